@@ -1,26 +1,55 @@
+# Patch sockets/threads for eventlet before anything else is imported (see utils/concurrency.py)
+from utils.concurrency import monkey_patch
+ASYNC_MODE = monkey_patch()
+
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_socketio import SocketIO, emit, join_room, leave_room  # pyright: ignore[reportMissingModuleSource]
-from datetime import datetime
+from sqlalchemy.orm import undefer_group
+from datetime import datetime, timedelta
 import json
+import math
 import os
 import random
+import re
+import secrets
+import time
 import logging
-from utils.llm_service import LLMService
-from utils.email_service import EmailService
-from utils.case_summary_service import CaseSummaryService
+import click
+from utils.services import get_llm_service, get_email_service, get_case_summary_service
 from utils.auth_service import AuthService
 from utils.validation import validate_email, validate_phone_number, validate_name, validate_queue_request, validate_email_request
 from utils.error_handling import ErrorResponse, log_error_detailed, handle_database_error, handle_email_error
+from utils.reference_cache import ReferenceDataCache, EMPTY_PAYLOAD
+from utils.facilitator_scheduler import scheduler, facilitator_directory
+from utils.wait_time_predictor import wait_time_predictor
+from utils.queue_events import transition, record_created, claimed_at, FINAL_STATUSES
+from utils.queue_analytics import query_rollups, rebuild_rollups, GRANULARITIES as ANALYTICS_GRANULARITIES
+from utils.retention import run_retention, earliest_rebuild_day
+from utils.progress_ingest import ingest_progress
+from utils.flow_checkpoints import (
+    flow_index, load_checkpoint, save_checkpoint, delete_checkpoint, checkpoint_to_dict, CheckpointConflict
+)
+from utils.schema_upgrade import upgrade_schema
+from utils.storage_codec import encode_json, decode_json
+from utils.queue_serializer import queue_serializer, entry_dict, dumps as dump_json
+from utils.socket_backplane import client_manager_options, describe as describe_backplane
+from utils.broadcast_coalescer import BroadcastCoalescer
+from utils import metrics
+from utils import query_profiler
+from utils import tracing
+from utils import db_profiles
+from utils import rate_limits
+from utils.structured_logging import configure_logging, parse_mapping
 from email_api import email_bp
 from config import Config
-from models import db, QueueEntry, User, UserSession, AuditLog, CaseSummary, CaseType
+from models import db, QueueEntry, User, UserSession, AuditLog, CaseSummary
 from validation_schemas import (
     validate_request_data, AskQuestionSchema, SubmitSessionSchema, 
     GenerateQueueSchema, DVRORAGSchema, CallNextSchema, CompleteCaseSchema,
-    GuidedQuestionsSchema, ProcessAnswersSchema, SendEmailSchema, GenerateCaseSummarySchema
+    GuidedQuestionsSchema, ProcessAnswersSchema, SendEmailSchema, GenerateCaseSummarySchema,
+    FlowProgressBatchSchema, FlowCheckpointSchema
 )
 
 app = Flask(__name__)
@@ -30,50 +59,61 @@ cors_origins = Config.CORS_ORIGINS
 # Never combine credentials with wildcard origin
 _cors_credentials = cors_origins != ['*']
 
-# Use eventlet for better async performance (falls back to threading if eventlet not available)
-try:
-    import eventlet  # pyright: ignore[reportUnusedImport]
-    socketio = SocketIO(app, cors_allowed_origins=cors_origins, async_mode='eventlet')
-except ImportError:
-    socketio = SocketIO(app, cors_allowed_origins=cors_origins, async_mode='threading')
+# Every worker fans broadcasts out to its own clients through the backplane
+_socketio_options = client_manager_options(Config.SOCKETIO_MESSAGE_QUEUE, Config.SOCKETIO_CHANNEL)
+
+# eventlet when installed (already monkey-patched above), threading otherwise
+socketio = SocketIO(app, cors_allowed_origins=cors_origins, async_mode=ASYNC_MODE, **_socketio_options)
 
 COURT_DOCUMENTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'court_documents'))
 
-# Configure logging
-logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL, 'INFO'))
+# Configure logging (JSON lines written off the request path, PII redacted)
+configure_logging(
+    level=Config.LOG_LEVEL,
+    fmt=Config.LOG_FORMAT,
+    module_levels=parse_mapping(Config.LOG_LEVELS),
+    sample_rates=parse_mapping(Config.LOG_SAMPLE_RATES, float),
+    redact_pii=Config.LOG_REDACT_PII,
+)
 logger = logging.getLogger(__name__)
+if Config.SOCKETIO_MESSAGE_QUEUE:
+    logger.info(f"Socket.IO backplane: {describe_backplane(Config.SOCKETIO_MESSAGE_QUEUE)}")
 
 CORS(app, origins=cors_origins,
-     allow_headers=['Content-Type', 'Authorization', 'X-Kiosk-Key'],
+     allow_headers=['Content-Type', 'Authorization', 'X-Kiosk-Key', 'X-Kiosk-Id'],
      methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
      supports_credentials=_cors_credentials)
 
-# Configure rate limiting
-# For production: Use Redis or PostgreSQL storage
-# For development: Use in-memory storage (SQLite)
+# Rate limiting: separate budgets per staff user, kiosk and anonymous IP (utils/rate_limits.py)
 import warnings
 
-# Determine storage backend
-storage_uri = os.getenv('RATELIMIT_STORAGE_URL')  # Can be Redis: redis://localhost:6379
-if not storage_uri:
-    # Auto-detect: Use PostgreSQL if available, otherwise memory for SQLite/development
-    db_uri = Config.SQLALCHEMY_DATABASE_URI
-    if db_uri and 'postgresql' in db_uri.lower():
-        storage_uri = db_uri
-        logger.info("Using PostgreSQL for rate limiting storage")
-    else:
-        # SQLite/development - use memory storage
-        storage_uri = None
-        # Suppress warning in development
-        warnings.filterwarnings('ignore', message='.*in-memory storage.*', category=UserWarning)
+ratelimit_storage = rate_limits.storage_uri()
+if not rate_limits.is_shared(ratelimit_storage):
+    # Per-process counters are fine for one worker; suppress Flask-Limiter's warning about them
+    warnings.filterwarnings('ignore', message='.*in-memory storage.*', category=UserWarning)
+logger.info(f"Rate limit counters: {rate_limits.describe(ratelimit_storage)} ({Config.RATELIMIT_STRATEGY})")
 
 limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["1000 per hour", "100 per minute"],
-    storage_uri=storage_uri  # None = memory (dev), URI = database/Redis (prod)
+    key_func=rate_limits.rate_limit_key,
+    default_limits=[rate_limits.default_limit],
+    storage_uri=ratelimit_storage,
+    strategy=Config.RATELIMIT_STRATEGY,
+    # Keep limiting per process if the shared store is unreachable
+    in_memory_fallback_enabled=rate_limits.is_shared(ratelimit_storage),
 )
+app.config['RATELIMIT_ENABLED'] = Config.RATELIMIT_ENABLED
 limiter.init_app(app)
 
+# Sampled request traces (HTTP, SQL, LLM, email stages); no-op unless TRACE_* is set
+tracing.install(app, Config.TRACE_SAMPLE_RATE, Config.TRACE_SLOW_MS, Config.TRACE_EXPORT_PATH,
+                Config.TRACE_TRUSTED_PARENTS)
+
+# Per-route request counts/latency and SQL per request, exported at /api/metrics
+metrics.install(app)
+
+if Config.SQL_PROFILE:
+    query_profiler.install(app, repeat_threshold=Config.SQL_PROFILE_REPEAT_THRESHOLD)
+
 # Add security headers
 @app.after_request
 def add_security_headers(response):
@@ -87,15 +127,17 @@ def add_security_headers(response):
 # Database configuration
 app.config['SQLALCHEMY_DATABASE_URI'] = Config.SQLALCHEMY_DATABASE_URI
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = Config.SQLALCHEMY_TRACK_MODIFICATIONS
+db_profiles.install(
+    app, Config.DB_PROFILE,
+    pool_size=Config.DB_POOL_SIZE, max_overflow=Config.DB_MAX_OVERFLOW, pool_recycle=Config.DB_POOL_RECYCLE,
+    statement_timeout_ms=Config.DB_STATEMENT_TIMEOUT_MS, busy_timeout_ms=Config.DB_BUSY_TIMEOUT_MS,
+)
 db.init_app(app)
 
 # Validate required API keys
 Config.validate_required_keys()
 
-# Initialize services
-llm_service = LLMService(Config.OPENAI_API_KEY)
-email_service = EmailService()
-case_summary_service = CaseSummaryService()
+# Services (LLM, email, case summary) are built on first use - see utils/services.py
 
 # Register blueprints
 app.register_blueprint(email_bp)
@@ -189,6 +231,18 @@ class Form(db.Model):
     url_link = db.Column(db.String(255))
     required_for = db.Column(db.String(255))
 
+# Kiosk home-screen data, served from per-county snapshots
+reference_cache = ReferenceDataCache(
+    db, County, Category, Content, StaffContact, Form,
+    ttl_seconds=Config.REFERENCE_CACHE_TTL
+).install()
+
+# Parsed facilitator languages/specialties for call-next routing
+facilitator_directory.install()
+
+# Cached per-entry JSON for the admin queue endpoints
+queue_serializer.install()
+
 DOCUMENT_SUGGESTIONS = {
     'en': {
         'divorce': [
@@ -264,6 +318,7 @@ def get_document_suggestions(message_content, language='en'):
 
 def generate_llm_response(user_message, conversation_history, language='en', system_prompt=None):
     """Generate LLM response using LLMService"""
+    llm_service = get_llm_service()
     if not llm_service or not llm_service.client:
         return "I'm sorry, the AI assistant is currently unavailable. Please consult with court staff for assistance."
     
@@ -273,7 +328,8 @@ def generate_llm_response(user_message, conversation_history, language='en', sys
         system_prompt = SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS['en'])
     
     try:
-        response = llm_service.client.chat.completions.create(
+        response = metrics.track_llm_completion(
+            'chat_answer', llm_service.client.chat.completions.create,
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -299,7 +355,7 @@ def send_summary_email(to_address, subject, body):
             'next_steps': [],
             'conversation_summary': body
         }
-        result = email_service.send_case_email(case_data)
+        result = get_email_service().send_case_email(case_data)
         return result.get('success', False)
     except Exception as e:
         logger.error(f"Failed to send email to {to_address}: {e}")
@@ -428,43 +484,50 @@ def api_qna():
     else:
         return jsonify({'answer': 'No answer found for this question in the selected county/language.'}), 404
 
+def _reference_response(payload):
+    """Serve a cached JSON payload, answering 304 when the client's ETag matches"""
+    response = app.response_class(payload.body, mimetype='application/json')
+    response.set_etag(payload.etag)
+    response.headers['Cache-Control'] = 'no-cache'  # always revalidate, usually a 304
+    return response.make_conditional(request)
+
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
     county_name = request.args.get('county', 'San Mateo')
-    county = County.query.filter_by(name=county_name).first()
-    if not county:
+    snapshot = reference_cache.get(county_name)
+    if not snapshot:
         return jsonify([]), 404
-    categories = Category.query.filter_by(county_id=county.id).order_by(Category.display_order).all()
-    return jsonify([{'id': c.id, 'name': c.name, 'display_order': c.display_order} for c in categories])
+    return _reference_response(snapshot.categories)
 
 @app.route('/api/content', methods=['GET'])
 def get_content():
     county_name = request.args.get('county', 'San Mateo')
     category_id = request.args.get('category_id')
     language = request.args.get('language', 'en')
-    county = County.query.filter_by(name=county_name).first()
-    if not county or not category_id:
+    snapshot = reference_cache.get(county_name)
+    if not snapshot or not category_id:
         return jsonify([]), 404
-    content = Content.query.filter_by(county_id=county.id, category_id=category_id, language=language, active=True).all()
-    return jsonify([{'id': c.id, 'title': c.title, 'body': c.body, 'language': c.language} for c in content])
+    try:
+        category_id = int(category_id)
+    except ValueError:
+        return _reference_response(EMPTY_PAYLOAD)
+    return _reference_response(snapshot.content_for(category_id, language))
 
 @app.route('/api/staff', methods=['GET'])
 def get_staff():
     county_name = request.args.get('county', 'San Mateo')
-    county = County.query.filter_by(name=county_name).first()
-    if not county:
+    snapshot = reference_cache.get(county_name)
+    if not snapshot:
         return jsonify([]), 404
-    staff = StaffContact.query.filter_by(county_id=county.id).all()
-    return jsonify([{'id': s.id, 'name': s.name, 'role': s.role, 'phone': s.phone, 'email': s.email, 'office_hours': s.office_hours} for s in staff])
+    return _reference_response(snapshot.staff)
 
 @app.route('/api/forms', methods=['GET'])
 def get_forms():
     county_name = request.args.get('county', 'San Mateo')
-    county = County.query.filter_by(name=county_name).first()
-    if not county:
+    snapshot = reference_cache.get(county_name)
+    if not snapshot:
         return jsonify([]), 404
-    forms = Form.query.filter_by(county_id=county.id).all()
-    return jsonify([{'id': f.id, 'title': f.title, 'description': f.description, 'url_link': f.url_link, 'required_for': f.required_for} for f in forms])
+    return _reference_response(snapshot.forms)
 
 @app.route('/api/dvro_rag', methods=['POST'])
 @limiter.limit("10 per minute")
@@ -544,6 +607,7 @@ def api_flowchart():
         return jsonify({'error': f'Error serving flowchart data: {str(e)}'}), 500
 
 @app.route('/api/health', methods=['GET'])
+@limiter.exempt
 def health_check():
     """Liveness plus deploy fingerprint so we can tell what is actually live."""
     git_sha = (
@@ -556,11 +620,43 @@ def health_check():
         'status': 'OK',
         'service': 'court-kiosk-backend',
         'git_sha': git_sha[:12] if git_sha != 'unknown' else 'unknown',
-        'kiosk_key_required': bool(Config.KIOSK_API_KEY),
+        'kiosk_key_required': AuthService.kiosk_key_required(),
         'cors_origins': cors_origins if cors_origins != ['*'] else ['*'],
+        'queue_broadcasts': queue_broadcaster.stats(),
     })
 
 
+def _collect_queue_depth():
+    rows = db.session.query(QueueEntry.status, QueueEntry.priority_level, db.func.count(QueueEntry.id)).filter(
+        QueueEntry.status.notin_(FINAL_STATUSES)
+    ).group_by(QueueEntry.status, QueueEntry.priority_level).all()
+    metrics.QUEUE_DEPTH.replace(({'status': status, 'priority': priority}, n) for status, priority, n in rows)
+
+
+def _collect_broadcast_stats():
+    metrics.QUEUE_BROADCASTS.replace(({'kind': kind}, n) for kind, n in queue_broadcaster.stats().items())
+
+
+metrics.registry.add_collector(_collect_queue_depth)
+metrics.registry.add_collector(_collect_broadcast_stats)
+
+
+@app.route('/api/metrics', methods=['GET'])
+@limiter.exempt
+def get_metrics():
+    """Prometheus scrape endpoint (bearer METRICS_TOKEN; open only in development)"""
+    if Config.METRICS_TOKEN:
+        header = request.headers.get('Authorization', '')
+        provided = header[len('Bearer '):] if header.startswith('Bearer ') else ''
+        # Bytes: compare_digest raises TypeError on non-ASCII str
+        if not provided or not secrets.compare_digest(provided.encode(), Config.METRICS_TOKEN.encode()):
+            return ErrorResponse.unauthorized()
+    elif not Config.METRICS_OPEN:
+        # Exempt from rate limits and runs a GROUP BY per scrape: never serve it anonymously in production
+        return ErrorResponse.forbidden("Set METRICS_TOKEN to enable /api/metrics")
+    return app.response_class(metrics.registry.render(), mimetype=None, content_type=metrics.CONTENT_TYPE)
+
+
 @app.route('/api/documents/<path:filename>', methods=['GET'])
 def get_court_document(filename):
     """Serve static court documents bundled with the deployment."""
@@ -584,6 +680,33 @@ def get_court_document(filename):
         logger.error(f"Error serving document {filename}: {exc}")
         return jsonify({'error': 'Unable to serve document'}), 500
 
+def refresh_wait_estimates():
+    """Recompute waiting entries' estimated_wait_time after the queue changed.
+
+    Runs after the caller's commit; a failure only leaves estimates stale.
+    """
+    try:
+        wait_time_predictor.refresh_estimates()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Wait-time estimate refresh failed: {e}")
+
+
+def record_case_claimed(profile, user_id):
+    """Count the calling facilitator as working, then refresh estimates."""
+    wait_time_predictor.observe_claim(profile.id if profile else user_id)
+    refresh_wait_estimates()
+
+
+def record_case_completed(entry, started_at):
+    """Learn the service duration of a finished case, then refresh estimates."""
+    try:
+        wait_time_predictor.record_completion(entry, started_at)
+    except Exception as e:
+        logger.error(f"Could not record service time for {entry.queue_number}: {e}")
+    refresh_wait_estimates()
+
+
 @app.route('/api/generate-queue', methods=['POST'])
 @limiter.limit("20 per minute")
 @AuthService.require_kiosk_or_auth
@@ -650,7 +773,9 @@ def generate_queue():
                 phone_number=phone_number
             )
             db.session.add(entry)
+            record_created(entry, actor_user_id=getattr(getattr(request, 'current_user', None), 'id', None))
             db.session.commit()
+            refresh_wait_estimates()
             
             logger.info(f"Queue number generated: {queue_number}")
             
@@ -672,7 +797,7 @@ def generate_queue():
                     )
                     # Queue entry still exists
             
-            return jsonify({'queue_number': queue_number})
+            return jsonify({'queue_number': queue_number, 'estimated_wait_time': entry.estimated_wait_time})
         except Exception as db_error:
             db.session.rollback()
             logger.error(f"Database error in /api/generate-queue: {str(db_error)}")
@@ -730,19 +855,16 @@ def get_queue():
 @AuthService.require_auth
 def call_next():
     try:
-        # Get next person in queue
-        next_entry = QueueEntry.query.filter_by(status='waiting').order_by(
-            QueueEntry.priority_level.asc(),
-            QueueEntry.created_at.asc()
-        ).first()
-        
-        if not next_entry:
-            return jsonify({'error': 'No one waiting in queue'}), 404
-        
         # Mark as called with proper transaction handling
         try:
-            next_entry.status = 'called'
+            # Atomically claim the best waiting entry for this facilitator (see utils/facilitator_scheduler.py)
+            user_id = request.current_user.id
+            profile = scheduler.profile_for_user(request.current_user)
+            next_entry = scheduler.claim_next('called', profile, actor_user_id=user_id)
+            if not next_entry:
+                return jsonify({'error': 'No one waiting in queue'}), 404
             db.session.commit()
+            record_case_claimed(profile, user_id)
             
             # Broadcast update AFTER successful commit
             try:
@@ -785,8 +907,10 @@ def complete_case():
         if not entry:
             return jsonify({'error': 'Queue entry not found'}), 404        
         try:
-            entry.status = 'completed'
+            started_at = claimed_at(entry)
+            transition(entry, 'completed', actor_user_id=request.current_user.id, started_at=started_at)
             db.session.commit()
+            record_case_completed(entry, started_at)
             
             # Broadcast update AFTER successful commit
             try:
@@ -882,7 +1006,7 @@ def process_answers():
     try:
         # QueueEntry doesn't have summary/next_steps columns; keep data in existing fields
         entry.conversation_summary = enhanced_summary
-        entry.facilitator_notes = json.dumps(enhanced_next_steps) if enhanced_next_steps else None
+        entry.facilitator_notes = encode_json(enhanced_next_steps) if enhanced_next_steps else None
         db.session.commit()
         
         return jsonify({
@@ -902,8 +1026,129 @@ def process_answers():
         )
         return ErrorResponse.internal_error("Failed to update case information")
 
+@app.route('/api/queue/<queue_number>/progress', methods=['POST'])
+@limiter.limit("60 per minute")
+@AuthService.require_kiosk_or_auth
+def record_flow_progress(queue_number):
+    """Store a path or buffered chunk of flow steps in one bulk insert
+
+    Body: {"steps": [{"sequence": 0, "node_id": "...", "node_text": "...",
+    "user_response": "...", "timestamp": "..."}]}. Steps already stored under
+    the same sequence are skipped, so resending a chunk is safe.
+    """
+    validated_data, errors = validate_request_data(FlowProgressBatchSchema, request.get_json(silent=True) or {})
+    if errors:
+        return jsonify({'error': 'Invalid request data', 'details': errors}), 400
+    
+    entry = QueueEntry.query.filter_by(queue_number=queue_number).first()
+    if not entry:
+        return jsonify({'error': 'Queue entry not found'}), 404
+    
+    try:
+        result = ingest_progress(entry, validated_data['steps'])
+        db.session.commit()
+        return jsonify({'success': True, 'current_node': entry.current_node, **result}), 200
+    except Exception as db_error:
+        db.session.rollback()
+        log_error_detailed(
+            error=db_error,
+            context="Error in record_flow_progress",
+            extra_data={'endpoint': '/api/queue/<queue_number>/progress', 'queue_number': queue_number}
+        )
+        return ErrorResponse.internal_error("Failed to record progress")
+
+CHECKPOINT_TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+@app.route('/api/flows/<flow_id>/index', methods=['GET'])
+def get_flow_index(flow_id):
+    """Node id order used to encode checkpoint paths for a bundled flow"""
+    index = flow_index(flow_id)
+    if index is None:
+        return jsonify({'error': 'Flow not found'}), 404
+    response = jsonify(index)
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+@app.route('/api/flow-checkpoints/<token>', methods=['GET'])
+@limiter.limit("60 per minute")
+@AuthService.require_kiosk_or_auth
+def get_flow_checkpoint(token):
+    """Resume a flow session synced by any kiosk"""
+    if not CHECKPOINT_TOKEN_PATTERN.match(token):
+        return jsonify({'error': 'Invalid checkpoint token'}), 400
+    try:
+        checkpoint = load_checkpoint(token)
+        if checkpoint is None:
+            return jsonify({'error': 'Checkpoint not found'}), 404
+        return jsonify(checkpoint_to_dict(checkpoint)), 200
+    except Exception as e:
+        log_error_detailed(
+            error=e,
+            context="Error loading flow checkpoint",
+            extra_data={'endpoint': '/api/flow-checkpoints/<token>'}
+        )
+        return ErrorResponse.internal_error("Failed to load checkpoint")
+
+@app.route('/api/flow-checkpoints/<token>', methods=['PUT'])
+@limiter.limit("120 per minute")
+@AuthService.require_kiosk_or_auth
+def put_flow_checkpoint(token):
+    """Sync a flow session: node indexes into the flow plus answers, with an optimistic version
+
+    Send version 0 to create the checkpoint and the last returned version to
+    update it; a mismatch returns 409 with the stored checkpoint.
+    """
+    if not CHECKPOINT_TOKEN_PATTERN.match(token):
+        return jsonify({'error': 'Invalid checkpoint token'}), 400
+    validated_data, errors = validate_request_data(FlowCheckpointSchema, request.get_json(silent=True) or {})
+    if errors:
+        return jsonify({'error': 'Invalid request data', 'details': errors}), 400
+    
+    try:
+        checkpoint = save_checkpoint(
+            token,
+            validated_data['flow_id'],
+            validated_data['path'],
+            validated_data.get('answers'),
+            validated_data['version']
+        )
+        return jsonify({'success': True, 'version': checkpoint.version,
+                        'expires_at': checkpoint.expires_at.isoformat()}), 200
+    except CheckpointConflict as conflict:
+        current = checkpoint_to_dict(conflict.current) if conflict.current else None
+        return jsonify({'error': 'Checkpoint version conflict', 'current': current}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        log_error_detailed(
+            error=e,
+            context="Error saving flow checkpoint",
+            extra_data={'endpoint': '/api/flow-checkpoints/<token>'}
+        )
+        return ErrorResponse.internal_error("Failed to save checkpoint")
+
+@app.route('/api/flow-checkpoints/<token>', methods=['DELETE'])
+@limiter.limit("60 per minute")
+@AuthService.require_kiosk_or_auth
+def delete_flow_checkpoint(token):
+    """End a flow session: the kiosk is handed to the next visitor"""
+    if not CHECKPOINT_TOKEN_PATTERN.match(token):
+        return jsonify({'error': 'Invalid checkpoint token'}), 400
+    try:
+        return jsonify({'success': True, 'deleted': delete_checkpoint(token)}), 200
+    except Exception as e:
+        db.session.rollback()
+        log_error_detailed(
+            error=e,
+            context="Error deleting flow checkpoint",
+            extra_data={'endpoint': '/api/flow-checkpoints/<token>'}
+        )
+        return ErrorResponse.internal_error("Failed to delete checkpoint")
+
 def generate_enhanced_summary(case_type, current_step, progress, existing_summary, language):
     """Generate enhanced summary using LLMService"""
+    llm_service = get_llm_service()
     if not llm_service:
         return existing_summary
     
@@ -928,7 +1173,8 @@ def generate_enhanced_summary(case_type, current_step, progress, existing_summar
     
     try:
         # Use LLMService instead of direct client access
-        response = llm_service.client.chat.completions.create(
+        response = metrics.track_llm_completion(
+            'enhanced_summary', llm_service.client.chat.completions.create,
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are a court facilitator assistant. Provide clear, comprehensive summaries of client situations."},
@@ -942,6 +1188,7 @@ def generate_enhanced_summary(case_type, current_step, progress, existing_summar
 
 def generate_enhanced_next_steps(case_type, current_step, existing_steps, language):
     """Generate enhanced next steps using LLMService"""
+    llm_service = get_llm_service()
     if not llm_service:
         return "\n".join(existing_steps) if isinstance(existing_steps, list) else existing_steps
     
@@ -964,7 +1211,8 @@ def generate_enhanced_next_steps(case_type, current_step, existing_steps, langua
     
     try:
         # Use LLMService instead of direct client access
-        response = llm_service.client.chat.completions.create(
+        response = metrics.track_llm_completion(
+            'enhanced_next_steps', llm_service.client.chat.completions.create,
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are a court facilitator assistant. Provide clear, actionable next steps for clients."},
@@ -1023,7 +1271,7 @@ def generate_case_summary():
             user_name = name_result['sanitized']
         
         # Create case summary and optionally add to queue
-        result = case_summary_service.save_summary_and_maybe_queue(
+        result = get_case_summary_service().save_summary_and_maybe_queue(
             flow_type=flow_type,
             answers=answers,
             flow_data=flow_data,
@@ -1069,7 +1317,7 @@ def send_case_summary_email():
             return jsonify({'error': 'Summary ID is required'}), 400
         
         # Get case summary
-        case_summary = case_summary_service.get_case_summary_by_id(summary_id)
+        case_summary = get_case_summary_service().get_case_summary_by_id(summary_id)
         if not case_summary:
             return jsonify({'error': 'Case summary not found'}), 404
         
@@ -1088,7 +1336,7 @@ def send_case_summary_email():
         }
         
         # Send comprehensive email
-        result = email_service.send_comprehensive_case_email(case_data, include_queue)
+        result = get_email_service().send_comprehensive_case_email(case_data, include_queue)
         
         if result['success']:
             return jsonify({
@@ -1189,10 +1437,14 @@ def send_comprehensive_email():
         # Check if queue information should be included
         include_queue = data.get('include_queue', False)
         
-        logger.info(f"Sending comprehensive email with case data: {comprehensive_case_data}")
+        logger.info("Sending comprehensive email", extra={
+            'queue_number': comprehensive_case_data.get('queue_number'),
+            'case_type': comprehensive_case_data.get('case_type'),
+            'forms_count': len(comprehensive_case_data['documents_needed'] or []),
+        })
         
         # Send comprehensive email using the email service
-        result = email_service.send_case_email(comprehensive_case_data, include_queue)
+        result = get_email_service().send_case_email(comprehensive_case_data, include_queue)
         
         logger.info(f"Email service result: {result}")
         
@@ -1247,7 +1499,7 @@ def send_summary_email_endpoint():
             'conversation_summary': summary
         }
         
-        result = email_service.send_case_email(case_data)
+        result = get_email_service().send_case_email(case_data)
         
         if result.get('success'):
             return jsonify({
@@ -1446,77 +1698,18 @@ def get_admin_queue():
             resource_type='queue'
         )
         
-        # Use existing queue logic but with authentication
-        queue_entries = QueueEntry.query.filter_by(status='waiting').order_by(QueueEntry.priority_level, QueueEntry.created_at).all()
+        # Use existing queue logic but with authentication; blob columns are
+        # only loaded for entries whose cached fragment is stale
+        queue_entries = QueueEntry.query.filter_by(status='waiting').order_by(
+            QueueEntry.priority_level, QueueEntry.created_at
+        ).all()
         current_entry = QueueEntry.query.filter_by(status='in_progress').first()
         
-        queue_data = []
-        for entry in queue_entries:
-            # Parse documents_needed if it's a JSON string
-            documents_needed = []
-            if entry.documents_needed:
-                try:
-                    if isinstance(entry.documents_needed, str):
-                        documents_needed = json.loads(entry.documents_needed)
-                    else:
-                        documents_needed = entry.documents_needed
-                except:
-                    documents_needed = []
-            
-            queue_data.append({
-                'queue_number': entry.queue_number,
-                'priority': entry.priority_level,
-                'priority_level': entry.priority_level,  # Alias for compatibility
-                'case_type': entry.case_type,
-                'user_name': entry.user_name,
-                'user_email': entry.user_email,
-                'phone_number': entry.phone_number,
-                'language': entry.language,
-                'status': entry.status,
-                'created_at': entry.created_at.isoformat() if entry.created_at else None,
-                'arrived_at': entry.created_at.isoformat() if entry.created_at else None,
-                'timestamp': entry.created_at.isoformat() if entry.created_at else None,
-                'conversation_summary': entry.conversation_summary,
-                'documents_needed': documents_needed,
-                'current_node': entry.current_node,
-                'estimated_wait_time': entry.estimated_wait_time
-            })
-        
-        current_number = None
-        if current_entry:
-            # Parse documents_needed for current entry
-            documents_needed = []
-            if current_entry.documents_needed:
-                try:
-                    if isinstance(current_entry.documents_needed, str):
-                        documents_needed = json.loads(current_entry.documents_needed)
-                    else:
-                        documents_needed = current_entry.documents_needed
-                except:
-                    documents_needed = []
-            
-            current_number = {
-                'queue_number': current_entry.queue_number,
-                'priority': current_entry.priority_level,
-                'priority_level': current_entry.priority_level,
-                'case_type': current_entry.case_type,
-                'user_name': current_entry.user_name,
-                'user_email': current_entry.user_email,
-                'phone_number': current_entry.phone_number,
-                'language': current_entry.language,
-                'conversation_summary': current_entry.conversation_summary,
-                'documents_needed': documents_needed,
-                'current_node': current_entry.current_node,
-                'created_at': current_entry.created_at.isoformat() if current_entry.created_at else None,
-                'arrived_at': current_entry.created_at.isoformat() if current_entry.created_at else None,
-                'timestamp': current_entry.created_at.isoformat() if current_entry.created_at else None
-            }
-        
-        return jsonify({
-            'success': True,
-            'queue': queue_data,
-            'current_number': current_number
-        }), 200
+        body = (
+            b'{"success":true,"queue":' + queue_serializer.list_body(queue_entries) +
+            b',"current_number":' + (queue_serializer.fragment(current_entry) if current_entry else b'null') + b'}'
+        )
+        return app.response_class(body, mimetype='application/json'), 200
         
     except Exception as e:
         log_error_detailed(
@@ -1532,23 +1725,26 @@ def get_admin_queue():
 def admin_call_next():
     """Call next case (protected) - returns comprehensive case information"""
     try:
+        # Read the caller before log_action commits (and expires) the user row
+        user_id = request.current_user.id
+        profile = scheduler.profile_for_user(request.current_user)
+
         # Log the action
         AuthService.log_action(
-            user_id=request.current_user.id,
+            user_id=user_id,
             action='call_next',
             resource_type='queue'
         )
         
-        # Use existing call next logic
-        next_entry = QueueEntry.query.filter_by(status='waiting').order_by(QueueEntry.priority_level, QueueEntry.created_at).first()
-        
-        if not next_entry:
-            return jsonify({'success': False, 'error': 'No cases in queue'}), 400
-        
         # Update status with proper transaction handling
         try:
-            next_entry.status = 'in_progress'
+            # Atomically claim the next case (language/specialty aware) so concurrent
+            # facilitators never share one
+            next_entry = scheduler.claim_next('in_progress', profile, actor_user_id=user_id)
+            if not next_entry:
+                return jsonify({'success': False, 'error': 'No cases in queue'}), 400
             db.session.commit()
+            record_case_claimed(profile, user_id)
             
             # Broadcast queue update via WebSocket AFTER successful commit
             try:
@@ -1575,30 +1771,6 @@ def admin_call_next():
             )
             return ErrorResponse.internal_error("Failed to update queue status")
         
-        # Parse documents_needed if it's a JSON string
-        documents_needed = []
-        if next_entry.documents_needed:
-            try:
-                if isinstance(next_entry.documents_needed, str):
-                    documents_needed = json.loads(next_entry.documents_needed)
-                else:
-                    documents_needed = next_entry.documents_needed
-            except:
-                documents_needed = []
-        
-        # Get case type information
-        case_type_info = None
-        if next_entry.case_type:
-            case_type_obj = CaseType.query.filter_by(code=next_entry.case_type, is_active=True).first()
-            if case_type_obj:
-                case_type_info = {
-                    'name': case_type_obj.name,
-                    'code': case_type_obj.code,
-                    'description': case_type_obj.description,
-                    'estimated_duration': case_type_obj.estimated_duration,
-                    'required_forms': json.loads(case_type_obj.required_forms) if case_type_obj.required_forms else []
-                }
-        
         # Calculate wait time
         wait_time_minutes = 0
         if next_entry.created_at:
@@ -1607,29 +1779,10 @@ def admin_call_next():
             wait_time_minutes = int(wait_time.total_seconds() / 60)
         
         # Return comprehensive case information
-        return jsonify({
-            'success': True,
-            'queue_entry': {
-                'queue_number': next_entry.queue_number,
-                'priority': next_entry.priority_level,
-                'priority_level': next_entry.priority_level,  # Alias for compatibility
-                'case_type': next_entry.case_type,
-                'case_type_info': case_type_info,
-                'user_name': next_entry.user_name,
-                'user_email': next_entry.user_email,
-                'phone_number': next_entry.phone_number,
-                'language': next_entry.language,
-                'status': next_entry.status,
-                'conversation_summary': next_entry.conversation_summary,
-                'documents_needed': documents_needed,
-                'current_node': next_entry.current_node,
-                'estimated_wait_time': next_entry.estimated_wait_time,
-                'wait_time_minutes': wait_time_minutes,
-                'created_at': next_entry.created_at.isoformat() if next_entry.created_at else None,
-                'arrived_at': next_entry.created_at.isoformat() if next_entry.created_at else None,
-                'timestamp': next_entry.created_at.isoformat() if next_entry.created_at else None
-            }
-        }), 200
+        queue_entry = entry_dict(next_entry)
+        queue_entry['case_type_info'] = queue_serializer.case_type_info(next_entry.case_type)
+        queue_entry['wait_time_minutes'] = wait_time_minutes
+        return app.response_class(dump_json({'success': True, 'queue_entry': queue_entry}), mimetype='application/json'), 200
         
     except Exception as e:
         log_error_detailed(
@@ -1666,8 +1819,10 @@ def admin_complete_case():
         
         # Update status with proper transaction handling
         try:
-            entry.status = 'completed'
+            started_at = claimed_at(entry)
+            transition(entry, 'completed', actor_user_id=request.current_user.id, started_at=started_at)
             db.session.commit()
+            record_case_completed(entry, started_at)
             
             # Broadcast queue update via WebSocket AFTER successful commit
             try:
@@ -1708,26 +1863,118 @@ def admin_complete_case():
         )
         return ErrorResponse.internal_error("An error occurred completing the case")
 
+@app.route('/api/admin/no-show', methods=['POST'])
+@AuthService.require_auth
+@AuthService.require_admin_whitelist()
+def admin_mark_no_show():
+    """Mark a called (or still waiting) client who did not come up as a no-show (protected)"""
+    try:
+        data = request.get_json() or {}
+        queue_number = data.get('queue_number')
+        
+        if not queue_number:
+            return jsonify({'success': False, 'error': 'Queue number required'}), 400
+        
+        entry = QueueEntry.query.filter_by(queue_number=queue_number).first()
+        if not entry:
+            return jsonify({'success': False, 'error': 'Case not found'}), 404
+        if entry.status in FINAL_STATUSES:
+            return jsonify({'success': False, 'error': f'Case is already {entry.status}'}), 409
+        
+        AuthService.log_action(
+            user_id=request.current_user.id,
+            action='no_show',
+            resource_type='case',
+            resource_id=queue_number
+        )
+        
+        try:
+            transition(entry, 'no_show', actor_user_id=request.current_user.id)
+            db.session.commit()
+        except Exception as db_error:
+            db.session.rollback()
+            app.logger.error(f"Database error in admin_mark_no_show: {str(db_error)}", exc_info=True)
+            return ErrorResponse.internal_error("Failed to update case")
+        
+        refresh_wait_estimates()
+        try:
+            broadcast_queue_update()
+        except Exception as broadcast_error:
+            app.logger.error(f"WebSocket broadcast failed: {str(broadcast_error)}", exc_info=True)
+        
+        return jsonify({'success': True}), 200
+    except Exception as e:
+        log_error_detailed(
+            error=e,
+            context="Error in admin_mark_no_show",
+            extra_data={'endpoint': '/api/admin/no-show'}
+        )
+        return ErrorResponse.internal_error("Failed to mark no-show")
+
+@app.route('/api/admin/analytics', methods=['GET'])
+@AuthService.require_auth
+@AuthService.require_role('admin')
+def get_queue_analytics():
+    """Queue throughput, wait/service times and no-show rate from the hourly/daily rollups (admin only)
+
+    Query params: granularity (hour|day), start/end (ISO dates, default last 7
+    days), group_by (comma-separated: case_type, language).
+    """
+    try:
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in ANALYTICS_GRANULARITIES:
+            return ErrorResponse.bad_request("granularity must be 'hour' or 'day'")
+        try:
+            end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow()
+            start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=7)
+        except ValueError:
+            return ErrorResponse.bad_request("start and end must be ISO dates")
+        if start >= end:
+            return ErrorResponse.bad_request("start must be before end")
+        group_by = [g.strip() for g in request.args.get('group_by', '').split(',') if g.strip()]
+        
+        return jsonify({'success': True, **query_rollups(granularity, start, end, group_by)}), 200
+    except Exception as e:
+        log_error_detailed(
+            error=e,
+            context="Error getting queue analytics",
+            extra_data={'endpoint': '/api/admin/analytics'}
+        )
+        return ErrorResponse.internal_error("Failed to retrieve queue analytics")
+
 # =============================================================================
 # WEBSOCKET HANDLERS FOR REAL-TIME UPDATES
 # =============================================================================
 
+def _public_queue_snapshot():
+    """Public (non-PII) queue state sent to WebSocket clients."""
+    queue_entries = QueueEntry.query.filter_by(status='waiting').order_by(
+        QueueEntry.priority_level, QueueEntry.created_at
+    ).all()
+    current_entry = QueueEntry.query.filter_by(status='in_progress').first()
+    return {
+        'type': 'queue_update',
+        'queue': [_public_queue_item(entry) for entry in queue_entries],
+        'current_number': _public_queue_item(current_entry) if current_entry else None
+    }
+
+def _emit_queue_update(payload, to='queue'):
+    socketio.emit('queue_update', payload, to=to, namespace='/api/ws/queue')
+
+queue_broadcaster = BroadcastCoalescer(
+    app, _public_queue_snapshot, _emit_queue_update,
+    window_seconds=Config.BROADCAST_COALESCE_MS / 1000,
+    start_background_task=socketio.start_background_task,
+    sleep=socketio.sleep
+)
+
 def broadcast_queue_update():
-    """Broadcast public (non-PII) queue updates to WebSocket clients."""
-    try:
-        queue_entries = QueueEntry.query.filter_by(status='waiting').order_by(
-            QueueEntry.priority_level, QueueEntry.created_at
-        ).all()
-        current_entry = QueueEntry.query.filter_by(status='in_progress').first()
+    """Broadcast public (non-PII) queue updates to WebSocket clients.
 
-        queue_data = [_public_queue_item(entry) for entry in queue_entries]
-        current_number = _public_queue_item(current_entry) if current_entry else None
-        
-        socketio.emit('queue_update', {
-            'type': 'queue_update',
-            'queue': queue_data,
-            'current_number': current_number
-        }, room='queue', namespace='/api/ws/queue')
+    Bursts within BROADCAST_COALESCE_MS collapse into a single emit.
+    """
+    try:
+        queue_broadcaster.request()
     except Exception as e:
         app.logger.error(
             f"Error broadcasting queue update: {str(e)}",
@@ -1739,10 +1986,11 @@ def broadcast_queue_update():
 def handle_connect():
     """Handle WebSocket connection"""
     try:
+        metrics.WEBSOCKET_CLIENTS.inc()
         join_room('queue')
         app.logger.info(f"Client connected to WebSocket: {request.sid}")
-        # Send initial queue state
-        broadcast_queue_update()
+        # Send the current queue state to this client only
+        queue_broadcaster.send_snapshot(to=request.sid)
     except Exception as e:
         app.logger.error(
             f"WebSocket connect error: {str(e)}",
@@ -1754,6 +2002,7 @@ def handle_connect():
 def handle_disconnect():
     """Handle WebSocket disconnection"""
     try:
+        metrics.WEBSOCKET_CLIENTS.dec()
         leave_room('queue')
         app.logger.info(f"Client disconnected from WebSocket: {request.sid}")
     except Exception as e:
@@ -1804,9 +2053,64 @@ def ensure_bootstrap_admin():
         logger.error(f"Failed to create bootstrap admin user: {e}", exc_info=True)
 
 
-with app.app_context():
-    db.create_all()
-    ensure_bootstrap_admin()
+def init_database():
+    """Create tables and the bootstrap admin.
+
+    This used to run on every import, which put schema checks on the cold-start
+    path of every serverless invocation. Run it once per deployment with
+    ``flask --app app init-db``; ``python app.py`` still runs it for local dev.
+    """
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+        ensure_bootstrap_admin()
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create database tables and the bootstrap admin user."""
+    init_database()
+    print("Database initialized")
+
+
+@app.cli.command('refresh-flow-stats')
+def refresh_flow_stats_command():
+    """Fold new FlowProgress rows into per-node dwell-time statistics."""
+    from utils.flow_stats import refresh_dwell_stats
+    result = refresh_dwell_stats()
+    print(f"Flow dwell stats refreshed: {result['rows_scanned']} progress rows, "
+          f"{result['samples']} samples across {result['nodes_updated']} nodes")
+
+
+@app.cli.command('backfill-rollups')
+@click.option('--since', default=None,
+              help='Rebuild from this date (YYYY-MM-DD); default and earliest: the day after the archive cutoff')
+def backfill_rollups_command(since):
+    """Rebuild queue analytics rollups from the queue event log."""
+    earliest = earliest_rebuild_day()
+    since = datetime.fromisoformat(since) if since else earliest
+    if since < earliest:
+        # Rebuilding would replace those days' rollups with counts missing every archived entry
+        raise click.UsageError(
+            f"--since must be {earliest.date()} or later: queue history before then is archived "
+            f"(RETENTION_DAYS={Config.RETENTION_DAYS}) and its rollups cannot be rebuilt"
+        )
+    result = rebuild_rollups(since)
+    print(f"Queue rollups rebuilt: {result['events_scanned']} events and "
+          f"{result['legacy_entries_scanned']} pre-event-log entries -> "
+          f"{result['rollup_rows_written']} rollup rows in {result['seconds']}s")
+
+
+@app.cli.command('retention')
+@click.option('--dry-run', is_flag=True, help='Only count what would be purged, archived and deleted')
+def retention_command(dry_run):
+    """Purge PII from, archive and delete old queue history per the retention policy."""
+    result = run_retention(dry_run=dry_run)
+    for table, counts in sorted(result['tables'].items()):
+        print(f"  {table}: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    for path in result['archive_files']:
+        print(f"  archive: {path}")
+    print(f"Retention {'dry run ' if dry_run else ''}finished in {result['seconds']}s")
 
 
 @app.route('/api/case-summary/<int:summary_id>', methods=['GET'])
@@ -1814,20 +2118,16 @@ with app.app_context():
 def get_case_summary(summary_id):
     """Get case summary by ID with enhanced details"""
     try:
-        summary = CaseSummary.query.get(summary_id)
+        summary = db.session.get(CaseSummary, summary_id, options=[undefer_group('details')])
         if not summary:
             return jsonify({'error': 'Case summary not found'}), 404
         
         # Get enhanced summary data
         summary_data = summary.to_dict()
         
-        # Add additional case details if available
-        if summary.summary_json:
-            try:
-                enhanced_data = json.loads(summary.summary_json)
-                summary_data.update(enhanced_data)
-            except Exception:
-                pass
+        # Add additional case details if available (already decoded by to_dict)
+        if isinstance(summary_data.get('summary_json'), dict):
+            summary_data.update(summary_data['summary_json'])
         
         return jsonify(summary_data)
     except Exception as e:
@@ -1838,13 +2138,13 @@ def get_case_summary(summary_id):
         )
         return ErrorResponse.internal_error("Failed to retrieve case summary")
 
-@app.route('/api/case-details/<int:queue_number>', methods=['GET'])
+@app.route('/api/case-details/<queue_number>', methods=['GET'])
 @AuthService.require_auth
 def get_case_details(queue_number):
     """Get comprehensive case details by queue number"""
     try:
         # Find case by queue number
-        queue_entry = QueueEntry.query.filter_by(queue_number=queue_number).first()
+        queue_entry = QueueEntry.query.options(undefer_group('details')).filter_by(queue_number=queue_number).first()
         if not queue_entry:
             return jsonify({'error': 'Case not found'}), 404
         
@@ -1852,49 +2152,20 @@ def get_case_details(queue_number):
         case_summary = None
         # Try to find case summary by queue number or other identifiers
         if queue_entry.user_email:
-            case_summary = CaseSummary.query.filter_by(
+            case_summary = CaseSummary.query.options(undefer_group('details')).filter_by(
                 user_email=queue_entry.user_email
             ).order_by(CaseSummary.created_at.desc()).first()
         
-        # Parse documents_needed if it's a JSON string
-        documents_needed = []
-        if queue_entry.documents_needed:
-            try:
-                if isinstance(queue_entry.documents_needed, str):
-                    documents_needed = json.loads(queue_entry.documents_needed)
-                else:
-                    documents_needed = queue_entry.documents_needed
-            except Exception:
-                documents_needed = []
-        
         # Build comprehensive case details
-        case_details = {
-            'queue_number': queue_entry.queue_number,
-            'case_type': queue_entry.case_type,
-            'priority': queue_entry.priority_level,
-            'priority_level': queue_entry.priority_level,
-            'status': queue_entry.status,
-            'language': queue_entry.language,
-            'user_name': queue_entry.user_name,
-            'user_email': queue_entry.user_email,
-            'phone_number': queue_entry.phone_number,
-            'created_at': queue_entry.created_at.isoformat() if queue_entry.created_at else None,
-            'updated_at': queue_entry.updated_at.isoformat() if queue_entry.updated_at else None,
-            'conversation_summary': queue_entry.conversation_summary,
-            'documents_needed': documents_needed,
-            'current_node': queue_entry.current_node,
-            'estimated_wait_time': queue_entry.estimated_wait_time
-        }
+        case_details = entry_dict(queue_entry)
         
         # Add enhanced summary data if available
         if case_summary and case_summary.summary_json:
-            try:
-                enhanced_data = json.loads(case_summary.summary_json)
+            enhanced_data = decode_json(case_summary.summary_json)
+            if enhanced_data is not None:
                 case_details['enhanced_summary'] = enhanced_data
-            except Exception:
-                pass
         
-        return jsonify(case_details)
+        return app.response_class(dump_json(case_details), mimetype='application/json')
     except Exception as e:
         log_error_detailed(
             error=e,
@@ -1929,6 +2200,19 @@ def method_not_allowed_error(error):
         'code': 'METHOD_NOT_ALLOWED'
     }), 405
 
+@app.errorhandler(429)
+def rate_limit_error(error):
+    """Handle rate limit hits (the catch-all below used to turn them into 500s)"""
+    limit = getattr(error, 'limit', None)
+    logger.warning(
+        f"429 Rate limit exceeded: {request.path}",
+        extra={'limit': str(getattr(limit, 'limit', '')), 'rate_limit_tier': rate_limits.identify()[0]}
+    )
+    # Until the breached window frees a hit, not the window length
+    current = limiter.current_limit
+    retry_after = max(1, math.ceil(current.reset_at - time.time())) if current is not None else None
+    return ErrorResponse.too_many_requests("Too many requests. Please wait a moment and try again.", retry_after)
+
 @app.errorhandler(500)
 def internal_error_handler(error):
     """Handle 500 errors"""
@@ -1958,4 +2242,5 @@ def handle_unexpected_error(error):
 
 # Run with SocketIO support
 if __name__ == '__main__':
+    init_database()
     socketio.run(app, debug=Config.DEBUG, port=Config.PORT or 5001, host='0.0.0.0')
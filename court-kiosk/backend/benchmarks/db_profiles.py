@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Queue write throughput per database profile (utils/db_profiles.py)
+
+For each profile a fresh backend process is started against an empty
+database. --writers threads then add queue entries the way
+/api/generate-queue does (look up the last number for the priority, insert
+the entry and its "created" event, commit) while --readers threads poll
+GET /api/queue like the displays and the admin dashboard do. Reported per
+profile: committed writes per second, write latency percentiles, failed
+writes and reads served.
+
+SQLite profiles run on a throwaway file: ``none`` (SQLAlchemy defaults,
+rollback journal) against ``sqlite`` (WAL, synchronous=NORMAL, busy
+timeout). ``postgres`` and ``serverless`` need --postgres-url pointing at a
+scratch database (its queue tables are emptied); for the serverless profile
+that URL should normally be the external pooler's.
+
+Fails (exit 1) if a tuned profile loses any write.
+
+Usage:
+    python -m benchmarks.db_profiles --writers 8 --writes 200 --readers 4
+    python -m benchmarks.db_profiles --profiles none,sqlite,postgres --postgres-url postgresql://localhost/kiosk_bench
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 2)
+
+
+def _writer(app_module, worker, writes, latencies, errors, barrier):
+    from models import db, QueueEntry
+    from utils.queue_events import record_created
+    with app_module.app.app_context():
+        barrier.wait()
+        for i in range(writes):
+            priority = 'ABCD'[i % 4]
+            start = time.perf_counter()
+            try:
+                last = QueueEntry.query.filter_by(priority_level=priority).order_by(QueueEntry.id.desc()).first()
+                entry = QueueEntry(
+                    queue_number=f"{priority}{worker:03d}{i:05d}",
+                    priority_level=priority,
+                    priority_number=(last.priority_number + 1) if last else 1,
+                    case_type='DVRO',
+                    status='waiting',
+                )
+                db.session.add(entry)
+                record_created(entry)
+                db.session.commit()
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                db.session.rollback()
+                errors.append(f"{type(e).__name__} after {time.perf_counter() - start:.2f}s: {str(e)[:160]}")
+            finally:
+                db.session.remove()
+
+
+def _reader(app_module, stop, reads, errors, barrier):
+    client = app_module.app.test_client()
+    barrier.wait()
+    while not stop.is_set():
+        response = client.get('/api/queue')
+        if response.status_code == 200:
+            reads.append(1)
+        else:
+            errors.append(f"HTTP {response.status_code}")
+
+
+def run_profile(args):
+    """Child process: the backend is configured for one profile via the environment"""
+    sys.path.insert(0, BACKEND_DIR)
+    import app as app_module
+    from models import db, QueueEntry, QueueEvent
+
+    app_module.init_database()
+    with app_module.app.app_context():
+        QueueEvent.query.delete()
+        QueueEntry.query.delete()
+        db.session.commit()
+        db.session.remove()
+
+    latencies, write_errors, reads, read_errors = [], [], [], []
+    stop = threading.Event()
+    barrier = threading.Barrier(args.writers + args.readers)
+    writers = [threading.Thread(target=_writer, args=(app_module, n, args.writes, latencies, write_errors, barrier))
+               for n in range(args.writers)]
+    readers = [threading.Thread(target=_reader, args=(app_module, stop, reads, read_errors, barrier), daemon=True)
+               for _ in range(args.readers)]
+    for t in readers + writers:
+        t.start()
+    start = time.perf_counter()
+    for t in writers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in readers:
+        t.join(timeout=5)
+
+    with app_module.app.app_context():
+        stored = QueueEntry.query.count()
+        options = app_module.app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        db.session.remove()
+
+    return {
+        'profile': os.environ['DB_PROFILE'],
+        'engine_options': {k: (v.__name__ if isinstance(v, type) else v) for k, v in options.items()
+                           if k != 'connect_args'},
+        'writes_committed': len(latencies),
+        'writes_stored': stored,
+        'writes_failed': len(write_errors),
+        'write_error_examples': sorted(set(write_errors))[:3],
+        'writes_per_s': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'write_p50_ms': _percentile(latencies, 0.50),
+        'write_p95_ms': _percentile(latencies, 0.95),
+        'write_p99_ms': _percentile(latencies, 0.99),
+        'write_mean_ms': round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+        'reads': len(reads),
+        'reads_failed': len(read_errors),
+        'elapsed_s': round(elapsed, 3),
+    }
+
+
+def _spawn(profile, database_url, args):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': database_url,
+        'DB_PROFILE': profile,
+        'ASYNC_MODE': 'threading',  # concurrent writers are OS threads here
+        'RATELIMIT_ENABLED': 'false',
+        'LOG_LEVEL': 'WARNING',
+        'SQL_PROFILE': 'false',
+        'TRACE_SAMPLE_RATE': '0',
+        'TRACE_SLOW_MS': '0',
+    })
+    env.setdefault('ADMIN_PASSWORD', 'profile-benchmark-password')
+    command = [sys.executable, '-m', 'benchmarks.db_profiles', '--child',
+               '--writers', str(args.writers), '--writes', str(args.writes), '--readers', str(args.readers)]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=args.timeout)
+    if result.returncode != 0:
+        return {'profile': profile, 'error': (result.stderr or result.stdout)[-2000:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(args):
+    profiles = [p.strip() for p in args.profiles.split(',') if p.strip()]
+    results = []
+    for profile in profiles:
+        if profile in ('postgres', 'serverless'):
+            if not args.postgres_url:
+                results.append({'profile': profile, 'skipped': 'needs --postgres-url'})
+                continue
+            database_url = args.postgres_url
+        else:
+            path = os.path.join(tempfile.gettempdir(), f'court_kiosk_db_profile_{profile}.db')
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            database_url = 'sqlite:///' + path
+        results.append(_spawn(profile, database_url, args))
+
+    expected = args.writers * args.writes
+    measured = {r['profile']: r for r in results if 'writes_per_s' in r}
+    report = {
+        'benchmark': 'db_profiles',
+        'writers': args.writers,
+        'writes_per_writer': args.writes,
+        'readers': args.readers,
+        'profiles': results,
+    }
+    if 'none' in measured and 'sqlite' in measured and measured['none']['writes_per_s']:
+        report['sqlite_speedup'] = round(measured['sqlite']['writes_per_s'] / measured['none']['writes_per_s'], 2)
+    report['passed'] = (
+        not any('error' in r for r in results)
+        and all(r['writes_failed'] == 0 and r['writes_stored'] == expected
+                for name, r in measured.items() if name != 'none')
+    )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', default='none,sqlite,postgres,serverless',
+                        help='comma-separated profiles to compare (default: all)')
+    parser.add_argument('--postgres-url', default=None, help='scratch Postgres database for postgres/serverless')
+    parser.add_argument('--writers', type=int, default=8, help='concurrent writer threads (default: 8)')
+    parser.add_argument('--writes', type=int, default=200, help='queue entries per writer (default: 200)')
+    parser.add_argument('--readers', type=int, default=4, help='concurrent GET /api/queue pollers (default: 4)')
+    parser.add_argument('--timeout', type=float, default=600, help='seconds allowed per profile (default: 600)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return 0
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Concurrent call-next stress test
+
+Seeds a queue of waiting entries, then lets dozens of facilitator threads call
+next at the same time until the queue is empty. Fails (exit 1) unless every
+entry was handed out exactly once and none is left waiting.
+
+Modes:
+  claim     - utils.queue_claim.claim_next_entry + commit (default)
+  endpoint  - POST /api/admin/call-next through the Flask test client
+  naive     - the old select-then-update, to show the race it fixes (expected to fail)
+
+The queue_entry table is emptied before seeding. Without DATABASE_URL a
+throwaway SQLite file is used; pointing it at another database requires
+--reset-queue.
+
+Usage:
+    python -m benchmarks.dequeue_stress --workers 32 --entries 500
+    DATABASE_URL=postgresql://... python -m benchmarks.dequeue_stress --mode endpoint --reset-queue
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _prepare_env(args):
+    if not os.getenv('DATABASE_URL'):
+        path = os.path.join(tempfile.gettempdir(), 'court_kiosk_dequeue_stress.db')
+        if os.path.exists(path):
+            os.remove(path)
+        os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    elif not args.reset_queue:
+        raise SystemExit("DATABASE_URL is set: pass --reset-queue to allow emptying its queue_entry table")
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('ADMIN_PASSWORD', 'stress-test-password')
+    os.environ.setdefault('ADMIN_USERNAME', 'admin')
+    os.environ.setdefault('ASYNC_MODE', 'threading')  # real threads race; greenthreads would take turns
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def _seed(app_module, entries):
+    from models import db, QueueEntry
+    with app_module.app.app_context():
+        QueueEntry.query.delete()
+        db.session.add_all(
+            QueueEntry(
+                queue_number=f"S{i:05d}",
+                priority_level='ABCD'[i % 4],
+                priority_number=i,
+                case_type='DVRO',
+                status='waiting'
+            )
+            for i in range(entries)
+        )
+        db.session.commit()
+
+
+def _worker_claim(app_module, claimed, errors, barrier, naive=False):
+    from models import db, QueueEntry
+    from utils.queue_claim import claim_next_entry
+    with app_module.app.app_context():
+        barrier.wait()
+        while True:
+            try:
+                if naive:
+                    entry = QueueEntry.query.filter_by(status='waiting').order_by(
+                        QueueEntry.priority_level, QueueEntry.created_at
+                    ).first()
+                    if entry is not None:
+                        entry.status = 'in_progress'
+                else:
+                    entry = claim_next_entry('in_progress')
+                if entry is None:
+                    db.session.rollback()
+                    return
+                queue_number = entry.queue_number
+                db.session.commit()
+                claimed.append(queue_number)
+            except Exception as e:
+                db.session.rollback()
+                errors.append(f"{type(e).__name__}: {e}")
+                if len(errors) > 100:
+                    return
+            finally:
+                db.session.remove()
+
+
+def _worker_endpoint(app_module, token, claimed, errors, barrier):
+    client = app_module.app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    barrier.wait()
+    while True:
+        response = client.post('/api/admin/call-next', headers=headers)
+        if response.status_code == 400:
+            return
+        if response.status_code != 200:
+            errors.append(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+            if len(errors) > 100:
+                return
+            continue
+        claimed.append(response.get_json()['queue_entry']['queue_number'])
+
+
+def run(args):
+    _prepare_env(args)
+    import app as app_module
+    from models import db, QueueEntry
+
+    app_module.limiter.enabled = False  # measuring claims, not the per-IP limits
+    app_module.init_database()
+    _seed(app_module, args.entries)
+
+    token = None
+    if args.mode == 'endpoint':
+        client = app_module.app.test_client()
+        response = client.post('/api/auth/login', json={
+            'username': os.environ['ADMIN_USERNAME'], 'password': os.environ['ADMIN_PASSWORD']
+        })
+        token = response.get_json().get('session_token')
+        if not token:
+            raise RuntimeError(f"login failed: {response.get_data(as_text=True)[:200]}")
+
+    claimed, errors = [], []
+    barrier = threading.Barrier(args.workers)
+    if args.mode == 'endpoint':
+        target, extra = _worker_endpoint, (token, claimed, errors, barrier)
+    else:
+        target, extra = _worker_claim, (claimed, errors, barrier, args.mode == 'naive')
+    threads = [threading.Thread(target=target, args=(app_module, *extra)) for _ in range(args.workers)]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app_module.app.app_context():
+        still_waiting = QueueEntry.query.filter_by(status='waiting').count()
+        db.session.remove()
+
+    counts = Counter(claimed)
+    duplicates = sorted(q for q, n in counts.items() if n > 1)
+    report = {
+        'benchmark': 'dequeue_stress',
+        'mode': args.mode,
+        'database': app_module.app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        'workers': args.workers,
+        'entries': args.entries,
+        'claims': len(claimed),
+        'unique_claims': len(counts),
+        'duplicate_claims': len(duplicates),
+        'duplicate_examples': duplicates[:10],
+        'still_waiting': still_waiting,
+        'errors': len(errors),
+        'error_examples': errors[:5],
+        'elapsed_s': round(elapsed, 3),
+        'claims_per_s': round(len(claimed) / elapsed, 1) if elapsed else None,
+    }
+    report['passed'] = (not duplicates and len(counts) == args.entries and still_waiting == 0 and not errors)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=32, help='concurrent facilitators (default: 32)')
+    parser.add_argument('--entries', type=int, default=500, help='waiting entries to seed (default: 500)')
+    parser.add_argument('--mode', choices=('claim', 'endpoint', 'naive'), default='claim')
+    parser.add_argument('--reset-queue', action='store_true', help='allow wiping queue_entry in DATABASE_URL')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Event-loop blocking check for the email send (utils/concurrency.py)
+
+Starts the backend in a fresh process under eventlet (monkey-patched as
+app.py does it), then sends --emails case emails from --concurrency
+greenthreads - case summary PDF, the bundled court forms, base64 encoding,
+and the POST to a local fake Resend - while a LoopLagMonitor greenthread
+measures how long each stretch without a hub switch lasted. That is the
+longest any WebSocket client on the worker would have been left waiting.
+
+Runs twice: with CPU_OFFLOAD=false (ReportLab and base64 on the hub) and
+with CPU_OFFLOAD=true (tpool). Fails (exit 1) if any send fails or the
+offloaded run blocks the hub for longer than --max-block-ms. Even offloaded,
+the Resend SDK's json.dumps of the ~10 MB body holds the GIL in one C call,
+so a few tens of milliseconds of stall remain.
+
+Usage:
+    python -m benchmarks.event_loop_blocking --emails 12 --concurrency 4 --max-block-ms 100
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fake_services import FakeResend  # noqa: E402
+
+FORMS = ['DV-100', 'DV-101', 'DV-109', 'DV-110', 'CLETS-001', 'FL-150']
+
+
+def _case_data(i):
+    return {
+        'queue_number': f"A{i:03d}",
+        'case_type': 'DVRO',
+        'priority_level': 'A',
+        'language': 'en',
+        'user_name': 'Load Test',
+        'user_email': f"client{i}@example.org",
+        'documents_needed': FORMS,
+        'summary': {'key_details': ['Requested a restraining order', 'Children involved']},
+    }
+
+
+def run_send(args):
+    """Child process: eventlet backend, sends measured under a LoopLagMonitor"""
+    import app  # noqa: F401  (monkey-patches and configures the services)
+    import eventlet
+    from utils.concurrency import LoopLagMonitor, current_mode
+    from utils.services import get_email_service
+
+    service = get_email_service()
+    service.send_case_email(_case_data(0))  # warm up: form index, styles, fonts
+
+    pool = eventlet.GreenPool(args.concurrency)
+    durations, failures = [], []
+
+    def send(i):
+        start = time.perf_counter()
+        result = service.send_case_email(_case_data(i))
+        durations.append(time.perf_counter() - start)
+        if not result.get('success'):
+            failures.append(result.get('error'))
+
+    monitor = LoopLagMonitor().start()
+    start = time.perf_counter()
+    for i in range(1, args.emails + 1):
+        pool.spawn_n(send, i)
+    pool.waitall()
+    elapsed = time.perf_counter() - start
+    lag = monitor.stop()
+
+    durations.sort()
+    return {
+        'async_mode': current_mode(),
+        'cpu_offload': os.environ['CPU_OFFLOAD'] == 'true',
+        'emails': len(durations),
+        'failures': len(failures),
+        'failure_examples': failures[:3],
+        'send_p50_ms': round(durations[len(durations) // 2] * 1000, 1) if durations else None,
+        'send_max_ms': round(durations[-1] * 1000, 1) if durations else None,
+        'elapsed_s': round(elapsed, 3),
+        'loop_lag': lag,
+    }
+
+
+def _spawn(offload, resend_url, args):
+    db_path = os.path.join(tempfile.gettempdir(), 'court_kiosk_event_loop_blocking.db')
+    env = dict(os.environ)
+    env.update({
+        'ASYNC_MODE': 'eventlet',
+        'CPU_OFFLOAD': 'true' if offload else 'false',
+        'DATABASE_URL': 'sqlite:///' + db_path,
+        'RESEND_API_KEY': 're_benchmark',
+        'RESEND_API_URL': resend_url,
+        'RESEND_FROM_EMAIL': 'kiosk@example.org',
+        'LOG_LEVEL': 'WARNING',
+        'TRACE_SAMPLE_RATE': '0',
+        'TRACE_SLOW_MS': '0',
+    })
+    command = [sys.executable, '-m', 'benchmarks.event_loop_blocking', '--child',
+               '--emails', str(args.emails), '--concurrency', str(args.concurrency)]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=args.timeout)
+    if result.returncode != 0:
+        return {'cpu_offload': offload, 'error': (result.stderr or result.stdout)[-2000:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(args):
+    resend = FakeResend(median_ms=args.email_ms).start()
+    try:
+        inline = _spawn(False, resend.url, args)
+        offloaded = _spawn(True, resend.url, args)
+    finally:
+        resend.stop()
+
+    report = {
+        'benchmark': 'event_loop_blocking',
+        'emails': args.emails,
+        'concurrency': args.concurrency,
+        'max_block_ms': args.max_block_ms,
+        'inline': inline,
+        'offloaded': offloaded,
+        'resend': resend.stats.as_dict(),
+    }
+    runs = (inline, offloaded)
+    report['passed'] = (
+        not any('error' in r for r in runs)
+        and all(r['failures'] == 0 and r['emails'] == args.emails for r in runs)
+        and offloaded['async_mode'] == 'eventlet'
+        and offloaded['loop_lag']['max_ms'] is not None
+        and offloaded['loop_lag']['max_ms'] < args.max_block_ms
+    )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--emails', type=int, default=12, help='case emails to send (default: 12)')
+    parser.add_argument('--concurrency', type=int, default=4, help='concurrent sends (default: 4)')
+    parser.add_argument('--max-block-ms', type=float, default=100,
+                        help='longest allowed hub stall with offloading on (default: 100)')
+    parser.add_argument('--email-ms', type=float, default=150, help='median fake Resend latency (default: 150)')
+    parser.add_argument('--timeout', type=float, default=300, help='seconds allowed per run (default: 300)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_send(args)))
+        return 0
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the Resend and OpenAI HTTP APIs
+
+Load tests must not send real email or spend real tokens, but the code
+paths in front of those calls (PDF rendering, attachment encoding, the
+HTTP round trip itself) are part of what they measure. These servers accept
+the same requests and answer like the real APIs after a configurable,
+log-normally distributed delay:
+
+- Resend: ``POST /emails`` -> ``{"id": ...}``
+- OpenAI: ``POST /v1/chat/completions`` -> a chat completion with ``usage``
+
+Both count requests and request bytes, exposed at ``GET /stats``. Point the
+backend at them with::
+
+    RESEND_API_URL=http://127.0.0.1:<port>
+    OPENAI_BASE_URL=http://127.0.0.1:<port>/v1
+
+Usage (standalone, for a backend started by hand):
+    python -m benchmarks.fake_services --resend-port 8025 --openai-port 8026 --llm-ms 800
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+class ServiceStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.request_bytes = 0
+        self.failures_injected = 0
+
+    def record(self, size: int):
+        with self._lock:
+            self.requests += 1
+            self.request_bytes += size
+
+    def as_dict(self) -> Dict:
+        return {'requests': self.requests, 'request_bytes': self.request_bytes,
+                'failures_injected': self.failures_injected}
+
+
+def _delay(median_ms: float, sigma: float = 0.5) -> float:
+    """Log-normal latency in seconds around ``median_ms`` (long right tail, like real APIs)"""
+    if median_ms <= 0:
+        return 0.0
+    return median_ms / 1000 * math.exp(random.gauss(0, sigma))
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: 'FakeServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Optional[Dict]:
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        self.server.stats.record(len(raw))
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError:
+            return None
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.server.stats.as_dict())
+        else:
+            self._send_json(404, {'statusCode': 404, 'message': 'Not found', 'name': 'not_found'})
+
+    def do_POST(self):
+        body = self._read_json()
+        if body is None:
+            self._send_json(400, {'statusCode': 400, 'message': 'Invalid JSON', 'name': 'validation_error'})
+            return
+        time.sleep(_delay(self.server.median_ms))
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self.server.stats.failures_injected += 1
+            self._send_json(500, {'statusCode': 500, 'message': 'Injected failure', 'name': 'application_error'})
+            return
+        self.server.respond(self, body)
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, median_ms: float, error_rate: float = 0.0):
+        super().__init__(('127.0.0.1', port), _FakeHandler)
+        self.median_ms = median_ms
+        self.error_rate = error_rate
+        self.stats = ServiceStats()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def respond(self, handler: _FakeHandler, body: Dict):
+        raise NotImplementedError
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeResend(FakeServer):
+    def __init__(self, port: int = 0, median_ms: float = 150, error_rate: float = 0.0):
+        super().__init__(port, median_ms, error_rate)
+        self.attachments = 0
+
+    def respond(self, handler, body):
+        if handler.path.rstrip('/') != '/emails':
+            handler._send_json(404, {'statusCode': 404, 'message': 'Not found', 'name': 'not_found'})
+            return
+        if not body.get('to') or not body.get('from'):
+            handler._send_json(422, {'statusCode': 422, 'message': 'Missing `to` or `from`',
+                                     'name': 'validation_error'})
+            return
+        self.attachments += len(body.get('attachments') or ())
+        handler._send_json(200, {'id': str(uuid.uuid4())})
+
+
+class FakeOpenAI(FakeServer):
+    ANSWER = ("Based on what you described, start with the forms listed on your summary and bring "
+              "them to the self-help center. A facilitator can review them with you before filing.")
+
+    def __init__(self, port: int = 0, median_ms: float = 800, error_rate: float = 0.0):
+        super().__init__(port, median_ms, error_rate)
+
+    def respond(self, handler, body):
+        if handler.path.rstrip('/') != '/v1/chat/completions':
+            handler._send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+            return
+        prompt_chars = sum(len(str(m.get('content', ''))) for m in body.get('messages') or ())
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = len(self.ANSWER) // 4
+        handler._send_json(200, {
+            'id': f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'gpt-3.5-turbo'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.ANSWER},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens},
+        })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resend-port', type=int, default=8025)
+    parser.add_argument('--openai-port', type=int, default=8026)
+    parser.add_argument('--email-ms', type=float, default=150, help='median Resend latency (default: 150)')
+    parser.add_argument('--llm-ms', type=float, default=800, help='median OpenAI latency (default: 800)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 500')
+    args = parser.parse_args(argv)
+
+    resend = FakeResend(args.resend_port, args.email_ms, args.error_rate).start()
+    openai = FakeOpenAI(args.openai_port, args.llm_ms, args.error_rate).start()
+    print(f"RESEND_API_URL={resend.url}")
+    print(f"OPENAI_BASE_URL={openai.url}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
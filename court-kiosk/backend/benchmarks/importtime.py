@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Import-time profile for the Flask backend
+
+Runs ``python -X importtime -c "import app"`` in a fresh interpreter, groups the
+cost by top-level package and fails when the import exceeds a budget or pulls in
+modules that should only load on first use (OpenAI client, ReportLab).
+
+Usage:
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --budget-ms 1500 --top 15
+    python -m benchmarks.importtime --json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules that must stay off the import path of app.py
+DEFAULT_FORBIDDEN = ('openai', 'reportlab', 'utils.email_service', 'utils.llm_service')
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(stderr):
+    """Parse ``-X importtime`` output into a list of module records"""
+    records = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        records.append({
+            'module': module,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': len(indent) // 2,
+        })
+    return records
+
+
+def summarize_packages(records):
+    """Total self time per top-level package, sorted by cost"""
+    totals = {}
+    for record in records:
+        package = record['module'].split('.')[0]
+        totals[package] = totals.get(package, 0) + record['self_us']
+    return sorted(
+        ({'package': name, 'self_ms': round(us / 1000, 2)} for name, us in totals.items()),
+        key=lambda item: item['self_ms'],
+        reverse=True
+    )
+
+
+def run_importtime(target='app', env=None):
+    """Import ``target`` in a fresh interpreter and return the parsed records"""
+    child_env = dict(os.environ)
+    child_env.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'court_kiosk_bench.db'))
+    if env:
+        child_env.update(env)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=BACKEND_DIR,
+        env=child_env,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def build_report(records, target='app', budget_ms=None, forbidden=DEFAULT_FORBIDDEN, top=20):
+    """Turn parsed records into a report dict with pass/fail checks"""
+    target_record = next((r for r in records if r['module'] == target), None)
+    total_ms = round(target_record['cumulative_us'] / 1000, 2) if target_record else None
+    loaded = {r['module'] for r in records}
+    eager = sorted(m for m in forbidden if m in loaded)
+
+    failures = []
+    if budget_ms is not None and total_ms is not None and total_ms > budget_ms:
+        failures.append(f"import {target} took {total_ms} ms (budget {budget_ms} ms)")
+    for module in eager:
+        failures.append(f"{module} is imported eagerly by {target}")
+
+    return {
+        'target': target,
+        'total_ms': total_ms,
+        'module_count': len(records),
+        'packages': summarize_packages(records)[:top],
+        'slowest_modules': [
+            {'module': r['module'], 'cumulative_ms': round(r['cumulative_us'] / 1000, 2)}
+            for r in sorted(records, key=lambda r: r['cumulative_us'], reverse=True)[:top]
+        ],
+        'eager_forbidden_modules': eager,
+        'failures': failures,
+        'passed': not failures,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', default='app', help='module to import (default: app)')
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail when the import exceeds this many ms')
+    parser.add_argument('--allow', action='append', default=[], help='allow a normally forbidden module')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='emit the report as JSON')
+    args = parser.parse_args(argv)
+
+    forbidden = tuple(m for m in DEFAULT_FORBIDDEN if m not in args.allow)
+    report = build_report(run_importtime(args.target), args.target, args.budget_ms, forbidden, args.top)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {report['target']}: {report['total_ms']} ms across {report['module_count']} modules")
+        print("\nSelf time by package:")
+        for item in report['packages']:
+            print(f"  {item['self_ms']:>9.2f} ms  {item['package']}")
+        for failure in report['failures']:
+            print(f"FAIL: {failure}")
+        if report['passed']:
+            print("\nOK")
+
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Caller-side logging cost: direct stream handler vs utils.structured_logging
+
+Logs --records INFO records (with an email address and ``extra`` fields, as
+the email service does) to a sink that takes --sink-ms per write, the way a
+slow terminal, pipe or log shipper does, and reports what the *calling*
+thread pays per record:
+
+- direct: ``logging.basicConfig``-style StreamHandler writing on the caller
+- pipeline: ``configure_logging()`` (QueueHandler + background writer,
+  JSON formatting and redaction on the writer thread)
+
+The pipeline run also reports how many records the bounded queue dropped
+(none unless --queue-size is smaller than the backlog the slow sink builds).
+
+Usage:
+    python -m benchmarks.logging_pipeline --records 2000 --sink-ms 0.5
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class SlowSink:
+    """File-like object whose writes take ``delay`` seconds"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lines = 0
+        self.last = ''
+
+    def write(self, text):
+        time.sleep(self.delay)
+        self.lines += text.count('\n')
+        if text.strip():
+            self.last = text.strip()
+
+    def flush(self):
+        pass
+
+
+def _measure(logger, records):
+    costs = []
+    for i in range(records):
+        start = time.perf_counter()
+        logger.info(f"Email sent successfully to client{i}@example.org",
+                    extra={'queue_number': f"A{i:03d}", 'attachments': 4})
+        costs.append(time.perf_counter() - start)
+    costs.sort()
+    return {
+        'p50_us': round(statistics.median(costs) * 1e6, 1),
+        'p99_us': round(costs[int(len(costs) * 0.99) - 1] * 1e6, 1),
+        'total_ms': round(sum(costs) * 1000, 1),
+    }
+
+
+def run(args):
+    sys.path.insert(0, BACKEND_DIR)
+    from flask import Flask
+    from utils import structured_logging
+
+    delay = args.sink_ms / 1000
+    app = Flask('logging-benchmark')
+    root = logging.getLogger()
+    logger = logging.getLogger('benchmarks.logging_pipeline')
+
+    with app.test_request_context('/api/send-comprehensive-email', method='POST'):
+        direct_sink = SlowSink(delay)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handler = logging.StreamHandler(direct_sink)
+        handler.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        direct = _measure(logger, args.records)
+        root.removeHandler(handler)
+
+        pipeline_sink = SlowSink(delay)
+        dropped_before = structured_logging.LOG_RECORDS_DROPPED.value()
+        structured_logging.configure_logging('INFO', 'json', stream=pipeline_sink, queue_size=args.queue_size)
+        pipeline = _measure(logger, args.records)
+        flush_start = time.perf_counter()
+        structured_logging.shutdown()
+        pipeline['drain_ms'] = round((time.perf_counter() - flush_start) * 1000, 1)
+        pipeline['dropped'] = int(structured_logging.LOG_RECORDS_DROPPED.value() - dropped_before)
+        pipeline['written'] = pipeline_sink.lines
+
+    sample = json.loads(pipeline_sink.last) if pipeline_sink.last else {}
+    report = {
+        'benchmark': 'logging_pipeline',
+        'records': args.records,
+        'sink_ms': args.sink_ms,
+        'direct': direct,
+        'pipeline': pipeline,
+        'caller_speedup_p50': round(direct['p50_us'] / max(pipeline['p50_us'], 0.1), 1),
+        'sample_record': sample,
+    }
+    report['passed'] = (
+        pipeline['written'] + pipeline['dropped'] == args.records
+        and '@example.org' in sample.get('message', '') and 'client' not in sample.get('message', '')
+        and pipeline['p50_us'] < direct['p50_us']
+    )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=2000, help='records logged per variant (default: 2000)')
+    parser.add_argument('--sink-ms', type=float, default=0.5, help='time per sink write in ms (default: 0.5)')
+    parser.add_argument('--queue-size', type=int, default=10_000, help='pipeline queue bound (default: 10000)')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
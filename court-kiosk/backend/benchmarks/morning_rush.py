@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Courthouse morning rush: end-to-end load test
+
+Simulates a morning at the self-help center against one backend process:
+
+- --kiosks kiosks, each serving one visitor after another. A visitor walks
+  a real flow from ``frontend/public/data/*.json`` (random answers, think
+  time between chunks), takes a queue number, reports progress the way the
+  kiosk's step buffer does, sometimes asks the assistant a question
+  (/api/ask), submits the session summary and sometimes emails the full
+  case packet (/api/send-comprehensive-email, PDFs included)
+- --facilitators staff sessions polling /api/admin/queue, calling the next
+  case, "serving" it for a while and completing it
+- --displays queue displays holding Socket.IO connections to /api/ws/queue
+
+Email and LLM calls go to local fakes (benchmarks/fake_services.py) with
+realistic latency, so nothing leaves the machine. Rate limiting is switched
+off in the started backend because every simulated kiosk shares one
+address. Forms are only attached when a local copy exists in
+court_documents/, so no form is downloaded from courts.ca.gov.
+
+Reports throughput, p50/p95/p99/max latency and error rate per endpoint,
+WebSocket connect latency and updates received, and what reached the fakes.
+Exits 1 when the overall error rate exceeds --max-error-rate or a display
+could not connect.
+
+With --url the load is sent to a backend started by hand instead; start it
+with RESEND_API_URL/OPENAI_BASE_URL pointing at ``python -m
+benchmarks.fake_services`` and RATELIMIT_ENABLED=false.
+
+Usage:
+    python -m benchmarks.morning_rush --kiosks 12 --facilitators 4 --displays 30 --duration 60
+    python -m benchmarks.morning_rush --url http://127.0.0.1:5001 --admin-password ... --duration 120
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FLOWS_DIR = os.path.abspath(os.path.join(BACKEND_DIR, '..', 'frontend', 'public', 'data'))
+COURT_DOCUMENTS_DIR = os.path.abspath(os.path.join(BACKEND_DIR, '..', 'court_documents'))
+NAMESPACE = '/api/ws/queue'
+
+# Flow id -> (case type code, queue priority), as the kiosk's CompletionPage assigns them
+CASE_TYPES = {
+    'dvro-flow': ('DVRO', 'A'),
+    'restraining-order-complete': ('DVRO', 'A'),
+    'restraining-order-triage': ('DVRO', 'A'),
+    'civil-harassment-flow': ('CHRO', 'A'),
+    'divorce-flow': ('DIVORCE', 'C'),
+}
+DEFAULT_CASE_TYPE = ('OTHER', 'C')
+MAX_WALK_STEPS = 80
+_QUESTION_CHARS = re.compile(r"[^a-zA-Z0-9\s\?\.\,\!\-\'\"]+")
+# Form codes mentioned in node text, as the kiosk's summary page extracts them
+_FORM_CODE = re.compile(r'\b[A-Z]{2,5}-\d{3,4}\b')
+
+
+# ----------------------------------------------------------------------
+# Backend process
+# ----------------------------------------------------------------------
+
+def _serve(port):
+    """Backend process: the app on ``port``, as ``python app.py`` runs it"""
+    sys.path.insert(0, BACKEND_DIR)
+    import app as app_module
+    app_module.init_database()
+    app_module.socketio.run(app_module.app, host='127.0.0.1', port=port, log_output=False,
+                            allow_unsafe_werkzeug=True)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Backend exited with {process.returncode} before listening")
+        with socket.socket() as s:
+            if s.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.2)
+    raise SystemExit(f"Backend on port {port} did not start")
+
+
+def _start_backend(args, resend_url, openai_url, log_file):
+    port = _free_port()
+    db_path = os.path.join(tempfile.gettempdir(), 'court_kiosk_morning_rush.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': os.getenv('DATABASE_URL') or 'sqlite:///' + db_path,
+        'ADMIN_USERNAME': args.admin_username,
+        'ADMIN_PASSWORD': args.admin_password,
+        'RESEND_API_KEY': 're_load_test',
+        'RESEND_API_URL': resend_url,
+        'OPENAI_API_KEY': 'sk-load-test',
+        'OPENAI_BASE_URL': openai_url + '/v1',
+        'RATELIMIT_ENABLED': 'false',
+        'LOG_LEVEL': 'WARNING',
+        'FALLBACK_EMAIL': '',
+        'FLASK_ENV': 'production',
+    })
+    env.pop('KIOSK_API_KEY', None)
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.morning_rush', '--serve', str(port)],
+                               cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    _wait_for_port(port, process)
+    return process, f"http://127.0.0.1:{port}"
+
+
+# ----------------------------------------------------------------------
+# Visitors
+# ----------------------------------------------------------------------
+
+def _load_flows():
+    sys.path.insert(0, BACKEND_DIR)
+    from utils.flow_graph import compile_flow
+    flows = []
+    for path in sorted(glob.glob(os.path.join(FLOWS_DIR, '*.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get('nodes'), dict) and data.get('start'):
+            flows.append(compile_flow(data))
+    if not flows:
+        raise SystemExit(f"No flows found in {FLOWS_DIR}")
+    return flows
+
+
+def _local_forms():
+    return {os.path.splitext(name)[0].upper() for name in os.listdir(COURT_DOCUMENTS_DIR)
+            if name.lower().endswith('.pdf')} if os.path.isdir(COURT_DOCUMENTS_DIR) else set()
+
+
+def walk(flow, rng, max_steps=MAX_WALK_STEPS):
+    """Node ids of one random path from the start node to an end node"""
+    path = []
+    i = flow.start
+    while i is not None and len(path) < max_steps:
+        path.append(flow.node_ids[i])
+        if flow.is_end(i):
+            break
+        i = rng.choice(flow.successors[i])
+    return path
+
+
+def forms_for_path(flow, path, local_forms):
+    """Forms the kiosk would list for ``path``, limited to those with a local PDF"""
+    forms = set(flow.forms_for_nodes(path))
+    for node_id in path:
+        forms.update(_FORM_CODE.findall(flow.node_texts[flow.index[node_id]] or ''))
+    return sorted(f for f in forms if f.upper() in local_forms)
+
+
+def _question(flow, path, rng):
+    texts = [flow.node_texts[flow.index[n]] for n in path if flow.node_texts[flow.index[n]]]
+    text = _QUESTION_CHARS.sub(' ', rng.choice(texts) if texts else '')
+    text = ' '.join(text.split())[:300]
+    return f"Can you explain this step {text}?" if text else "Which forms do I need to file?"
+
+
+class Recorder:
+    """Latency samples and outcomes per endpoint (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = Counter()
+        self.statuses = defaultdict(Counter)
+
+    def record(self, name, seconds, status, ok):
+        with self._lock:
+            self.samples[name].append(seconds)
+            self.statuses[name][str(status)] += 1
+            if not ok:
+                self.errors[name] += 1
+
+    @staticmethod
+    def _percentile(ordered, q):
+        return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name in sorted(self.samples):
+            ordered = sorted(self.samples[name])
+            endpoints[name] = {
+                'requests': len(ordered),
+                'rps': round(len(ordered) / elapsed, 2),
+                'errors': self.errors[name],
+                'error_rate': round(self.errors[name] / len(ordered), 4),
+                'p50_ms': round(self._percentile(ordered, 0.50) * 1000, 1),
+                'p95_ms': round(self._percentile(ordered, 0.95) * 1000, 1),
+                'p99_ms': round(self._percentile(ordered, 0.99) * 1000, 1),
+                'max_ms': round(ordered[-1] * 1000, 1),
+                'statuses': dict(self.statuses[name]),
+            }
+        return endpoints
+
+
+async def _call(client, recorder, name, method, path, expected=(200,), **kwargs):
+    import httpx
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        response, status = None, type(e).__name__
+    recorder.record(name, time.perf_counter() - start, status, status in expected)
+    return response
+
+
+def _think(rng, mean_ms):
+    return rng.expovariate(1000 / mean_ms) if mean_ms > 0 else 0
+
+
+async def kiosk(kiosk_id, client, recorder, flows, local_forms, args, deadline, counters):
+    rng = random.Random(args.seed * 1000 + kiosk_id)
+    visitor = 0
+    while time.monotonic() < deadline:
+        visitor += 1
+        flow = rng.choice(flows)
+        path = walk(flow, rng)
+        case_type, priority = CASE_TYPES.get(flow.flow_id, DEFAULT_CASE_TYPE)
+        email = f"visitor-{kiosk_id}-{visitor}@example.org"
+        forms = forms_for_path(flow, path, local_forms)
+
+        response = await _call(client, recorder, 'POST /api/generate-queue', 'POST', '/api/generate-queue', json={
+            'case_type': case_type, 'priority': priority, 'language': 'en', 'user_email': email,
+        })
+        if response is None or response.status_code != 200:
+            await asyncio.sleep(_think(rng, args.think_ms))
+            continue
+        queue_number = response.json()['queue_number']
+
+        for start in range(0, len(path), args.chunk):
+            await asyncio.sleep(_think(rng, args.think_ms))
+            steps = [{'sequence': s, 'node_id': path[s]} for s in range(start, min(start + args.chunk, len(path)))]
+            await _call(client, recorder, 'POST /api/queue/<n>/progress', 'POST',
+                        f"/api/queue/{queue_number}/progress", json={'steps': steps})
+
+        if rng.random() < args.ask_ratio:
+            await _call(client, recorder, 'POST /api/ask', 'POST', '/api/ask', json={
+                'question': _question(flow, path, rng), 'language': 'en', 'case_number': queue_number,
+            })
+
+        summary = f"Visitor walked the {flow.flow_id} flow ({len(path)} steps) and needs: {', '.join(forms) or 'no forms'}."
+        await _call(client, recorder, 'POST /api/submit-session', 'POST', '/api/submit-session', json={
+            'email': email, 'case_number': queue_number, 'summary': summary, 'language': 'en', 'documents': forms,
+        })
+
+        if rng.random() < args.email_ratio:
+            await _call(client, recorder, 'POST /api/send-comprehensive-email', 'POST',
+                        '/api/send-comprehensive-email', json={
+                            'email': email,
+                            'case_data': {
+                                'user_name': 'Load Test Visitor', 'case_type': case_type, 'priority_level': priority,
+                                'language': 'en', 'queue_number': queue_number, 'documents_needed': forms,
+                                'next_steps': ['Bring the forms to the self-help center'], 'summary': summary,
+                            },
+                        })
+        counters['visitors'] += 1
+        await asyncio.sleep(_think(rng, args.think_ms))
+
+
+async def facilitator(index, client, recorder, args, deadline, counters):
+    rng = random.Random(args.seed * 1000 + 500 + index)
+    response = await _call(client, recorder, 'POST /api/auth/login', 'POST', '/api/auth/login', json={
+        'username': args.admin_username, 'password': args.admin_password,
+    })
+    if response is None or response.status_code != 200:
+        return
+    headers = {'Authorization': f"Bearer {response.json()['session_token']}"}
+    while time.monotonic() < deadline:
+        await _call(client, recorder, 'GET /api/admin/queue', 'GET', '/api/admin/queue', headers=headers)
+        # 400 = nobody waiting, which is normal early in the morning
+        response = await _call(client, recorder, 'POST /api/admin/call-next', 'POST', '/api/admin/call-next',
+                               expected=(200, 400), headers=headers)
+        if response is not None and response.status_code == 200:
+            queue_number = response.json()['queue_entry']['queue_number']
+            await asyncio.sleep(_think(rng, args.service_ms))
+            await _call(client, recorder, 'POST /api/admin/complete-case', 'POST', '/api/admin/complete-case',
+                        json={'queue_number': queue_number}, headers=headers)
+            counters['served'] += 1
+        else:
+            await asyncio.sleep(args.poll_ms / 1000)
+
+
+async def drive(base_url, args, flows, local_forms, recorder, counters):
+    import httpx
+    limits = httpx.Limits(max_connections=args.kiosks + args.facilitators + 4)
+    deadline = time.monotonic() + args.duration
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        await asyncio.gather(
+            *(kiosk(k, client, recorder, flows, local_forms, args, deadline, counters) for k in range(args.kiosks)),
+            *(facilitator(f, client, recorder, args, deadline, counters) for f in range(args.facilitators)),
+        )
+
+
+# ----------------------------------------------------------------------
+# Displays
+# ----------------------------------------------------------------------
+
+class Displays:
+    """Queue displays holding Socket.IO connections (threads; python-socketio's client is sync)"""
+
+    def __init__(self, url, count, transport, recorder):
+        self.url = url
+        self.count = count
+        self.transports = [transport] if transport else None
+        self.recorder = recorder
+        self.clients = []
+        self.updates = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def _on_update(self, data):
+        with self._lock:
+            self.updates += 1
+
+    def _connect_one(self, _):
+        import socketio
+        client = socketio.Client(reconnection=False)
+        client.on('queue_update', self._on_update, namespace=NAMESPACE)
+        start = time.perf_counter()
+        try:
+            client.connect(self.url, namespaces=[NAMESPACE], transports=self.transports, wait_timeout=30)
+        except Exception as e:
+            self.recorder.record('WS connect', time.perf_counter() - start, type(e).__name__, False)
+            with self._lock:
+                self.failed += 1
+            return
+        self.recorder.record('WS connect', time.perf_counter() - start, 'connected', True)
+        with self._lock:
+            self.clients.append(client)
+
+    def connect(self):
+        with ThreadPoolExecutor(max_workers=min(32, max(1, self.count))) as pool:
+            list(pool.map(self._connect_one, range(self.count)))
+
+    def disconnect(self):
+        for client in self.clients:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+
+    def summary(self):
+        connected = len(self.clients)
+        return {
+            'requested': self.count,
+            'connected': connected,
+            'still_connected': sum(1 for c in self.clients if c.connected),
+            'failed': self.failed,
+            'updates_received': self.updates,
+            'updates_per_display': round(self.updates / connected, 1) if connected else 0,
+        }
+
+
+# ----------------------------------------------------------------------
+# Run
+# ----------------------------------------------------------------------
+
+def run(args):
+    from benchmarks.fake_services import FakeOpenAI, FakeResend
+
+    flows = _load_flows()
+    local_forms = _local_forms()
+    recorder = Recorder()
+    counters = Counter()
+    fakes = []
+    backend = None
+    log_path = os.path.join(tempfile.gettempdir(), 'court_kiosk_morning_rush.log')
+
+    with open(log_path, 'wb') as log_file:
+        try:
+            if args.url:
+                base_url = args.url.rstrip('/')
+            else:
+                fakes = [FakeResend(median_ms=args.email_ms).start(), FakeOpenAI(median_ms=args.llm_ms).start()]
+                backend, base_url = _start_backend(args, fakes[0].url, fakes[1].url, log_file)
+
+            displays = Displays(base_url, args.displays, args.transport, recorder)
+            displays.connect()
+            started = time.perf_counter()
+            asyncio.run(drive(base_url, args, flows, local_forms, recorder, counters))
+            elapsed = time.perf_counter() - started
+            time.sleep(0.5)  # let the last coalesced broadcast land
+            display_summary = displays.summary()
+            displays.disconnect()
+        finally:
+            if backend is not None:
+                backend.terminate()
+                try:
+                    backend.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    backend.kill()
+            for fake in fakes:
+                fake.stop()
+
+    endpoints = recorder.report(elapsed)
+    http = {k: v for k, v in endpoints.items() if k != 'WS connect'}
+    total = sum(e['requests'] for e in http.values())
+    errors = sum(e['errors'] for e in http.values())
+    report = {
+        'benchmark': 'morning_rush',
+        'backend': args.url or 'started (sqlite, fakes)',
+        'duration_s': round(elapsed, 1),
+        'kiosks': args.kiosks,
+        'facilitators': args.facilitators,
+        'flows': len(flows),
+        'visitors_completed': counters['visitors'],
+        'cases_served': counters['served'],
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2),
+        'error_rate': round(errors / total, 4) if total else 0,
+        'endpoints': endpoints,
+        'displays': display_summary,
+    }
+    if fakes:
+        report['fake_resend'] = dict(fakes[0].stats.as_dict(), attachments=fakes[0].attachments)
+        report['fake_openai'] = fakes[1].stats.as_dict()
+        report['backend_log'] = log_path
+    report['passed'] = (
+        total > 0 and report['error_rate'] <= args.max_error_rate and display_summary['failed'] == 0
+    )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    parser.add_argument('--url', help='target an already running backend instead of starting one')
+    parser.add_argument('--kiosks', type=int, default=12, help='concurrent kiosks (default: 12)')
+    parser.add_argument('--facilitators', type=int, default=4, help='staff sessions (default: 4)')
+    parser.add_argument('--displays', type=int, default=20, help='Socket.IO queue displays (default: 20)')
+    parser.add_argument('--duration', type=float, default=60, help='seconds of load (default: 60)')
+    parser.add_argument('--think-ms', type=float, default=400, help='mean visitor think time (default: 400)')
+    parser.add_argument('--chunk', type=int, default=8, help='flow steps per progress report (default: 8)')
+    parser.add_argument('--ask-ratio', type=float, default=0.5, help='visitors asking a question (default: 0.5)')
+    parser.add_argument('--email-ratio', type=float, default=0.3,
+                        help='visitors emailing the case packet (default: 0.3)')
+    parser.add_argument('--service-ms', type=float, default=2000, help='mean time serving a case (default: 2000)')
+    parser.add_argument('--poll-ms', type=float, default=1000, help='facilitator idle poll interval (default: 1000)')
+    parser.add_argument('--llm-ms', type=float, default=800, help='fake OpenAI median latency (default: 800)')
+    parser.add_argument('--email-ms', type=float, default=150, help='fake Resend median latency (default: 150)')
+    parser.add_argument('--transport', choices=['websocket', 'polling'], help='force a display transport')
+    parser.add_argument('--timeout', type=float, default=60, help='HTTP timeout in seconds (default: 60)')
+    parser.add_argument('--admin-username', default='admin')
+    parser.add_argument('--admin-password', default=os.getenv('ADMIN_PASSWORD') or 'load-test-password')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='pass threshold (default: 0.01)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        _serve(args.serve)
+        return 0
+    if args.transport is None:
+        try:
+            import websocket  # noqa: F401  (websocket-client)
+        except ImportError:
+            args.transport = 'polling'
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+FlowProgress insert throughput: one commit per step vs bulk ingestion
+
+Seeds queue entries and records a path of --steps nodes for each, first the
+old way (one FlowProgress row and one commit per node, as
+QueueManager.update_progress does) and then through
+utils.progress_ingest.ingest_progress in chunks of --chunk steps. Finally the
+whole bulk run is replayed to check that nothing is inserted twice.
+
+Without DATABASE_URL a throwaway SQLite file is used; pointing it at another
+database requires --reset (flow_progress and queue_entry are emptied).
+
+Usage:
+    python -m benchmarks.progress_ingest --entries 20 --steps 300 --chunk 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _prepare_env(args):
+    if not os.getenv('DATABASE_URL'):
+        path = os.path.join(tempfile.gettempdir(), 'court_kiosk_progress_ingest.db')
+        if os.path.exists(path):
+            os.remove(path)
+        os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    elif not args.reset:
+        raise SystemExit("DATABASE_URL is set: pass --reset to allow emptying flow_progress and queue_entry")
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('ADMIN_PASSWORD', 'benchmark-password')
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def _seed(entries):
+    from models import db, QueueEntry, FlowProgress
+    FlowProgress.query.delete()
+    QueueEntry.query.delete()
+    created = [
+        QueueEntry(queue_number=f"P{i:05d}", priority_level='C', priority_number=i, case_type='DIVORCE')
+        for i in range(entries * 2)
+    ]
+    db.session.add_all(created)
+    db.session.commit()
+    return created[:entries], created[entries:]
+
+
+def _path(steps):
+    return [{'sequence': i, 'node_id': f"node_{i}", 'node_text': f"Step {i}", 'user_response': 'yes'}
+            for i in range(steps)]
+
+
+def _per_step(entries, path):
+    from models import db, FlowProgress
+    start = time.perf_counter()
+    for entry in entries:
+        for step in path:
+            db.session.add(FlowProgress(queue_entry_id=entry.id, sequence=step['sequence'], node_id=step['node_id'],
+                                        node_text=step['node_text'], user_response=step['user_response']))
+            entry.current_node = step['node_id']
+            db.session.commit()
+    return time.perf_counter() - start
+
+
+def _bulk(entries, path, chunk):
+    from models import db
+    from utils.progress_ingest import ingest_progress
+    inserted = 0
+    start = time.perf_counter()
+    for entry in entries:
+        for i in range(0, len(path), chunk):
+            inserted += ingest_progress(entry, path[i:i + chunk])['inserted']
+            db.session.commit()
+    return time.perf_counter() - start, inserted
+
+
+def run(args):
+    _prepare_env(args)
+    import app as app_module
+    from models import FlowProgress
+
+    app_module.init_database()
+    path = _path(args.steps)
+    rows = args.entries * args.steps
+    with app_module.app.app_context():
+        per_step_entries, bulk_entries = _seed(args.entries)
+        per_step_s = _per_step(per_step_entries, path)
+        bulk_s, inserted = _bulk(bulk_entries, path, args.chunk)
+        replay_s, replayed = _bulk(bulk_entries, path, args.chunk)
+        stored = FlowProgress.query.filter(FlowProgress.queue_entry_id.in_([e.id for e in bulk_entries])).count()
+
+    report = {
+        'benchmark': 'progress_ingest',
+        'database': app_module.app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        'entries': args.entries,
+        'steps_per_entry': args.steps,
+        'chunk': args.chunk,
+        'per_step_rows_per_s': round(rows / per_step_s, 1),
+        'bulk_rows_per_s': round(rows / bulk_s, 1),
+        'speedup': round(per_step_s / bulk_s, 1),
+        'replay_inserted': replayed,
+        'replay_s': round(replay_s, 3),
+        'stored_rows': stored,
+    }
+    report['passed'] = inserted == rows and replayed == 0 and stored == rows
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=20, help='kiosk sessions (default: 20)')
+    parser.add_argument('--steps', type=int, default=300, help='nodes per path (default: 300)')
+    parser.add_argument('--chunk', type=int, default=50, help='steps per bulk request (default: 50)')
+    parser.add_argument('--reset', action='store_true', help='allow wiping flow_progress/queue_entry in DATABASE_URL')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Admin queue payload: hand-built dicts + jsonify vs utils.queue_serializer
+
+Seeds --entries waiting queue entries (with documents_needed and a
+conversation summary) and times building the /api/admin/queue body:
+
+- legacy: load every column, build each dict by hand (parsing
+  documents_needed, three isoformat calls) and ``jsonify`` the result, as
+  get_admin_queue did before
+- cold: ``queue_serializer`` with an empty fragment cache
+- warm: ``queue_serializer`` with every fragment cached (the common case:
+  the dashboard polls and only a few entries change between polls)
+- one_changed: warm, after one entry was updated
+
+Without DATABASE_URL a throwaway SQLite file is used; pointing it at another
+database requires --reset (queue_entry is emptied).
+
+Usage:
+    python -m benchmarks.queue_serializer --entries 500
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _prepare_env(args):
+    if not os.getenv('DATABASE_URL'):
+        path = os.path.join(tempfile.gettempdir(), 'court_kiosk_queue_serializer.db')
+        if os.path.exists(path):
+            os.remove(path)
+        os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    elif not args.reset:
+        raise SystemExit("DATABASE_URL is set: pass --reset to allow emptying queue_entry")
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('ADMIN_PASSWORD', 'benchmark-password')
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def _seed(entries):
+    from models import db, QueueEntry, FlowProgress
+    from utils.storage_codec import encode_json
+    FlowProgress.query.delete()
+    QueueEntry.query.delete()
+    db.session.add_all([
+        QueueEntry(queue_number=f"{'ABCD'[i % 4]}{i:04d}", priority_level='ABCD'[i % 4], priority_number=i,
+                   case_type='DVRO', user_name=f"Client {i}", user_email=f"client{i}@example.org",
+                   phone_number='650-555-0100', status='waiting', current_node=f"node_{i % 40}",
+                   conversation_summary='Visitor asked about filing a restraining order and serving the other party.',
+                   documents_needed=encode_json(['DV-100', 'DV-109', 'DV-110', 'CLETS-001']),
+                   estimated_wait_time=15)
+        for i in range(entries)
+    ])
+    db.session.commit()
+
+
+def _legacy_body(app):
+    from flask import jsonify
+    from sqlalchemy.orm import undefer_group
+    from models import QueueEntry
+    from utils.storage_codec import decode_json
+    entries = QueueEntry.query.options(undefer_group('details')).filter_by(status='waiting').order_by(
+        QueueEntry.priority_level, QueueEntry.created_at
+    ).all()
+    queue_data = []
+    for entry in entries:
+        queue_data.append({
+            'queue_number': entry.queue_number,
+            'priority': entry.priority_level,
+            'priority_level': entry.priority_level,
+            'case_type': entry.case_type,
+            'user_name': entry.user_name,
+            'user_email': entry.user_email,
+            'phone_number': entry.phone_number,
+            'language': entry.language,
+            'status': entry.status,
+            'created_at': entry.created_at.isoformat() if entry.created_at else None,
+            'arrived_at': entry.created_at.isoformat() if entry.created_at else None,
+            'timestamp': entry.created_at.isoformat() if entry.created_at else None,
+            'conversation_summary': entry.conversation_summary,
+            'documents_needed': decode_json(entry.documents_needed, []),
+            'current_node': entry.current_node,
+            'estimated_wait_time': entry.estimated_wait_time
+        })
+    return jsonify({'success': True, 'queue': queue_data, 'current_number': None}).get_data()
+
+
+def _serializer_body():
+    from models import QueueEntry
+    from utils.queue_serializer import queue_serializer
+    entries = QueueEntry.query.filter_by(status='waiting').order_by(
+        QueueEntry.priority_level, QueueEntry.created_at
+    ).all()
+    return b'{"success":true,"queue":' + queue_serializer.list_body(entries) + b',"current_number":null}'
+
+
+def _time(fn, repeat):
+    from models import db
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.remove()  # every request starts with an empty identity map
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+
+def run(args):
+    _prepare_env(args)
+    import app as app_module
+    from models import db, QueueEntry
+    from utils import queue_serializer as serializer_module
+    from utils.queue_serializer import queue_serializer
+
+    app_module.init_database()
+    app = app_module.app
+    with app.app_context(), app.test_request_context():
+        _seed(args.entries)
+        legacy_s, legacy_body = _time(lambda: _legacy_body(app), args.repeat)
+
+        cold_s = float('inf')
+        for _ in range(args.repeat):
+            queue_serializer.clear()
+            cold_s = min(cold_s, _time(_serializer_body, 1)[0])
+        warm_s, warm_body = _time(_serializer_body, args.repeat)
+
+        changed = QueueEntry.query.order_by(QueueEntry.id).first()
+        changed.current_node = 'changed'
+        db.session.commit()
+        one_changed_s, _ = _time(_serializer_body, 1)
+
+    legacy, new = json.loads(legacy_body), json.loads(warm_body)
+    same = [{k: row[k] for k in legacy['queue'][0]} for row in new['queue']] == legacy['queue']
+    report = {
+        'benchmark': 'queue_serializer',
+        'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        'encoder': 'orjson' if serializer_module.orjson is not None else 'json',
+        'entries': args.entries,
+        'legacy_ms': round(legacy_s * 1000, 2),
+        'cold_ms': round(cold_s * 1000, 2),
+        'warm_ms': round(warm_s * 1000, 2),
+        'one_changed_ms': round(one_changed_s * 1000, 2),
+        'warm_speedup': round(legacy_s / warm_s, 1),
+        'body_bytes_legacy': len(legacy_body),
+        'body_bytes_new': len(warm_body),
+    }
+    report['passed'] = same and len(new['queue']) == args.entries
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=500, help='waiting queue entries (default: 500)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per variant, best is reported (default: 5)')
+    parser.add_argument('--reset', action='store_true', help='allow wiping queue_entry in DATABASE_URL')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Rate limiter overhead per request (utils/rate_limits.py)
+
+For each --strategies entry a fresh backend process is started with that
+RATELIMIT_STRATEGY and tier limits high enough never to trip. It then sends
+GET /api/health (no route limit, so the caller's tier default applies) as
+each tier - anonymous IP, kiosk (X-Kiosk-Key) and staff user (Bearer) -
+with the limiter switched off and on in alternating blocks, and reports
+per tier:
+
+- p50/mean request time with and without the limiter, and the difference
+- counter-store calls per request (each is one network round trip on Redis)
+
+The user tier's overhead includes the session lookup the limiter's key
+function does; on routes behind AuthService decorators that lookup is
+shared with the decorator, so the difference there is smaller.
+
+Counters live in memory unless --storage-url (e.g. redis://localhost:6379/15)
+is given. Fails (exit 1) if any request is rejected or a tier needs more
+than one store call per request.
+
+Usage:
+    python -m benchmarks.rate_limiter --requests 2000
+    python -m benchmarks.rate_limiter --storage-url redis://localhost:6379/15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+KIOSK_KEY = 'rate-limiter-benchmark-key'
+STORAGE_METHODS = ('incr', 'decr', 'get', 'get_expiry', 'acquire_entry', 'get_moving_window',
+                   'acquire_sliding_window_entry', 'get_sliding_window', 'clear')
+
+
+class _CallCounter:
+    """Counts top-level calls on the storage (memory storage calls its own methods internally)"""
+
+    def __init__(self, storage):
+        self.calls = 0
+        self._depth = 0
+        for name in STORAGE_METHODS:
+            method = getattr(storage, name, None)
+            if method is not None:
+                setattr(storage, name, self._wrap(method))
+
+    def _wrap(self, method):
+        def counted(*args, **kwargs):
+            if not self._depth:
+                self.calls += 1
+            self._depth += 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._depth -= 1
+        return counted
+
+
+def _timed_requests(client, headers, count):
+    costs, rejected = [], 0
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.get('/api/health', headers=headers)
+        costs.append(time.perf_counter() - start)
+        if response.status_code == 429:
+            rejected += 1
+    return costs, rejected
+
+
+def run_strategy(args):
+    """Child process: one RATELIMIT_STRATEGY, every tier"""
+    sys.path.insert(0, BACKEND_DIR)
+    import app as app_module
+
+    app_module.init_database()
+    limiter = app_module.limiter
+    counter = _CallCounter(limiter.storage)
+    client = app_module.app.test_client()
+    login = client.post('/api/auth/login', json={
+        'username': os.environ['ADMIN_USERNAME'], 'password': os.environ['ADMIN_PASSWORD']
+    }).get_json() or {}
+    if not login.get('session_token'):
+        raise RuntimeError(f"login failed: {login}")
+
+    tiers = {
+        'ip': {},
+        'kiosk': {'X-Kiosk-Key': KIOSK_KEY},
+        'user': {'Authorization': f"Bearer {login['session_token']}"},
+    }
+    block = max(1, args.requests // 10)
+    results = {}
+    for tier, headers in tiers.items():
+        _timed_requests(client, headers, 200)  # warm up
+        off, on, rejected, calls = [], [], 0, 0
+        for _ in range(0, args.requests, block):
+            limiter.enabled = False
+            off.extend(_timed_requests(client, headers, block)[0])
+            limiter.enabled = True
+            before = counter.calls
+            costs, hits = _timed_requests(client, headers, block)
+            calls += counter.calls - before
+            on.extend(costs)
+            rejected += hits
+        results[tier] = {
+            'off_p50_us': round(statistics.median(off) * 1e6, 1),
+            'on_p50_us': round(statistics.median(on) * 1e6, 1),
+            'overhead_p50_us': round((statistics.median(on) - statistics.median(off)) * 1e6, 1),
+            'overhead_mean_us': round((statistics.mean(on) - statistics.mean(off)) * 1e6, 1),
+            'store_calls_per_request': round(calls / len(on), 2),
+            'rejected': rejected,
+        }
+    return {
+        'strategy': os.environ['RATELIMIT_STRATEGY'],
+        'storage': type(limiter.storage).__name__,
+        'tiers': results,
+    }
+
+
+def _spawn(strategy, args):
+    db_path = os.path.join(tempfile.gettempdir(), 'court_kiosk_rate_limiter.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': 'sqlite:///' + db_path,
+        'RATELIMIT_ENABLED': 'true',
+        'RATELIMIT_STRATEGY': strategy,
+        'RATELIMIT_USER_LIMIT': '1000000 per minute',
+        'RATELIMIT_KIOSK_LIMIT': '1000000 per minute',
+        'RATELIMIT_IP_LIMIT': '1000000 per minute',
+        'KIOSK_API_KEYS': f"benchmark-kiosk={KIOSK_KEY}",
+        'ASYNC_MODE': 'threading',
+        'LOG_LEVEL': 'WARNING',
+        'SQL_PROFILE': 'false',
+        'TRACE_SAMPLE_RATE': '0',
+        'TRACE_SLOW_MS': '0',
+    })
+    env.pop('KIOSK_API_KEY', None)
+    env.setdefault('ADMIN_USERNAME', 'admin')
+    env.setdefault('ADMIN_PASSWORD', 'rate-limiter-benchmark-password')
+    if args.storage_url:
+        env['RATELIMIT_STORAGE_URL'] = args.storage_url
+    command = [sys.executable, '-m', 'benchmarks.rate_limiter', '--child', '--requests', str(args.requests)]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=args.timeout)
+    if result.returncode != 0:
+        return {'strategy': strategy, 'error': (result.stderr or result.stdout)[-2000:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(args):
+    strategies = [s.strip() for s in args.strategies.split(',') if s.strip()]
+    results = [_spawn(strategy, args) for strategy in strategies]
+    report = {
+        'benchmark': 'rate_limiter',
+        'requests_per_tier': args.requests,
+        'storage_url': args.storage_url or 'memory://',
+        'strategies': results,
+    }
+    report['passed'] = (
+        not any('error' in r for r in results)
+        and all(t['rejected'] == 0 and t['store_calls_per_request'] <= 1
+                for r in results for t in r['tiers'].values())
+    )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='measured requests per tier (default: 2000)')
+    parser.add_argument('--strategies', default='sliding-window-counter,moving-window,fixed-window',
+                        help='comma-separated RATELIMIT_STRATEGY values to compare')
+    parser.add_argument('--storage-url', default=None, help='shared counter store (default: memory://)')
+    parser.add_argument('--timeout', type=float, default=600, help='seconds allowed per strategy (default: 600)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_strategy(args)))
+        return 0
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Discrete-event simulation of call-next routing
+
+Replays the same arrival stream (Poisson arrivals with a realistic mix of
+priorities, languages and case types) against a pool of facilitators under
+two policies and reports waiting times:
+
+  fifo    - today's behaviour: strict priority, then oldest first
+  skills  - utils.facilitator_scheduler.rank_entries (language/specialty
+            matching, scarcity bonus, priority aging)
+
+A facilitator serving a client in a language they do not speak needs an
+interpreter (service time x LANGUAGE_MISMATCH_FACTOR); one outside their
+specialties is slower too (x SPECIALTY_MISMATCH_FACTOR).
+
+Usage:
+    python -m benchmarks.scheduler_sim
+    python -m benchmarks.scheduler_sim --arrivals-per-hour 12 --replications 50 --aging-minutes 45
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import statistics
+import sys
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+try:
+    from utils.facilitator_scheduler import FacilitatorProfile, rank_entries, PRIORITY_RANK
+except ImportError:  # executed as a plain script
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from utils.facilitator_scheduler import FacilitatorProfile, rank_entries, PRIORITY_RANK
+
+SimEntry = namedtuple('SimEntry', 'id priority_level language case_type created_at arrival')
+
+PRIORITY_MIX = (('A', 0.15), ('B', 0.25), ('C', 0.35), ('D', 0.25))
+LANGUAGE_MIX = (('en', 0.65), ('es', 0.25), ('zh', 0.05), ('vi', 0.05))
+CASE_TYPE_MIX = (('DVRO', 0.30), ('CHRO', 0.20), ('DIVORCE', 0.30), ('OTHER', 0.20))
+MEAN_SERVICE_MINUTES = {'DVRO': 20, 'CHRO': 15, 'DIVORCE': 25, 'OTHER': 10}
+
+LANGUAGE_MISMATCH_FACTOR = 2.0
+SPECIALTY_MISMATCH_FACTOR = 1.3
+
+DEFAULT_FACILITATORS = (
+    FacilitatorProfile(1, 'f1@example.org', frozenset({'en', 'es'}), frozenset({'DVRO', 'CHRO'})),
+    FacilitatorProfile(2, 'f2@example.org', frozenset({'en'}), frozenset({'DIVORCE', 'OTHER'})),
+    FacilitatorProfile(3, 'f3@example.org', frozenset({'en', 'es'}), frozenset()),
+    FacilitatorProfile(4, 'f4@example.org', frozenset({'en', 'zh', 'vi'}), frozenset()),
+)
+
+EPOCH = datetime(2024, 1, 1, 8, 0, 0)
+
+
+def _pick(rng, mix):
+    x = rng.random()
+    for value, weight in mix:
+        x -= weight
+        if x <= 0:
+            return value
+    return mix[-1][0]
+
+
+def generate_arrivals(rng, arrivals_per_hour, hours):
+    """Poisson arrivals over the working day, in minutes from opening"""
+    entries, t, rate = [], 0.0, arrivals_per_hour / 60.0
+    while True:
+        t += rng.expovariate(rate)
+        if t > hours * 60:
+            return entries
+        entries.append(SimEntry(
+            id=len(entries) + 1,
+            priority_level=_pick(rng, PRIORITY_MIX),
+            language=_pick(rng, LANGUAGE_MIX),
+            case_type=_pick(rng, CASE_TYPE_MIX),
+            created_at=EPOCH + timedelta(minutes=t),
+            arrival=t,
+        ))
+
+
+def service_minutes(entry, profile, base_draw):
+    """Service time for ``entry`` by ``profile``; base_draw is the case's own exp(1) sample"""
+    minutes = MEAN_SERVICE_MINUTES[entry.case_type] * base_draw
+    if not profile.speaks(entry.language):
+        minutes *= LANGUAGE_MISMATCH_FACTOR
+    if not profile.handles(entry.case_type):
+        minutes *= SPECIALTY_MISMATCH_FACTOR
+    return minutes
+
+
+def fifo_order(waiting, profile, now, aging_minutes, facilitators):
+    return sorted(waiting, key=lambda e: (PRIORITY_RANK[e.priority_level], e.arrival, e.id))
+
+
+def skills_order(waiting, profile, now, aging_minutes, facilitators):
+    return rank_entries(waiting, profile, now, aging_minutes, facilitators)
+
+
+POLICIES = {'fifo': fifo_order, 'skills': skills_order}
+
+
+def simulate(arrivals, draws, facilitators, policy, aging_minutes):
+    """Run one day; returns a list of (entry, wait_minutes, service_minutes, mismatched_language)"""
+    order = POLICIES[policy]
+    events = [(e.arrival, 0, e.id) for e in arrivals]  # (time, kind 0=arrival 1=done, id)
+    heapq.heapify(events)
+    by_id = {e.id: e for e in arrivals}
+    idle = list(facilitators)
+    waiting = []
+    served = []
+
+    def dispatch(now):
+        while idle and waiting:
+            profile = idle.pop(0)
+            entry = order(waiting, profile, EPOCH + timedelta(minutes=now), aging_minutes, facilitators)[0]
+            waiting.remove(entry)
+            minutes = service_minutes(entry, profile, draws[entry.id])
+            served.append((entry, now - entry.arrival, minutes, not profile.speaks(entry.language)))
+            heapq.heappush(events, (now + minutes, 1, profile.id))
+
+    profiles = {p.id: p for p in facilitators}
+    while events:
+        now, kind, ref = heapq.heappop(events)
+        if kind == 0:
+            waiting.append(by_id[ref])
+        else:
+            idle.append(profiles[ref])
+        dispatch(now)
+    return served
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))]
+
+
+def _stats(waits):
+    if not waits:
+        return None
+    return {
+        'n': len(waits),
+        'mean': round(statistics.fmean(waits), 2),
+        'p95': round(percentile(waits, 95), 2),
+        'max': round(max(waits), 2),
+    }
+
+
+def summarize(results):
+    waits = [w for _, w, _, _ in results]
+    report = {
+        'wait_minutes': _stats(waits),
+        'service_minutes_mean': round(statistics.fmean(s for _, _, s, _ in results), 2) if results else None,
+        'interpreter_share': round(sum(1 for *_, m in results if m) / len(results), 3) if results else None,
+        'by_priority': {},
+        'by_language': {},
+    }
+    for level, _ in PRIORITY_MIX:
+        report['by_priority'][level] = _stats([w for e, w, _, _ in results if e.priority_level == level])
+    for language, _ in LANGUAGE_MIX:
+        report['by_language'][language] = _stats([w for e, w, _, _ in results if e.language == language])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arrivals-per-hour', type=float, default=9.0)
+    parser.add_argument('--hours', type=float, default=8.0)
+    parser.add_argument('--replications', type=int, default=30)
+    parser.add_argument('--aging-minutes', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    pooled = {policy: [] for policy in POLICIES}
+    for r in range(args.replications):
+        rng = random.Random(args.seed + r)
+        arrivals = generate_arrivals(rng, args.arrivals_per_hour, args.hours)
+        draws = {e.id: rng.expovariate(1.0) for e in arrivals}  # same case difficulty under both policies
+        for policy in POLICIES:
+            pooled[policy].extend(simulate(arrivals, draws, DEFAULT_FACILITATORS, policy, args.aging_minutes))
+
+    report = {
+        'benchmark': 'scheduler_sim',
+        'arrivals_per_hour': args.arrivals_per_hour,
+        'hours': args.hours,
+        'replications': args.replications,
+        'facilitators': len(DEFAULT_FACILITATORS),
+        'aging_minutes': args.aging_minutes,
+        'policies': {policy: summarize(results) for policy, results in pooled.items()},
+    }
+    fifo, skills = report['policies']['fifo']['wait_minutes'], report['policies']['skills']['wait_minutes']
+    report['skills_vs_fifo'] = {
+        'mean_wait_change_pct': round((skills['mean'] - fifo['mean']) / fifo['mean'] * 100, 1) if fifo['mean'] else None,
+        'p95_wait_change_pct': round((skills['p95'] - fifo['p95']) / fifo['p95'] * 100, 1) if fifo['p95'] else None,
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Multi-worker Socket.IO fan-out load test
+
+Starts --workers backend processes on consecutive ports, all sharing one
+database and one Socket.IO backplane (SOCKETIO_MESSAGE_QUEUE), and connects
+--clients display clients to /api/ws/queue, spread round-robin across the
+workers. A trigger client on the first worker then asks for a queue update
+--rounds times; every broadcast has to reach every display, including those
+on other workers.
+
+Reports delivery ratio and broadcast latency (trigger emit -> display
+receive) percentiles. Fails (exit 1) if any display missed a broadcast.
+
+Without --message-queue an SQLite backplane file in the temp directory is
+used; pass e.g. --message-queue redis://localhost:6379/0 to test Redis.
+Clients use the websocket transport when websocket-client is installed and
+long-polling otherwise (--transport to force one).
+
+Usage:
+    python -m benchmarks.socketio_fanout --workers 4 --clients 2000
+    python -m benchmarks.socketio_fanout --workers 2 --clients 50 --transport polling
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+NAMESPACE = '/api/ws/queue'
+
+
+def _serve(port):
+    """Worker process: the backend app on ``port``"""
+    sys.path.insert(0, BACKEND_DIR)
+    import app as app_module
+    app_module.socketio.run(app_module.app, host='127.0.0.1', port=port, log_output=False,
+                            allow_unsafe_werkzeug=True)
+
+
+def _worker_env(args, db_path, queue_url):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': 'sqlite:///' + db_path,
+        'SOCKETIO_MESSAGE_QUEUE': queue_url,
+        'LOG_LEVEL': 'WARNING',
+        'ADMIN_PASSWORD': env.get('ADMIN_PASSWORD', 'benchmark-password'),
+        'FLASK_ENV': 'production',
+        'DEBUG': 'false',
+    })
+    return env
+
+
+def _wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.2)
+    raise SystemExit(f"Worker on port {port} did not start")
+
+
+class Display:
+    """One display client; records when the current round's broadcast arrived"""
+
+    def __init__(self, url, transports, stats):
+        import socketio
+        self.url = url
+        self.transports = transports
+        self.stats = stats
+        self.received_at = None
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('queue_update', self._on_update, namespace=NAMESPACE)
+
+    def _on_update(self, data):
+        if self.stats.armed and self.received_at is None:
+            self.received_at = time.perf_counter()
+            self.stats.arrived()
+        self.stats.last_message = time.monotonic()
+
+    def connect(self):
+        self.client.connect(self.url, namespaces=[NAMESPACE], transports=self.transports, wait_timeout=30)
+
+
+class RoundStats:
+    def __init__(self):
+        self.armed = False
+        self.last_message = time.monotonic()
+        self._count = 0
+        self._lock = threading.Lock()
+        self.done = threading.Event()
+        self.expected = 0
+
+    def arm(self, expected):
+        self._count = 0
+        self.expected = expected
+        self.done.clear()
+        self.armed = True
+
+    def arrived(self):
+        with self._lock:
+            self._count += 1
+            if self._count >= self.expected:
+                self.done.set()
+
+
+def _wait_quiet(stats, quiet_seconds, timeout):
+    """Let the broadcasts triggered by connecting clients drain"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and time.monotonic() - stats.last_message < quiet_seconds:
+        time.sleep(0.1)
+
+
+def _connect_all(displays, concurrency):
+    errors = []
+    pending = list(displays)
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                display = pending.pop()
+            try:
+                display.connect()
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(args):
+    import socketio
+
+    if args.transport == 'auto':
+        try:
+            import websocket  # noqa: F401  (websocket-client)
+            transports = ['websocket']
+        except ImportError:
+            transports = ['polling']
+    else:
+        transports = [args.transport]
+
+    tmp = tempfile.mkdtemp(prefix='court_kiosk_fanout_')
+    db_path = os.path.join(tmp, 'kiosk.db')
+    queue_url = args.message_queue or 'sqlite:///' + os.path.join(tmp, 'backplane.db')
+    env = _worker_env(args, db_path, queue_url)
+
+    # Create the schema once, before the workers race to do it
+    subprocess.run([sys.executable, '-c', 'import app; app.init_database()'], cwd=BACKEND_DIR, env=env,
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    ports = [args.port + i for i in range(args.workers)]
+    workers = [
+        subprocess.Popen([sys.executable, '-m', 'benchmarks.socketio_fanout', '--serve', str(port)], cwd=BACKEND_DIR,
+                         env=env, stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL)
+        for port in ports
+    ]
+    try:
+        for port in ports:
+            _wait_for_port(port)
+
+        stats = RoundStats()
+        displays = [Display(f"http://127.0.0.1:{ports[i % len(ports)]}", transports, stats)
+                    for i in range(args.clients)]
+        connect_start = time.perf_counter()
+        errors = _connect_all(displays, args.connect_concurrency)
+        connect_s = time.perf_counter() - connect_start
+        connected = [d for d in displays if d.client.connected]
+        _wait_quiet(stats, args.quiet, timeout=args.timeout)
+
+        trigger = socketio.Client(reconnection=False)
+        trigger.connect(f"http://127.0.0.1:{ports[0]}", namespaces=[NAMESPACE], transports=transports)
+        _wait_quiet(stats, args.quiet, timeout=args.timeout)
+
+        latencies_ms, delivered, rounds = [], 0, []
+        for _ in range(args.rounds):
+            for d in connected:
+                d.received_at = None
+            stats.arm(len(connected))
+            sent_at = time.perf_counter()
+            trigger.emit('request_update', namespace=NAMESPACE)
+            stats.done.wait(args.timeout)
+            stats.armed = False
+            round_latencies = [(d.received_at - sent_at) * 1000 for d in connected if d.received_at is not None]
+            latencies_ms.extend(round_latencies)
+            delivered += len(round_latencies)
+            rounds.append({'delivered': len(round_latencies),
+                           'max_ms': round(max(round_latencies), 1) if round_latencies else None})
+            _wait_quiet(stats, args.quiet, timeout=args.timeout)
+
+        trigger.disconnect()
+        for d in connected:
+            try:
+                d.client.disconnect()
+            except Exception:
+                pass
+    finally:
+        for w in workers:
+            w.terminate()
+        for w in workers:
+            try:
+                w.wait(10)
+            except subprocess.TimeoutExpired:
+                w.kill()
+
+    expected = len(connected) * args.rounds
+    report = {
+        'benchmark': 'socketio_fanout',
+        'backplane': queue_url.split(':', 1)[0],
+        'transport': transports[0],
+        'workers': args.workers,
+        'clients': args.clients,
+        'connected': len(connected),
+        'connect_errors': len(errors),
+        'connect_s': round(connect_s, 2),
+        'rounds': rounds,
+        'delivery_ratio': round(delivered / expected, 4) if expected else 0,
+        'latency_ms_p50': round(statistics.median(latencies_ms), 1) if latencies_ms else None,
+        'latency_ms_p95': round(_percentile(latencies_ms, 95), 1) if latencies_ms else None,
+        'latency_ms_p99': round(_percentile(latencies_ms, 99), 1) if latencies_ms else None,
+        'latency_ms_max': round(max(latencies_ms), 1) if latencies_ms else None,
+    }
+    if errors:
+        report['first_connect_error'] = errors[0]
+    report['passed'] = bool(connected) and len(connected) == args.clients and delivered == expected
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    parser.add_argument('--workers', type=int, default=4, help='backend processes (default: 4)')
+    parser.add_argument('--clients', type=int, default=2000, help='display clients (default: 2000)')
+    parser.add_argument('--rounds', type=int, default=5, help='broadcasts to measure (default: 5)')
+    parser.add_argument('--port', type=int, default=5301, help='first worker port (default: 5301)')
+    parser.add_argument('--message-queue', help='backplane URL (default: SQLite file in the temp directory)')
+    parser.add_argument('--transport', choices=['auto', 'websocket', 'polling'], default='auto')
+    parser.add_argument('--connect-concurrency', type=int, default=50, help='parallel connects (default: 50)')
+    parser.add_argument('--quiet', type=float, default=2.0, help='seconds without messages before a round')
+    parser.add_argument('--timeout', type=float, default=60.0, help='seconds to wait for a round')
+    parser.add_argument('--verbose', action='store_true', help='show worker stderr')
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        _serve(args.serve)
+        return 0
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Flask backend
+
+Boots ``app`` in a fresh interpreter N times and reports, as JSON:
+
+- time-to-first-response on ``/api/health`` (p50/p95, measured from process
+  launch, so interpreter startup is included)
+- import time of ``app`` and of the first request alone
+- per-package import cost from ``-X importtime`` (median across runs), plus the
+  modules we care about on the cold path (eventlet, openai, reportlab,
+  flask_limiter, marshmallow/validation_schemas)
+- ``Config.validate_required_keys`` cost
+- resident memory after boot
+
+Usage:
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --runs 20 --output startup.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    from benchmarks.importtime import parse_importtime
+except ImportError:  # executed as a plain script
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from benchmarks.importtime import parse_importtime
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules whose cumulative import cost is reported individually
+WATCHED_MODULES = (
+    'eventlet',
+    'openai',
+    'reportlab',
+    'flask_limiter',
+    'flask_socketio',
+    'marshmallow',
+    'validation_schemas',
+    'sqlalchemy',
+    'models',
+)
+
+
+def _rss_kb():
+    """Current resident set size in KB (Linux), falling back to peak RSS"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child_main():
+    """Runs inside the fresh interpreter: import app, hit /api/health, report"""
+    import resource
+
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+
+    t0 = time.perf_counter()
+    import app as app_module
+    t_import = time.perf_counter()
+
+    client = app_module.app.test_client()
+    response = client.get('/api/health')
+    t_first = time.perf_counter()
+
+    from config import Config
+    t_validate = time.perf_counter()
+    Config.validate_required_keys()
+    validate_ms = (time.perf_counter() - t_validate) * 1000
+
+    result = {
+        'status_code': response.status_code,
+        'import_ms': (t_import - t0) * 1000,
+        'first_request_ms': (t_first - t_import) * 1000,
+        'validate_required_keys_ms': validate_ms,
+        'rss_kb': _rss_kb(),
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'loaded_watched_modules': sorted(m for m in WATCHED_MODULES if m in sys.modules),
+    }
+    # Marker line so the parent can find our JSON among app log output
+    sys.stdout.write('\n__STARTUP_RESULT__' + json.dumps(result) + '\n')
+    sys.stdout.flush()
+
+
+def run_once(env):
+    """Launch one cold boot and return (wall_ms, child_result, importtime_records)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'benchmarks.startup', '--child'],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"cold boot failed:\n{proc.stderr[-2000:]}")
+
+    marker = '__STARTUP_RESULT__'
+    line = next((l for l in proc.stdout.splitlines() if l.startswith(marker)), None)
+    if line is None:
+        raise RuntimeError(f"child produced no result:\n{proc.stdout[-2000:]}")
+    return wall_ms, json.loads(line[len(marker):]), parse_importtime(proc.stderr)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def _summary(values):
+    return {
+        'p50': round(percentile(values, 50), 2),
+        'p95': round(percentile(values, 95), 2),
+        'mean': round(statistics.fmean(values), 2),
+        'min': round(min(values), 2),
+        'max': round(max(values), 2),
+    }
+
+
+def aggregate(runs):
+    """Combine per-run measurements into the report body"""
+    package_costs = {}
+    watched_costs = {name: [] for name in WATCHED_MODULES}
+    for _, _, records in runs:
+        per_package = {}
+        for record in records:
+            package = record['module'].split('.')[0]
+            per_package[package] = per_package.get(package, 0) + record['self_us']
+            if record['module'] in watched_costs:
+                watched_costs[record['module']].append(record['cumulative_us'] / 1000)
+        for package, us in per_package.items():
+            package_costs.setdefault(package, []).append(us / 1000)
+
+    packages = sorted(
+        ({'package': name, 'median_self_ms': round(statistics.median(values), 2)}
+         for name, values in package_costs.items()),
+        key=lambda item: item['median_self_ms'],
+        reverse=True
+    )
+    watched = {
+        name: (round(statistics.median(values), 2) if values else None)
+        for name, values in watched_costs.items()
+    }
+
+    children = [child for _, child, _ in runs]
+    return {
+        'time_to_first_response_ms': _summary([wall for wall, _, _ in runs]),
+        'import_app_ms': _summary([c['import_ms'] for c in children]),
+        'first_request_ms': _summary([c['first_request_ms'] for c in children]),
+        'validate_required_keys_ms': _summary([c['validate_required_keys_ms'] for c in children]),
+        'rss_after_boot_mb': _summary([c['rss_kb'] / 1024 for c in children]),
+        'max_rss_mb': _summary([c['max_rss_kb'] / 1024 for c in children]),
+        'watched_modules_cumulative_ms': watched,
+        'eagerly_loaded_watched_modules': children[-1]['loaded_watched_modules'],
+        'packages': packages,
+    }
+
+
+def _git_sha():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return os.getenv('GIT_SHA', 'unknown')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='number of cold boots (default: 10)')
+    parser.add_argument('--top', type=int, default=25, help='packages to include in the report')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child_main()
+        return 0
+
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'court_kiosk_bench.db'))
+    env.setdefault('LOG_LEVEL', 'WARNING')
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    report = aggregate(runs)
+    report['packages'] = report['packages'][:args.top]
+    report = {
+        'benchmark': 'startup',
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'git_sha': _git_sha(),
+        'python': platform.python_version(),
+        'runs': args.runs,
+        **report,
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload + '\n')
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+JSON blob storage: plain JSON text vs utils.storage_codec
+
+Writes --rows case summaries shaped like CaseSummaryService output into two
+throwaway SQLite files - one with plain ``json.dumps`` text, one through
+``encode_json`` - and reports:
+
+- bytes on disk per database file and per stored blob
+- decode time for all rows (``json.loads`` vs ``decode_json``)
+- time to list the rows' small columns through the ORM with the blob
+  columns deferred, vs loading and parsing them the way list endpoints
+  used to (``undefer_group('details')`` + decode)
+
+Usage:
+    python -m benchmarks.storage_codec --rows 10000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+FORMS = ['DV-100', 'DV-101', 'DV-105', 'DV-108', 'DV-109', 'DV-110', 'DV-120', 'CLETS-001', 'FL-100', 'FL-105',
+         'CH-100', 'CH-109', 'FW-001', 'SER-001', 'POS-040']
+
+
+def _summary(i, rng):
+    forms = rng.sample(FORMS, rng.randint(2, 7))
+    return {
+        'header': {'case_type': 'DVRO', 'date': 'October 19, 2026 at 09:15 AM',
+                   'location': 'San Mateo County Superior Court Kiosk', 'session_id': f"K{10000 + i}"},
+        'user_information': {'name': f"Client {i}", 'email': f"client{i}@example.org", 'language': 'EN'},
+        'forms_completed': [{'form': f, 'title': f"{f} form title", 'description': f"What {f} is used for and who files it."}
+                            for f in forms],
+        'key_answers': [{'question': f"Question {q}?", 'answer': rng.choice(['Yes', 'No', 'Not sure'])} for q in range(12)],
+        'next_steps': [{'step': s, 'title': f"Step {s}", 'description': 'File the forms with the clerk and arrange service.'}
+                       for s in range(1, 6)],
+        'resources': {'self_help_center': 'Room 101, 400 County Center, Redwood City',
+                      'phone': '(650) 261-5100', 'hours': 'Mon-Fri 8:00 AM - 4:00 PM'},
+        'disclaimer': 'This summary is for informational purposes only and does not constitute legal advice. '
+                      'Please consult with an attorney for legal guidance.',
+        'created_at': '2026-10-19T09:15:00',
+        'language': 'en',
+    }, forms
+
+
+def _write(path, rows, encode):
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE case_summary (id INTEGER PRIMARY KEY, user_id VARCHAR(255), case_number VARCHAR(50), '
+                 'flow_type VARCHAR(50) NOT NULL, summary_json TEXT NOT NULL, required_forms TEXT, next_steps TEXT, '
+                 'user_email VARCHAR(255), user_name VARCHAR(255), language VARCHAR(10), created_at DATETIME)')
+    conn.executemany(
+        'INSERT INTO case_summary (flow_type, summary_json, required_forms, next_steps, user_email, language, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [('DVRO', encode(s), encode(forms), encode(s['next_steps']), f"client{i}@example.org", 'en', '2026-10-19 09:15:00')
+         for i, (s, forms) in enumerate(rows)]
+    )
+    conn.commit()
+    conn.execute('VACUUM')
+    blobs = conn.execute('SELECT summary_json, required_forms, next_steps FROM case_summary').fetchall()
+    conn.close()
+    return os.path.getsize(path), blobs
+
+
+def _time(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _orm_list_times(path):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    from flask import Flask
+    from sqlalchemy.orm import undefer_group
+    from models import db, CaseSummary
+    from utils.storage_codec import decode_json
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL']
+    db.init_app(app)
+    with app.app_context():
+        def listing(eager=False):
+            query = CaseSummary.query
+            if eager:
+                query = query.options(undefer_group('details'))
+            for r in query.all():
+                (r.id, r.flow_type, r.user_email, r.created_at)
+                if eager:
+                    decode_json(r.summary_json), decode_json(r.required_forms), decode_json(r.next_steps)
+            db.session.remove()
+        deferred_s = _time(listing)
+        eager_s = _time(lambda: listing(eager=True))
+    return deferred_s, eager_s
+
+
+def run(args):
+    from utils.storage_codec import encode_json, decode_json
+    rng = random.Random(args.seed)
+    rows = [_summary(i, rng) for i in range(args.rows)]
+    tmp = tempfile.gettempdir()
+
+    plain_path = os.path.join(tmp, 'court_kiosk_codec_plain.db')
+    codec_path = os.path.join(tmp, 'court_kiosk_codec_encoded.db')
+    plain_bytes, plain_blobs = _write(plain_path, rows, json.dumps)
+    codec_bytes, codec_blobs = _write(codec_path, rows, encode_json)
+
+    plain_decode = _time(lambda: [json.loads(b) for row in plain_blobs for b in row])
+    codec_decode = _time(lambda: [decode_json(b) for row in codec_blobs for b in row])
+    assert [decode_json(b) for b in codec_blobs[0]] == [json.loads(b) for b in plain_blobs[0]]
+    deferred_s, eager_s = _orm_list_times(codec_path)
+
+    per_k = 10000 / args.rows
+    blob_chars = lambda blobs: sum(len(b) for row in blobs for b in row) / len(blobs)
+    return {
+        'benchmark': 'storage_codec',
+        'rows': args.rows,
+        'db_bytes_plain': plain_bytes,
+        'db_bytes_codec': codec_bytes,
+        'db_size_ratio': round(codec_bytes / plain_bytes, 3),
+        'blob_chars_per_row_plain': round(blob_chars(plain_blobs)),
+        'blob_chars_per_row_codec': round(blob_chars(codec_blobs)),
+        'decode_ms_per_10k_plain': round(plain_decode * 1000 * per_k, 1),
+        'decode_ms_per_10k_codec': round(codec_decode * 1000 * per_k, 1),
+        'list_ms_per_10k_deferred': round(deferred_s * 1000 * per_k, 1),
+        'list_ms_per_10k_eager_decoded': round(eager_s * 1000 * per_k, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help='case summaries to write (default: 10000)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
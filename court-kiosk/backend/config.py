@@ -14,6 +14,15 @@ class Config:
     # Database configuration
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///court_kiosk.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Engine tuning (utils/db_profiles.py): sqlite, postgres, serverless or none; unset = from DATABASE_URL
+    DB_PROFILE = os.getenv('DB_PROFILE', '').lower()
+    # postgres profile: connections per worker process, plus overflow under bursts
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '15000'))
+    # sqlite profile: how long a writer waits for the lock before "database is locked"
+    DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
     
     # Email configuration
     EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
@@ -26,6 +35,10 @@ class Config:
     RESEND_API_KEY = os.getenv('RESEND_API_KEY')
     RESEND_FROM_DOMAIN = os.getenv('RESEND_FROM_DOMAIN')
     RESEND_FROM_EMAIL = os.getenv('RESEND_FROM_EMAIL')
+    # Alternate API endpoint (e.g. the load test's fake Resend); unset = api.resend.com
+    RESEND_API_URL = os.getenv('RESEND_API_URL')
+    # Where undeliverable client emails go for manual forwarding (Resend testing mode)
+    FALLBACK_EMAIL = os.getenv('FALLBACK_EMAIL')
     
     # Service endpoints
     SEARCH_SERVICE_URL = os.getenv('SEARCH_SERVICE_URL', 'http://localhost:8000')
@@ -34,6 +47,7 @@ class Config:
     
     # API Keys
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # unset = api.openai.com
     GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
     SUPABASE_URL = os.getenv('SUPABASE_URL')
     SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
@@ -59,6 +73,8 @@ class Config:
 
     # Optional shared secret for kiosk LLM endpoints (X-Kiosk-Key header)
     KIOSK_API_KEY = os.getenv('KIOSK_API_KEY')
+    # Per-kiosk keys instead ("lobby-1=<key>,lobby-2=<key>"): each kiosk gets its own rate-limit budget
+    KIOSK_API_KEYS = os.getenv('KIOSK_API_KEYS', '')
 
     # CORS — comma-separated allowlist. Never default to '*'
     _cors_raw = os.getenv('CORS_ORIGINS', _DEFAULT_CORS).strip()
@@ -68,8 +84,87 @@ class Config:
     else:
         CORS_ORIGINS = [o.strip() for o in _cors_raw.split(',') if o.strip()]
     
+    # County reference data cache (categories/content/staff/forms), seconds
+    REFERENCE_CACHE_TTL = int(os.getenv('REFERENCE_CACHE_TTL', '300'))
+
+    # Flow JSONs compiled by utils/flow_graph.py (defaults to the frontend's public data)
+    FLOWS_DIR = os.getenv('FLOWS_DIR', os.path.abspath(
+        os.path.join(os.path.dirname(__file__), '..', 'frontend', 'public', 'data')
+    ))
+
+    # How often (seconds) per-node dwell statistics are reloaded from the database
+    FLOW_STATS_TTL = int(os.getenv('FLOW_STATS_TTL', '600'))
+
+    # Call-next routing: 'skills' (language/specialty aware, see utils/facilitator_scheduler.py) or 'fifo'
+    QUEUE_SCHEDULER = os.getenv('QUEUE_SCHEDULER', 'skills').lower()
+    # Minutes of waiting that promote an entry by one priority level
+    SCHEDULER_AGING_MINUTES = float(os.getenv('SCHEDULER_AGING_MINUTES', '30'))
+
+    # Hours a kiosk flow checkpoint stays resumable after its last sync
+    FLOW_CHECKPOINT_TTL_HOURS = int(os.getenv('FLOW_CHECKPOINT_TTL_HOURS', '24'))
+
+    # Retention (utils/retention.py, `flask --app app retention`)
+    # Days after which finished queue entries lose names/contact details/free text
+    RETENTION_PII_DAYS = int(os.getenv('RETENTION_PII_DAYS', '30'))
+    # Days after which finished queue entries and case summaries are archived and deleted
+    RETENTION_DAYS = int(os.getenv('RETENTION_DAYS', '90'))
+    AUDIT_LOG_RETENTION_DAYS = int(os.getenv('AUDIT_LOG_RETENTION_DAYS', '365'))
+    RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', os.path.join(os.path.dirname(__file__), 'archive'))
+    # Keep PII columns in the archive files (default: left out)
+    RETENTION_ARCHIVE_PII = os.getenv('RETENTION_ARCHIVE_PII', 'false').lower() == 'true'
+    RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', '500'))
+
+    # Socket.IO pub/sub backplane, required when running more than one worker
+    # (redis://..., or sqlite:///path for a single host without Redis)
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.getenv('SOCKETIO_CHANNEL', 'court-kiosk')
+    # Queue broadcasts requested within this many ms are sent as one (0 = send immediately)
+    BROADCAST_COALESCE_MS = int(os.getenv('BROADCAST_COALESCE_MS', '100'))
+
+    # Concurrency model (utils/concurrency.py): auto, eventlet or threading
+    ASYNC_MODE = os.getenv('ASYNC_MODE', 'auto').lower()
+    # Run PDF rendering and attachment encoding in eventlet's native thread pool
+    CPU_OFFLOAD = os.getenv('CPU_OFFLOAD', 'true').lower() == 'true'
+
+    # Rate limiting (utils/rate_limits.py), keyed per staff user / kiosk / anonymous IP.
+    # Shared counter store (redis://...); unset = the Socket.IO backplane's Redis, else per-process memory
+    RATELIMIT_STORAGE_URL = os.getenv('RATELIMIT_STORAGE_URL')
+    RATELIMIT_STRATEGY = os.getenv('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    # Budget per caller for routes without a limit of their own (one limit = one store round trip)
+    RATELIMIT_USER_LIMIT = os.getenv('RATELIMIT_USER_LIMIT', '300 per minute')
+    RATELIMIT_KIOSK_LIMIT = os.getenv('RATELIMIT_KIOSK_LIMIT', '300 per minute')
+    RATELIMIT_IP_LIMIT = os.getenv('RATELIMIT_IP_LIMIT', '100 per minute')
+    # Distinct X-Kiosk-Id values (shared KIOSK_API_KEY) one address may use per hour; more share one budget
+    RATELIMIT_KIOSK_IDS_PER_IP = int(os.getenv('RATELIMIT_KIOSK_IDS_PER_IP', '20'))
+    # Turn per-client rate limits off (load tests from one address only)
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'
+
+    # Bearer token required by GET /api/metrics. Unset, the endpoint is only
+    # served in development (FLASK_ENV=development or FLASK_DEBUG=true)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    METRICS_OPEN = not METRICS_TOKEN and (
+        os.getenv('FLASK_ENV') == 'development' or os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+    )
+
+    # Per-request SQL profiling (X-Query-* headers, N+1 warnings); dev/staging only
+    SQL_PROFILE = os.getenv('SQL_PROFILE', 'false').lower() == 'true'
+    SQL_PROFILE_REPEAT_THRESHOLD = int(os.getenv('SQL_PROFILE_REPEAT_THRESHOLD', '3'))
+
+    # Request tracing to OTLP/JSON lines: export this fraction of requests,
+    # plus any request slower than TRACE_SLOW_MS (both 0 = tracing off)
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+    TRACE_SLOW_MS = float(os.getenv('TRACE_SLOW_MS', '0'))
+    TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', os.path.join(os.path.dirname(__file__), 'traces', 'traces.jsonl'))
+    # Callers (IPs/CIDRs) allowed to force sampling with the traceparent flag
+    TRACE_TRUSTED_PARENTS = os.getenv('TRACE_TRUSTED_PARENTS', '')
+
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # json or text
+    # Per-logger overrides and INFO/DEBUG sampling, e.g. "werkzeug=WARNING" / "utils.email_service=0.1"
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+    LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', '')
+    LOG_REDACT_PII = os.getenv('LOG_REDACT_PII', 'true').lower() == 'true'
     
     # Server configuration
     PORT = int(os.getenv('PORT', '5001'))
@@ -4,7 +4,7 @@ Consolidates all email functionality into clean, focused endpoints
 """
 
 from flask import Blueprint, request, jsonify
-from utils.email_service import EmailService
+from utils.services import get_email_service
 from utils.validation import validate_email, validate_phone_number, validate_name
 from utils.auth_service import AuthService
 from config import Config
@@ -14,8 +14,7 @@ import uuid
 # Create blueprint for email routes
 email_bp = Blueprint('email', __name__, url_prefix='/api/email')
 
-# Initialize email service
-email_service = EmailService()
+# Email service is created on first use (see utils/services.py)
 
 @email_bp.route('/send-case-summary', methods=['POST'])
 @AuthService.require_kiosk_or_auth
@@ -55,7 +54,7 @@ def send_case_summary():
         
         case_data['user_email'] = email
         include_queue = request.json.get('include_queue', False)
-        result = email_service.send_case_email(case_data, include_queue)
+        result = get_email_service().send_case_email(case_data, include_queue)
         
         if result.get('success'):
             return jsonify({
@@ -108,7 +107,7 @@ def send_queue_notification():
             ]
         }
         
-        result = email_service.send_case_email(case_data, include_queue=True)
+        result = get_email_service().send_case_email(case_data, include_queue=True)
         
         if result.get('success'):
             return jsonify({
@@ -154,7 +153,7 @@ def send_facilitator_notification():
             "Assist the client when ready"
         ]
         
-        result = email_service.send_case_email(case_data)
+        result = get_email_service().send_case_email(case_data)
         
         if result.get('success'):
             return jsonify({
@@ -178,6 +177,7 @@ def send_facilitator_notification():
 def email_health():
     """Health check for email service"""
     try:
+        email_service = get_email_service()
         if not email_service.from_email:
             return jsonify({
                 'status': 'unhealthy',
@@ -215,7 +215,7 @@ def send_case_summary_enhanced():
                 'error': 'Missing case_responses'
             }), 400
         
-        result = email_service.send_complete_case_summary_email(
+        result = get_email_service().send_complete_case_summary_email(
             user_session_id=user_session_id,
             case_responses=case_responses,
             queue_number=queue_number
@@ -3,6 +3,7 @@ from datetime import datetime
 import json
 import hashlib
 import secrets
+from utils.storage_codec import decode_json, decode_text
 
 db = SQLAlchemy()
 
@@ -12,9 +13,10 @@ class CaseSummary(db.Model):
     user_id = db.Column(db.String(255), nullable=True)  # Optional user identifier
     case_number = db.Column(db.String(50), nullable=True)  # Optional until known
     flow_type = db.Column(db.String(50), nullable=False)  # e.g. 'DVRO', 'Civil', etc.
-    summary_json = db.Column(db.Text, nullable=False)  # JSON string with all case details
-    required_forms = db.Column(db.Text, nullable=True)  # JSON array of form codes
-    next_steps = db.Column(db.Text, nullable=True)  # JSON array of next steps
+    # Blob columns go through utils/storage_codec.py and are only loaded when accessed
+    summary_json = db.deferred(db.Column(db.Text, nullable=False), group='details')  # All case details
+    required_forms = db.deferred(db.Column(db.Text, nullable=True), group='details')  # JSON array of form codes
+    next_steps = db.deferred(db.Column(db.Text, nullable=True), group='details')  # JSON array of next steps
     user_email = db.Column(db.String(255), nullable=True)
     user_name = db.Column(db.String(255), nullable=True)
     language = db.Column(db.String(10), default='en')
@@ -26,9 +28,9 @@ class CaseSummary(db.Model):
             'user_id': self.user_id,
             'case_number': self.case_number,
             'flow_type': self.flow_type,
-            'summary_json': json.loads(self.summary_json) if self.summary_json else {},
-            'required_forms': json.loads(self.required_forms) if self.required_forms else [],
-            'next_steps': json.loads(self.next_steps) if self.next_steps else [],
+            'summary_json': decode_json(self.summary_json, {}),
+            'required_forms': decode_json(self.required_forms, []),
+            'next_steps': decode_json(self.next_steps, []),
             'user_email': self.user_email,
             'user_name': self.user_name,
             'language': self.language,
@@ -156,14 +158,15 @@ class QueueEntry(db.Model):
     user_email = db.Column(db.String(255), nullable=True)
     phone_number = db.Column(db.String(50), nullable=True)
     language = db.Column(db.String(10), default='en')
-    status = db.Column(db.String(50), default='waiting')  # waiting, in_progress, completed, cancelled
+    status = db.Column(db.String(50), default='waiting')  # waiting, called, in_progress, completed, cancelled, no_show
     current_node = db.Column(db.String(100), nullable=True)
-    conversation_summary = db.Column(db.Text, nullable=True)
-    documents_needed = db.Column(db.Text, nullable=True)
+    # Blob columns are only loaded when accessed (or with undefer_group('details'))
+    conversation_summary = db.deferred(db.Column(db.Text, nullable=True), group='details')
+    documents_needed = db.deferred(db.Column(db.Text, nullable=True), group='details')  # utils/storage_codec.py
     estimated_wait_time = db.Column(db.Integer, nullable=True)  # in minutes
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    facilitator_notes = db.Column(db.Text, nullable=True)
+    facilitator_notes = db.deferred(db.Column(db.Text, nullable=True), group='details')  # utils/storage_codec.py
     
     def to_dict(self):
         return {
@@ -179,17 +182,71 @@ class QueueEntry(db.Model):
             'status': self.status,
             'current_node': self.current_node,
             'conversation_summary': self.conversation_summary,
-            'documents_needed': json.loads(self.documents_needed) if self.documents_needed else [],
+            'documents_needed': decode_json(self.documents_needed, []),
             'estimated_wait_time': self.estimated_wait_time,
             'timestamp': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'facilitator_notes': self.facilitator_notes
+            'facilitator_notes': decode_text(self.facilitator_notes)
         }
 
+class QueueEvent(db.Model):
+    """Append-only log of queue entry status transitions"""
+    __tablename__ = 'queue_event'
+    __table_args__ = (
+        db.Index('ix_queue_event_created_at', 'created_at'),
+        db.Index('ix_queue_event_entry_created', 'queue_entry_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    queue_entry_id = db.Column(db.Integer, db.ForeignKey('queue_entry.id'), nullable=False)
+    from_status = db.Column(db.String(20), nullable=True)  # None when the entry is created
+    to_status = db.Column(db.String(20), nullable=False)  # waiting, called, in_progress, completed, cancelled, no_show
+    actor_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    actor = db.Column(db.String(50), nullable=True)  # kiosk, system, ... when not a staff user
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'queue_entry_id': self.queue_entry_id,
+            'from_status': self.from_status,
+            'to_status': self.to_status,
+            'actor_user_id': self.actor_user_id,
+            'actor': self.actor,
+            'created_at': self.created_at.isoformat()
+        }
+
+class QueueRollup(db.Model):
+    """Pre-aggregated queue counters per hour/day, case type and language"""
+    __tablename__ = 'queue_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'case_type', 'language', name='uq_queue_rollup_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(5), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    case_type = db.Column(db.String(100), nullable=False, default='')
+    language = db.Column(db.String(10), nullable=False, default='')
+    arrivals = db.Column(db.Integer, nullable=False, default=0)
+    called = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    cancelled = db.Column(db.Integer, nullable=False, default=0)
+    no_shows = db.Column(db.Integer, nullable=False, default=0)
+    wait_seconds = db.Column(db.Float, nullable=False, default=0.0)  # sum over `called`
+    service_seconds = db.Column(db.Float, nullable=False, default=0.0)  # sum over `service_count`
+    service_count = db.Column(db.Integer, nullable=False, default=0)
+
 class FlowProgress(db.Model):
     """Track user progress through flowchart nodes"""
+    __table_args__ = (
+        # Replayed kiosk batches are deduplicated on this (NULL sequences never collide)
+        db.Index('uq_flow_progress_entry_sequence', 'queue_entry_id', 'sequence', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     queue_entry_id = db.Column(db.Integer, db.ForeignKey('queue_entry.id'), nullable=False)
+    sequence = db.Column(db.Integer, nullable=True)  # Step number within the entry's path
     node_id = db.Column(db.String(100), nullable=False)
     node_text = db.Column(db.Text, nullable=False)
     user_response = db.Column(db.Text, nullable=True)
@@ -199,12 +256,49 @@ class FlowProgress(db.Model):
         return {
             'id': self.id,
             'queue_entry_id': self.queue_entry_id,
+            'sequence': self.sequence,
             'node_id': self.node_id,
             'node_text': self.node_text,
             'user_response': self.user_response,
             'timestamp': self.timestamp.isoformat()
         }
 
+class FlowCheckpoint(db.Model):
+    """Last synced position of a kiosk flow session, resumable from any kiosk"""
+    __tablename__ = 'flow_checkpoint'
+
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(64), unique=True, nullable=False)  # Client-generated session token
+    flow_id = db.Column(db.String(100), nullable=False)
+    flow_version = db.Column(db.String(50), nullable=True)  # Path indexes are only valid for this version
+    path = db.Column(db.Text, nullable=False, default='')  # Encoded node indexes (utils/flow_checkpoints.py)
+    answers = db.Column(db.Text, nullable=True)  # JSON object
+    version = db.Column(db.Integer, nullable=False, default=1)  # Optimistic concurrency counter
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class FlowNodeDwell(db.Model):
+    """Observed time users spend on a flowchart node (from FlowProgress timestamps)"""
+    node_id = db.Column(db.String(100), primary_key=True)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    mean_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'node_id': self.node_id,
+            'sample_count': self.sample_count,
+            'mean_seconds': self.mean_seconds,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class JobCursor(db.Model):
+    """Watermark for incremental background jobs (last processed row id)"""
+    name = db.Column(db.String(50), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class FacilitatorCase(db.Model):
     """Cases assigned to facilitators for review"""
     id = db.Column(db.Integer, primary_key=True)
@@ -1,15 +1,41 @@
+import logging
 from datetime import datetime, timedelta
-import json
+from sqlalchemy import func
+from sqlalchemy.orm import undefer_group
 from models import db, QueueEntry, FlowProgress, FacilitatorCase, CaseType
 from openai import OpenAI
 from config import Config
+from utils.queue_claim import claim_next_entry
+from utils.facilitator_scheduler import scheduler, facilitator_directory
+from utils.wait_time_predictor import wait_time_predictor
+from utils.queue_events import transition, record_created, claimed_at
+from utils.progress_ingest import ingest_progress, MAX_STEPS_PER_BATCH
+from utils.storage_codec import encode_json
+from utils.metrics import track_llm_completion
+
+logger = logging.getLogger(__name__)
+
+# Completed entries shown on the status board
+RECENT_COMPLETED_LIMIT = 20
+
+
+def _refresh_wait_estimates():
+    """Recompute waiting entries' estimates after a committed queue change.
+
+    A failure only leaves estimates stale; it must not report the change as failed.
+    """
+    try:
+        wait_time_predictor.refresh_estimates()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Wait-time estimate refresh failed: {e}")
 
 class QueueManager:
     def __init__(self, openai_client=None):
         if openai_client is not None:
             self.client = openai_client
         elif Config.OPENAI_API_KEY:
-            self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+            self.client = OpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL)
         else:
             self.client = None
         
@@ -23,12 +49,12 @@ class QueueManager:
     
     def add_to_queue(self, case_type, user_name=None, user_email=None, phone_number=None, language='en', answers=None, history=None, summary=None):
         """Add a new case to the queue with appropriate priority"""
-        print(f"Adding to queue: case_type={case_type}, user_name={user_name}, language={language}")
+        logger.debug("Adding to queue", extra={'case_type': case_type, 'language': language})
         
         # Get case type info
         case_info = CaseType.query.filter_by(code=case_type, is_active=True).first()
         if not case_info:
-            print(f"Case type {case_type} not found, creating default")
+            logger.warning(f"Case type {case_type} not found, creating default")
             # Create a default case type if not found
             case_info = CaseType(
                 name="Domestic Violence Restraining Order",
@@ -45,18 +71,14 @@ class QueueManager:
                 db.session.commit()
             except Exception as e:
                 db.session.rollback()
-                import logging
-                logger = logging.getLogger(__name__)
                 logger.error(f"Failed to create case type {case_type}: {e}")
                 raise
         
         priority_level = case_info.priority_level
         queue_number = self.generate_queue_number(priority_level, case_type)
         
-        print(f"Generated queue number: {queue_number}")
-        
         # Calculate estimated wait time based on queue position
-        wait_time = self.calculate_wait_time(priority_level)
+        wait_time = self.calculate_wait_time(priority_level, case_type)
         
         # Process summary data if provided
         conversation_summary = None
@@ -89,93 +111,74 @@ class QueueManager:
             language=language,
             estimated_wait_time=wait_time,
             conversation_summary=conversation_summary,
-            documents_needed=json.dumps(documents_needed) if documents_needed else None
+            documents_needed=encode_json(documents_needed) if documents_needed else None
         )
         
-        print(f"Created queue entry: {queue_entry.queue_number}")
-        
         # Create queue entry with proper transaction handling
         try:
             db.session.add(queue_entry)
             db.session.flush()  # Get ID without committing
+            record_created(queue_entry)
             
-            # Record initial progress if history provided (same transaction)
+            # Record initial progress if history provided (same transaction, one INSERT)
             if history and isinstance(history, list):
-                for node_id in history:
-                    progress = FlowProgress(
-                        queue_entry_id=queue_entry.id,
-                        node_id=node_id,
-                        node_text=f"Completed step: {node_id}",
-                        user_response=None
-                    )
-                    db.session.add(progress)
-                
-                # Update current node to last completed step
-                if history:
-                    queue_entry.current_node = history[-1]
+                ingest_progress(queue_entry, [
+                    {'sequence': sequence, 'node_id': node_id}
+                    for sequence, node_id in enumerate(history[:MAX_STEPS_PER_BATCH])
+                ])
             
             # Commit all at once
             db.session.commit()
-            
-            print(f"Queue entry saved to database: {queue_entry.queue_number}")
-            return queue_entry
         except Exception as e:
             db.session.rollback()
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"Failed to add queue entry: {e}")
             raise
+        
+        _refresh_wait_estimates()
+        logger.info("Queue entry created", extra={
+            'queue_number': queue_entry.queue_number, 'case_type': case_type, 'priority': priority_level,
+        })
+        return queue_entry
     
     def get_next_priority_number(self, priority_level):
         """Get the next sequential number for a priority level"""
         last_entry = QueueEntry.query.filter_by(priority_level=priority_level).order_by(QueueEntry.priority_number.desc()).first()
         return 1 if not last_entry else last_entry.priority_number + 1
     
-    def calculate_wait_time(self, priority_level):
-        """Calculate estimated wait time based on priority and current queue"""
-        # Base times per priority level (in minutes)
-        base_times = {
-            'A': 15,  # DV cases - highest priority
-            'B': 30,  # Civil harassment, elder abuse
-            'C': 45,  # Workplace violence, other restraining orders
-            'D': 60   # General questions, form assistance
-        }
-        
-        # Count people ahead in same or higher priority
-        ahead_count = QueueEntry.query.filter(
-            QueueEntry.status == 'waiting',
-            QueueEntry.priority_level <= priority_level
-        ).count()
-        
-        base_time = base_times.get(priority_level, 30)
-        return base_time + (ahead_count * 5)  # 5 minutes per person ahead
+    def calculate_wait_time(self, priority_level, case_type=None):
+        """Estimated wait for a new arrival, from observed service times (see utils/wait_time_predictor.py)"""
+        return wait_time_predictor.estimate_new(priority_level, case_type)
     
-    def get_queue_status(self):
-        """Get current queue status for display"""
-        print("Getting queue status...")
-        
-        waiting = QueueEntry.query.filter_by(status='waiting').order_by(
+    def get_queue_status(self, recent_completed=RECENT_COMPLETED_LIMIT):
+        """Get current queue status for display
+
+        Only the most recently completed entries are returned; totals come
+        from a single grouped count rather than loading every past entry.
+        """
+        details = undefer_group('details')  # to_dict returns the blob columns
+        waiting = QueueEntry.query.options(details).filter_by(status='waiting').order_by(
             QueueEntry.priority_level,
             QueueEntry.priority_number
         ).all()
         
-        in_progress = QueueEntry.query.filter_by(status='in_progress').all()
+        in_progress = QueueEntry.query.options(details).filter_by(status='in_progress').all()
         
-        completed = QueueEntry.query.filter_by(status='completed').all()
+        completed = QueueEntry.query.options(details).filter_by(status='completed').order_by(
+            QueueEntry.updated_at.desc()
+        ).limit(recent_completed).all()
         
-        print(f"Found {len(waiting)} waiting, {len(in_progress)} in progress, {len(completed)} completed")
+        counts = dict(db.session.query(QueueEntry.status, func.count(QueueEntry.id)).filter(
+            QueueEntry.status.in_(('waiting', 'in_progress', 'completed'))
+        ).group_by(QueueEntry.status).all())
         
-        result = {
+        return {
             'waiting': [entry.to_dict() for entry in waiting],
             'in_progress': [entry.to_dict() for entry in in_progress],
             'completed': [entry.to_dict() for entry in completed],
-            'total_waiting': len(waiting),
-            'total_in_progress': len(in_progress),
-            'total_completed': len(completed)
+            'total_waiting': counts.get('waiting', 0),
+            'total_in_progress': counts.get('in_progress', 0),
+            'total_completed': counts.get('completed', 0)
         }
-        
-        print(f"Queue status result: {result}")
-        return result
     
     def update_progress(self, queue_number, node_id, node_text, user_response=None):
         """Update user progress through the flowchart"""
@@ -185,12 +188,16 @@ class QueueManager:
         
         # Update current node
         queue_entry.current_node = node_id
-        queue_entry.status = 'in_progress'
+        transition(queue_entry, 'in_progress', actor='kiosk')
         queue_entry.updated_at = datetime.utcnow()
         
         # Record progress
+        last_sequence = db.session.query(func.max(FlowProgress.sequence)).filter(
+            FlowProgress.queue_entry_id == queue_entry.id
+        ).scalar()
         progress = FlowProgress(
             queue_entry_id=queue_entry.id,
+            sequence=0 if last_sequence is None else last_sequence + 1,
             node_id=node_id,
             node_text=node_text,
             user_response=user_response
@@ -202,11 +209,28 @@ class QueueManager:
             return queue_entry
         except Exception as e:
             db.session.rollback()
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"Failed to update progress for queue {queue_number}: {e}")
             raise
     
+    def record_progress_batch(self, queue_number, steps):
+        """Store a path or buffered chunk of steps with one bulk insert
+
+        Steps already stored under the same sequence are skipped, so a kiosk
+        can safely resend a chunk. Returns the counts from ``ingest_progress``.
+        """
+        queue_entry = QueueEntry.query.filter_by(queue_number=queue_number).first()
+        if not queue_entry:
+            raise ValueError(f"Queue entry not found: {queue_number}")
+        
+        try:
+            result = ingest_progress(queue_entry, steps)
+            db.session.commit()
+            return result
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to record progress batch for queue {queue_number}: {e}")
+            raise
+    
     def generate_summary(self, queue_number):
         """Generate a summary of the user's progress for facilitators"""
         queue_entry = QueueEntry.query.filter_by(queue_number=queue_number).first()
@@ -243,7 +267,8 @@ class QueueManager:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = track_llm_completion(
+                'queue_summary', self.client.chat.completions.create,
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=300
@@ -259,8 +284,6 @@ class QueueManager:
             return summary
         except Exception as e:
             db.session.rollback()
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"Failed to update summary for queue {queue_number}: {e}")
             raise
     
@@ -291,39 +314,45 @@ class QueueManager:
             return facilitator_case
         except Exception as e:
             db.session.rollback()
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"Failed to assign case {queue_number} to facilitator: {e}")
             raise
     
     def get_next_case(self, facilitator_id=None):
         """Get the next case in the queue for a facilitator"""
-        # Priority order: A -> B -> C -> D, then by creation time
-        next_case = QueueEntry.query.filter_by(status='waiting').order_by(
-            QueueEntry.priority_level,
-            QueueEntry.priority_number
-        ).first()
+        # Priority order: A -> B -> C -> D, then by ticket number; claimed atomically
+        try:
+            profile = facilitator_directory.get(facilitator_id)
+            if profile is not None:
+                # Language/specialty aware routing for a known facilitator
+                next_case = scheduler.claim_next('in_progress', profile)
+            else:
+                next_case = claim_next_entry('in_progress', order_by=(
+                    QueueEntry.priority_level,
+                    QueueEntry.priority_number,
+                    QueueEntry.id
+                ), actor='system')
+        except Exception:
+            db.session.rollback()
+            raise
         
         if next_case:
             try:
-                next_case.status = 'in_progress'
                 db.session.commit()
-                
-                # Assign to facilitator if specified (non-transactional)
-                if facilitator_id:
-                    try:
-                        self.assign_to_facilitator(next_case.queue_number, facilitator_id)
-                    except Exception as assign_error:
-                        import logging
-                        logger = logging.getLogger(__name__)
-                        logger.error(f"Failed to assign to facilitator: {assign_error}")
-                        # Status update still succeeded
             except Exception as e:
                 db.session.rollback()
-                import logging
-                logger = logging.getLogger(__name__)
                 logger.error(f"Failed to update case status: {e}")
                 raise
+            
+            wait_time_predictor.observe_claim(facilitator_id)
+            _refresh_wait_estimates()
+            
+            # Assign to facilitator if specified (non-transactional)
+            if facilitator_id:
+                try:
+                    self.assign_to_facilitator(next_case.queue_number, facilitator_id)
+                except Exception as assign_error:
+                    logger.error(f"Failed to assign to facilitator: {assign_error}")
+                    # Status update still succeeded
         
         return next_case
     
@@ -332,14 +361,18 @@ class QueueManager:
         queue_entry = QueueEntry.query.filter_by(queue_number=queue_number).first()
         if queue_entry:
             try:
-                queue_entry.status = 'completed'
-                queue_entry.updated_at = datetime.utcnow()
+                started_at = claimed_at(queue_entry)
+                transition(queue_entry, 'completed', actor='system', started_at=started_at)
                 db.session.commit()
             except Exception as e:
                 db.session.rollback()
-                import logging
-                logger = logging.getLogger(__name__)
                 logger.error(f"Failed to complete case {queue_number}: {e}")
                 raise
+            
+            try:
+                wait_time_predictor.record_completion(queue_entry, started_at)
+            except Exception as e:
+                logger.error(f"Could not record service time for {queue_number}: {e}")
+            _refresh_wait_estimates()
         
         return queue_entry
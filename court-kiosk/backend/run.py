@@ -27,7 +27,8 @@ def main():
     
     # Import and run the app
     try:
-        from app import app
+        from app import app, init_database
+        init_database()
         print("🚀 Starting Court Kiosk Backend Server...")
         print("📡 Backend will be available at: http://localhost:4000")
         print("🔗 API Health Check: http://localhost:4000/api/health")
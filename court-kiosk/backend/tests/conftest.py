@@ -0,0 +1,142 @@
+"""
+Backend test configuration
+
+    cd court-kiosk/backend && python -m pytest tests
+
+Tests run against a throwaway SQLite file. Point TEST_DATABASE_URL at a
+scratch Postgres database (e.g. postgresql+psycopg2://postgres@localhost/kiosk_test)
+to run them there as well; tests marked ``postgres`` exercise row locking and
+are skipped on SQLite. The schema is dropped and recreated for every run.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+ADMIN_USERNAME = 'test-admin'
+ADMIN_PASSWORD = 'test-admin-password'
+
+# Config reads the environment at import time, so this must run before app is imported
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or \
+    'sqlite:///' + os.path.join(tempfile.gettempdir(), 'court_kiosk_tests.db')
+os.environ.update({
+    'ASYNC_MODE': 'threading',
+    'RATELIMIT_ENABLED': 'false',
+    'ADMIN_USERNAME': ADMIN_USERNAME,
+    'ADMIN_PASSWORD': ADMIN_PASSWORD,
+    'LOG_LEVEL': 'WARNING',
+    'TRACE_SAMPLE_RATE': '0',
+    'TRACE_SLOW_MS': '0',
+})
+
+pytest_plugins = ['utils.query_budget']
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'postgres: needs row locking; runs only when TEST_DATABASE_URL is Postgres')
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ['DATABASE_URL'].startswith('postgres'):
+        return
+    skip = pytest.mark.skip(reason='set TEST_DATABASE_URL to a Postgres database')
+    for item in items:
+        if 'postgres' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def kiosk():
+    """The app module, on a freshly created schema"""
+    import app as kiosk_app
+    with kiosk_app.app.app_context():
+        kiosk_app.db.drop_all()
+    kiosk_app.init_database()
+    return kiosk_app
+
+
+@pytest.fixture
+def app_ctx(kiosk):
+    """Application context with every table emptied except the bootstrap admin"""
+    db = kiosk.db
+    with kiosk.app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        kiosk.ensure_bootstrap_admin()
+        yield kiosk.app
+        db.session.rollback()
+
+
+@pytest.fixture
+def client(kiosk, app_ctx):
+    return kiosk.app.test_client()
+
+
+@pytest.fixture
+def admin_headers(client):
+    response = client.post('/api/auth/login', json={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {'Authorization': f"Bearer {response.get_json()['session_token']}"}
+
+
+@pytest.fixture
+def waiting_entries(app_ctx):
+    """``waiting_entries(n)`` adds n waiting QueueEntry rows (oldest first) and returns their ids"""
+    from models import db, QueueEntry
+
+    def add(count, priority='C', case_type='DVRO', language='en'):
+        now = datetime.utcnow()
+        entries = [
+            QueueEntry(queue_number=f"{priority}{i:03d}-{os.urandom(2).hex()}", priority_level=priority,
+                       priority_number=i + 1, case_type=case_type, language=language, status='waiting',
+                       created_at=now - timedelta(minutes=count - i))
+            for i in range(count)
+        ]
+        db.session.add_all(entries)
+        db.session.commit()
+        return [entry.id for entry in entries]
+
+    return add
+
+
+@pytest.fixture
+def cyclic_flow():
+    """Flow document with a loop (a -> b -> c -> a), two ways out of it and a dead-end cycle (x <-> y)
+
+        start -> a -(no)-> end1
+                 a -(yes)-> b -> c -> a
+                                 c -> d -> end2
+        x <-> y
+    """
+    return {
+        'id': 'cyclic', 'version': '1', 'start': 'start',
+        'nodes': {
+            'start': {'type': 'start', 'text': 'Start'},
+            'a': {'type': 'decision', 'text': 'Continue?'},
+            'b': {'type': 'process', 'text': 'Fill FL-100', 'forms_add': ['FL-100']},
+            'c': {'type': 'process', 'text': 'Check'},
+            'd': {'type': 'process', 'text': 'Fill FL-105', 'forms_add': ['FL-105']},
+            'end1': {'type': 'end', 'text': 'Done early'},
+            'end2': {'type': 'end', 'text': 'Done'},
+            'x': {'type': 'process', 'text': 'Loop'},
+            'y': {'type': 'process', 'text': 'Loop back'},
+        },
+        'edges': [
+            {'from': 'start', 'to': 'a'},
+            {'from': 'a', 'to': 'end1', 'when': 'no'},
+            {'from': 'a', 'to': 'b', 'when': 'yes'},
+            {'from': 'b', 'to': 'c'},
+            {'from': 'c', 'to': 'a'},
+            {'from': 'c', 'to': 'd'},
+            {'from': 'd', 'to': 'end2'},
+            {'from': 'x', 'to': 'y'},
+            {'from': 'y', 'to': 'x'},
+        ],
+    }
@@ -0,0 +1,42 @@
+"""Monkey-patching decisions (utils/concurrency.py)"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip('eventlet')
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _run(args, **env):
+    # Fresh interpreters: patching cannot be undone in this one
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, PYTHONWARNINGS='ignore', **env)
+    return subprocess.run(args, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+
+
+def test_flask_cli_runs_unpatched(tmp_path):
+    result = _run([sys.executable, '-m', 'flask', '--app', 'app', 'routes'], ASYNC_MODE='auto',
+                  DATABASE_URL=f"sqlite:///{tmp_path / 'cli.db'}")
+
+    assert result.returncode == 0, result.stderr
+    assert 'monkey_patching' not in result.stderr
+    assert 'Working outside of' not in result.stderr
+
+
+def test_patching_imports_nothing_it_does_not_need():
+    script = textwrap.dedent('''
+        import sys
+        from utils.concurrency import monkey_patch
+        assert monkey_patch('eventlet') == 'eventlet'
+        import httpx
+        httpx.Client()  # loads httpcore, which probes for trio
+        print(sorted(name for name, module in sys.modules.items() if module is not None and name.split('.')[0] == 'trio'))
+    ''')
+    result = _run([sys.executable, '-c', script])
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '[]'
@@ -0,0 +1,105 @@
+"""Sending through Resend (utils/email_service.py)"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from config import Config
+from utils import email_service
+from utils.email_service import EmailService
+
+pytestmark = pytest.mark.skipif(email_service.resend is None, reason='resend is not installed')
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Payloads handed to ``resend.Emails.send``, and through which offload call"""
+    calls = {'payloads': [], 'offloaded': []}
+    real_offload = email_service.offload
+
+    def fake_send(payload):
+        calls['payloads'].append(payload)
+        return calls.get('response', {'id': 'email-1'})
+
+    def recording_offload(fn, *args, **kwargs):
+        calls['offloaded'].append(fn)
+        return real_offload(fn, *args, **kwargs)
+
+    monkeypatch.setattr(Config, 'RESEND_API_KEY', 're_test')
+    monkeypatch.setattr(email_service.resend.Emails, 'send', fake_send)
+    monkeypatch.setattr(email_service, 'offload', recording_offload)
+    return calls
+
+
+def test_sends_through_the_sdk_off_the_hub(sent):
+    attachment = {'filename': 'DV-100.pdf', 'content': 'JVBERi0xLjQK'}
+
+    assert EmailService()._send_email_with_attachments('jane@example.org', 'Your case', '<p>Hi</p>', [attachment])
+
+    assert sent['payloads'] == [{
+        'from': EmailService().from_email, 'to': ['jane@example.org'], 'subject': 'Your case',
+        'html': '<p>Hi</p>', 'attachments': [attachment],
+    }]
+    assert email_service.resend.Emails.send in sent['offloaded']
+
+
+def test_rejected_send_reports_failure(sent):
+    sent['response'] = {'message': 'Invalid `to` field'}
+
+    assert not EmailService()._send_email_with_attachments('jane@example.org', 'Your case', '<p>Hi</p>')
+
+
+def test_fallback_goes_through_the_same_path(sent, monkeypatch):
+    monkeypatch.setattr(Config, 'FALLBACK_EMAIL', 'clerk@example.org')
+    outcomes = iter([ConnectionError('resend unreachable'), {'id': 'fallback-1'}])
+
+    def flaky_send(payload):
+        sent['payloads'].append(payload)
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(email_service.resend.Emails, 'send', flaky_send)
+
+    assert EmailService()._send_email_with_attachments('jane@example.org', 'Your case', '<p>Hi</p>')
+    assert [p['to'] for p in sent['payloads']] == [['jane@example.org'], ['clerk@example.org']]
+    assert sent['offloaded'].count(flaky_send) == 2
+
+
+def test_slow_send_does_not_hold_the_eventlet_hub():
+    pytest.importorskip('eventlet')
+    # Fresh interpreter: monkey-patching cannot be undone in this one
+    script = textwrap.dedent('''
+        from utils.concurrency import monkey_patch, LoopLagMonitor
+        assert monkey_patch('eventlet') == 'eventlet'
+
+        import eventlet
+        from eventlet import patcher
+        from utils import email_service
+
+        blocking_sleep = patcher.original('time').sleep
+
+        def slow_send(payload):
+            blocking_sleep(0.3)  # a request that really blocks its thread
+            return {'id': 'email-1'}
+
+        email_service.resend.Emails.send = slow_send
+        service = email_service.EmailService()
+        monitor = LoopLagMonitor().start()
+        assert service._send_email_with_attachments('jane@example.org', 'Your case', '<p>Hi</p>')
+        eventlet.sleep(0.05)
+        print(monitor.stop()['max_ms'])
+    ''')
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, PYTHONWARNINGS='ignore', CPU_OFFLOAD='true',
+               RESEND_API_KEY='re_test')
+    result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert float(result.stdout.strip().splitlines()[-1]) < 100  # the send itself blocks for 300 ms
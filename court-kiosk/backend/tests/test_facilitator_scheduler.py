@@ -0,0 +1,94 @@
+"""Call-next through the facilitator scheduler (utils/facilitator_scheduler.py)"""
+
+import threading
+
+import pytest
+
+from models import db, QueueEntry
+from utils.facilitator_scheduler import scheduler
+
+
+def test_claim_next_takes_the_oldest_of_equal_priority(waiting_entries):
+    ids = waiting_entries(3)
+
+    entry = scheduler.claim_next('called')
+    db.session.commit()
+
+    assert entry.id == ids[0]
+    assert entry.status == 'called'
+
+
+def test_call_next_endpoints_share_the_queue(client, admin_headers, waiting_entries):
+    waiting_entries(2)
+
+    called = client.post('/api/call-next', headers=admin_headers)
+    admin = client.post('/api/admin/call-next', headers=admin_headers)
+    empty = client.post('/api/call-next', headers=admin_headers)
+
+    assert called.status_code == 200, called.get_data(as_text=True)
+    assert admin.status_code == 200, admin.get_data(as_text=True)
+    assert called.get_json()['queue_number'] != admin.get_json()['queue_entry']['queue_number']
+    assert empty.status_code == 404
+
+
+@pytest.mark.postgres
+def test_call_next_while_another_claim_is_open(kiosk, client, admin_headers, waiting_entries):
+    """/api/admin/call-next must not fail while a /api/call-next claim is still uncommitted"""
+    ids = waiting_entries(3)
+    # Separate case types so the claims do not also queue up on the same queue_rollup row
+    for entry_id, case_type in zip(ids, ('DVRO', 'CIVIL', 'ELDER')):
+        QueueEntry.query.filter_by(id=entry_id).update({'case_type': case_type})
+    db.session.commit()
+    numbers = {e.id: e.queue_number for e in QueueEntry.query.filter(QueueEntry.id.in_(ids))}
+    claimed, release, held = threading.Event(), threading.Event(), {}
+
+    def hold_claim():
+        with kiosk.app.app_context():
+            held['id'] = scheduler.claim_next('called').id
+            claimed.set()
+            release.wait(10)
+            db.session.commit()
+
+    holder = threading.Thread(target=hold_claim)
+    holder.start()
+    try:
+        assert claimed.wait(10)
+        response = client.post('/api/admin/call-next', headers=admin_headers)
+    finally:
+        release.set()
+        holder.join(10)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert held['id'] == ids[0]
+    assert response.get_json()['queue_entry']['queue_number'] == numbers[ids[1]]
+
+
+@pytest.mark.postgres
+def test_concurrent_call_next_from_both_endpoints(kiosk, admin_headers, waiting_entries):
+    callers = 6
+    waiting_entries(callers)
+    barrier = threading.Barrier(callers)
+    responses = []
+
+    def call(path):
+        client = kiosk.app.test_client()
+        barrier.wait(10)
+        responses.append((path, client.post(path, headers=admin_headers)))
+
+    threads = [
+        threading.Thread(target=call, args=('/api/call-next' if i % 2 else '/api/admin/call-next',))
+        for i in range(callers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    failures = [(path, r.status_code, r.get_data(as_text=True)) for path, r in responses if r.status_code != 200]
+    assert not failures
+    numbers = [
+        r.get_json()['queue_number'] if path == '/api/call-next' else r.get_json()['queue_entry']['queue_number']
+        for path, r in responses
+    ]
+    assert len(numbers) == callers and len(set(numbers)) == callers
+    assert QueueEntry.query.filter_by(status='waiting').count() == 0
@@ -0,0 +1,83 @@
+"""Flow session checkpoints (utils/flow_checkpoints.py)"""
+
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.flow_checkpoints import (
+    CheckpointConflict, checkpoint_to_dict, decode_path, encode_path, load_checkpoint, save_checkpoint
+)
+from utils.flow_graph import flow_registry
+
+TOKEN = 'checkpoint-token-0001'
+
+
+def test_varint_round_trip():
+    path = [0, 1, 127, 128, 300, 16383, 16384, 2 ** 21]
+
+    encoded = encode_path(path)
+
+    assert decode_path(encoded) == path
+    assert '=' not in encoded
+    assert len(base64.urlsafe_b64decode(encode_path([127, 128, 16383]) + '==')) == 1 + 2 + 2
+    assert encode_path([]) == '' and decode_path('') == []
+    with pytest.raises(ValueError):
+        encode_path([3, -1])
+
+
+def test_create_update_and_stale_writer(app_ctx):
+    flow = flow_registry.get('dvro-flow')
+    path = [flow.start, 150, 151]
+
+    created = save_checkpoint(TOKEN, 'dvro-flow', path, {'DVCheck1': 'Yes'}, 0)
+    assert created.version == 1
+    view = checkpoint_to_dict(load_checkpoint(TOKEN))
+    assert view['path'] == path and view['node_ids'] == [flow.node_ids[i] for i in path]
+    assert view['answers'] == {'DVCheck1': 'Yes'} and not view['flow_changed']
+
+    assert save_checkpoint(TOKEN, 'dvro-flow', path + [152], {}, 1).version == 2
+    with pytest.raises(CheckpointConflict) as stale:
+        save_checkpoint(TOKEN, 'dvro-flow', path, {}, 1)
+    assert stale.value.current.version == 2
+    with pytest.raises(CheckpointConflict):
+        save_checkpoint(TOKEN, 'dvro-flow', path, {}, 0)
+    with pytest.raises(ValueError):
+        save_checkpoint(TOKEN, 'dvro-flow', [len(flow)], {}, 2)
+
+
+def test_stale_version_returns_409_with_the_stored_checkpoint(client):
+    url = f"/api/flow-checkpoints/{TOKEN}"
+    body = {'flow_id': 'gvro-flow', 'path': [0, 1], 'answers': {}, 'version': 0}
+
+    assert client.put(url, json=body).get_json()['version'] == 1
+    assert client.put(url, json=dict(body, version=1)).status_code == 200
+    stale = client.put(url, json=dict(body, version=1))
+
+    assert stale.status_code == 409
+    assert stale.get_json()['current']['version'] == 2
+
+
+def test_expired_checkpoints_are_gone_and_start_over(app_ctx):
+    save_checkpoint(TOKEN, 'gvro-flow', [0, 1, 2], {}, 0)
+    checkpoint = load_checkpoint(TOKEN)
+    after_expiry = checkpoint.expires_at + timedelta(seconds=1)
+
+    assert load_checkpoint(TOKEN, checkpoint.expires_at - timedelta(seconds=1)) is not None
+    assert load_checkpoint(TOKEN, after_expiry) is None
+    with pytest.raises(CheckpointConflict) as expired:
+        save_checkpoint(TOKEN, 'gvro-flow', [0, 1], {}, 1, now=after_expiry)
+    assert expired.value.current is None
+
+    restarted = save_checkpoint(TOKEN, 'gvro-flow', [0], {}, 0, now=after_expiry)
+    assert restarted.version == 1 and restarted.created_at == after_expiry
+    assert restarted.expires_at > after_expiry > datetime.utcnow()
+
+
+def test_finished_sessions_cannot_be_resumed(client):
+    url = f"/api/flow-checkpoints/{TOKEN}"
+    client.put(url, json={'flow_id': 'gvro-flow', 'path': [0, 1], 'answers': {'name': 'Jane'}, 'version': 0})
+
+    assert client.delete(url).get_json() == {'success': True, 'deleted': True}
+    assert client.get(url).status_code == 404
+    assert client.delete(url).get_json()['deleted'] is False
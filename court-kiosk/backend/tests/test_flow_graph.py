@@ -0,0 +1,86 @@
+"""Compiled flow graphs and the flow registry (utils/flow_graph.py)"""
+
+import copy
+import json
+import os
+
+from utils.flow_graph import FlowRegistry, compile_flow, flow_registry
+
+
+def _by_id(flow, values):
+    return {node_id: values[i] for i, node_id in enumerate(flow.node_ids)}
+
+
+def test_cycles_collapse_into_one_level(cyclic_flow):
+    flow = compile_flow(cyclic_flow)
+    depth = _by_id(flow, flow.depth)
+
+    assert depth['a'] == depth['b'] == depth['c'] == 1
+    assert (depth['start'], depth['end1'], depth['d'], depth['end2']) == (0, 2, 2, 3)
+    assert depth['x'] == depth['y']
+    assert flow.next_steps('a') == [
+        {'node_id': 'end1', 'text': 'Done early', 'type': 'end', 'condition': 'no'},
+        {'node_id': 'b', 'text': 'Fill FL-100', 'type': 'process', 'condition': 'yes'},
+    ]
+
+
+def test_remaining_steps_and_forms(cyclic_flow):
+    flow = compile_flow(cyclic_flow)
+
+    # Shortest is a BFS from the end nodes; longest counts the a-b-c loop once
+    assert {node_id: flow.remaining_steps(node_id) for node_id in ('start', 'a', 'b', 'c', 'd', 'end2')} == {
+        'start': (2, 3), 'a': (1, 2), 'b': (3, 3), 'c': (2, 2), 'd': (1, 1), 'end2': (0, 0),
+    }
+    assert flow.remaining_steps('x') is None and flow.remaining_steps('nowhere') is None
+    assert flow.progress_percentage(['start', 'a']) == 50.0
+    assert flow.progress_percentage(['start', 'a', 'end1']) == 100.0
+    assert flow.progress_percentage(['x']) is None
+
+    assert flow.reachable_forms('start') == {'FL-100', 'FL-105'}
+    assert flow.reachable_forms('c') == {'FL-100', 'FL-105'}  # back round the loop to b
+    assert flow.reachable_forms('d') == {'FL-105'} and flow.reachable_forms('end1') == set()
+    assert flow.forms_for_nodes(['start', 'a', 'b', 'unknown']) == {'FL-100'}
+
+
+def test_weighted_remaining_takes_the_cheapest_way_out(cyclic_flow):
+    flow = compile_flow(cyclic_flow)
+    weights = [{'b': 50.0}.get(node_id, 1.0) for node_id in flow.node_ids]
+
+    remaining = _by_id(flow, flow.weighted_remaining(weights))
+
+    assert remaining['end1'] == 1.0  # end nodes count themselves
+    assert remaining['a'] == 2.0
+    assert remaining['c'] == 3.0  # c -> d -> end2 and c -> a -> end1 tie
+    assert remaining['b'] == 53.0
+    assert remaining['x'] is None and remaining['y'] is None
+
+
+def test_bundled_flow_compiles_consistently():
+    flow = flow_registry.get('dvro-flow')
+    assert flow is not None and flow_registry.get('dv_flow_combined') is flow
+
+    with open(os.path.join(flow_registry.flows_dir, 'dv_flow_combined.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    for edge in data['edges']:
+        assert flow.index[edge['to']] in flow.successors[flow.index[edge['from']]]
+    for i in range(len(flow)):
+        if flow.is_end(i):
+            assert (flow.min_remaining[i], flow.max_remaining[i]) == (0, 0)
+        assert flow.min_remaining[i] <= flow.max_remaining[i]
+    assert flow.remaining_steps(flow.node_ids[flow.start])[0] > 0
+
+
+def test_adhoc_documents_are_cached_by_content(tmp_path, cyclic_flow):
+    (tmp_path / 'cyclic.json').write_text(json.dumps(cyclic_flow))
+    registry = FlowRegistry(str(tmp_path))
+
+    bundled = registry.get('cyclic')
+    assert registry.for_flow_data(copy.deepcopy(cyclic_flow)) is bundled
+
+    # Same id and version, different content: compiled on its own, once
+    edited = copy.deepcopy(cyclic_flow)
+    edited['edges'].append({'from': 'x', 'to': 'end2'})
+    adhoc = registry.for_flow_data(edited)
+    assert adhoc is not bundled and (adhoc.remaining_steps('x'), adhoc.remaining_steps('y')) == ((1, 1), (2, 2))
+    assert registry.for_flow_data(copy.deepcopy(edited)) is adhoc
+    assert registry.for_flow_data({'edges': []}) is None
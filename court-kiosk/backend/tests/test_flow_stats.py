@@ -0,0 +1,35 @@
+"""Remaining-time estimates from dwell times (utils/flow_stats.py)"""
+
+from models import db, FlowNodeDwell
+from utils.flow_graph import compile_flow, flow_registry
+from utils.flow_stats import DwellTimeModel, MIN_SAMPLES
+
+
+def test_type_defaults_until_enough_samples(app_ctx, cyclic_flow):
+    flow = compile_flow(cyclic_flow)
+    db.session.add(FlowNodeDwell(node_id='b', sample_count=MIN_SAMPLES - 1, mean_seconds=10))
+    db.session.commit()
+    model = DwellTimeModel(ttl_seconds=None)
+
+    # decision 180 + end 60; process 300 + that; b: another process on top
+    assert model.remaining_seconds(flow, 'a') == 240
+    assert model.remaining_seconds(flow, 'c') == 540
+    assert model.remaining_seconds(flow, 'b') == 840
+    assert model.remaining_seconds(flow, 'x') is None
+    assert model.remaining_seconds(flow, 'nowhere') is None
+
+    FlowNodeDwell.query.filter_by(node_id='b').update({'sample_count': MIN_SAMPLES})
+    db.session.commit()
+    assert model.remaining_seconds(flow, 'b') == 840  # cached until invalidated
+    model.invalidate()
+    assert model.remaining_seconds(flow, 'b') == 550
+
+
+def test_tables_are_per_flow(app_ctx, cyclic_flow):
+    model = DwellTimeModel(ttl_seconds=None)
+    shortcut = dict(cyclic_flow, edges=cyclic_flow['edges'] + [{'from': 'start', 'to': 'end1'}])
+
+    assert model.remaining_seconds(compile_flow(cyclic_flow), 'start') == 360  # start 120 + a 240
+    assert model.remaining_seconds(compile_flow(shortcut), 'start') == 180
+    bundled = flow_registry.get('dvro-flow')
+    assert model.remaining_seconds(bundled, bundled.node_ids[bundled.start]) > 0
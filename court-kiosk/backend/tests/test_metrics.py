@@ -0,0 +1,46 @@
+"""Prometheus endpoint and SQL timing (utils/metrics.py)"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from config import Config
+from models import db
+
+
+def test_metrics_need_a_token_outside_development(client, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', None)
+    monkeypatch.setattr(Config, 'METRICS_OPEN', False)
+    assert client.get('/api/metrics').status_code == 403
+
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', 'scrape-token')
+    assert client.get('/api/metrics').status_code == 401
+    scraped = client.get('/api/metrics', headers={'Authorization': 'Bearer scrape-token'})
+    assert scraped.status_code == 200
+    assert 'queue_depth' in scraped.get_data(as_text=True)
+
+
+def test_metrics_token_needs_the_bearer_scheme(client, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', 'secret')
+
+    for header in ('xxxxxxxsecret', 'secret', 'Bearer wrong', 'Bearer sécret'):
+        assert client.get('/api/metrics', headers={'Authorization': header}).status_code == 401, header
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+
+def test_open_metrics_in_development(client, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', None)
+    monkeypatch.setattr(Config, 'METRICS_OPEN', True)
+    assert client.get('/api/metrics').status_code == 200
+
+
+def test_failed_statements_do_not_leak_timer_entries(app_ctx):
+    connection = db.session.connection()
+    for _ in range(3):
+        with pytest.raises(DBAPIError):
+            db.session.execute(text('SELECT no_such_column FROM no_such_table'))
+        db.session.rollback()
+        connection = db.session.connection()
+
+    db.session.execute(text('SELECT 1'))
+    assert connection.info.get('metrics_query_start') == []
@@ -0,0 +1,43 @@
+"""Query budgets for the hot staff endpoints (utils/query_budget.py)"""
+
+import pytest
+
+from models import db, CaseSummary, QueueEntry
+
+
+@pytest.mark.parametrize('path', ['/api/queue', '/api/admin/queue'])
+def test_queue_list_does_not_grow_with_the_queue(client, admin_headers, waiting_entries, query_budget, path):
+    # Uncached entries are fetched in one batch, so 3 and 33 rows cost the same
+    waiting_entries(3)
+    with query_budget(6):
+        assert client.get(path, headers=admin_headers).status_code == 200
+
+    waiting_entries(30, priority='B', case_type='CIVIL', language='es')
+    with query_budget(6):
+        response = client.get(path, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert len(response.get_json()['queue']) == 33
+
+
+def test_case_details(client, admin_headers, waiting_entries, query_budget):
+    entry = db.session.get(QueueEntry, waiting_entries(1)[0])
+    entry.user_email = 'jane@example.org'
+    db.session.add(CaseSummary(flow_type='DVRO', summary_json='{"step": 2}', user_email='jane@example.org'))
+    db.session.commit()
+
+    with query_budget(5):
+        response = client.get(f'/api/case-details/{entry.queue_number}', headers=admin_headers)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.get_json()['enhanced_summary'] == {'step': 2}
+
+
+def test_admin_call_next(client, admin_headers, waiting_entries, query_budget):
+    waiting_entries(10)
+    # Covers auth, the audit row, the claim with its event and rollups, and the estimate refresh
+    with query_budget(22):
+        response = client.post('/api/admin/call-next', headers=admin_headers)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.get_json()['queue_entry']['status'] == 'in_progress'
@@ -0,0 +1,105 @@
+"""Atomic dequeue (utils/queue_claim.py)"""
+
+import threading
+
+import pytest
+
+from models import db, QueueEntry, QueueEvent
+from utils.queue_claim import claim_next_entry
+
+
+def _in_own_session(kiosk, fn):
+    """Run ``fn`` in a new app context (and so a new session and connection) on another thread"""
+    result = {}
+
+    def target():
+        with kiosk.app.app_context():
+            try:
+                result['value'] = fn()
+            except Exception as e:  # surfaced by the assertion in the test
+                result['error'] = e
+                db.session.rollback()
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, result
+
+
+def test_candidate_order_wins_over_queue_order(waiting_entries):
+    ids = waiting_entries(3)
+
+    entry = claim_next_entry(candidate_ids=list(reversed(ids)))
+    db.session.commit()
+
+    assert entry.id == ids[-1]
+    assert entry.status == 'in_progress'
+    assert QueueEvent.query.filter_by(queue_entry_id=entry.id, to_status='in_progress').count() == 1
+
+
+def test_taken_candidates_are_skipped(waiting_entries):
+    ids = waiting_entries(3)
+    QueueEntry.query.filter_by(id=ids[0]).update({'status': 'called'})
+    db.session.commit()
+
+    assert claim_next_entry(candidate_ids=ids).id == ids[1]
+
+
+def test_empty_queue_claims_nothing(app_ctx):
+    assert claim_next_entry() is None
+    assert claim_next_entry(candidate_ids=[]) is None
+
+
+@pytest.mark.postgres
+def test_open_claim_locks_only_the_claimed_row(kiosk, waiting_entries):
+    """A second facilitator must get the next candidate while the first claim is uncommitted"""
+    ids = waiting_entries(3)
+    # Separate case types so the claims do not also queue up on the same queue_rollup row
+    for entry_id, case_type in zip(ids, ('DVRO', 'CIVIL', 'ELDER')):
+        QueueEntry.query.filter_by(id=entry_id).update({'case_type': case_type})
+    db.session.commit()
+    first_claimed, release = threading.Event(), threading.Event()
+
+    def hold_first_claim():
+        entry_id = claim_next_entry(candidate_ids=ids).id
+        first_claimed.set()
+        release.wait(10)
+        db.session.commit()
+        return entry_id
+
+    holder, held = _in_own_session(kiosk, hold_first_claim)
+    try:
+        assert first_claimed.wait(10)
+        ranked = claim_next_entry(candidate_ids=ids)
+        fallback = claim_next_entry()
+        db.session.commit()
+    finally:
+        release.set()
+        holder.join(10)
+
+    assert 'error' not in held, held.get('error')
+    assert held['value'] == ids[0]
+    assert ranked is not None and ranked.id == ids[1]
+    assert fallback is not None and fallback.id == ids[2]
+
+
+@pytest.mark.postgres
+def test_concurrent_claims_hand_out_each_entry_once(kiosk, waiting_entries):
+    callers = 8
+    ids = waiting_entries(callers)
+    barrier = threading.Barrier(callers)
+
+    def claim():
+        barrier.wait(10)
+        entry = claim_next_entry(candidate_ids=ids)
+        db.session.commit()
+        return entry.id if entry is not None else None
+
+    runs = [_in_own_session(kiosk, claim) for _ in range(callers)]
+    for thread, _ in runs:
+        thread.join(30)
+
+    errors = [result['error'] for _, result in runs if 'error' in result]
+    claimed = [result.get('value') for _, result in runs]
+    assert not errors, errors
+    assert sorted(claimed) == sorted(ids)
+    assert QueueEntry.query.filter_by(status='waiting').count() == 0
@@ -0,0 +1,27 @@
+"""Queue changes against a failing wait-time refresh (queue_manager.py)"""
+
+from models import db, QueueEntry
+from queue_manager import QueueManager
+from utils.wait_time_predictor import wait_time_predictor
+
+
+def test_committed_changes_survive_a_failed_estimate_refresh(app_ctx, monkeypatch):
+    refresh = wait_time_predictor.refresh_estimates
+
+    def fail_after_commit(commit=True):
+        # estimate_new refreshes uncommitted as part of the enqueue; only the follow-up refresh fails
+        if commit:
+            raise RuntimeError('predictor down')
+        return refresh(commit=False)
+
+    monkeypatch.setattr(wait_time_predictor, 'refresh_estimates', fail_after_commit)
+    manager = QueueManager(openai_client=None)
+
+    entry = manager.add_to_queue('DVRO', user_name='Jane Doe')
+    claimed = manager.get_next_case()
+    completed = manager.complete_case(entry.queue_number)
+
+    assert claimed.id == entry.id
+    assert completed.id == entry.id
+    db.session.expire_all()
+    assert [e.status for e in QueueEntry.query.all()] == ['completed']
@@ -0,0 +1,83 @@
+"""Rate-limit identities and 429 responses (utils/rate_limits.py)"""
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from limits.storage import MemoryStorage
+
+from config import Config
+from utils import rate_limits
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _identify(app, address, kiosk_id):
+    headers = {'X-Kiosk-Key': 'shared-key', 'X-Kiosk-Id': kiosk_id}
+    with app.test_request_context('/api/categories', headers=headers, environ_base={'REMOTE_ADDR': address}):
+        return rate_limits.identify()
+
+
+def test_rotating_kiosk_ids_share_one_budget(app_ctx, monkeypatch):
+    monkeypatch.setattr(Config, 'KIOSK_API_KEY', 'shared-key')
+    monkeypatch.setattr(Config, 'RATELIMIT_KIOSK_IDS_PER_IP', 2)
+    monkeypatch.setattr(rate_limits, '_kiosk_id_store', MemoryStorage())
+
+    first = [_identify(app_ctx, '10.0.0.1', kiosk_id) for kiosk_id in ('lobby-1', 'lobby-2', 'x1', 'x2')]
+    again = _identify(app_ctx, '10.0.0.1', 'lobby-1')
+    elsewhere = _identify(app_ctx, '10.0.0.2', 'x1')
+
+    assert [key for _, key in first] == [
+        'kiosk:shared.lobby-1', 'kiosk:shared.lobby-2', 'kiosk:shared@10.0.0.1', 'kiosk:shared@10.0.0.1',
+    ]
+    assert again == ('kiosk', 'kiosk:shared.lobby-1')
+    assert elsewhere == ('kiosk', 'kiosk:shared.x1')
+
+
+def test_non_ascii_kiosk_key_is_no_match(app_ctx, monkeypatch):
+    monkeypatch.setattr(Config, 'KIOSK_API_KEY', 'shared-key')
+    headers = {'X-Kiosk-Key': 'é'}
+
+    with app_ctx.test_request_context('/api/categories', headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.3'}):
+        assert rate_limits.identify() == ('ip', 'ip:10.0.0.3')
+    assert app_ctx.test_client().post('/api/generate-queue', json={}, headers=headers).status_code == 401
+
+
+def test_exempt_routes_skip_sessions_and_retry_after_counts_down(tmp_path):
+    # The suite runs with the limiter off, and Flask-Limiter cannot be switched on after the first request
+    script = textwrap.dedent('''
+        import json, time
+        import app as kiosk
+        from utils.auth_service import AuthService
+
+        loads = []
+        load = AuthService._load_session_user
+        AuthService._load_session_user = staticmethod(lambda token: loads.append(token) or load(token))
+        with kiosk.app.app_context():
+            kiosk.db.create_all()
+        client = kiosk.app.test_client()
+        bearer = {'Authorization': 'Bearer scrape-token'}
+
+        exempt = [client.get(path, headers=bearer).status_code for path in ('/api/health', '/api/metrics')]
+        exempt_loads = len(loads)
+        client.get('/api/categories')
+        time.sleep(3)
+        limited = client.get('/api/categories')
+        print(json.dumps({'exempt': exempt, 'exempt_loads': exempt_loads, 'status': limited.status_code,
+                          'retry_after': limited.headers.get('Retry-After')}))
+    ''')
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, PYTHONWARNINGS='ignore', RATELIMIT_ENABLED='true',
+               RATELIMIT_STORAGE_URL='memory://', RATELIMIT_STRATEGY='fixed-window', RATELIMIT_IP_LIMIT='1 per minute',
+               METRICS_TOKEN='scrape-token', DATABASE_URL=f"sqlite:///{tmp_path / 'limits.db'}")
+    result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    outcome = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert outcome['exempt'] == [200, 200]
+    assert outcome['exempt_loads'] == 0
+    assert outcome['status'] == 429
+    # Time left in the window (opened by the first hit 3 s earlier), not its length
+    assert 1 <= int(outcome['retry_after']) <= 58
@@ -0,0 +1,55 @@
+"""Retention job and the rollup backfill guard (utils/retention.py)"""
+
+from datetime import datetime, timedelta
+
+from config import Config
+from models import db, CaseSummary, FacilitatorCase, QueueEntry
+from utils.retention import ArchiveWriter, RetentionJob, earliest_rebuild_day
+from utils.storage_codec import decode_json
+
+
+def _finished_entry(days_ago, number):
+    at = datetime.utcnow() - timedelta(days=days_ago)
+    entry = QueueEntry(queue_number=number, priority_level='C', priority_number=1, case_type='DVRO',
+                       user_name='Jane Doe', user_email='jane@example.org', status='completed',
+                       created_at=at, updated_at=at)
+    db.session.add(entry)
+    db.session.flush()
+    return entry
+
+
+def test_pii_purge_covers_case_summaries_and_facilitator_notes(app_ctx, tmp_path):
+    old_days = Config.RETENTION_PII_DAYS + 5  # past the PII cutoff, before the archive cutoff
+    old = _finished_entry(old_days, 'C900')
+    recent = _finished_entry(1, 'C901')
+    for entry in (old, recent):
+        db.session.add(FacilitatorCase(queue_entry_id=entry.id, priority_notes='Safety concern at home'))
+    summaries = [
+        CaseSummary(flow_type='DVRO', summary_json='{"name": "Jane Doe"}', user_email='jane@example.org',
+                    user_name='Jane Doe', user_id='kiosk-user-1', created_at=created)
+        for created in (datetime.utcnow() - timedelta(days=old_days), datetime.utcnow())
+    ]
+    db.session.add_all(summaries)
+    db.session.commit()
+
+    RetentionJob(writer=ArchiveWriter(str(tmp_path))).purge_pii()
+    db.session.expire_all()
+
+    notes = {fc.queue_entry_id: fc.priority_notes for fc in FacilitatorCase.query.all()}
+    assert notes == {old.id: None, recent.id: 'Safety concern at home'}
+    purged, kept = (db.session.get(CaseSummary, s.id) for s in summaries)
+    assert (purged.user_email, purged.user_name, purged.user_id) == (None, None, None)
+    assert decode_json(purged.summary_json) == {}
+    assert kept.user_email == 'jane@example.org' and decode_json(kept.summary_json) == {'name': 'Jane Doe'}
+
+
+def test_backfill_refuses_to_rebuild_archived_history(kiosk, app_ctx):
+    runner = kiosk.app.test_cli_runner()
+    earliest = earliest_rebuild_day()
+
+    refused = runner.invoke(args=['backfill-rollups', '--since', (earliest - timedelta(days=1)).date().isoformat()])
+    default = runner.invoke(args=['backfill-rollups'])
+
+    assert refused.exit_code == 2 and 'is archived' in refused.output
+    assert default.exit_code == 0, default.output
+    assert earliest > datetime.utcnow() - timedelta(days=Config.RETENTION_DAYS)
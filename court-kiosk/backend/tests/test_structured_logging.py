@@ -0,0 +1,51 @@
+"""Log pipeline under eventlet (utils/structured_logging.py)"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip('eventlet')
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in a fresh interpreter: monkey-patching cannot be undone in this one
+SCRIPT = textwrap.dedent('''
+    from utils.concurrency import monkey_patch, LoopLagMonitor
+    assert monkey_patch('eventlet') == 'eventlet'
+
+    import logging
+    import eventlet
+    from eventlet import patcher
+    from utils.structured_logging import configure_logging
+
+    blocking_sleep = patcher.original('time').sleep
+
+    class SlowSink:
+        def write(self, text):
+            blocking_sleep(0.05)
+
+        def flush(self):
+            pass
+
+    listener = configure_logging(fmt='text', stream=SlowSink())
+    assert isinstance(listener._thread, patcher.original('threading').Thread)
+    monitor = LoopLagMonitor().start()
+    for i in range(5):
+        logging.getLogger('test').warning('record %d', i)
+        eventlet.sleep(0.01)
+    eventlet.sleep(0.3)
+    print(monitor.stop()['max_ms'])
+''')
+
+
+def test_slow_sink_does_not_hold_the_eventlet_hub():
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, PYTHONWARNINGS='ignore')
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert float(result.stdout.strip().splitlines()[-1]) < 25  # each write blocks for 50 ms
+    assert 'greenlet is being finalized' not in result.stderr
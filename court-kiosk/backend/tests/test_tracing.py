@@ -0,0 +1,46 @@
+"""Trace sampling and export (utils/tracing.py)"""
+
+import json
+
+from utils import tracing
+
+TRACE_ID, PARENT_ID = 'a' * 32, 'b' * 16
+SAMPLED = f"00-{TRACE_ID}-{PARENT_ID}-01"
+NOT_SAMPLED = f"00-{TRACE_ID}-{PARENT_ID}-00"
+
+
+def _exported(tmp_path, sample_rate, traceparent, trust_parent):
+    exporter = tracing.FileExporter(str(tmp_path / 'traces.jsonl')).start()
+    tracer = tracing.Tracer(sample_rate, slow_ms=10_000, exporter=exporter)
+    tracer.start_trace('GET /api/health', traceparent=traceparent, trust_parent=trust_parent).end()
+    exporter.flush()
+    path = tmp_path / 'traces.jsonl'
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def test_untrusted_callers_cannot_force_sampling(tmp_path):
+    assert _exported(tmp_path, 0.0, SAMPLED, trust_parent=False) == []
+
+
+def test_trusted_callers_decide_sampling(tmp_path):
+    exported = _exported(tmp_path, 0.0, SAMPLED, trust_parent=True)
+
+    span = exported[0]['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+    assert (span['traceId'], span['parentSpanId']) == (TRACE_ID, PARENT_ID)
+    assert _exported(tmp_path / 'unsampled', 1.0, NOT_SAMPLED, trust_parent=True) == []
+
+
+def test_untrusted_trace_ids_are_continued_at_the_sample_rate(tmp_path):
+    exported = _exported(tmp_path, 1.0, NOT_SAMPLED, trust_parent=False)
+
+    assert exported[0]['resourceSpans'][0]['scopeSpans'][0]['spans'][0]['traceId'] == TRACE_ID
+
+
+def test_trusted_parent_networks():
+    networks = tracing.parse_networks('10.0.0.0/8, 127.0.0.1, not-an-address')
+
+    assert len(networks) == 2
+    assert tracing._in_networks('10.1.2.3', networks)
+    assert tracing._in_networks('127.0.0.1', networks)
+    assert not tracing._in_networks('192.168.0.9', networks)
+    assert not tracing._in_networks(None, networks)
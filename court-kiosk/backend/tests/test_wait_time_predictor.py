@@ -0,0 +1,88 @@
+"""Service times and wait estimates (utils/wait_time_predictor.py)"""
+
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from models import db, QueueEntry
+from utils.queue_claim import claim_next_entry
+from utils.queue_events import claimed_at, transition
+from utils.wait_time_predictor import WaitTimePredictor
+
+
+def test_service_time_starts_at_the_claim_not_the_last_update(waiting_entries):
+    entry_id = waiting_entries(1)[0]
+    entry = claim_next_entry()
+    db.session.commit()
+    claim_time = entry.updated_at
+
+    # Progress ingest and estimate refreshes move updated_at while the case is in progress
+    entry.updated_at = claim_time + timedelta(minutes=25)
+    entry.current_node = 'step-2'
+    db.session.commit()
+
+    assert claimed_at(entry) == claim_time
+    predictor = WaitTimePredictor()
+    predictor.observe_completion('DVRO', claimed_at(entry), claim_time + timedelta(minutes=30))
+    assert predictor._by_case_type['DVRO'].mean == pytest.approx(30)
+    assert db.session.get(QueueEntry, entry_id).status == 'in_progress'
+
+
+def test_entries_never_claimed_have_no_claim_time(waiting_entries):
+    entry = db.session.get(QueueEntry, waiting_entries(1)[0])
+
+    assert claimed_at(entry) is None
+    transition(entry, 'cancelled')
+    db.session.commit()
+    assert claimed_at(entry) is None
+
+
+def test_refresh_writes_only_changed_estimates(waiting_entries):
+    waiting_entries(3)
+    predictor = WaitTimePredictor()
+
+    assert predictor.refresh_estimates() == 3
+    stamps = {e.id: e.updated_at for e in QueueEntry.query.all()}
+    assert predictor.refresh_estimates() == 0
+    assert {e.id: e.updated_at for e in QueueEntry.query.all()} == stamps
+
+
+def test_refresh_leaves_claimed_entries_alone(waiting_entries):
+    waiting_entries(2)
+    entry = claim_next_entry()
+    db.session.commit()
+    before = (entry.estimated_wait_time, entry.updated_at)
+
+    WaitTimePredictor().refresh_estimates()
+    db.session.refresh(entry)
+
+    assert (entry.estimated_wait_time, entry.updated_at) == before
+
+
+@pytest.mark.postgres
+def test_refresh_does_not_wait_for_an_open_claim(kiosk, waiting_entries):
+    waiting_entries(3)
+    claimed, release = threading.Event(), threading.Event()
+
+    def hold_claim():
+        with kiosk.app.app_context():
+            claim_next_entry()
+            claimed.set()
+            release.wait(10)
+            db.session.rollback()
+
+    holder = threading.Thread(target=hold_claim)
+    holder.start()
+    try:
+        assert claimed.wait(10)
+        start = time.monotonic()
+        WaitTimePredictor().refresh_estimates()
+        elapsed = time.monotonic() - start
+    finally:
+        release.set()
+        holder.join(10)
+
+    assert elapsed < 2
+    assert QueueEntry.query.filter(QueueEntry.estimated_wait_time.isnot(None)).count() == 2
@@ -7,15 +7,22 @@ import secrets
 import hashlib
 import json
 import logging
+import re
 from datetime import datetime, timedelta
-from flask import request, jsonify
+from flask import request, jsonify, has_request_context
 from models import db, User, UserSession, AuditLog
+from config import Config
+from utils.structured_logging import parse_mapping
 
 logger = logging.getLogger(__name__)
 
 # In-memory login lockout tracker: key -> {count, locked_until}
 _login_attempts = {}
 
+# KIOSK_API_KEYS: "lobby-1=<key>,lobby-2=<key>" -> {name: key}
+_kiosk_keys = parse_mapping(Config.KIOSK_API_KEYS)
+_KIOSK_ID = re.compile(r'^[A-Za-z0-9_.-]{1,40}$')
+
 
 class AuthService:
     """Service for handling authentication and authorization"""
@@ -179,12 +186,33 @@ class AuthService:
             logger.error(f"Failed to create session for user {user.id}: {e}")
             raise
     
+    @staticmethod
+    def session_token():
+        """Bearer token from the Authorization header, or None"""
+        header = request.headers.get('Authorization')
+        if header and header.startswith('Bearer '):
+            return header[7:]
+        return header or None
+
     @staticmethod
     def validate_session(session_token):
-        """Validate session token and return user"""
+        """Validate session token and return user (cached for the rest of the request)"""
         if not session_token:
             return None
-        
+        if not has_request_context():
+            return AuthService._load_session_user(session_token)
+
+        # On the request, not flask.g: g outlives a request when an app context
+        # was already pushed (CLI, benchmarks), and a logout must not be missed
+        cache = getattr(request, 'session_users', None)
+        if cache is None:
+            cache = request.session_users = {}
+        if session_token not in cache:
+            cache[session_token] = AuthService._load_session_user(session_token)
+        return cache[session_token]
+
+    @staticmethod
+    def _load_session_user(session_token):
         session = UserSession.query.filter_by(session_token=session_token).first()
         
         if not session or session.is_expired():
@@ -209,6 +237,9 @@ class AuthService:
         """Logout user by invalidating session"""
         session = UserSession.query.filter_by(session_token=session_token).first()
         
+        if has_request_context():
+            getattr(request, 'session_users', {}).pop(session_token, None)
+
         if session:
             user_id = session.user_id
             try:
@@ -283,6 +314,30 @@ class AuthService:
         
         return [log.to_dict() for log in logs]
     
+    @staticmethod
+    def kiosk_key_required():
+        return bool(Config.KIOSK_API_KEY or _kiosk_keys)
+
+    @staticmethod
+    def identify_kiosk(provided, kiosk_id=None):
+        """Name of the kiosk an X-Kiosk-Key belongs to, or None if it matches no key.
+
+        Keys in KIOSK_API_KEYS name their kiosk. The shared KIOSK_API_KEY is
+        one identity for every kiosk unless the kiosk sends X-Kiosk-Id.
+        """
+        if not provided:
+            return None
+        # Bytes: compare_digest raises TypeError on non-ASCII str, and any client can send this header
+        provided = provided.encode()
+        for name, key in _kiosk_keys.items():
+            if secrets.compare_digest(provided, key.encode()):
+                return name
+        if Config.KIOSK_API_KEY and secrets.compare_digest(provided, Config.KIOSK_API_KEY.encode()):
+            if kiosk_id and _KIOSK_ID.match(kiosk_id):
+                return f"shared.{kiosk_id}"
+            return 'shared'
+        return None
+
     @staticmethod
     def require_auth(f):
         """Decorator to require authentication for endpoints"""
@@ -290,11 +345,7 @@ class AuthService:
         
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            session_token = request.headers.get('Authorization')
-            if session_token and session_token.startswith('Bearer '):
-                session_token = session_token[7:]
-            
-            user = AuthService.validate_session(session_token)
+            user = AuthService.validate_session(AuthService.session_token())
             if not user:
                 return jsonify({'error': 'Authentication required'}), 401
             
@@ -305,27 +356,21 @@ class AuthService:
 
     @staticmethod
     def require_kiosk_or_auth(f):
-        """Allow admin session, or X-Kiosk-Key when KIOSK_API_KEY is set.
+        """Allow admin session, or X-Kiosk-Key when KIOSK_API_KEY/KIOSK_API_KEYS is set.
 
-        If KIOSK_API_KEY is unset, public kiosk traffic is allowed (still rate-limited).
+        If neither is set, public kiosk traffic is allowed (still rate-limited).
         """
         from functools import wraps
-        from config import Config
 
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            session_token = request.headers.get('Authorization')
-            if session_token and session_token.startswith('Bearer '):
-                session_token = session_token[7:]
-            user = AuthService.validate_session(session_token)
+            user = AuthService.validate_session(AuthService.session_token())
             if user:
                 request.current_user = user
                 return f(*args, **kwargs)
 
-            kiosk_key = Config.KIOSK_API_KEY
-            provided = request.headers.get('X-Kiosk-Key')
-            if kiosk_key:
-                if provided and secrets.compare_digest(provided, kiosk_key):
+            if AuthService.kiosk_key_required():
+                if AuthService.identify_kiosk(request.headers.get('X-Kiosk-Key')):
                     request.current_user = None
                     return f(*args, **kwargs)
                 return jsonify({'error': 'Authentication required'}), 401
@@ -0,0 +1,107 @@
+"""
+Coalesced queue broadcasts
+
+Every call-next, complete-case, no-show, WebSocket connect and
+``request_update`` used to rebuild the public queue snapshot and emit it to
+the whole ``queue`` room. A morning rush, or every display reconnecting after
+a network blip, turned into a storm of identical broadcasts.
+
+``BroadcastCoalescer.request()`` now only marks the queue dirty; the first
+request in a window schedules one flush ``window_seconds`` later, which
+builds a single snapshot and emits it once. Requests arriving while a flush
+is pending ride along with it. Connecting clients get the cached snapshot
+sent to them alone instead of a room-wide broadcast.
+
+The cached snapshot is dropped on every request and after
+``SNAPSHOT_MAX_AGE_SECONDS``, since changes made by other workers reach
+this worker's clients through the backplane but not its cache.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from utils.metrics import BROADCAST_FANOUT
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAX_AGE_SECONDS = 2.0
+
+
+class BroadcastCoalescer:
+    """Collapses broadcast requests within a window into one snapshot emit"""
+
+    def __init__(self, app, build_snapshot: Callable[[], Dict], emit: Callable[..., None],
+                 window_seconds: float = 0.1, start_background_task: Optional[Callable] = None,
+                 sleep: Callable[[float], None] = time.sleep, snapshot_max_age: float = SNAPSHOT_MAX_AGE_SECONDS):
+        self.app = app
+        self.build_snapshot = build_snapshot
+        self.emit = emit
+        self.window_seconds = window_seconds
+        self.start_background_task = start_background_task
+        self.sleep = sleep
+        self.snapshot_max_age = snapshot_max_age
+        self._lock = threading.Lock()
+        self._pending = False
+        self._snapshot = None  # (payload, built_at)
+        self.requested = 0
+        self.emitted = 0
+        self.direct = 0
+        self.failed = 0
+
+    def request(self):
+        """Ask for a room broadcast; returns immediately unless the window is 0"""
+        with self._lock:
+            self.requested += 1
+            self._snapshot = None
+            if self._pending:
+                return
+            self._pending = True
+        if self.window_seconds <= 0 or self.start_background_task is None:
+            self._flush()
+        else:
+            self.start_background_task(self._flush_later)
+
+    def _flush_later(self):
+        self.sleep(self.window_seconds)
+        self._flush()
+
+    def _flush(self):
+        with self._lock:
+            # Requests from here on schedule a new flush, so none is lost
+            self._pending = False
+        started = time.perf_counter()
+        try:
+            with self.app.app_context():
+                payload = self.snapshot(refresh=True)
+                self.emit(payload)
+            self.emitted += 1
+            BROADCAST_FANOUT.observe(time.perf_counter() - started)
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Queue broadcast failed: {e}", exc_info=True)
+
+    def snapshot(self, refresh: bool = False) -> Dict:
+        """Current public queue snapshot (needs an app context)"""
+        cached = self._snapshot
+        if not refresh and cached is not None and time.monotonic() - cached[1] <= self.snapshot_max_age:
+            return cached[0]
+        payload = self.build_snapshot()
+        self._snapshot = (payload, time.monotonic())
+        return payload
+
+    def send_snapshot(self, to: str):
+        """Send the snapshot to one client (e.g. on connect) instead of the room"""
+        self.emit(self.snapshot(), to=to)
+        self.direct += 1
+
+    def stats(self) -> Dict[str, int]:
+        pending = 1 if self._pending else 0
+        return {
+            'requested': self.requested,
+            'emitted': self.emitted,
+            'saved': max(0, self.requested - self.emitted - self.failed - pending),
+            'direct_snapshots': self.direct,
+            'failed': self.failed,
+        }
@@ -1,27 +1,27 @@
-import json
 import random
 from typing import Dict, List, Optional
 from datetime import datetime
 from models import db, CaseSummary, QueueTicket
-from utils.email_service import EmailService
+from utils.services import get_email_service
+from utils.flow_graph import flow_registry
+from utils.storage_codec import encode_json
 
 class CaseSummaryService:
     """Service for managing case summaries and queue integration"""
     
-    def __init__(self):
-        self.email_service = EmailService()
+    @property
+    def email_service(self):
+        """Shared EmailService, created on first use"""
+        return get_email_service()
     
     def extract_required_forms(self, flow_data: Dict, answers: Dict) -> List[str]:
         """Extract required forms from flow data and user answers"""
         forms = set()
         
-        # Extract forms from flow nodes
-        if 'nodes' in flow_data:
-            for node_id, node_data in flow_data['nodes'].items():
-                if node_id in answers:
-                    # Check if node has forms_add property
-                    if hasattr(node_data, 'get') and node_data.get('forms_add'):
-                        forms.update(node_data['forms_add'])
+        # Extract forms added by the answered nodes (precomputed per node)
+        flow = flow_registry.for_flow_data(flow_data)
+        if flow:
+            forms.update(flow.forms_for_nodes(answers))
         
         # Add forms based on user answers
         if answers.get('children') == 'yes':
@@ -279,9 +279,9 @@ class CaseSummaryService:
             case_summary = CaseSummary(
                 case_number=session_id,  # Using session_id instead of case number
                 flow_type=flow_type,
-                summary_json=json.dumps(summary_json),
-                required_forms=json.dumps(required_forms),
-                next_steps=json.dumps(next_steps),
+                summary_json=encode_json(summary_json),
+                required_forms=encode_json(required_forms),
+                next_steps=encode_json(next_steps),
                 user_email=user_email,
                 user_name=user_name,
                 language=language
@@ -0,0 +1,185 @@
+"""
+Concurrency model: eventlet with explicit monkey-patching
+
+The Socket.IO server runs on eventlet: one OS thread, many greenthreads,
+and a hub that only switches between them when one of them waits on a
+green primitive. Two things stall every WebSocket client on the worker:
+
+- blocking I/O on an unpatched socket (OpenAI via httpx, Resend and the
+  form download via requests, Postgres via psycopg2). ``monkey_patch()``
+  runs before app.py imports anything else so every socket, ssl, DNS,
+  ``time.sleep`` and thread primitive is green, and makes psycopg2 wait
+  through the hub when it is installed;
+- CPU-bound work (ReportLab rendering, base64 of PDF attachments), which
+  no amount of patching makes yield. ``offload()`` runs it in eventlet's
+  native thread pool (``tpool``); the hub then gets the GIL back at every
+  switch interval instead of after the whole render.
+
+``ASYNC_MODE``: ``eventlet``, ``threading`` or ``auto`` (default: eventlet
+when installed, threading on serverless platforms where a request owns its
+process and there is no hub to protect). Under threading, ``offload()``
+simply calls the function.
+
+``LoopLagMonitor`` measures how long the hub was kept from running:
+benchmarks/event_loop_blocking.py uses it to check an email send.
+"""
+
+import contextvars
+import importlib
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_mode: Optional[str] = None
+
+# Optional dependencies of our HTTP clients that are probed for at import
+# time (httpcore tries ``import trio``) but cannot load on eventlet's green
+# ``select``, which has no epoll. Marking them unavailable makes the probe
+# fail with ImportError, as if they were not installed, without importing them.
+_UNUSABLE_WHEN_PATCHED = ('trio',)
+
+# Once these are imported patching comes too late: eventlet has to rewrite
+# their existing locks in place and trips over werkzeug's context-local
+# proxies. That is the case under the ``flask`` CLI (``init-db``,
+# ``retention``, ``backfill-rollups``), which imports Flask before app.py;
+# those commands need no hub and run with threading.
+_PATCHING_TOO_LATE_AFTER = ('flask', 'werkzeug')
+
+
+def resolve_mode(requested: Optional[str] = None) -> str:
+    requested = (requested or 'auto').lower()
+    if requested not in ('auto', 'eventlet', 'threading'):
+        raise ValueError(f"Unknown ASYNC_MODE {requested!r}; expected auto, eventlet or threading")
+    if requested == 'threading':
+        return 'threading'
+    try:
+        import eventlet  # noqa: F401
+    except ImportError:
+        if requested == 'eventlet':
+            raise
+        return 'threading'
+    if requested == 'auto' and (os.getenv('VERCEL') or os.getenv('AWS_LAMBDA_FUNCTION_NAME')):
+        return 'threading'
+    return 'eventlet'
+
+
+def _green_psycopg2():
+    try:
+        from eventlet.support import psycopg2_patcher
+    except ImportError:
+        return  # psycopg2 not installed (SQLite deployments)
+    psycopg2_patcher.make_psycopg_green()
+
+
+def monkey_patch(mode: Optional[str] = None) -> str:
+    """Patch the standard library for ``mode`` once per process; returns the mode in effect.
+
+    Call before importing anything that opens sockets or starts threads.
+    A process already patched by its server (``gunicorn -k eventlet``) is
+    left as it is; one that has already imported Flask (the ``flask`` CLI)
+    is not patched and runs with threading.
+    """
+    global _mode
+    if _mode is not None:
+        return _mode
+    requested = mode or Config.ASYNC_MODE
+    mode = resolve_mode(requested)
+    if mode == 'eventlet':
+        import eventlet
+        from eventlet import patcher
+        if patcher.is_monkey_patched('socket'):
+            pass
+        elif any(name in sys.modules for name in _PATCHING_TOO_LATE_AFTER):
+            level = logging.WARNING if requested == 'eventlet' else logging.DEBUG
+            logger.log(level, "Flask was imported before monkey_patch(); running with threading instead of eventlet")
+            mode = 'threading'
+        else:
+            for name in _UNUSABLE_WHEN_PATCHED:
+                sys.modules.setdefault(name, None)
+            eventlet.monkey_patch()
+    if mode == 'eventlet':
+        _green_psycopg2()
+    _mode = mode
+    return mode
+
+
+def current_mode() -> str:
+    return _mode or 'threading'
+
+
+def native(module_name: str):
+    """The unpatched standard-library module (``'threading'``, ``'queue'``).
+
+    For the few things that must block a real OS thread rather than a
+    greenthread, such as the log writer; the same module when nothing is
+    patched.
+    """
+    patcher = sys.modules.get('eventlet.patcher')
+    if patcher is None:
+        return importlib.import_module(module_name)
+    return patcher.original(module_name)
+
+
+def offload(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run CPU-bound ``fn`` off the eventlet hub; inline under threading.
+
+    The call runs in the caller's context (contextvars), so logging and
+    tracing inside ``fn`` still see the current request.
+    """
+    if _mode != 'eventlet' or not Config.CPU_OFFLOAD:
+        return fn(*args, **kwargs)
+    from eventlet import tpool
+    return tpool.execute(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class LoopLagMonitor:
+    """Greenthread that sleeps ``interval`` seconds at a time and records how late it wakes.
+
+    The lateness is how long something else held the hub: the longest one is
+    the worst stall any WebSocket client on this worker saw.
+    """
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.lags = []
+        self._running = False
+        self._thread = None
+
+    def _run(self):
+        import eventlet
+        while self._running:
+            start = time.perf_counter()
+            eventlet.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self) -> 'LoopLagMonitor':
+        import eventlet
+        self._running = True
+        self._thread = eventlet.spawn(self._run)
+        eventlet.sleep(0)
+        return self
+
+    def stop(self) -> Dict:
+        self._running = False
+        if self._thread is not None:
+            self._thread.wait()
+        return self.summary()
+
+    def summary(self) -> Dict:
+        lags = sorted(self.lags)
+        if not lags:
+            return {'samples': 0, 'max_ms': None, 'p99_ms': None, 'p50_ms': None}
+        return {
+            'samples': len(lags),
+            'max_ms': round(lags[-1] * 1000, 2),
+            'p99_ms': round(lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000, 2),
+            'p50_ms': round(lags[len(lags) // 2] * 1000, 2),
+        }
@@ -0,0 +1,181 @@
+"""
+Database engine tuning profiles
+
+``app.config['SQLALCHEMY_ENGINE_OPTIONS']`` used to be empty, so every
+deployment ran on SQLAlchemy's defaults: a 5+10 QueuePool whether or not
+the database could take it, no pre-ping after the server dropped an idle
+connection, no statement timeout, and SQLite in rollback-journal mode where
+one writer locks out every reader and a second writer fails with
+"database is locked" instead of waiting.
+
+``DB_PROFILE`` picks one of:
+
+- ``sqlite``     single process on a local file: WAL journal (readers no
+  longer block the writer), ``synchronous=NORMAL``, a busy timeout,
+  larger page cache, and an in-process writer lock. SQLite's busy handler
+  polls with growing sleeps rather than queueing, so under a burst of
+  check-ins some writers kept losing the race until the timeout and failed
+  with "database is locked"; the lock makes this process's writers wait
+  their turn instead (other processes, e.g. cron jobs, still rely on the
+  busy timeout).
+- ``postgres``   long-running multi-worker servers: sized QueuePool per
+  worker, LIFO checkout, pre-ping, recycle, and a server-side
+  ``statement_timeout`` so a runaway query cannot hold a connection.
+- ``serverless`` short-lived functions behind an external pooler
+  (PgBouncer, Supabase/Neon pooler): no client-side pool (``NullPool``) -
+  the pooler keeps the server connections warm, and pooling again in every
+  function instance would only pin idle connections on it. Startup
+  ``options`` are not sent because transaction poolers reject them; set
+  ``statement_timeout`` on the database role instead.
+- ``none``       SQLAlchemy defaults (the old behaviour; benchmarks compare
+  against it).
+
+Unset, the profile follows ``DATABASE_URL``: SQLite URLs get ``sqlite``,
+Postgres URLs get ``serverless`` on Vercel/Lambda and ``postgres`` elsewhere.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+logger = logging.getLogger(__name__)
+
+PROFILES = ('sqlite', 'postgres', 'serverless', 'none')
+
+_WRITE_VERBS = frozenset(('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'CREATE', 'DROP', 'ALTER'))
+
+# Applied to every new SQLite connection while the sqlite profile is active
+_sqlite_pragmas: Dict[str, object] = {}
+_listeners_installed = False
+# Held from a transaction's first write until its commit/rollback (sqlite profile)
+_writer_lock = threading.Lock()
+_writer_lock_timeout = 0.0
+
+
+def detect_profile(uri: str) -> str:
+    """Profile for a database URL when DB_PROFILE is not set"""
+    scheme = (uri or '').split(':', 1)[0].lower()
+    if scheme.startswith('sqlite'):
+        return 'sqlite'
+    if scheme.startswith('postgres'):
+        if os.getenv('VERCEL') or os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
+            return 'serverless'
+        return 'postgres'
+    return 'none'
+
+
+def sqlite_pragmas(busy_timeout_ms: int = 5000, cache_mb: int = 20) -> Dict[str, object]:
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # durable at checkpoints; safe with WAL
+        'busy_timeout': busy_timeout_ms,
+        'cache_size': -cache_mb * 1024,  # negative = KiB
+        'temp_store': 'MEMORY',
+    }
+
+
+def engine_options(profile: str, pool_size: int = 5, max_overflow: int = 10, pool_timeout: int = 30,
+                   pool_recycle: int = 1800, statement_timeout_ms: int = 15000,
+                   busy_timeout_ms: int = 5000) -> Dict[str, object]:
+    """``create_engine`` keyword arguments for a profile"""
+    if profile == 'sqlite':
+        return {
+            # sqlite3's own lock wait; the busy_timeout pragma covers the same for SQL
+            'connect_args': {'timeout': busy_timeout_ms / 1000, 'check_same_thread': False},
+        }
+    if profile == 'postgres':
+        options = '-c idle_in_transaction_session_timeout=60000'
+        if statement_timeout_ms:
+            options = f'-c statement_timeout={statement_timeout_ms} ' + options
+        return {
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_timeout': pool_timeout,
+            'pool_recycle': pool_recycle,
+            'pool_pre_ping': True,
+            'pool_use_lifo': True,  # spare connections go idle and get recycled
+            'connect_args': {'connect_timeout': 10, 'application_name': 'court-kiosk', 'options': options},
+        }
+    if profile == 'serverless':
+        return {
+            'poolclass': NullPool,
+            'connect_args': {'connect_timeout': 5, 'application_name': 'court-kiosk'},
+        }
+    return {}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not _sqlite_pragmas or not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _sqlite_pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def _acquire_writer_lock(conn, cursor, statement, parameters, context, executemany):
+    if not _writer_lock_timeout or conn.dialect.name != 'sqlite' or conn.info.get('holds_writer_lock'):
+        return
+    verb = statement.lstrip()[:7].split(None, 1)
+    if not verb or verb[0].upper() not in _WRITE_VERBS:
+        return
+    # Bounded so a thread writing through two connections degrades to the busy timeout, not a deadlock
+    if _writer_lock.acquire(timeout=_writer_lock_timeout):
+        conn.info['holds_writer_lock'] = True
+    else:
+        logger.warning("SQLite writer lock not acquired in time; relying on busy_timeout")
+
+
+def _release_writer_lock(info):
+    if info.pop('holds_writer_lock', False):
+        _writer_lock.release()
+
+
+def _on_transaction_end(conn):
+    _release_writer_lock(conn.info)
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    _release_writer_lock(connection_record.info)
+
+
+def install(app, profile: Optional[str] = None, **options) -> Tuple[str, Dict[str, object]]:
+    """Set ``SQLALCHEMY_ENGINE_OPTIONS`` for a profile; call before ``db.init_app``.
+
+    ``options`` are the keyword arguments of ``engine_options``. Returns the
+    resolved profile name and the engine options.
+    """
+    global _listeners_installed, _writer_lock_timeout
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    profile = (profile or detect_profile(uri)).lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; expected one of {', '.join(PROFILES)}")
+
+    engine_kwargs = engine_options(profile, **options)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}), **engine_kwargs}
+
+    _sqlite_pragmas.clear()
+    _writer_lock_timeout = 0.0
+    if profile == 'sqlite':
+        busy_timeout_ms = options.get('busy_timeout_ms', 5000)
+        _sqlite_pragmas.update(sqlite_pragmas(busy_timeout_ms))
+        _writer_lock_timeout = max(busy_timeout_ms / 1000, 0.001)
+        if not _listeners_installed:
+            event.listen(Engine, 'connect', _apply_sqlite_pragmas)
+            event.listen(Engine, 'before_cursor_execute', _acquire_writer_lock)
+            event.listen(Engine, 'commit', _on_transaction_end)
+            event.listen(Engine, 'rollback', _on_transaction_end)
+            event.listen(Engine, 'checkin', _on_checkin)
+            _listeners_installed = True
+
+    logged = {k: v for k, v in engine_kwargs.items() if k != 'connect_args'}
+    logger.info(f"Database profile: {profile}", extra={'engine_options': repr(logged)})
+    return profile, engine_kwargs
@@ -1,5 +1,6 @@
 import os
 import json
+import logging
 import tempfile
 import base64
 import requests
@@ -12,17 +13,41 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from typing import List, Dict, Optional, Tuple, Any
 from config import Config
-from utils.llm_service import LLMService
 from utils.validation import validate_email, validate_phone_number, validate_name
+from utils.metrics import timed, EMAIL_RENDER, EMAIL_SEND, EMAIL_ATTACHMENT_BYTES
+from utils import tracing
+from utils.tracing import traced
+from utils.concurrency import offload
+
+logger = logging.getLogger(__name__)
 
 # Initialize Resend with proper error handling
 try:
     import resend
     if Config.RESEND_API_KEY:
         resend.api_key = Config.RESEND_API_KEY
+    if Config.RESEND_API_URL:
+        # resend 0.6 reads Request.base_url; later releases read resend.api_url
+        resend.Request.base_url = Config.RESEND_API_URL.rstrip('/')
+        resend.api_url = Config.RESEND_API_URL.rstrip('/')
 except ImportError:
     resend = None
-    print("Warning: resend package not installed. Email functionality will be limited.")
+    logger.warning("resend package not installed; email functionality will be limited")
+
+
+def _b64encode(content: bytes) -> str:
+    return base64.b64encode(content).decode('utf-8')
+
+
+def _resend_send(payload: dict) -> dict:
+    """``resend.Emails.send`` run off the eventlet hub.
+
+    With the court forms attached the body is ~10 MB of base64; the SDK's
+    ``json.dumps`` of it held the hub for ~60 ms per email. The whole call,
+    encoding and HTTP request, runs in the offload thread instead.
+    """
+    return offload(resend.Emails.send, payload)
+
 
 # Use the shared court_documents directory at the project root
 COURT_DOCUMENTS_DIR = os.path.abspath(
@@ -45,25 +70,43 @@ class EmailService:
             # Use verified domain
             self.from_email = f"Court Kiosk <noreply@{custom_domain}>"
             self.support_email = f"support@{custom_domain}"
-            print(f"✅ Using verified domain: {custom_domain}")
+            logger.info(f"Using verified domain: {custom_domain}")
         else:
             # Fallback to testing email (restricted)
             self.from_email = "Court Kiosk <onboarding@resend.dev>"
             self.support_email = "onboarding@resend.dev"
-            print("⚠️ WARNING: Using Resend testing email. Emails can only be sent to your own address.")
-            print("⚠️ To send to all recipients, verify a domain at https://resend.com/domains")
-            print("⚠️ Then set RESEND_FROM_DOMAIN environment variable (e.g., 'yourdomain.com')")
+            logger.warning("Using the Resend testing sender; emails can only go to the account owner. "
+                           "Verify a domain at https://resend.com/domains and set RESEND_FROM_DOMAIN.")
         
-        # Setup PDF styles
-        self.styles = getSampleStyleSheet()
-        self._setup_pdf_styles()
-
-        # Load local PDFs so attachments work even when network is blocked
+        # PDF styles and the local form index are built on first use
+        self._styles = None
+        self._form_filename_index = None
         self.court_documents_dir = COURT_DOCUMENTS_DIR
-        self.form_filename_index = self._build_form_index()
-        
-        # Initialize LLM service for AI-powered summaries (optional)
-        self.llm_service = LLMService(Config.OPENAI_API_KEY) if Config.OPENAI_API_KEY else None
+
+    @property
+    def styles(self):
+        """ReportLab stylesheet with court styles, built on first PDF render"""
+        if self._styles is None:
+            # Publish only the finished sheet: a concurrent render must never see it without CourtTitle
+            styles = getSampleStyleSheet()
+            self._setup_pdf_styles(styles)
+            self._styles = styles
+        return self._styles
+
+    @property
+    def form_filename_index(self) -> Dict[str, str]:
+        """Local PDFs so attachments work even when network is blocked"""
+        if self._form_filename_index is None:
+            self._form_filename_index = self._build_form_index()
+        return self._form_filename_index
+
+    @property
+    def llm_service(self):
+        """Shared LLM service for AI-powered summaries (optional)"""
+        if not Config.OPENAI_API_KEY:
+            return None
+        from utils.services import get_llm_service
+        return get_llm_service()
 
     def _build_form_index(self) -> Dict[str, str]:
         """Create a lowercase index of available local PDF filenames."""
@@ -71,47 +114,48 @@ class EmailService:
 
         try:
             if not os.path.isdir(self.court_documents_dir):
-                print(f"⚠️ Court documents directory not found: {self.court_documents_dir}")
+                logger.warning(f"Court documents directory not found: {self.court_documents_dir}")
                 return index
 
             for filename in os.listdir(self.court_documents_dir):
                 if filename.lower().endswith('.pdf'):
                     index[filename.lower()] = os.path.join(self.court_documents_dir, filename)
 
-            print(f"✅ Loaded {len(index)} local court form PDFs for attachments")
+            logger.info(f"Loaded {len(index)} local court form PDFs for attachments")
         except Exception as e:
-            print(f"⚠️ Could not index local court forms: {e}")
+            logger.warning(f"Could not index local court forms: {e}")
 
         return index
     
-    def _setup_pdf_styles(self):
+    def _setup_pdf_styles(self, styles):
         """Setup custom paragraph styles for court documents"""
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='CourtTitle',
-            parent=self.styles['Heading1'],
+            parent=styles['Heading1'],
             fontSize=18,
             spaceAfter=30,
             alignment=TA_CENTER,
             textColor=colors.darkblue
         ))
         
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='CourtSubtitle',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=14,
             spaceAfter=20,
             alignment=TA_CENTER,
             textColor=colors.darkblue
         ))
         
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='FormTitle',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=16,
             spaceAfter=15,
             textColor=colors.black
         ))
     
+    @traced('email.send_case_email')
     def send_case_email(self, case_data: dict, include_queue: bool = False) -> dict:
         """Main method - sends comprehensive case email with PDFs - FIXED VERSION"""
         try:
@@ -125,7 +169,7 @@ class EmailService:
             if not user_email:
                 return {"success": False, "error": "No email address provided"}
             
-            print(f"📧 Preparing email for {user_email}...")
+            logger.info(f"Preparing email for {user_email}")
             
             # Extract all forms from case data (check multiple locations)
             all_forms = self._extract_forms_data(case_data)
@@ -145,10 +189,12 @@ class EmailService:
             # Remove duplicates and empty values
             form_codes = list(set([f.strip().upper() for f in form_codes if f and f.strip()]))
             
-            print(f"📋 Forms to attach: {', '.join(form_codes)}")
+            logger.debug(f"Forms to attach: {', '.join(form_codes)}")
+            tracing.current_span().set_attribute('email.form_count', len(form_codes))
             
             # Generate case summary PDF (needed for _prepare_attachments)
-            case_summary_path = self._generate_case_summary_pdf(case_data)
+            with timed(EMAIL_RENDER, stage='pdf'):
+                case_summary_path = self._generate_case_summary_pdf(case_data)
             
             # Download official forms
             form_attachments = self._download_forms(form_codes)
@@ -158,7 +204,8 @@ class EmailService:
             
             # Generate email content
             subject = f"Your Court Case Summary - {case_data.get('queue_number', 'N/A')}"
-            html_content = self._generate_email_html(case_data)
+            with timed(EMAIL_RENDER, stage='html'):
+                html_content = self._generate_email_html(case_data)
             
             # Send email
             success = self._send_email_with_attachments(user_email, subject, html_content, attachments)
@@ -167,17 +214,16 @@ class EmailService:
             self._cleanup_temp_files(case_summary_path, form_attachments)
             
             if success:
-                print(f"✅ Email sent successfully to {user_email}")
+                logger.info(f"Email sent successfully to {user_email}")
                 return {"success": True, "id": "email_sent_successfully", "attachments_count": len(attachments)}
             else:
                 return {"success": False, "error": "Failed to send email", "attachments_prepared": len(attachments)}
                 
         except Exception as e:
-            print(f"❌ Error in send_case_email: {e}")
-            import traceback
-            print(f"❌ Full traceback:\n{traceback.format_exc()}")
+            logger.error(f"Error in send_case_email: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
     
+    @traced('email.prepare_attachments')
     def _prepare_attachments(self, case_data: dict, case_summary_path: str, form_attachments: list) -> list:
         """Prepare and validate all attachments - FIXED VERSION"""
         attachments = []
@@ -188,25 +234,23 @@ class EmailService:
                 file_size = os.path.getsize(case_summary_path)
                 
                 if file_size == 0:
-                    print("⚠️ Warning: Case summary PDF is empty, skipping")
+                    logger.warning("Case summary PDF is empty, skipping")
                 else:
-                    print(f"📄 Case summary PDF: {file_size} bytes")
+                    logger.debug(f"Case summary PDF: {file_size} bytes")
                     with open(case_summary_path, 'rb') as f:
                         content = f.read()
-                        encoded = base64.b64encode(content).decode('utf-8')
+                        encoded = offload(_b64encode, content)
                         
                         attachments.append({
                             'filename': f"Case_Summary_{case_data.get('queue_number', 'N/A')}.pdf",
                             'content': encoded
                             # NO 'type' field - Resend infers it from filename/content
                         })
-                        print(f"✅ Prepared case summary ({len(encoded)} chars base64)")
+                        logger.debug(f"Prepared case summary ({len(encoded)} chars base64)")
             except Exception as e:
-                print(f"⚠️ Error preparing case summary: {e}")
-                import traceback
-                print(f"⚠️ Traceback: {traceback.format_exc()}")
+                logger.warning(f"Error preparing case summary: {e}", exc_info=True)
         else:
-            print("⚠️ Case summary PDF not found or not generated")
+            logger.warning("Case summary PDF not found or not generated")
         
         # 2. Add form PDFs
         attached_count = 0
@@ -215,27 +259,27 @@ class EmailService:
             form_filename = form_attachment.get('filename')
             
             if not form_path or not os.path.exists(form_path):
-                print(f"⚠️ Form file not found: {form_filename}")
+                logger.warning(f"Form file not found: {form_filename}")
                 continue
             
             try:
                 file_size = os.path.getsize(form_path)
                 
                 if file_size == 0:
-                    print(f"⚠️ Warning: {form_filename} is empty (0 bytes), skipping")
+                    logger.warning(f"{form_filename} is empty (0 bytes), skipping")
                     continue
                 
-                print(f"📄 {form_filename}: {file_size} bytes")
+                logger.debug(f"{form_filename}: {file_size} bytes")
                 
                 with open(form_path, 'rb') as f:
                     content = f.read()
                     
                     # Verify content was read
                     if len(content) == 0:
-                        print(f"⚠️ Warning: Read 0 bytes from {form_filename}, skipping")
+                        logger.warning(f"Read 0 bytes from {form_filename}, skipping")
                         continue
                     
-                    encoded = base64.b64encode(content).decode('utf-8')
+                    encoded = offload(_b64encode, content)
                     
                     attachments.append({
                         'filename': form_filename,
@@ -244,25 +288,24 @@ class EmailService:
                     })
                     
                     attached_count += 1
-                    print(f"✅ Attached: {form_filename} ({len(encoded)} chars base64)")
+                    logger.debug(f"Attached: {form_filename} ({len(encoded)} chars base64)")
                     
             except Exception as e:
-                print(f"⚠️ Error attaching {form_filename}: {e}")
-                import traceback
-                print(f"⚠️ Traceback: {traceback.format_exc()}")
+                logger.warning(f"Error attaching {form_filename}: {e}", exc_info=True)
                 continue
         
-        print(f"📎 Total attachments prepared: {len(attachments)}")
+        logger.info(f"Total attachments prepared: {len(attachments)}")
+        tracing.current_span().set_attribute('email.attachment_count', len(attachments))
         return attachments
     
     def _send_email_with_attachments(self, to_email: str, subject: str, html_content: str, attachments: list = None) -> bool:
         """Send email with attachments using Resend API - FIXED VERSION"""
         if not resend:
-            print("❌ Resend package not available. Cannot send email.")
+            logger.error("Resend package not available. Cannot send email.")
             return False
             
         if not Config.RESEND_API_KEY:
-            print("❌ RESEND_API_KEY not configured. Cannot send email.")
+            logger.error("RESEND_API_KEY not configured. Cannot send email.")
             return False
             
         try:
@@ -274,22 +317,23 @@ class EmailService:
                 for att in attachments:
                     try:
                         # Decode to check size (base64 is ~33% larger than original)
-                        decoded_size = len(base64.b64decode(att['content']))
+                        decoded_size = len(offload(base64.b64decode, att['content']))
                         total_size += decoded_size
                         
-                        print(f"📎 Attachment: {att['filename']} ({decoded_size} bytes)")
+                        logger.debug(f"Attachment: {att['filename']} ({decoded_size} bytes)")
                         validated_attachments.append(att)
                     except Exception as e:
-                        print(f"⚠️ Invalid attachment {att.get('filename', 'unknown')}: {e}")
+                        logger.warning(f"Invalid attachment {att.get('filename', 'unknown')}: {e}")
                         continue
                 
                 # Check 25MB limit (Resend's typical limit)
                 max_size = 25 * 1024 * 1024
                 if total_size > max_size:
-                    print(f"❌ Total attachment size ({total_size} bytes) exceeds {max_size} bytes limit")
+                    logger.error(f"Total attachment size ({total_size} bytes) exceeds {max_size} bytes limit")
                     return False
                 
-                print(f"✅ Total attachment size: {total_size} bytes ({len(validated_attachments)} files)")
+                logger.info(f"Total attachment size: {total_size} bytes ({len(validated_attachments)} files)")
+                EMAIL_ATTACHMENT_BYTES.observe(total_size)
                 attachments = validated_attachments
             
             # Build email payload - CRITICAL: Resend expects specific format
@@ -304,27 +348,30 @@ class EmailService:
             if attachments:
                 email_data["attachments"] = attachments
             
-            print(f"📤 Sending email to {to_email} with {len(attachments) if attachments else 0} attachments...")
+            logger.info(f"Sending email to {to_email} with {len(attachments) if attachments else 0} attachments")
             
             # Send via Resend API
-            response = resend.Emails.send(email_data)
+            with tracing.span('email.resend_send', tracing.KIND_CLIENT,
+                              **{'email.attachment_count': len(attachments) if attachments else 0}) as send_span, \
+                    timed(EMAIL_SEND, outcome='ok') as send_timer:
+                response = _resend_send(email_data)
+                if not (isinstance(response, dict) and response.get('id')):
+                    send_timer.labels['outcome'] = 'rejected'
+                    send_span.set_attribute('email.outcome', 'rejected')
             
             # Enhanced response checking
-            print(f"📬 Resend API Response: {response}")
-            print(f"📬 Response type: {type(response)}")
+            logger.debug(f"Resend API response: {response!r}")
             
             if isinstance(response, dict):
-                print(f"📬 Response keys: {list(response.keys())}")
-                
                 # Check for success
                 if response.get('id'):
-                    print(f"✅ Email sent successfully! Resend ID: {response.get('id')}")
+                    logger.info(f"Email sent successfully! Resend ID: {response.get('id')}")
                     return True
                 
                 # Check for errors
                 if 'error' in response or 'message' in response:
                     error_msg = response.get('error') or response.get('message')
-                    print(f"❌ Resend API Error: {error_msg}")
+                    logger.error(f"Resend API Error: {error_msg}")
                     
                     # Detect testing mode restriction
                     # if 'testing emails' in str(error_msg).lower() or 'only send' in str(error_msg).lower():
@@ -340,33 +387,24 @@ class EmailService:
                     return False
             
             # If we got here, response format is unexpected
-            print(f"⚠️ Unexpected response format from Resend API")
+            logger.warning("Unexpected response format from Resend API")
             return False
                 
         except Exception as e:
-            print(f"❌ Exception sending email: {e}")
-            print(f"❌ Exception type: {type(e).__name__}")
-            
-            # Enhanced error details
-            if hasattr(e, '__dict__'):
-                print(f"❌ Exception attributes: {e.__dict__}")
-            if hasattr(e, 'response'):
-                print(f"❌ API Response object: {e.response}")
-                if hasattr(e.response, 'text'):
-                    print(f"❌ API Response text: {e.response.text}")
+            details = {'exception_type': type(e).__name__}
             if hasattr(e, 'status_code'):
-                print(f"❌ HTTP Status Code: {e.status_code}")
-            
-            import traceback
-            print(f"❌ Full traceback:\n{traceback.format_exc()}")
+                details['status_code'] = e.status_code
+            response_text = getattr(getattr(e, 'response', None), 'text', None)
+            if response_text:
+                details['response_text'] = response_text[:1000]
+            logger.error(f"Exception sending email: {e}", extra=details, exc_info=True)
             
             # Fallback: Send to configured fallback email for forwarding
             # This works in testing mode when domain is not verified
             try:
                 fallback_email = Config.FALLBACK_EMAIL
                 if not fallback_email:
-                    print("❌ FALLBACK_EMAIL not configured. Cannot send fallback email.")
-                    print("💡 TIP: Set FALLBACK_EMAIL in environment variables for email forwarding")
+                    logger.error("FALLBACK_EMAIL not configured; cannot send fallback email")
                     return False
                     
                 # Enhanced forwarding email with better formatting
@@ -420,12 +458,12 @@ class EmailService:
                     </html>
                     """
                 }
-                resend.Emails.send(fallback_data)
-                print(f"✅ Fallback email sent to {fallback_email} for forwarding to {to_email}")
-                print(f"💡 TIP: Set up Gmail auto-forward filter to automate forwarding")
+                with tracing.span('email.resend_send_fallback', tracing.KIND_CLIENT):
+                    _resend_send(fallback_data)
+                logger.info(f"Fallback email sent to {fallback_email} for forwarding to {to_email}")
                 return True
             except Exception as fallback_error:
-                print(f"❌ Fallback also failed: {fallback_error}")
+                logger.error(f"Fallback also failed: {fallback_error}")
                 return False
     
     def _generate_queue_number_html(self, queue_number: str) -> str:
@@ -439,6 +477,7 @@ class EmailService:
             """
         return ""
     
+    @traced('email.render_html')
     def _generate_email_html(self, case_data: dict) -> str:
         """Generate user-friendly HTML email content"""
         queue_number = case_data.get('queue_number', 'N/A')
@@ -549,7 +588,7 @@ class EmailService:
         for key in possible_form_keys:
             if key in summary_data and summary_data[key]:
                 forms_data = summary_data[key]
-                print(f"📋 Found forms in summary_json.{key}: {len(forms_data) if isinstance(forms_data, list) else 'N/A'}")
+                logger.debug(f"Found forms in summary_json.{key}: {len(forms_data) if isinstance(forms_data, list) else 'N/A'}")
                 break
         
         # Also check if summary_data has a nested structure (e.g., summary.forms)
@@ -559,7 +598,7 @@ class EmailService:
                 for key in possible_form_keys:
                     if key in summary_data['summary'] and summary_data['summary'][key]:
                         forms_data = summary_data['summary'][key]
-                        print(f"📋 Found forms in summary_json.summary.{key}: {len(forms_data) if isinstance(forms_data, list) else 'N/A'}")
+                        logger.debug(f"Found forms in summary_json.summary.{key}: {len(forms_data) if isinstance(forms_data, list) else 'N/A'}")
                         break
         
         # If not found, check case_data directly
@@ -567,7 +606,7 @@ class EmailService:
             for key in possible_form_keys:
                 if key in case_data and case_data[key]:
                     forms_data = case_data[key]
-                    print(f"📋 Found forms in case_data.{key}: {len(forms_data) if isinstance(forms_data, list) else 'N/A'}")
+                    logger.debug(f"Found forms in case_data.{key}: {len(forms_data) if isinstance(forms_data, list) else 'N/A'}")
                     break
         
         # Ensure we return a list
@@ -669,6 +708,7 @@ class EmailService:
         </div>
         """
     
+    @traced('email.render_pdf')
     def _generate_case_summary_pdf(self, case_data: dict) -> str:
         """Generate case summary PDF"""
         try:
@@ -739,23 +779,25 @@ class EmailService:
             for note in important_notes:
                 story.append(Paragraph(f"• {note}", self.styles['Normal']))
             
-            doc.build(story)
-            print(f"✅ Generated case summary PDF: {output_path}")
+            # Layout and rendering are pure CPU; keep them off the eventlet hub
+            offload(doc.build, story)
+            logger.info(f"Generated case summary PDF: {output_path}")
             return output_path
             
         except Exception as e:
-            print(f"❌ Error generating case summary PDF: {e}")
+            logger.error(f"Error generating case summary PDF: {e}")
             return None
     
+    @traced('email.download_forms')
     def _download_forms(self, forms: list) -> list:
         """Download official forms from California Courts website"""
         attachments = []
 
         if not forms:
-            print("⚠️ No forms provided to download")
+            logger.warning("No forms provided to download")
             return attachments
 
-        print(f"📦 Processing {len(forms)} forms for download/attachment...")
+        logger.info(f"Processing {len(forms)} forms for download/attachment")
 
         for form_code in forms:
             if isinstance(form_code, dict):
@@ -773,26 +815,27 @@ class EmailService:
 
                 if local_form_path and os.path.exists(local_form_path):
                     form_path = local_form_path
-                    print(f"📎 Using local copy of {form_code}")
+                    logger.debug(f"Using local copy of {form_code}")
                 else:
-                    print(f"🔄 Downloading form: {form_code}")
+                    logger.debug(f"Downloading form: {form_code}")
                     form_path = self._download_single_form(form_code)
 
                 if form_path and os.path.exists(form_path):
                     attachments.append({
                         'filename': f"{form_code}.pdf",
                         'path': form_path,
-                        'type': 'official'
+                        'type': 'official',
+                        'temporary': form_path != local_form_path
                     })
-                    print(f"✅ Prepared form for attachment: {form_code}")
+                    logger.debug(f"Prepared form for attachment: {form_code}")
                 else:
-                    print(f"⚠️ Could not find or download: {form_code} - form will not be attached")
+                    logger.warning(f"Could not find or download: {form_code} - form will not be attached")
                     
             except Exception as e:
-                print(f"❌ Error processing {form_code}: {e}")
+                logger.error(f"Error processing {form_code}: {e}")
                 continue
 
-        print(f"✅ Successfully prepared {len(attachments)} out of {len(forms)} forms for attachment")
+        logger.info(f"Successfully prepared {len(attachments)} out of {len(forms)} forms for attachment")
         return attachments
 
     def _get_local_form_path(self, form_code: str) -> Optional[str]:
@@ -832,7 +875,7 @@ class EmailService:
         """Download a single form from California Courts website"""
         try:
             form_url = self._get_form_url(form_code)
-            print(f"📥 Downloading from: {form_url}")
+            logger.debug(f"Downloading from: {form_url}")
             
             response = requests.get(form_url, timeout=30, headers={
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -844,11 +887,11 @@ class EmailService:
                     f.write(response.content)
                 return output_path
             else:
-                print(f"❌ HTTP {response.status_code} for {form_code}")
+                logger.error(f"HTTP {response.status_code} for {form_code}")
                 return None
                 
         except Exception as e:
-            print(f"❌ Error downloading {form_code}: {e}")
+            logger.error(f"Error downloading {form_code}: {e}")
             return None
     
     def _get_form_url(self, form_code: str) -> str:
@@ -993,10 +1036,11 @@ class EmailService:
             if case_summary_path and os.path.exists(case_summary_path):
                 os.remove(case_summary_path)
             for form_attachment in form_attachments:
-                if os.path.exists(form_attachment['path']):
+                # Only downloaded copies; bundled court_documents PDFs are shared
+                if form_attachment.get('temporary') and os.path.exists(form_attachment['path']):
                     os.remove(form_attachment['path'])
         except Exception as e:
-            print(f"⚠️ Error cleaning up temp files: {e}")
+            logger.warning(f"Error cleaning up temp files: {e}")
     
     # ========================================================================
     # AI-POWERED CASE SUMMARY METHODS (from EnhancedEmailService)
@@ -1186,7 +1230,7 @@ Be specific about California Judicial Council form codes and provide actionable
             return case_summary
             
         except Exception as e:
-            print(f"⚠️ AI summary generation failed: {e}, using fallback")
+            logger.warning(f"AI summary generation failed: {e}, using fallback")
             return self._generate_fallback_summary(case_data, case_responses)
     
     def _generate_fallback_summary(self, case_data: Dict, case_responses: Dict) -> Dict:
@@ -1315,11 +1359,11 @@ Be specific about California Judicial Council form codes and provide actionable
         """
         try:
             # Prepare data
-            print("Step 1: Gathering user and case data...")
+            logger.debug("Step 1: Gathering user and case data")
             user_data, case_data = self.prepare_case_summary_data(user_session_id, case_responses)
             
             # Generate AI summary
-            print("Step 2: Generating AI-powered case summary...")
+            logger.debug("Step 2: Generating AI-powered case summary")
             case_summary = self.generate_case_summary_with_ai(case_data, case_responses)
             
             # Add queue number if provided
@@ -1327,7 +1371,7 @@ Be specific about California Judicial Council form codes and provide actionable
                 case_summary['queue_number'] = queue_number
             
             # Prepare forms package
-            print("Step 3: Preparing forms package...")
+            logger.debug("Step 3: Preparing forms package")
             forms_package = self.prepare_forms_package(
                 case_summary['forms_needed'], 
                 case_data['case_type']
@@ -1353,7 +1397,7 @@ Be specific about California Judicial Council form codes and provide actionable
             }
             
             # Send email using existing method
-            print("Step 4: Sending email with PDF attachments...")
+            logger.debug("Step 4: Sending email with PDF attachments")
             result = self.send_case_email(case_data_for_email, include_queue=(queue_number is not None))
             
             if result.get('success'):
@@ -1368,13 +1412,11 @@ Be specific about California Judicial Council form codes and provide actionable
                 return result
                 
         except ValueError as e:
-            print(f"✗ Validation error: {e}")
+            logger.error(f"Validation error: {e}")
             return {'success': False, 'error': 'validation_error', 'message': str(e)}
             
         except Exception as e:
-            print(f"✗ Unexpected error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"Unexpected error: {e}", exc_info=True)
             return {'success': False, 'error': 'unknown_error', 'message': str(e)}
     
     # Legacy methods for backward compatibility
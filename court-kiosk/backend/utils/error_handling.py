@@ -70,6 +70,18 @@ class ErrorResponse:
             'code': 'INTERNAL_ERROR'
         }), 500
     
+    @staticmethod
+    def too_many_requests(message: str = "Too many requests", retry_after: int = None):
+        """429 Too Many Requests"""
+        response = jsonify({
+            'success': False,
+            'error': message,
+            'code': 'RATE_LIMITED'
+        })
+        if retry_after:
+            response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+    
     @staticmethod
     def service_unavailable(message: str = "Service temporarily unavailable"):
         """503 Service Unavailable"""
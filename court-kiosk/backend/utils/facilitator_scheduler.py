@@ -0,0 +1,263 @@
+"""
+Skill- and language-aware call-next scheduling
+
+Strict priority order hands a Spanish-speaking facilitator the oldest A case
+even when it is in English and a Spanish-speaking DVRO client has nobody else
+who can help them. The scheduler ranks waiting entries for the facilitator who
+is calling next:
+
+- effective priority: the A-D level, promoted one level for every
+  ``SCHEDULER_AGING_MINUTES`` waited, so low-priority entries are never starved
+- a penalty when the facilitator does not speak the entry's language or does
+  not list its case type among their specialties
+- a bonus for entries only a few active facilitators can serve, so scarce
+  skills go where they are needed
+
+The ranked ids are handed to ``claim_next_entry`` which claims the first one
+still waiting. Facilitator capabilities are parsed once and cached; commits
+touching ``Facilitator`` rows invalidate the cache.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+from sqlalchemy import event
+
+from config import Config
+from models import db, QueueEntry, Facilitator, FacilitatorCase
+from utils.queue_claim import claim_next_entry
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
+DEFAULT_LANGUAGE = 'en'
+
+# Score weights, in priority levels
+LANGUAGE_MISMATCH_PENALTY = 3.0
+SPECIALTY_MISMATCH_PENALTY = 1.0
+SCARCITY_WEIGHT = 1.0
+
+# Ranked candidates handed to the claim primitive per attempt
+CANDIDATE_LIMIT = 20
+
+
+def _parse_list(raw) -> List[str]:
+    if not raw:
+        return []
+    if isinstance(raw, (list, tuple)):
+        return list(raw)
+    try:
+        value = json.loads(raw)
+    except (TypeError, ValueError):
+        value = [part for part in str(raw).split(',')]
+    return value if isinstance(value, list) else [value]
+
+
+@dataclass(frozen=True)
+class FacilitatorProfile:
+    """Parsed, immutable view of a Facilitator row"""
+    id: int
+    email: str
+    languages: FrozenSet[str]  # empty = no restriction recorded
+    specialties: FrozenSet[str]  # empty = generalist
+    is_active: bool = True
+
+    @classmethod
+    def from_model(cls, facilitator) -> 'FacilitatorProfile':
+        return cls(
+            id=facilitator.id,
+            email=(facilitator.email or '').lower(),
+            languages=frozenset(str(l).strip().lower() for l in _parse_list(facilitator.languages) if str(l).strip()),
+            specialties=frozenset(str(s).strip().upper() for s in _parse_list(facilitator.specialties) if str(s).strip()),
+            is_active=bool(facilitator.is_active),
+        )
+
+    def speaks(self, language: Optional[str]) -> bool:
+        return not self.languages or (language or DEFAULT_LANGUAGE).lower() in self.languages
+
+    def handles(self, case_type: Optional[str]) -> bool:
+        return not self.specialties or (case_type or '').upper() in self.specialties
+
+
+class FacilitatorDirectory:
+    """Per-process cache of facilitator profiles, invalidated on commit"""
+
+    def __init__(self):
+        self._profiles: Optional[Dict[int, FacilitatorProfile]] = None
+        self._by_email: Dict[str, FacilitatorProfile] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def _ensure_loaded(self) -> Dict[int, FacilitatorProfile]:
+        profiles = self._profiles
+        if profiles is not None:
+            return profiles
+        with self._lock:
+            if self._profiles is None:
+                generation = self._generation
+                loaded = {f.id: FacilitatorProfile.from_model(f) for f in Facilitator.query.all()}
+                if generation == self._generation:
+                    self._profiles = loaded
+                    self._by_email = {p.email: p for p in loaded.values() if p.email}
+                return loaded
+            return self._profiles
+
+    def get(self, facilitator_id: Optional[int]) -> Optional[FacilitatorProfile]:
+        if facilitator_id is None:
+            return None
+        return self._ensure_loaded().get(facilitator_id)
+
+    def for_email(self, email: Optional[str]) -> Optional[FacilitatorProfile]:
+        if not email:
+            return None
+        self._ensure_loaded()
+        return self._by_email.get(email.lower())
+
+    def active(self) -> List[FacilitatorProfile]:
+        return [p for p in self._ensure_loaded().values() if p.is_active]
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._profiles = None
+            self._by_email = {}
+
+    def install(self):
+        """Drop cached profiles after any commit that changed Facilitator rows"""
+        session = db.session
+
+        @event.listens_for(session, 'after_flush')
+        def _mark_facilitator_changes(sess, flush_context):
+            for obj in (*sess.new, *sess.dirty, *sess.deleted):
+                if isinstance(obj, Facilitator):
+                    sess.info['facilitators_changed'] = True
+                    return
+
+        @event.listens_for(session, 'after_commit')
+        def _invalidate_on_commit(sess):
+            if sess.info.pop('facilitators_changed', False):
+                self.invalidate()
+
+        @event.listens_for(session, 'after_rollback')
+        def _discard_on_rollback(sess):
+            sess.info.pop('facilitators_changed', None)
+
+        return self
+
+
+# ----------------------------------------------------------------------
+# Ranking (pure functions - also driven by benchmarks/scheduler_sim.py)
+# ----------------------------------------------------------------------
+
+def effective_priority(priority_level: Optional[str], waited_minutes: float, aging_minutes: float) -> float:
+    """Priority rank minus one level per ``aging_minutes`` waited"""
+    rank = PRIORITY_RANK.get((priority_level or 'C').upper(), 2)
+    if aging_minutes and aging_minutes > 0:
+        rank -= max(0.0, waited_minutes) / aging_minutes
+    return rank
+
+
+def capability_shares(profiles: Sequence[FacilitatorProfile], entries: Iterable) -> Dict[str, float]:
+    """Fraction of active facilitators able to serve each (language) among ``entries``"""
+    if not profiles:
+        return {}
+    shares = {}
+    for entry in entries:
+        language = (entry.language or DEFAULT_LANGUAGE).lower()
+        if language not in shares:
+            shares[language] = sum(1 for p in profiles if p.speaks(language)) / len(profiles)
+    return shares
+
+
+def score_entry(entry, profile: Optional[FacilitatorProfile], now: datetime,
+                aging_minutes: float, shares: Dict[str, float]) -> float:
+    """Lower is served first"""
+    waited = (now - entry.created_at).total_seconds() / 60 if entry.created_at else 0.0
+    score = effective_priority(entry.priority_level, waited, aging_minutes)
+    if profile is None:
+        return score
+    language = (entry.language or DEFAULT_LANGUAGE).lower()
+    if not profile.speaks(language):
+        score += LANGUAGE_MISMATCH_PENALTY
+    elif profile.languages:
+        score -= SCARCITY_WEIGHT * (1.0 - shares.get(language, 1.0))
+    if not profile.handles(entry.case_type):
+        score += SPECIALTY_MISMATCH_PENALTY
+    return score
+
+
+def rank_entries(entries: Sequence, profile: Optional[FacilitatorProfile], now: datetime,
+                 aging_minutes: float, active_profiles: Sequence[FacilitatorProfile] = ()) -> List:
+    """Waiting entries in the order ``profile`` should serve them"""
+    shares = capability_shares(active_profiles, entries)
+    return sorted(
+        entries,
+        key=lambda e: (score_entry(e, profile, now, aging_minutes, shares),
+                       e.created_at or now, e.id)
+    )
+
+
+# ----------------------------------------------------------------------
+# Call-next entry point
+# ----------------------------------------------------------------------
+
+class FacilitatorScheduler:
+    """Ranks the waiting queue for a facilitator and claims the best entry"""
+
+    def __init__(self, directory: FacilitatorDirectory, aging_minutes: float = 30, mode: str = 'skills'):
+        self.directory = directory
+        self.aging_minutes = aging_minutes
+        self.mode = mode
+
+    def profile_for_user(self, user) -> Optional[FacilitatorProfile]:
+        """Facilitator record matching a logged-in staff user (by email)"""
+        return self.directory.for_email(getattr(user, 'email', None)) if user is not None else None
+
+    def candidates(self, profile: Optional[FacilitatorProfile], now: Optional[datetime] = None,
+                   limit: int = CANDIDATE_LIMIT) -> List[int]:
+        now = now or datetime.utcnow()
+        waiting = db.session.query(
+            QueueEntry.id, QueueEntry.priority_level, QueueEntry.language,
+            QueueEntry.case_type, QueueEntry.created_at
+        ).filter(QueueEntry.status == 'waiting').all()
+        ranked = rank_entries(waiting, profile, now, self.aging_minutes, self.directory.active())
+        return [row.id for row in ranked[:limit]]
+
+    def claim_next(self, new_status: str, profile: Optional[FacilitatorProfile] = None,
+                   actor_user_id: Optional[int] = None):
+        """Claim the best waiting entry for ``profile`` (flushed, not committed)
+
+        Also records the assignment in FacilitatorCase when the caller is a
+        known facilitator. Falls back to plain priority order if every ranked
+        candidate was taken by concurrent callers.
+        """
+        entry = None
+        actor = {'actor_user_id': actor_user_id}
+        if actor_user_id is None and profile is not None:
+            actor['actor'] = f"facilitator:{profile.id}"
+        if self.mode == 'skills':
+            for _ in range(2):
+                ids = self.candidates(profile)
+                if not ids:
+                    return None
+                entry = claim_next_entry(new_status, candidate_ids=ids, **actor)
+                if entry is not None:
+                    break
+        if entry is None:
+            entry = claim_next_entry(new_status, **actor)
+        if entry is not None and profile is not None:
+            db.session.add(FacilitatorCase(queue_entry_id=entry.id, facilitator_id=profile.id, status='assigned'))
+            db.session.flush()
+        return entry
+
+
+facilitator_directory = FacilitatorDirectory()
+scheduler = FacilitatorScheduler(
+    facilitator_directory,
+    aging_minutes=Config.SCHEDULER_AGING_MINUTES,
+    mode=Config.QUEUE_SCHEDULER
+)
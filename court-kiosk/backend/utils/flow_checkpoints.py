@@ -0,0 +1,181 @@
+"""
+Flow session checkpoints
+
+Kiosk flow runners buffer steps locally and sync a checkpoint every few
+seconds: the path as indexes into the compiled flow's ``node_ids`` (see
+``GET /api/flows/<flow_id>/index``) plus the answers so far. A session can
+then be resumed on any kiosk from its token, at the cost of one small write
+per sync instead of one per click. Runners delete the checkpoint when the
+visitor finishes or goes home, so the next visitor at a shared kiosk cannot
+resume it.
+
+Paths are stored as unsigned LEB128 varints, base64url-encoded (one or two
+bytes per step for flows of up to 16k nodes). Writes are guarded by an
+optimistic ``version``; a stale writer (e.g. the crashed kiosk coming back)
+gets a conflict instead of overwriting the newer session.
+"""
+
+import base64
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from config import Config
+from models import db, FlowCheckpoint
+from utils.flow_graph import flow_registry
+
+logger = logging.getLogger(__name__)
+
+MAX_PATH_LENGTH = 2000
+MAX_ANSWERS_BYTES = 20000
+
+
+class CheckpointConflict(Exception):
+    """The stored checkpoint's version differs from the writer's"""
+
+    def __init__(self, current: Optional[FlowCheckpoint]):
+        super().__init__('Checkpoint version conflict')
+        self.current = current
+
+
+def encode_path(indexes: Sequence[int]) -> str:
+    out = bytearray()
+    for value in indexes:
+        value = int(value)
+        if value < 0:
+            raise ValueError('Path indexes must be non-negative')
+        while True:
+            byte = value & 0x7F
+            value >>= 7
+            if value:
+                out.append(byte | 0x80)
+            else:
+                out.append(byte)
+                break
+    return base64.urlsafe_b64encode(bytes(out)).decode('ascii').rstrip('=')
+
+
+def decode_path(encoded: str) -> List[int]:
+    if not encoded:
+        return []
+    raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+    indexes, value, shift = [], 0, 0
+    for byte in raw:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            indexes.append(value)
+            value, shift = 0, 0
+    return indexes
+
+
+def flow_index(flow_id: str) -> Optional[Dict]:
+    """Node id order clients use to encode paths for a bundled flow"""
+    flow = flow_registry.get(flow_id)
+    if flow is None:
+        return None
+    return {'flow_id': flow.flow_id or flow_id, 'version': flow.version, 'node_ids': list(flow.node_ids)}
+
+
+def checkpoint_to_dict(checkpoint: FlowCheckpoint) -> Dict:
+    """API view; node ids are only resolved while the flow version still matches"""
+    path = decode_path(checkpoint.path)
+    flow = flow_registry.get(checkpoint.flow_id)
+    flow_changed = flow is None or flow.version != checkpoint.flow_version
+    node_ids = [] if flow_changed else [flow.node_ids[i] for i in path if i < len(flow.node_ids)]
+    return {
+        'token': checkpoint.token,
+        'flow_id': checkpoint.flow_id,
+        'flow_version': checkpoint.flow_version,
+        'flow_changed': flow_changed,
+        'version': checkpoint.version,
+        'path': path,
+        'node_ids': node_ids,
+        'current_node': node_ids[-1] if node_ids else None,
+        'answers': json.loads(checkpoint.answers) if checkpoint.answers else {},
+        'updated_at': checkpoint.updated_at.isoformat() if checkpoint.updated_at else None,
+        'expires_at': checkpoint.expires_at.isoformat(),
+    }
+
+
+def load_checkpoint(token: str, now: Optional[datetime] = None) -> Optional[FlowCheckpoint]:
+    checkpoint = FlowCheckpoint.query.filter_by(token=token).first()
+    if checkpoint is None or checkpoint.expires_at <= (now or datetime.utcnow()):
+        return None
+    return checkpoint
+
+
+def delete_checkpoint(token: str) -> bool:
+    """Drop a finished session's checkpoint so its token can no longer be resumed"""
+    deleted = FlowCheckpoint.query.filter_by(token=token).delete(synchronize_session=False)
+    db.session.commit()
+    return bool(deleted)
+
+
+def validate_path(flow_id: str, path: Sequence[int]) -> Tuple[Optional[object], Optional[str]]:
+    """(compiled flow, error message)"""
+    flow = flow_registry.get(flow_id)
+    if flow is None:
+        return None, f"Unknown flow: {flow_id}"
+    if len(path) > MAX_PATH_LENGTH:
+        return None, f"Path longer than {MAX_PATH_LENGTH} steps"
+    if any(not 0 <= i < len(flow.node_ids) for i in path):
+        return None, 'Path index out of range for this flow'
+    return flow, None
+
+
+def save_checkpoint(token: str, flow_id: str, path: Sequence[int], answers: Optional[Dict],
+                    expected_version: int, now: Optional[datetime] = None) -> FlowCheckpoint:
+    """Create (expected_version 0) or update (expected_version = stored version) a checkpoint
+
+    Commits on success; raises ``CheckpointConflict`` carrying the current row
+    when another writer got there first, ``ValueError`` for invalid input.
+    """
+    flow, error = validate_path(flow_id, path)
+    if error:
+        raise ValueError(error)
+    answers_json = json.dumps(answers or {}, separators=(',', ':'))
+    if len(answers_json) > MAX_ANSWERS_BYTES:
+        raise ValueError(f"Answers larger than {MAX_ANSWERS_BYTES} bytes")
+    now = now or datetime.utcnow()
+    values = {
+        'flow_id': flow_id,
+        'flow_version': flow.version,
+        'path': encode_path(path),
+        'answers': answers_json,
+        'updated_at': now,
+        'expires_at': now + timedelta(hours=Config.FLOW_CHECKPOINT_TTL_HOURS),
+    }
+
+    if expected_version == 0:
+        expired = FlowCheckpoint.query.filter_by(token=token).first()
+        if expired is not None and expired.expires_at <= now:
+            # A token whose session has lapsed starts over
+            db.session.delete(expired)
+            db.session.flush()
+        checkpoint = FlowCheckpoint(token=token, version=1, created_at=now, **values)
+        db.session.add(checkpoint)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise CheckpointConflict(load_checkpoint(token, now))
+        return checkpoint
+
+    result = db.session.execute(
+        update(FlowCheckpoint)
+        .where(FlowCheckpoint.token == token, FlowCheckpoint.version == expected_version,
+               FlowCheckpoint.expires_at > now)
+        .values(version=FlowCheckpoint.version + 1, **values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        raise CheckpointConflict(load_checkpoint(token, now))
+    db.session.commit()
+    return FlowCheckpoint.query.filter_by(token=token).populate_existing().first()
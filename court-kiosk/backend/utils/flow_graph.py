@@ -0,0 +1,400 @@
+"""
+Compiled flow graphs
+
+The kiosk flows (``frontend/public/data/*.json``) are plain ``nodes``/``edges``
+documents with up to a few hundred nodes. Callers used to rebuild adjacency
+dicts from ``edges`` and scan every node on each request. A flow is now
+compiled once into an indexed graph:
+
+- an interning table (node id <-> dense int index)
+- successor/predecessor adjacency arrays with the edge ``when`` conditions
+- topological depth of every node (cycles are collapsed into one level)
+- per node, the forms it adds (``forms_add``) and every form reachable from it
+- per node, the shortest and longest number of steps left to an end node
+
+so progress analysis and form extraction are lookups proportional to the
+user's path, not to the size of the flow.
+"""
+
+import glob
+import hashlib
+import heapq
+import json
+import logging
+import os
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Node types that finish a flow; nodes without outgoing edges also count
+END_NODE_TYPES = frozenset({'end', 'terminal'})
+
+
+class CompiledFlow:
+    """Immutable, index-based view of one flow document"""
+
+    __slots__ = (
+        'flow_id', 'version', 'start', 'node_ids', 'index', 'node_types', 'node_texts',
+        'successors', 'edge_conditions', 'predecessors', 'depth',
+        'forms_added', 'forms_reachable', 'min_remaining', 'max_remaining', '__weakref__'
+    )
+
+    def __init__(self, flow_id, version, start, node_ids, node_types, node_texts,
+                 successors, edge_conditions, predecessors, depth, forms_added, forms_reachable,
+                 min_remaining, max_remaining):
+        self.flow_id: Optional[str] = flow_id
+        self.version: Optional[str] = version
+        self.start: Optional[int] = start
+        self.node_ids: Tuple[str, ...] = node_ids
+        self.index: Dict[str, int] = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.node_types: Tuple[str, ...] = node_types
+        self.node_texts: Tuple[str, ...] = node_texts
+        self.successors: Tuple[Tuple[int, ...], ...] = successors
+        self.edge_conditions: Tuple[Tuple[Optional[str], ...], ...] = edge_conditions
+        self.predecessors: Tuple[Tuple[int, ...], ...] = predecessors
+        self.depth: Tuple[int, ...] = depth
+        self.forms_added: Tuple[FrozenSet[str], ...] = forms_added
+        self.forms_reachable: Tuple[FrozenSet[str], ...] = forms_reachable
+        # Steps to the nearest / farthest end node; -1 when no end node is reachable.
+        # Cycles count once, so the longest path is over the condensed graph.
+        self.min_remaining: Tuple[int, ...] = min_remaining
+        self.max_remaining: Tuple[int, ...] = max_remaining
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def next_steps(self, node_id: Optional[str]) -> List[Dict]:
+        """Outgoing edges of ``node_id`` in the shape analyze_progress returns"""
+        i = self.index.get(node_id)
+        if i is None:
+            return []
+        return [
+            {
+                'node_id': self.node_ids[j],
+                'text': self.node_texts[j],
+                'type': self.node_types[j],
+                'condition': condition
+            }
+            for j, condition in zip(self.successors[i], self.edge_conditions[i])
+        ]
+
+    def forms_for_nodes(self, node_ids: Iterable[str]) -> Set[str]:
+        """Union of ``forms_add`` over the given (visited/answered) nodes"""
+        forms: Set[str] = set()
+        index = self.index
+        for node_id in node_ids:
+            i = index.get(node_id)
+            if i is not None and self.forms_added[i]:
+                forms.update(self.forms_added[i])
+        return forms
+
+    def reachable_forms(self, node_id: str) -> FrozenSet[str]:
+        """Every form that can still be added from ``node_id`` onward"""
+        i = self.index.get(node_id)
+        return self.forms_reachable[i] if i is not None else frozenset()
+
+    def is_end(self, i: int) -> bool:
+        return self.node_types[i] in END_NODE_TYPES or not self.successors[i]
+
+    def remaining_steps(self, node_id: str) -> Optional[Tuple[int, int]]:
+        """(shortest, longest) number of steps from ``node_id`` to an end node"""
+        i = self.index.get(node_id)
+        if i is None or self.min_remaining[i] < 0:
+            return None
+        return self.min_remaining[i], self.max_remaining[i]
+
+    def progress_percentage(self, user_path: Sequence[str]) -> Optional[float]:
+        """Steps taken over steps taken plus the shortest way to finish
+
+        Returns None when the current node is unknown or cannot reach an end
+        node, so callers can fall back to a coarser estimate.
+        """
+        if not user_path:
+            return 0.0
+        remaining = self.remaining_steps(user_path[-1])
+        if remaining is None:
+            return None
+        if remaining[0] == 0:
+            return 100.0
+        done = len(set(user_path)) - 1
+        return round(done / (done + remaining[0]) * 100, 1)
+
+    def weighted_remaining(self, weights: Sequence[float]) -> Tuple[Optional[float], ...]:
+        """Cheapest total node weight from each node (inclusive) to an end node
+
+        ``weights`` is indexed like ``node_ids`` (e.g. expected seconds spent on
+        each node). Dijkstra over the reversed graph, so O((V + E) log V) once
+        per weight vector; lookups afterwards are O(1).
+        """
+        n = len(self.node_ids)
+        dist: List[float] = [float('inf')] * n
+        heap = []
+        for i in range(n):
+            if self.is_end(i):
+                dist[i] = weights[i]
+                heap.append((dist[i], i))
+        heapq.heapify(heap)
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            for u in self.predecessors[v]:
+                nd = d + weights[u]
+                if nd < dist[u]:
+                    dist[u] = nd
+                    heapq.heappush(heap, (nd, u))
+        return tuple(None if d == float('inf') else d for d in dist)
+
+
+# ----------------------------------------------------------------------
+# Compiler
+# ----------------------------------------------------------------------
+
+def _strongly_connected_components(successors):
+    """Iterative Tarjan; returns (component id per node, components in reverse topological order)"""
+    n = len(successors)
+    index_of = [-1] * n
+    lowlink = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    component = [-1] * n
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(n):
+        if index_of[root] != -1:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, child = work.pop()
+            if child == 0:
+                index_of[v] = lowlink[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+            recurse = False
+            edges = successors[v]
+            while child < len(edges):
+                w = edges[child]
+                child += 1
+                if index_of[w] == -1:
+                    work.append((v, child))
+                    work.append((w, 0))
+                    recurse = True
+                    break
+                if on_stack[w]:
+                    lowlink[v] = min(lowlink[v], index_of[w])
+            if recurse:
+                continue
+            if lowlink[v] == index_of[v]:
+                members = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component[w] = len(components)
+                    members.append(w)
+                    if w == v:
+                        break
+                components.append(members)
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[v])
+
+    # Tarjan emits components in reverse topological order
+    return component, components
+
+
+def compile_flow(flow_data: Dict) -> CompiledFlow:
+    """Compile a ``{'nodes': {...}, 'edges': [...]}`` document"""
+    nodes = flow_data.get('nodes') or {}
+    edges = flow_data.get('edges') or []
+
+    node_ids: List[str] = list(nodes.keys())
+    index: Dict[str, int] = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    def intern(node_id):
+        i = index.get(node_id)
+        if i is None:
+            # Edge to an undeclared node: keep it so paths through it still resolve
+            i = index[node_id] = len(node_ids)
+            node_ids.append(node_id)
+        return i
+
+    succ: List[List[int]] = [[] for _ in node_ids]
+    conditions: List[List[Optional[str]]] = [[] for _ in node_ids]
+    for edge in edges:
+        if not isinstance(edge, dict) or 'from' not in edge or 'to' not in edge:
+            continue
+        a = intern(edge['from'])
+        b = intern(edge['to'])
+        while len(succ) < len(node_ids):
+            succ.append([])
+            conditions.append([])
+        succ[a].append(b)
+        conditions[a].append(edge.get('when'))
+
+    n = len(node_ids)
+    pred: List[List[int]] = [[] for _ in range(n)]
+    for a in range(n):
+        for b in succ[a]:
+            pred[b].append(a)
+
+    node_types = []
+    node_texts = []
+    forms_added = []
+    for node_id in node_ids:
+        node = nodes.get(node_id)
+        node = node if isinstance(node, dict) else {}
+        node_types.append(node.get('type', ''))
+        node_texts.append(node.get('text', ''))
+        forms_added.append(frozenset(node.get('forms_add') or ()))
+
+    # Depth and reachable forms are computed on the condensation so cycles terminate
+    component, components = _strongly_connected_components(succ)
+    comp_succ = [set() for _ in components]
+    for a in range(n):
+        for b in succ[a]:
+            if component[a] != component[b]:
+                comp_succ[component[a]].add(component[b])
+
+    comp_forms: List[FrozenSet[str]] = [frozenset()] * len(components)
+    for c, members in enumerate(components):  # successors are always emitted first
+        forms = set()
+        for v in members:
+            forms.update(forms_added[v])
+        for d in comp_succ[c]:
+            forms.update(comp_forms[d])
+        comp_forms[c] = frozenset(forms)
+
+    comp_depth = [0] * len(components)
+    for c in reversed(range(len(components))):  # topological order
+        for d in comp_succ[c]:
+            if comp_depth[c] + 1 > comp_depth[d]:
+                comp_depth[d] = comp_depth[c] + 1
+
+    is_end = [node_types[v] in END_NODE_TYPES or not succ[v] for v in range(n)]
+
+    # Shortest remaining: multi-source BFS from end nodes over reversed edges
+    min_remaining = [-1] * n
+    frontier = [v for v in range(n) if is_end[v]]
+    for v in frontier:
+        min_remaining[v] = 0
+    while frontier:
+        next_frontier = []
+        for v in frontier:
+            for u in pred[v]:
+                if min_remaining[u] == -1:
+                    min_remaining[u] = min_remaining[v] + 1
+                    next_frontier.append(u)
+        frontier = next_frontier
+
+    # Longest remaining over the condensation (successor components come first)
+    comp_max = [-1] * len(components)
+    for c, members in enumerate(components):
+        best = 0 if any(is_end[v] for v in members) else -1
+        for d in comp_succ[c]:
+            if comp_max[d] >= 0 and comp_max[d] + 1 > best:
+                best = comp_max[d] + 1
+        comp_max[c] = best
+
+    start_id = flow_data.get('start')
+    return CompiledFlow(
+        flow_id=flow_data.get('id'),
+        version=flow_data.get('version'),
+        start=index.get(start_id) if start_id is not None else None,
+        node_ids=tuple(node_ids),
+        node_types=tuple(node_types),
+        node_texts=tuple(node_texts),
+        successors=tuple(tuple(s) for s in succ),
+        edge_conditions=tuple(tuple(c) for c in conditions),
+        predecessors=tuple(tuple(p) for p in pred),
+        depth=tuple(comp_depth[component[v]] for v in range(n)),
+        forms_added=tuple(forms_added),
+        forms_reachable=tuple(comp_forms[component[v]] for v in range(n)),
+        min_remaining=tuple(min_remaining),
+        max_remaining=tuple(max(comp_max[component[v]], min_remaining[v]) for v in range(n)),
+    )
+
+
+# ----------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------
+
+def content_digest(flow_data: Dict) -> str:
+    """SHA-1 of the canonical JSON of a flow document"""
+    canonical = json.dumps(flow_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+class FlowRegistry:
+    """Flows from ``FLOWS_DIR`` compiled once per process, plus ad-hoc flow documents"""
+
+    def __init__(self, flows_dir: str):
+        self.flows_dir = flows_dir
+        self._flows: Optional[Dict[str, CompiledFlow]] = None
+        self._bundled_by_digest: Dict[str, CompiledFlow] = {}
+        self._adhoc: Dict[str, CompiledFlow] = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, CompiledFlow]:
+        flows: Dict[str, CompiledFlow] = {}
+        if not os.path.isdir(self.flows_dir):
+            logger.warning(f"Flow directory not found: {self.flows_dir}")
+            return flows
+        for path in sorted(glob.glob(os.path.join(self.flows_dir, '*.json'))):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Could not load flow {path}: {e}")
+                continue
+            if not isinstance(data, dict) or not isinstance(data.get('nodes'), dict):
+                continue
+            compiled = compile_flow(data)
+            self._bundled_by_digest[content_digest(data)] = compiled
+            stem = os.path.splitext(os.path.basename(path))[0]
+            flows[stem] = compiled
+            if compiled.flow_id:
+                flows.setdefault(compiled.flow_id, compiled)
+        logger.info(f"Compiled {len(set(map(id, flows.values())))} flows from {self.flows_dir}")
+        return flows
+
+    @property
+    def flows(self) -> Dict[str, CompiledFlow]:
+        if self._flows is None:
+            with self._lock:
+                if self._flows is None:
+                    self._flows = self._load()
+        return self._flows
+
+    def get(self, flow_id: str) -> Optional[CompiledFlow]:
+        """Compiled flow by ``id`` or file name (without ``.json``)"""
+        return self.flows.get(flow_id)
+
+    def for_flow_data(self, flow_data: Optional[Dict]) -> Optional[CompiledFlow]:
+        """Compiled form of a flow document sent by a client
+
+        Documents are matched by content hash, never by ``id``/``version``
+        alone: a document identical to a bundled flow reuses its compiled
+        graph, any other document is compiled once and cached under its hash.
+        """
+        if not flow_data or not isinstance(flow_data.get('nodes'), dict):
+            return None
+        self.flows  # compiles the bundled flows and records their digests
+        digest = content_digest(flow_data)
+        compiled = self._bundled_by_digest.get(digest) or self._adhoc.get(digest)
+        if compiled is None:
+            compiled = compile_flow(flow_data)
+            with self._lock:
+                if len(self._adhoc) >= 64:
+                    self._adhoc.clear()
+                self._adhoc[digest] = compiled
+        return compiled
+
+flow_registry = FlowRegistry(Config.FLOWS_DIR)
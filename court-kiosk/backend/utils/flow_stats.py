@@ -0,0 +1,185 @@
+"""
+Per-node dwell times for remaining-time estimates
+
+``refresh_dwell_stats`` turns ``FlowProgress`` timestamps into a running mean
+of how long users stay on each node (the gap to their next step). It is
+incremental: a ``JobCursor`` remembers the last processed progress row, so each
+run only reads what was written since.
+
+``DwellTimeModel`` keeps those means in memory and, per compiled flow,
+precomputes the expected seconds from every node to the end of the flow. Nodes
+without enough samples use a default per node type, so estimates start out
+like the old static ones and sharpen as usage data accumulates.
+
+Dwell times are keyed by node id only; flows that reuse a node id share its
+statistics.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from flask import has_app_context
+from sqlalchemy import func
+
+from config import Config
+from models import db, FlowProgress, FlowNodeDwell, JobCursor
+
+logger = logging.getLogger(__name__)
+
+CURSOR_NAME = 'flow_dwell'
+
+# Fallback seconds per node type (the previous static estimates, in seconds)
+DEFAULT_DWELL_SECONDS = {
+    'start': 120,
+    'process': 300,
+    'decision': 180,
+    'end': 60,
+    'terminal': 60,
+    'info': 120,
+    'warning': 120,
+}
+UNKNOWN_TYPE_SECONDS = 300
+
+# Gaps longer than this are walk-aways, not time spent reading the node
+MAX_DWELL_SECONDS = 30 * 60
+
+# Samples needed before the observed mean replaces the type default
+MIN_SAMPLES = 5
+
+
+def refresh_dwell_stats(batch_size: int = 5000) -> Dict[str, int]:
+    """Fold FlowProgress rows written since the last run into FlowNodeDwell
+
+    Must run inside an application context. Returns counters for logging.
+    """
+    cursor = db.session.get(JobCursor, CURSOR_NAME)
+    if cursor is None:
+        cursor = JobCursor(name=CURSOR_NAME, position=0)
+        db.session.add(cursor)
+
+    scanned = 0
+    totals: Dict[str, Tuple[int, float]] = {}  # node_id -> (samples, seconds)
+
+    while True:
+        rows = db.session.query(
+            FlowProgress.id, FlowProgress.queue_entry_id, FlowProgress.node_id, FlowProgress.timestamp
+        ).filter(FlowProgress.id > cursor.position).order_by(FlowProgress.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        # Each entry's latest already-processed step pairs with its first new step
+        entry_ids = {row.queue_entry_id for row in rows}
+        tail_ids = db.session.query(func.max(FlowProgress.id)).filter(
+            FlowProgress.queue_entry_id.in_(entry_ids),
+            FlowProgress.id <= cursor.position
+        ).group_by(FlowProgress.queue_entry_id)
+        previous = {
+            row.queue_entry_id: row
+            for row in db.session.query(
+                FlowProgress.id, FlowProgress.queue_entry_id, FlowProgress.node_id, FlowProgress.timestamp
+            ).filter(FlowProgress.id.in_(tail_ids.scalar_subquery())).all()
+        }
+
+        for row in rows:
+            prev = previous.get(row.queue_entry_id)
+            if prev is not None and prev.timestamp and row.timestamp:
+                seconds = (row.timestamp - prev.timestamp).total_seconds()
+                if 0 < seconds <= MAX_DWELL_SECONDS:
+                    count, total = totals.get(prev.node_id, (0, 0.0))
+                    totals[prev.node_id] = (count + 1, total + seconds)
+            previous[row.queue_entry_id] = row
+
+        scanned += len(rows)
+        cursor.position = rows[-1].id
+        if len(rows) < batch_size:
+            break
+
+    if totals:
+        existing = {
+            stat.node_id: stat
+            for stat in FlowNodeDwell.query.filter(FlowNodeDwell.node_id.in_(list(totals))).all()
+        }
+        for node_id, (count, total) in totals.items():
+            stat = existing.get(node_id)
+            if stat is None:
+                db.session.add(FlowNodeDwell(node_id=node_id, sample_count=count, mean_seconds=total / count))
+            else:
+                merged = stat.sample_count + count
+                stat.mean_seconds = (stat.mean_seconds * stat.sample_count + total) / merged
+                stat.sample_count = merged
+
+    db.session.commit()
+    dwell_model.invalidate()
+    return {
+        'rows_scanned': scanned,
+        'samples': sum(count for count, _ in totals.values()),
+        'nodes_updated': len(totals),
+        'position': cursor.position,
+    }
+
+
+class DwellTimeModel:
+    """In-memory dwell means plus per-flow remaining-time tables"""
+
+    def __init__(self, ttl_seconds: Optional[int] = 600):
+        self.ttl_seconds = ttl_seconds
+        self._means: Optional[Dict[str, float]] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._remaining: Dict[int, Tuple[int, object, tuple]] = {}  # id(flow) -> (generation, flow, table)
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._means = None
+            self._generation += 1
+            self._remaining = {}
+
+    def _observed_means(self) -> Dict[str, float]:
+        expired = self.ttl_seconds is not None and time.monotonic() - self._loaded_at > self.ttl_seconds
+        if self._means is not None and not expired:
+            return self._means
+        if not has_app_context():
+            return self._means or {}
+        try:
+            means = {
+                stat.node_id: stat.mean_seconds
+                for stat in FlowNodeDwell.query.filter(FlowNodeDwell.sample_count >= MIN_SAMPLES).all()
+            }
+        except Exception as e:
+            # A failed statement aborts the transaction on Postgres; without the
+            # rollback every later query in this request would fail too
+            db.session.rollback()
+            logger.warning(f"Could not load flow dwell stats, using defaults: {e}")
+            means = {}
+        with self._lock:
+            if means != self._means:
+                self._generation += 1
+                self._remaining = {}
+            self._means = means
+            self._loaded_at = time.monotonic()
+        return means
+
+    def remaining_seconds(self, flow, node_id: str) -> Optional[float]:
+        """Expected seconds from ``node_id`` (inclusive) to the end of ``flow``"""
+        i = flow.index.get(node_id)
+        if i is None:
+            return None
+        means = self._observed_means()
+        cached = self._remaining.get(id(flow))
+        if cached is None or cached[0] != self._generation or cached[1] is not flow:
+            weights = [
+                means.get(nid, DEFAULT_DWELL_SECONDS.get(node_type, UNKNOWN_TYPE_SECONDS))
+                for nid, node_type in zip(flow.node_ids, flow.node_types)
+            ]
+            cached = (self._generation, flow, flow.weighted_remaining(weights))
+            with self._lock:
+                if len(self._remaining) >= 128:  # ad-hoc flows are compiled per request
+                    self._remaining = {}
+                self._remaining[id(flow)] = cached
+        return cached[2][i]
+
+
+dwell_model = DwellTimeModel(ttl_seconds=Config.FLOW_STATS_TTL)
@@ -1,8 +1,12 @@
 import json
 import logging
+import math
 from typing import List, Dict, Any, Optional
 from openai import OpenAI
 from config import Config
+from utils.flow_graph import flow_registry
+from utils.flow_stats import dwell_model
+from utils.metrics import track_llm_completion
 
 logger = logging.getLogger(__name__)
 
@@ -10,40 +14,19 @@ logger = logging.getLogger(__name__)
 class LLMService:
     def __init__(self, api_key: Optional[str] = None):
         key = api_key or Config.OPENAI_API_KEY
-        self.client = OpenAI(api_key=key) if key else None
+        self.client = OpenAI(api_key=key, base_url=Config.OPENAI_BASE_URL) if key else None
         
     def analyze_progress(self, flow_data: Dict, user_progress: List[Dict], case_type: str, language: str = 'en') -> Dict[str, Any]:
         """
         Analyze user progress through the flowchart and provide insights
         """
         nodes = flow_data.get('nodes', {})
-        edges = flow_data.get('edges', [])
-        
-        node_connections = {}
-        for edge in edges:
-            from_node = edge['from']
-            to_node = edge['to']
-            if from_node not in node_connections:
-                node_connections[from_node] = []
-            node_connections[from_node].append({
-                'to': to_node,
-                'condition': edge.get('when')
-            })
+        flow = flow_registry.for_flow_data(flow_data)
         
         user_path = [step['node_id'] for step in user_progress]
         current_node = user_path[-1] if user_path else None
         
-        next_steps = []
-        if current_node and current_node in node_connections:
-            for connection in node_connections[current_node]:
-                next_node_id = connection['to']
-                next_node = nodes.get(next_node_id, {})
-                next_steps.append({
-                    'node_id': next_node_id,
-                    'text': next_node.get('text', ''),
-                    'type': next_node.get('type', ''),
-                    'condition': connection.get('condition')
-                })
+        next_steps = flow.next_steps(current_node) if flow and current_node else []
         
         analysis = self._generate_progress_analysis(
             flow_data, user_progress, next_steps, case_type, language
@@ -53,8 +36,9 @@ class LLMService:
             'current_node': current_node,
             'next_steps': next_steps,
             'analysis': analysis,
-            'progress_percentage': self._calculate_progress_percentage(user_path, nodes),
-            'estimated_time_remaining': self._estimate_time_remaining(user_path, nodes)
+            'progress_percentage': self._calculate_progress_percentage(user_path, nodes, flow),
+            'estimated_time_remaining': self._estimate_time_remaining(user_path, nodes, flow),
+            'remaining_steps': flow.remaining_steps(current_node) if flow and current_node else None
         }
     
     def _generate_progress_analysis(self, flow_data: Dict, user_progress: List[Dict], 
@@ -116,7 +100,8 @@ class LLMService:
             }
 
         try:
-            response = self.client.chat.completions.create(
+            response = track_llm_completion(
+                'progress_analysis', self.client.chat.completions.create,
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=800,
@@ -152,10 +137,16 @@ class LLMService:
         
         return analysis
     
-    def _calculate_progress_percentage(self, user_path: List[str], nodes: Dict) -> float:
+    def _calculate_progress_percentage(self, user_path: List[str], nodes: Dict, flow=None) -> float:
         if not user_path:
             return 0.0
         
+        # Graph distance to the nearest end node (precomputed per flow)
+        if flow is not None:
+            percentage = flow.progress_percentage(user_path)
+            if percentage is not None:
+                return percentage
+        
         main_nodes = [node_id for node_id, node in nodes.items() 
                      if node.get('type') in ['start', 'process', 'decision', 'end']]
         
@@ -165,10 +156,16 @@ class LLMService:
         completed_main_nodes = len([node for node in user_path if node in main_nodes])
         return min(100.0, (completed_main_nodes / len(main_nodes)) * 100)
     
-    def _estimate_time_remaining(self, user_path: List[str], nodes: Dict) -> int:
+    def _estimate_time_remaining(self, user_path: List[str], nodes: Dict, flow=None) -> int:
         if not user_path:
             return 45
         
+        # Observed dwell times along the quickest remaining path, in minutes
+        if flow is not None:
+            seconds = dwell_model.remaining_seconds(flow, user_path[-1])
+            if seconds is not None:
+                return max(1, math.ceil(seconds / 60))
+        
         time_estimates = {
             'start': 2,
             'process': 5,
@@ -219,7 +216,8 @@ class LLMService:
             return "AI assistant unavailable. Please review the case manually."
 
         try:
-            response = self.client.chat.completions.create(
+            response = track_llm_completion(
+                'facilitator_summary', self.client.chat.completions.create,
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=500,
@@ -264,7 +262,8 @@ class LLMService:
             return "I'm sorry, the AI assistant is currently unavailable. Please ask a facilitator for assistance."
 
         try:
-            response = self.client.chat.completions.create(
+            response = track_llm_completion(
+                'answer_question', self.client.chat.completions.create,
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=300,
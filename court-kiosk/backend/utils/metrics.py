@@ -0,0 +1,301 @@
+"""
+In-process metrics, exported in the Prometheus text format
+
+Counters, gauges and histograms live in plain dicts keyed by label values,
+so recording a sample is a dict lookup plus a few additions under a lock;
+nothing is sent anywhere until ``GET /api/metrics`` renders the registry.
+Values are per process: with several workers, scrape each one (or let the
+scraper add them up by instance).
+
+``install(app)`` wires up the per-request metrics (count and latency per
+route, DB queries and DB time per request). Other modules record their own
+samples through the metric objects defined here, e.g.
+``LLM_TOKENS.inc(usage.prompt_tokens, operation='summary', kind='prompt')``.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils import tracing
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (10_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 25_000_000)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_label_text(self.labelnames, key)} {_format_value(v)}"
+            for key, v in sorted(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def replace(self, samples: Iterable[Tuple[Dict, float]]):
+        """Swap in a fresh set of samples (for values collected at scrape time)"""
+        values = {self._key(labels): value for labels, value in samples}
+        with self._lock:
+            self._values = values
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        names = self.labelnames + ('le',)
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_label_text(names, key + (_format_value(bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_text(names, key + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Run ``collector`` before every render, to refresh scrape-time gauges"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                # A failing collector must not take the whole endpoint down
+                SCRAPE_ERRORS.inc(collector=getattr(collector, '__name__', 'collector'))
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+SCRAPE_ERRORS = registry.counter('metrics_collector_errors_total', 'Scrape-time collectors that raised', ['collector'])
+
+HTTP_REQUESTS = registry.counter(
+    'http_requests_total', 'HTTP requests by route and status', ['method', 'route', 'status'])
+HTTP_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency', ['method', 'route'])
+HTTP_DB_QUERIES = registry.histogram(
+    'http_request_db_queries', 'SQL statements executed per HTTP request', ['route'], buckets=COUNT_BUCKETS)
+HTTP_DB_SECONDS = registry.histogram(
+    'http_request_db_seconds', 'Time spent in SQL per HTTP request', ['route'])
+DB_QUERIES = registry.counter('db_queries_total', 'SQL statements executed (all contexts)')
+
+LLM_LATENCY = registry.histogram(
+    'llm_request_duration_seconds', 'OpenAI chat completion latency', ['operation', 'outcome'], buckets=SLOW_BUCKETS)
+LLM_TOKENS = registry.counter('llm_tokens_total', 'OpenAI tokens used', ['operation', 'kind'])
+
+EMAIL_RENDER = registry.histogram(
+    'email_render_seconds', 'Case email rendering time', ['stage'], buckets=SLOW_BUCKETS)
+EMAIL_SEND = registry.histogram(
+    'email_send_seconds', 'Email provider API call latency', ['outcome'], buckets=SLOW_BUCKETS)
+EMAIL_ATTACHMENT_BYTES = registry.histogram(
+    'email_attachment_bytes', 'Decoded attachment bytes per email', buckets=BYTES_BUCKETS)
+
+WEBSOCKET_CLIENTS = registry.gauge('websocket_clients', 'Connected queue display clients (this worker)')
+BROADCAST_FANOUT = registry.histogram(
+    'queue_broadcast_fanout_seconds', 'Time to build and emit one queue broadcast')
+QUEUE_BROADCASTS = registry.gauge(
+    'queue_broadcasts', 'Queue broadcast requests, emits and emits saved by coalescing', ['kind'])
+
+QUEUE_DEPTH = registry.gauge('queue_depth', 'Queue entries by status and priority', ['status', 'priority'])
+
+
+def _route() -> str:
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    DB_QUERIES.inc()
+    if has_request_context():
+        g.metrics_db_queries = g.get('metrics_db_queries', 0) + 1
+        g.metrics_db_seconds = g.get('metrics_db_seconds', 0.0) + elapsed
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    starts = conn.info.get('metrics_query_start') if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def install(app):
+    """Record per-request metrics for ``app`` and SQL counts for every engine"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = _route()
+            HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, route=route)
+            HTTP_DB_QUERIES.observe(g.pop('metrics_db_queries', 0), route=route)
+            HTTP_DB_SECONDS.observe(g.pop('metrics_db_seconds', 0.0), route=route)
+        return response
+
+    return registry
+
+
+class timed:
+    """``with timed(EMAIL_SEND, outcome='ok') as t: ...``; ``t.labels`` can be changed before exit"""
+
+    def __init__(self, histogram: Histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and 'outcome' in self.histogram.labelnames:
+            self.labels['outcome'] = 'error'
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+def track_llm_completion(operation: str, create: Callable, **kwargs):
+    """Call ``create(**kwargs)`` (an OpenAI chat completion) and record latency and tokens"""
+    with tracing.span('llm.chat_completion', tracing.KIND_CLIENT, **{
+        'llm.operation': operation, 'llm.model': kwargs.get('model'),
+    }) as llm_span:
+        with timed(LLM_LATENCY, operation=operation, outcome='ok'):
+            response = create(**kwargs)
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+            completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+            LLM_TOKENS.inc(prompt_tokens, operation=operation, kind='prompt')
+            LLM_TOKENS.inc(completion_tokens, operation=operation, kind='completion')
+            llm_span.set_attribute('llm.prompt_tokens', prompt_tokens)
+            llm_span.set_attribute('llm.completion_tokens', completion_tokens)
+    return response
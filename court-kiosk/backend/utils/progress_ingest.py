@@ -0,0 +1,97 @@
+"""
+Bulk FlowProgress ingestion
+
+Kiosks used to write one ``FlowProgress`` row per node, each in its own
+transaction; a 300-node flow meant 300 commits. ``ingest_progress`` takes a
+whole path (or a buffered chunk of steps) and writes it with one multi-row
+INSERT in the caller's transaction.
+
+Every step carries a ``sequence`` (its position in the path). Replays of a
+chunk the kiosk already sent - after a timeout or a reconnect - are dropped by
+the unique (queue_entry_id, sequence) index: already-stored sequences are
+filtered out up front and, on SQLite/Postgres, ``ON CONFLICT DO NOTHING``
+covers two requests racing with the same chunk.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert
+
+from models import db, FlowProgress
+
+logger = logging.getLogger(__name__)
+
+MAX_STEPS_PER_BATCH = 500
+
+
+def _insert_statement():
+    table = FlowProgress.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(table)
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=['queue_entry_id', 'sequence'])
+
+
+def normalize_steps(steps: Iterable[Dict], now: Optional[datetime] = None) -> List[Dict]:
+    """Steps sorted by sequence, first occurrence of each sequence wins"""
+    now = now or datetime.utcnow()
+    by_sequence = {}
+    for step in steps:
+        sequence = int(step['sequence'])
+        if sequence in by_sequence:
+            continue
+        timestamp = step.get('timestamp') or now
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        by_sequence[sequence] = {
+            'sequence': sequence,
+            'node_id': str(step['node_id'])[:100],
+            'node_text': step.get('node_text') or f"Completed step: {step['node_id']}",
+            'user_response': step.get('user_response'),
+            # Buffered steps keep their kiosk time, but never a time in the future
+            'timestamp': min(timestamp, now),
+        }
+    return [by_sequence[s] for s in sorted(by_sequence)]
+
+
+def ingest_progress(queue_entry, steps: Iterable[Dict], now: Optional[datetime] = None) -> Dict[str, int]:
+    """Bulk-insert new steps for ``queue_entry`` (flushed, not committed)
+
+    Each step is a dict with ``sequence`` and ``node_id`` and optionally
+    ``node_text``, ``user_response`` and ``timestamp``. The entry's
+    ``current_node`` follows the highest sequence seen so far. Returns
+    received/inserted/duplicate counts.
+    """
+    rows = normalize_steps(steps, now)
+    if len(rows) > MAX_STEPS_PER_BATCH:
+        raise ValueError(f"At most {MAX_STEPS_PER_BATCH} steps per batch")
+    result = {'received': len(rows), 'inserted': 0, 'duplicates': 0}
+    if not rows:
+        return result
+
+    existing = {
+        sequence for (sequence,) in db.session.query(FlowProgress.sequence).filter(
+            FlowProgress.queue_entry_id == queue_entry.id,
+            FlowProgress.sequence.between(rows[0]['sequence'], rows[-1]['sequence'])
+        )
+    }
+    previous_max = db.session.query(func.max(FlowProgress.sequence)).filter(
+        FlowProgress.queue_entry_id == queue_entry.id
+    ).scalar()
+
+    new_rows = [dict(row, queue_entry_id=queue_entry.id) for row in rows if row['sequence'] not in existing]
+    if new_rows:
+        db.session.execute(_insert_statement(), new_rows)
+        if previous_max is None or new_rows[-1]['sequence'] > previous_max:
+            queue_entry.current_node = new_rows[-1]['node_id']
+        db.session.flush()
+
+    result['inserted'] = len(new_rows)
+    result['duplicates'] = len(rows) - len(new_rows)
+    return result
@@ -0,0 +1,21 @@
+"""
+pytest plugin: the ``query_budget`` fixture
+
+    pytest_plugins = ['utils.query_budget']
+
+    def test_admin_queue(client, admin_headers, query_budget):
+        with query_budget(3):
+            client.get('/api/admin/queue', headers=admin_headers)
+
+Kept apart from utils/query_profiler.py so the app never imports pytest.
+"""
+
+import pytest
+
+from utils.query_profiler import assert_query_budget
+
+
+@pytest.fixture
+def query_budget():
+    """``with query_budget(3): client.get(...)``; see assert_query_budget"""
+    return assert_query_budget
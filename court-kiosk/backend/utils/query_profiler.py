@@ -0,0 +1,210 @@
+"""
+Per-request SQL profiler (development/staging)
+
+With ``SQL_PROFILE=true`` every statement a request runs is recorded with
+its duration and the first call site in our own code. After the request the
+totals go out as ``X-Query-Count`` / ``X-Query-Time-Ms`` /
+``X-Query-Repeated`` headers and one log line, and statement shapes run
+``SQL_PROFILE_REPEAT_THRESHOLD`` or more times (the usual sign of an N+1
+loop) are logged as warnings with their call site.
+
+The same recording works outside requests (CLI, benchmarks, tests):
+
+    with profile_queries() as profile:
+        ...
+    print(profile.summary())
+
+    with assert_query_budget(3):
+        client.get('/api/admin/queue', headers=...)
+
+Tests get the latter as the ``query_budget`` fixture from the
+``utils.query_budget`` pytest plugin.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_REPEAT_THRESHOLD = 3
+
+_IN_LIST = re.compile(r'\bIN \((?:[^()]*)\)', re.IGNORECASE)
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACE = re.compile(r'\s+')
+_SKIP_FRAMES = (os.sep + 'venv' + os.sep, 'site-packages', os.path.join('utils', 'query_profiler.py'))
+
+
+def statement_shape(statement: str) -> str:
+    """``statement`` with literals and IN lists collapsed, so repeats compare equal"""
+    shape = _STRING.sub('?', statement)
+    shape = _IN_LIST.sub('IN (?)', shape)
+    shape = _NUMBER.sub('?', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+def _call_site() -> Optional[str]:
+    """Innermost frame in backend code that led to the statement"""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if frame.filename.startswith('<'):
+            continue  # generated code (e.g. SQLAlchemy's deprecation wrappers)
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(BACKEND_DIR) and not any(part in filename for part in _SKIP_FRAMES):
+            return f"{os.path.relpath(filename, BACKEND_DIR)}:{frame.lineno} ({frame.name})"
+    return None
+
+
+@dataclass
+class QueryRecord:
+    statement: str
+    shape: str
+    seconds: float
+    call_site: Optional[str]
+
+
+@dataclass
+class QueryProfile:
+    """Statements recorded for one request or ``profile_queries()`` block"""
+    label: str = ''
+    repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD
+    records: List[QueryRecord] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(r.seconds for r in self.records)
+
+    def repeated(self) -> List[Dict]:
+        """Shapes run at least ``repeat_threshold`` times, most frequent first"""
+        counts = Counter(r.shape for r in self.records)
+        out = []
+        for shape, n in counts.most_common():
+            if n < self.repeat_threshold:
+                break
+            sites = Counter(r.call_site for r in self.records if r.shape == shape)
+            out.append({'shape': shape, 'count': n, 'call_sites': [s for s, _ in sites.most_common(3)]})
+        return out
+
+    def summary(self) -> Dict:
+        return {
+            'label': self.label,
+            'queries': self.count,
+            'time_ms': round(self.total_seconds * 1000, 2),
+            'repeated': self.repeated(),
+        }
+
+    def describe(self) -> str:
+        """Multi-line listing, for assertion messages"""
+        lines = [f"{self.count} queries, {self.total_seconds * 1000:.1f} ms"]
+        for r in self.records:
+            lines.append(f"  {r.seconds * 1000:7.2f} ms  {r.call_site or '?'}  {r.shape[:160]}")
+        for rep in self.repeated():
+            lines.append(f"  repeated x{rep['count']}: {rep['shape'][:160]}")
+        return '\n'.join(lines)
+
+
+_local = threading.local()
+_listeners_lock = threading.Lock()
+
+
+def _active_profiles() -> List[QueryProfile]:
+    profiles = list(getattr(_local, 'profiles', ()))
+    if has_request_context():
+        request_profile = g.get('sql_profile')
+        if request_profile is not None:
+            profiles.append(request_profile)
+    return profiles
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('profiler_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('profiler_query_start')
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    profiles = _active_profiles()
+    if profiles:
+        record = QueryRecord(statement, statement_shape(statement), elapsed, _call_site())
+        for profile in profiles:
+            profile.records.append(record)
+
+
+def _ensure_listeners():
+    with _listeners_lock:
+        if not event.contains(Engine, 'after_cursor_execute', _after_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+@contextmanager
+def profile_queries(label: str = '', repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD):
+    """Record the statements run on this thread inside the block"""
+    _ensure_listeners()
+    profile = QueryProfile(label=label, repeat_threshold=repeat_threshold)
+    stack = getattr(_local, 'profiles', None)
+    if stack is None:
+        stack = _local.profiles = []
+    stack.append(profile)
+    try:
+        yield profile
+    finally:
+        stack.remove(profile)
+
+
+@contextmanager
+def assert_query_budget(max_queries: int, allow_repeated: bool = False,
+                        repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD):
+    """Fail if the block runs more than ``max_queries`` statements (or an N+1 pattern)"""
+    with profile_queries('budget', repeat_threshold) as profile:
+        yield profile
+    if profile.count > max_queries:
+        raise AssertionError(f"Query budget exceeded: {profile.count} > {max_queries}\n{profile.describe()}")
+    if not allow_repeated and profile.repeated():
+        raise AssertionError(f"Repeated statement shape (likely N+1)\n{profile.describe()}")
+
+
+def install(app, repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD):
+    """Profile every request of ``app``; only call this when profiling is enabled"""
+    _ensure_listeners()
+
+    @app.before_request
+    def _start_sql_profile():
+        g.sql_profile = QueryProfile(label=f"{request.method} {request.path}", repeat_threshold=repeat_threshold)
+
+    @app.after_request
+    def _report_sql_profile(response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+        repeated = profile.repeated()
+        response.headers['X-Query-Count'] = str(profile.count)
+        response.headers['X-Query-Time-Ms'] = f"{profile.total_seconds * 1000:.2f}"
+        response.headers['X-Query-Repeated'] = str(len(repeated))
+        logger.info(f"SQL {profile.label}: {profile.count} queries, {profile.total_seconds * 1000:.1f} ms")
+        for rep in repeated:
+            logger.warning(
+                f"Possible N+1 in {profile.label}: {rep['count']}x {rep['shape'][:200]} "
+                f"at {', '.join(s or '?' for s in rep['call_sites'])}"
+            )
+        return response
+
+    logger.warning("SQL profiling is enabled; do not run it in production")
+    return app
+
@@ -0,0 +1,253 @@
+"""
+Queue analytics rollups
+
+Every queue status transition adds its counters (arrivals, called, completed,
+no-shows, wait and service seconds) to an hourly and a daily ``QueueRollup``
+row for the entry's case type and language, in the same transaction as the
+transition. Dashboards then read a few hundred pre-aggregated rows instead of
+every ``QueueEntry`` ever created.
+
+``rebuild_rollups`` recomputes the rollups from the ``QueueEvent`` log (and,
+for history recorded before the event log existed, from the entries
+themselves); it backs the ``flask backfill-rollups`` command.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, update
+
+from models import db, QueueEntry, QueueEvent, QueueRollup
+from utils.queue_events import CLAIMED_STATUSES, FINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day')
+GROUP_BY_FIELDS = ('case_type', 'language')
+COUNTERS = ('arrivals', 'called', 'completed', 'cancelled', 'no_shows',
+            'wait_seconds', 'service_seconds', 'service_count')
+
+_UPSERT_DIALECTS = {'postgresql', 'sqlite'}
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    if granularity == 'hour':
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def transition_deltas(from_status: Optional[str], to_status: str, at: datetime,
+                      created_at: Optional[datetime] = None,
+                      started_at: Optional[datetime] = None) -> Dict[str, float]:
+    """Counter increments for one status transition"""
+    deltas: Dict[str, float] = {}
+    if from_status is None and to_status == 'waiting':
+        deltas['arrivals'] = 1
+    if from_status == 'waiting' and to_status in CLAIMED_STATUSES:
+        deltas['called'] = 1
+        if created_at:
+            deltas['wait_seconds'] = max(0.0, (at - created_at).total_seconds())
+    if to_status == 'completed':
+        deltas['completed'] = 1
+        if started_at:
+            deltas['service_seconds'] = max(0.0, (at - started_at).total_seconds())
+            deltas['service_count'] = 1
+    elif to_status == 'cancelled':
+        deltas['cancelled'] = 1
+    elif to_status == 'no_show':
+        deltas['no_shows'] = 1
+    return deltas
+
+
+def _key(granularity, at, case_type, language):
+    return {
+        'granularity': granularity,
+        'bucket_start': bucket_start(at, granularity),
+        'case_type': (case_type or '')[:100],
+        'language': (language or '')[:10],
+    }
+
+
+def _upsert(key: Dict, deltas: Dict[str, float]):
+    """Add ``deltas`` to the rollup row for ``key``, creating it if needed"""
+    table = QueueRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in _UPSERT_DIALECTS:
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table).values(**key, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['granularity', 'bucket_start', 'case_type', 'language'],
+            set_={name: table.c[name] + stmt.excluded[name] for name in deltas}
+        )
+        db.session.execute(stmt)
+        return
+
+    where = [table.c[name] == value for name, value in key.items()]
+    result = db.session.execute(
+        update(table).where(*where).values({name: table.c[name] + value for name, value in deltas.items()})
+    )
+    if result.rowcount == 0:
+        db.session.execute(insert(table).values(**key, **deltas))
+
+
+def apply_transition(entry, from_status: Optional[str], to_status: str, at: datetime,
+                     started_at: Optional[datetime] = None):
+    """Fold one transition of ``entry`` into its hourly and daily rollups"""
+    deltas = transition_deltas(from_status, to_status, at, entry.created_at, started_at)
+    if not deltas:
+        return
+    for granularity in GRANULARITIES:
+        _upsert(_key(granularity, at, entry.case_type, entry.language), deltas)
+
+
+# ----------------------------------------------------------------------
+# Dashboard queries
+# ----------------------------------------------------------------------
+
+def _derived(row: Dict) -> Dict:
+    called = row['called'] or 0
+    completed = row['completed'] or 0
+    no_shows = row['no_shows'] or 0
+    row['throughput'] = completed
+    row['avg_wait_minutes'] = round(row['wait_seconds'] / called / 60, 2) if called else None
+    row['avg_service_minutes'] = (
+        round(row['service_seconds'] / row['service_count'] / 60, 2) if row['service_count'] else None
+    )
+    row['no_show_rate'] = round(no_shows / (completed + no_shows), 4) if completed + no_shows else None
+    return row
+
+
+def query_rollups(granularity: str, start: datetime, end: datetime,
+                  group_by: Iterable[str] = ()) -> Dict:
+    """Per-bucket (and optionally per case type / language) metrics between start and end"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+    group_by = [g for g in group_by if g in GROUP_BY_FIELDS]
+    dims = [QueueRollup.bucket_start] + [getattr(QueueRollup, g) for g in group_by]
+    sums = [func.coalesce(func.sum(getattr(QueueRollup, c)), 0).label(c) for c in COUNTERS]
+
+    rows = db.session.query(*dims, *sums).filter(
+        QueueRollup.granularity == granularity,
+        QueueRollup.bucket_start >= start,
+        QueueRollup.bucket_start < end
+    ).group_by(*dims).order_by(QueueRollup.bucket_start).all()
+
+    series: List[Dict] = []
+    totals = {c: 0 for c in COUNTERS}
+    for row in rows:
+        item = {'bucket_start': row.bucket_start.isoformat()}
+        for g in group_by:
+            item[g] = getattr(row, g)
+        for c in COUNTERS:
+            item[c] = getattr(row, c)
+            totals[c] += getattr(row, c)
+        series.append(_derived(item))
+
+    return {
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'group_by': group_by,
+        'series': series,
+        'totals': _derived(totals),
+    }
+
+
+# ----------------------------------------------------------------------
+# Backfill
+# ----------------------------------------------------------------------
+
+def rebuild_rollups(since: Optional[datetime] = None, chunk_size: int = 5000) -> Dict[str, float]:
+    """Recompute rollups from ``since`` (day boundary) onward; must run in an app context
+
+    Existing rollup rows in the range are replaced. Returns row counts and time.
+    """
+    started = time.perf_counter()
+    since = bucket_start(since, 'day') if since else None
+    totals: Dict[Tuple, Dict[str, float]] = {}
+
+    def add(at, case_type, language, deltas):
+        if not deltas:
+            return
+        for granularity in GRANULARITIES:
+            key = tuple(_key(granularity, at, case_type, language).values())
+            bucket = totals.setdefault(key, {})
+            for name, value in deltas.items():
+                bucket[name] = bucket.get(name, 0) + value
+
+    # 1. Event log, in id order so each entry's claim is seen before its completion
+    events_scanned = 0
+    claimed_at: Dict[int, datetime] = {}
+    last_id = 0
+    while True:
+        query = db.session.query(
+            QueueEvent.id, QueueEvent.queue_entry_id, QueueEvent.from_status, QueueEvent.to_status,
+            QueueEvent.created_at, QueueEntry.case_type, QueueEntry.language, QueueEntry.created_at
+        ).join(QueueEntry, QueueEntry.id == QueueEvent.queue_entry_id).filter(QueueEvent.id > last_id)
+        if since:
+            query = query.filter(QueueEvent.created_at >= since)
+        rows = query.order_by(QueueEvent.id).limit(chunk_size).all()
+        if not rows:
+            break
+        for event_id, entry_id, from_status, to_status, at, case_type, language, entry_created in rows:
+            started_at = claimed_at.pop(entry_id, None) if to_status == 'completed' else None
+            if to_status in CLAIMED_STATUSES:
+                claimed_at[entry_id] = at
+            add(at, case_type, language, transition_deltas(from_status, to_status, at, entry_created, started_at))
+        events_scanned += len(rows)
+        last_id = rows[-1][0]
+
+    # 2. Entries from before the event log: arrival at created_at, final status at updated_at
+    legacy_scanned = 0
+    has_events = db.session.query(QueueEvent.id).filter(QueueEvent.queue_entry_id == QueueEntry.id).exists()
+    last_id = 0
+    while True:
+        query = db.session.query(
+            QueueEntry.id, QueueEntry.status, QueueEntry.case_type, QueueEntry.language,
+            QueueEntry.created_at, QueueEntry.updated_at
+        ).filter(QueueEntry.id > last_id, ~has_events)
+        if since:
+            query = query.filter(QueueEntry.created_at >= since)
+        rows = query.order_by(QueueEntry.id).limit(chunk_size).all()
+        if not rows:
+            break
+        for entry_id, status, case_type, language, created_at, updated_at in rows:
+            if created_at:
+                add(created_at, case_type, language, {'arrivals': 1})
+            finished_at = updated_at or created_at
+            if finished_at and status in CLAIMED_STATUSES:
+                add(finished_at, case_type, language, transition_deltas('waiting', status, finished_at, created_at))
+            elif finished_at and status in FINAL_STATUSES:
+                add(finished_at, case_type, language, transition_deltas('called', status, finished_at))
+        legacy_scanned += len(rows)
+        last_id = rows[-1][0]
+
+    # 3. Replace the rollups in range
+    delete = db.session.query(QueueRollup)
+    if since:
+        delete = delete.filter(QueueRollup.bucket_start >= since)
+    deleted = delete.delete(synchronize_session=False)
+
+    names = ('granularity', 'bucket_start', 'case_type', 'language')
+    values = [{**dict(zip(names, key)), **counters} for key, counters in totals.items()]
+    for i in range(0, len(values), chunk_size):
+        chunk = values[i:i + chunk_size]
+        # Every row in a chunk must carry the same columns for executemany
+        for row in chunk:
+            for c in COUNTERS:
+                row.setdefault(c, 0)
+        db.session.execute(insert(QueueRollup), chunk)
+    db.session.commit()
+
+    return {
+        'events_scanned': events_scanned,
+        'legacy_entries_scanned': legacy_scanned,
+        'rollup_rows_deleted': deleted,
+        'rollup_rows_written': len(values),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
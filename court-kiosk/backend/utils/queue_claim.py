@@ -0,0 +1,127 @@
+"""
+Atomic queue dequeue
+
+``claim_next_entry`` moves the next waiting ``QueueEntry`` to a new status so
+that two facilitators calling next at the same moment can never be handed the
+same person.
+
+- Postgres/MySQL: ``SELECT ... FOR UPDATE SKIP LOCKED`` - concurrent callers
+  skip rows another transaction is already claiming instead of blocking on it.
+- SQLite (no row locks): compare-and-swap
+  ``UPDATE ... WHERE id = :id AND status = 'waiting'``; a rowcount of 0 means
+  somebody else won that row, so the next candidate is tried.
+
+The claim is flushed but not committed, together with its ``QueueEvent``; the
+caller commits (or rolls back, which releases the entry again) together with
+its own changes.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy import case, update
+from sqlalchemy.exc import OperationalError
+
+from models import db, QueueEntry
+from utils.queue_events import record_transition
+
+logger = logging.getLogger(__name__)
+
+ROW_LOCKING_DIALECTS = ('postgresql', 'mysql', 'mariadb')
+
+# Candidates fetched per compare-and-swap round on SQLite
+CANDIDATE_BATCH = 8
+MAX_ATTEMPTS = 20
+
+
+def default_order():
+    """Priority A first, then oldest first (id breaks created_at ties)"""
+    return (QueueEntry.priority_level.asc(), QueueEntry.created_at.asc(), QueueEntry.id.asc())
+
+
+def _supports_skip_locked() -> bool:
+    return db.session.get_bind().dialect.name in ROW_LOCKING_DIALECTS
+
+
+def claim_next_entry(new_status: str = 'in_progress',
+                     filters: Iterable = (),
+                     order_by: Optional[Sequence] = None,
+                     candidate_ids: Optional[Sequence[int]] = None,
+                     actor_user_id: Optional[int] = None,
+                     actor: Optional[str] = None) -> Optional[QueueEntry]:
+    """Atomically claim the next waiting entry and set its status
+
+    ``filters`` narrows the waiting set (e.g. a language), ``order_by``
+    overrides the default priority/age order, and ``candidate_ids`` supplies an
+    explicit preference order (e.g. from a scheduler); the first still-waiting
+    candidate wins. Returns None when nothing could be claimed.
+    """
+    filters = tuple(filters)
+    if _supports_skip_locked():
+        entry = _claim_skip_locked(new_status, filters, order_by, candidate_ids)
+    else:
+        entry = _claim_compare_and_swap(new_status, filters, order_by, candidate_ids)
+    if entry is not None:
+        record_transition(entry, 'waiting', new_status, actor_user_id, actor, entry.updated_at)
+        db.session.flush()
+    return entry
+
+
+def _waiting_query(filters, order_by):
+    return QueueEntry.query.filter(QueueEntry.status == 'waiting', *filters).order_by(*(order_by or default_order()))
+
+
+def _claim_skip_locked(new_status, filters, order_by, candidate_ids):
+    if candidate_ids is not None:
+        if not candidate_ids:
+            return None
+        # Lock only the best still-free candidate: locking them all would make a
+        # concurrent caller skip every one of them and find nobody waiting
+        rank = case({entry_id: i for i, entry_id in enumerate(candidate_ids)}, value=QueueEntry.id)
+        entry = _waiting_query(filters, (rank,)).filter(QueueEntry.id.in_(list(candidate_ids))) \
+            .with_for_update(skip_locked=True).first()
+    else:
+        entry = _waiting_query(filters, order_by).with_for_update(skip_locked=True).first()
+    if entry is None:
+        return None
+    entry.status = new_status
+    entry.updated_at = datetime.utcnow()
+    db.session.flush()
+    return entry
+
+
+def _claim_compare_and_swap(new_status, filters, order_by, candidate_ids):
+    for attempt in range(MAX_ATTEMPTS):
+        if candidate_ids is not None:
+            candidates = list(candidate_ids)
+        else:
+            candidates = [
+                row.id for row in _waiting_query(filters, order_by).with_entities(QueueEntry.id)
+                .limit(CANDIDATE_BATCH).all()
+            ]
+        if not candidates:
+            return None
+
+        try:
+            for entry_id in candidates:
+                result = db.session.execute(
+                    update(QueueEntry)
+                    .where(QueueEntry.id == entry_id, QueueEntry.status == 'waiting', *filters)
+                    .values(status=new_status, updated_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 1:
+                    return db.session.get(QueueEntry, entry_id, populate_existing=True)
+        except OperationalError as e:
+            # "database is locked" after busy_timeout - back off and try again
+            db.session.rollback()
+            logger.warning(f"Queue claim attempt {attempt + 1} hit a locked database: {e}")
+            time.sleep(min(0.05 * (attempt + 1), 0.5))
+            continue
+
+        if candidate_ids is not None:
+            return None  # every preferred candidate was taken
+    logger.error(f"Could not claim a queue entry after {MAX_ATTEMPTS} attempts")
+    return None
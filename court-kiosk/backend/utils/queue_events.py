@@ -0,0 +1,97 @@
+"""
+Queue status transitions
+
+Every status change of a ``QueueEntry`` goes through ``transition`` (or, for
+atomic claims, ``record_transition``) so that an append-only ``QueueEvent`` row
+is written in the same transaction as the change. Time-to-call, service time
+and no-show rates can then be measured from the event log instead of the
+mutable ``created_at``/``updated_at`` columns. The same call folds the change
+into the hourly/daily analytics rollups (see ``utils.queue_analytics``).
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func
+
+from models import db, QueueEvent
+
+logger = logging.getLogger(__name__)
+
+QUEUE_STATUSES = ('waiting', 'called', 'in_progress', 'completed', 'cancelled', 'no_show')
+# Statuses an entry can reach from ``waiting`` only by being called
+CLAIMED_STATUSES = ('called', 'in_progress')
+FINAL_STATUSES = ('completed', 'cancelled', 'no_show')
+
+
+def record_transition(entry, from_status: Optional[str], to_status: str,
+                      actor_user_id: Optional[int] = None, actor: Optional[str] = None,
+                      at: Optional[datetime] = None, started_at: Optional[datetime] = None) -> QueueEvent:
+    """Append a QueueEvent to the current session (committed with the caller's transaction)
+
+    ``started_at`` is when service began, for transitions out of a claimed status.
+    """
+    from utils.queue_analytics import apply_transition
+
+    if to_status not in QUEUE_STATUSES:
+        raise ValueError(f"Unknown queue status: {to_status}")
+    at = at or datetime.utcnow()
+    event = QueueEvent(
+        queue_entry_id=entry.id,
+        from_status=from_status,
+        to_status=to_status,
+        actor_user_id=actor_user_id,
+        actor=actor,
+        created_at=at
+    )
+    db.session.add(event)
+    apply_transition(entry, from_status, to_status, at, started_at)
+    return event
+
+
+def record_created(entry, actor_user_id: Optional[int] = None, actor: Optional[str] = 'kiosk') -> QueueEvent:
+    """Log the initial status of a new entry (flushes it to get an id)"""
+    if entry.id is None:
+        db.session.flush()
+    return record_transition(entry, None, entry.status or 'waiting', actor_user_id, actor, entry.created_at)
+
+
+def claim_times(entry_ids: Iterable[int]) -> Dict[int, datetime]:
+    """When each entry was last claimed, from the event log
+
+    ``updated_at`` is no substitute: progress updates and estimate refreshes
+    move it while a case is in progress. Entries claimed before the event log
+    existed have no claim time.
+    """
+    entry_ids = list(entry_ids)
+    if not entry_ids:
+        return {}
+    return dict(db.session.query(QueueEvent.queue_entry_id, func.max(QueueEvent.created_at)).filter(
+        QueueEvent.queue_entry_id.in_(entry_ids),
+        QueueEvent.to_status.in_(CLAIMED_STATUSES)
+    ).group_by(QueueEvent.queue_entry_id).all())
+
+
+def claimed_at(entry) -> Optional[datetime]:
+    """When service of ``entry`` began, or None if it is not in a claimed status"""
+    if entry.status not in CLAIMED_STATUSES:
+        return None
+    return claim_times([entry.id]).get(entry.id)
+
+
+def transition(entry, to_status: str, actor_user_id: Optional[int] = None,
+               actor: Optional[str] = None, started_at: Optional[datetime] = None) -> Optional[QueueEvent]:
+    """Change ``entry.status`` and log it; a no-op when the status is unchanged
+
+    ``started_at`` saves the claim-time lookup when the caller already has it.
+    """
+    from_status = entry.status
+    if from_status == to_status:
+        return None
+    if started_at is None:
+        started_at = claimed_at(entry)
+    now = datetime.utcnow()
+    entry.status = to_status
+    entry.updated_at = now
+    return record_transition(entry, from_status, to_status, actor_user_id, actor, now, started_at)
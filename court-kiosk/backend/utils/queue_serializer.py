@@ -0,0 +1,182 @@
+"""
+Shared QueueEntry serializer for the admin endpoints
+
+``get_admin_queue``, ``admin_call_next`` and ``get_case_details`` used to
+build nearly the same dict per entry by hand, each parsing
+``documents_needed``, formatting ``created_at`` three times for its aliases
+and (call-next) querying ``CaseType`` on every call.
+
+``QueueSerializer`` builds that dict in one place and keeps each entry's
+serialized JSON fragment keyed by ``(id, updated_at)``. Every change to an
+entry goes through the ORM or ``queue_claim`` and bumps ``updated_at``, so a
+fragment is reused until the row changes. List responses are assembled by
+joining cached fragments, and only entries that missed the cache have their
+deferred blob columns loaded (in one query).
+
+Serialization uses ``orjson`` when it is installed, the standard library
+otherwise.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import undefer_group
+
+from models import db, QueueEntry, CaseType
+from utils.storage_codec import decode_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_FRAGMENTS = 5000
+CASE_TYPE_TTL_SECONDS = 300
+
+
+def dumps(value) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def json_list(fragments: Iterable[bytes]) -> bytes:
+    return b'[' + b','.join(fragments) + b']'
+
+
+def entry_dict(entry: QueueEntry) -> Dict:
+    """Fields shared by the queue list, the current case, call-next and case details"""
+    created_at = entry.created_at.isoformat() if entry.created_at else None
+    return {
+        'queue_number': entry.queue_number,
+        'priority': entry.priority_level,
+        'priority_level': entry.priority_level,  # Alias for compatibility
+        'case_type': entry.case_type,
+        'user_name': entry.user_name,
+        'user_email': entry.user_email,
+        'phone_number': entry.phone_number,
+        'language': entry.language,
+        'status': entry.status,
+        'created_at': created_at,
+        'arrived_at': created_at,
+        'timestamp': created_at,
+        'updated_at': entry.updated_at.isoformat() if entry.updated_at else None,
+        'conversation_summary': entry.conversation_summary,
+        'documents_needed': decode_json(entry.documents_needed, []),
+        'current_node': entry.current_node,
+        'estimated_wait_time': entry.estimated_wait_time,
+    }
+
+
+class QueueSerializer:
+    """Per-process cache of serialized queue entries and case type info"""
+
+    def __init__(self, max_fragments=MAX_CACHED_FRAGMENTS, case_type_ttl=CASE_TYPE_TTL_SECONDS):
+        self.max_fragments = max_fragments
+        self.case_type_ttl = case_type_ttl
+        self._fragments = {}  # entry id -> (updated_at, bytes)
+        self._case_types = {}  # code -> (info or None, loaded_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def _cached(self, entry: QueueEntry) -> Optional[bytes]:
+        cached = self._fragments.get(entry.id)
+        if cached is not None and cached[0] == entry.updated_at:
+            return cached[1]
+        return None
+
+    def _store(self, entry: QueueEntry, fragment: bytes):
+        with self._lock:
+            self._fragments.pop(entry.id, None)
+            if len(self._fragments) >= self.max_fragments:
+                # Oldest insertion first; live entries are re-added on their next read
+                del self._fragments[next(iter(self._fragments))]
+            self._fragments[entry.id] = (entry.updated_at, fragment)
+
+    def fragment(self, entry: QueueEntry) -> bytes:
+        """Serialized ``entry_dict(entry)``, reused while ``updated_at`` is unchanged"""
+        cached = self._cached(entry)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        fragment = dumps(entry_dict(entry))
+        self._store(entry, fragment)
+        return fragment
+
+    def fragments(self, entries: List[QueueEntry]) -> List[bytes]:
+        """Fragments for ``entries`` in order, loading blob columns only for cache misses"""
+        missing = [e.id for e in entries if self._cached(e) is None]
+        if len(missing) > 1:
+            # Populates the deferred columns of the already-loaded objects in one query
+            QueueEntry.query.options(undefer_group('details')).filter(QueueEntry.id.in_(missing)).all()
+        return [self.fragment(e) for e in entries]
+
+    def list_body(self, entries: List[QueueEntry]) -> bytes:
+        return json_list(self.fragments(entries))
+
+    def clear(self):
+        with self._lock:
+            self._fragments = {}
+            self._case_types = {}
+
+    # ------------------------------------------------------------------
+    # Case types
+    # ------------------------------------------------------------------
+
+    def case_type_info(self, code: Optional[str]) -> Optional[Dict]:
+        """Active CaseType summary for ``code`` (cached, including misses)"""
+        if not code:
+            return None
+        cached = self._case_types.get(code)
+        if cached is not None and time.monotonic() - cached[1] <= self.case_type_ttl:
+            return cached[0]
+        case_type = CaseType.query.filter_by(code=code, is_active=True).first()
+        info = None
+        if case_type:
+            info = {
+                'name': case_type.name,
+                'code': case_type.code,
+                'description': case_type.description,
+                'estimated_duration': case_type.estimated_duration,
+                'required_forms': decode_json(case_type.required_forms, []),
+            }
+        self._case_types[code] = (info, time.monotonic())
+        return info
+
+    def install(self):
+        """Drop cached case types after any commit that changed CaseType rows"""
+        session = db.session
+
+        @event.listens_for(session, 'after_flush')
+        def _mark_case_type_changes(sess, flush_context):
+            for obj in (*sess.new, *sess.dirty, *sess.deleted):
+                if isinstance(obj, CaseType):
+                    sess.info['case_types_changed'] = True
+                    return
+
+        @event.listens_for(session, 'after_commit')
+        def _invalidate_on_commit(sess):
+            if sess.info.pop('case_types_changed', False):
+                self._case_types = {}
+
+        @event.listens_for(session, 'after_rollback')
+        def _discard_on_rollback(sess):
+            sess.info.pop('case_types_changed', None)
+
+        return self
+
+
+queue_serializer = QueueSerializer()
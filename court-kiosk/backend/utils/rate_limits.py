@@ -0,0 +1,136 @@
+"""
+Rate-limit identities, tiers and counter storage
+
+Every limit used to be keyed on the client IP. The kiosks in a courthouse
+lobby all sit behind one NAT address, so a busy morning spent the
+"10 per minute" on /api/ask and "5 per minute" on the email endpoints of
+the whole lobby together. Limits are now keyed on who is calling:
+
+- ``user:<id>``     a valid staff session (``Authorization: Bearer``)
+- ``kiosk:<name>``  a valid ``X-Kiosk-Key``. Each key in ``KIOSK_API_KEYS``
+  names its kiosk; with the single shared ``KIOSK_API_KEY`` kiosks tell
+  themselves apart with ``X-Kiosk-Id``
+- ``ip:<address>``  everyone else
+
+``X-Kiosk-Id`` is chosen by the client, so one device holding the shared key
+could rotate ids for a fresh budget each time. Each address gets at most
+``RATELIMIT_KIOSK_IDS_PER_IP`` ids an hour; ids past that share one budget
+(``kiosk:shared@<address>``). Per-kiosk keys (``KIOSK_API_KEYS``) are not
+capped: the server issued them.
+
+Each identity gets its own budget for every route limit, and routes
+without a limit of their own get the tier's default
+(``RATELIMIT_{USER,KIOSK,IP}_LIMIT``).
+
+Counters use the sliding-window-counter strategy: two counters per key
+instead of a log of hits, no burst at the window edge like fixed windows.
+In Redis each limit is checked and counted with one script call - one
+round trip per limit, so a tier default with a single limit costs one round
+trip per request. The store is ``RATELIMIT_STORAGE_URL``, else the Socket.IO
+backplane's Redis, else per-process memory (one worker only).
+"""
+
+import logging
+import re
+from typing import Optional, Tuple
+
+from flask import request
+from flask_limiter.util import get_remote_address
+from limits.storage import storage_from_string
+
+from config import Config
+from utils.auth_service import AuthService
+
+TIER_USER = 'user'
+TIER_KIOSK = 'kiosk'
+TIER_IP = 'ip'
+
+_SHARED_SCHEMES = ('redis://', 'rediss://', 'redis+sentinel://', 'redis+cluster://', 'memcached://')
+KIOSK_ID_WINDOW = 3600  # seconds
+
+logger = logging.getLogger(__name__)
+_kiosk_id_store = None
+
+
+def storage_uri() -> str:
+    """Counter store for Flask-Limiter"""
+    if Config.RATELIMIT_STORAGE_URL:
+        return Config.RATELIMIT_STORAGE_URL
+    backplane = Config.SOCKETIO_MESSAGE_QUEUE or ''
+    if backplane.startswith(('redis://', 'rediss://')):
+        return backplane
+    return 'memory://'
+
+
+def is_shared(uri: str) -> bool:
+    return uri.startswith(_SHARED_SCHEMES)
+
+
+def identify() -> Tuple[str, str]:
+    """``(tier, key)`` for the current request, worked out once per request"""
+    identity = getattr(request, 'rate_limit_identity', None)
+    if identity is not None:
+        return identity
+
+    # Only limited routes get here (exempt ones never call the key or default
+    # limit functions). Sessions are validated once per request (AuthService
+    # caches the user on the request), so the auth decorator behind the limiter
+    # does not repeat it
+    user = AuthService.validate_session(AuthService.session_token())
+    if user is not None:
+        identity = (TIER_USER, f"user:{user.id}")
+    else:
+        address = get_remote_address()
+        kiosk_id = request.headers.get('X-Kiosk-Id')
+        kiosk = AuthService.identify_kiosk(request.headers.get('X-Kiosk-Key'), kiosk_id)
+        if kiosk and kiosk == f"shared.{kiosk_id}" and not _admit_kiosk_id(address, kiosk_id):
+            identity = (TIER_KIOSK, f"kiosk:shared@{address}")
+        elif kiosk:
+            identity = (TIER_KIOSK, f"kiosk:{kiosk}")
+        else:
+            identity = (TIER_IP, f"ip:{address}")
+    request.rate_limit_identity = identity
+    return identity
+
+
+def _admit_kiosk_id(address: str, kiosk_id: str) -> bool:
+    """Whether ``kiosk_id`` is within the address's X-Kiosk-Id allowance this hour
+
+    One store read per request for an id already admitted, two writes the
+    first time an id is seen. Fails open if the store is unreachable, like the
+    limiter's own in-memory fallback.
+    """
+    global _kiosk_id_store
+    if _kiosk_id_store is None:
+        _kiosk_id_store = storage_from_string(storage_uri())
+    admitted = f"kiosk-id/{address}/{kiosk_id}"
+    try:
+        if _kiosk_id_store.get(admitted):
+            return True
+        if _kiosk_id_store.incr(f"kiosk-ids/{address}", KIOSK_ID_WINDOW) > Config.RATELIMIT_KIOSK_IDS_PER_IP:
+            return False
+        _kiosk_id_store.incr(admitted, KIOSK_ID_WINDOW)
+        return True
+    except Exception as e:
+        logger.warning(f"Kiosk id allowance unavailable, admitting {kiosk_id}: {e}")
+        return True
+
+
+def rate_limit_key() -> str:
+    """Flask-Limiter ``key_func``"""
+    return identify()[1]
+
+
+def default_limit() -> str:
+    """Flask-Limiter default limit for the caller's tier"""
+    tier = identify()[0]
+    if tier == TIER_USER:
+        return Config.RATELIMIT_USER_LIMIT
+    if tier == TIER_KIOSK:
+        return Config.RATELIMIT_KIOSK_LIMIT
+    return Config.RATELIMIT_IP_LIMIT
+
+
+def describe(uri: Optional[str]) -> str:
+    """Store URL without credentials, for the startup log"""
+    return re.sub(r'//[^@/]*@', '//***@', uri or 'memory://')
@@ -0,0 +1,173 @@
+"""
+County reference data cache
+
+Categories, content, staff contacts and forms change maybe once a week, but the
+kiosk home screen asked the database for them (two queries plus a fresh
+serialization) on every request. This module loads everything for a county
+into an immutable snapshot of pre-serialized JSON bytes with ETags.
+
+Snapshots are dropped when a transaction that touched one of the reference
+tables commits, and also expire after ``REFERENCE_CACHE_TTL`` seconds so that
+other workers (which did not see the commit) never serve stale data for long.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+EMPTY_LIST = b'[]'
+
+
+def _serialize(rows) -> bytes:
+    return json.dumps(rows, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+@dataclass(frozen=True)
+class JSONPayload:
+    """Pre-serialized response body and its ETag"""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def of(cls, rows) -> 'JSONPayload':
+        body = _serialize(rows)
+        return cls(body=body, etag=_etag(body))
+
+
+EMPTY_PAYLOAD = JSONPayload(body=EMPTY_LIST, etag=_etag(EMPTY_LIST))
+
+
+@dataclass(frozen=True)
+class CountySnapshot:
+    """Everything the kiosk home screen needs for one county"""
+    county_id: int
+    categories: JSONPayload
+    staff: JSONPayload
+    forms: JSONPayload
+    # (category_id, language) -> active content for that category
+    content: Mapping[Tuple[int, str], JSONPayload] = field(default_factory=dict)
+
+    def content_for(self, category_id: int, language: str) -> JSONPayload:
+        return self.content.get((category_id, language), EMPTY_PAYLOAD)
+
+
+class ReferenceDataCache:
+    """Per-process cache of county snapshots, invalidated on commit"""
+
+    def __init__(self, db, county_model, category_model, content_model, staff_model, form_model, ttl_seconds=300):
+        self.db = db
+        self.County = county_model
+        self.Category = category_model
+        self.Content = content_model
+        self.StaffContact = staff_model
+        self.Form = form_model
+        self.ttl_seconds = ttl_seconds
+        self._tracked = (county_model, category_model, content_model, staff_model, form_model)
+        self._snapshots = {}  # county name -> (CountySnapshot, loaded_at); existing counties only
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, county_name: str) -> Optional[CountySnapshot]:
+        """Snapshot for ``county_name``, or None if the county does not exist"""
+        entry = self._snapshots.get(county_name)
+        if entry is not None and not self._expired(entry):
+            return entry[0]
+
+        with self._lock:
+            entry = self._snapshots.get(county_name)
+            if entry is not None and not self._expired(entry):
+                return entry[0]
+            generation = self._generation
+            snapshot = self._load(county_name)
+            # Misses are not cached: ?county= is caller-supplied, so caching them would let
+            # anyone grow the cache without bound. Only publish if nothing was invalidated
+            # while we were loading.
+            if snapshot is not None and generation == self._generation:
+                self._snapshots[county_name] = (snapshot, time.monotonic())
+            return snapshot
+
+    def _expired(self, entry) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - entry[1] > self.ttl_seconds
+
+    def _load(self, county_name: str) -> Optional[CountySnapshot]:
+        county = self.County.query.filter_by(name=county_name).first()
+        if not county:
+            return None
+
+        categories = self.Category.query.filter_by(county_id=county.id).order_by(self.Category.display_order).all()
+        staff = self.StaffContact.query.filter_by(county_id=county.id).all()
+        forms = self.Form.query.filter_by(county_id=county.id).all()
+        content_rows = self.Content.query.filter_by(county_id=county.id, active=True).all()
+
+        grouped = {}
+        for c in content_rows:
+            grouped.setdefault((c.category_id, c.language), []).append(
+                {'id': c.id, 'title': c.title, 'body': c.body, 'language': c.language}
+            )
+
+        return CountySnapshot(
+            county_id=county.id,
+            categories=JSONPayload.of([
+                {'id': c.id, 'name': c.name, 'display_order': c.display_order} for c in categories
+            ]),
+            staff=JSONPayload.of([
+                {'id': s.id, 'name': s.name, 'role': s.role, 'phone': s.phone,
+                 'email': s.email, 'office_hours': s.office_hours} for s in staff
+            ]),
+            forms=JSONPayload.of([
+                {'id': f.id, 'title': f.title, 'description': f.description,
+                 'url_link': f.url_link, 'required_for': f.required_for} for f in forms
+            ]),
+            content=MappingProxyType({key: JSONPayload.of(rows) for key, rows in grouped.items()})
+        )
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate(self):
+        """Drop every snapshot; the next request reloads from the database"""
+        with self._lock:
+            self._generation += 1
+            self._snapshots = {}
+        logger.debug("Reference data cache invalidated")
+
+    def install(self):
+        """Invalidate after any commit that added, changed or deleted reference rows"""
+        session = self.db.session
+
+        @event.listens_for(session, 'after_flush')
+        def _mark_reference_changes(sess, flush_context):
+            for obj in (*sess.new, *sess.dirty, *sess.deleted):
+                if isinstance(obj, self._tracked):
+                    sess.info['reference_data_changed'] = True
+                    return
+
+        @event.listens_for(session, 'after_commit')
+        def _invalidate_on_commit(sess):
+            if sess.info.pop('reference_data_changed', False):
+                self.invalidate()
+
+        @event.listens_for(session, 'after_rollback')
+        def _discard_on_rollback(sess):
+            sess.info.pop('reference_data_changed', None)
+
+        return self
+
@@ -0,0 +1,275 @@
+"""
+Retention job for queue history, case summaries and logs
+
+The hot tables (``QueueEntry``, ``CaseSummary``, ``FlowProgress``,
+``AuditLog``, ``UserSession``) otherwise grow forever, slowing the
+``status='waiting'`` and latest-number queries and keeping PII around
+indefinitely. ``run_retention`` applies the policy from ``Config``:
+
+1. PII purge (``RETENTION_PII_DAYS``): names, emails, phone numbers and free
+   text answers are cleared on finished queue entries, their flow progress and
+   facilitator notes, on case summaries, and client IP/user agent on audit
+   logs. The rows stay for reporting.
+2. Archive (``RETENTION_DAYS`` / ``AUDIT_LOG_RETENTION_DAYS``): finished
+   queue entries with their progress, events and facilitator assignments, old
+   case summaries with their tickets, and old audit logs are appended to
+   gzip-compressed JSONL files under ``RETENTION_ARCHIVE_DIR`` and deleted.
+   PII columns are left out of the archive unless ``RETENTION_ARCHIVE_PII``.
+3. Expired sessions and flow checkpoints are deleted outright (tokens are
+   never archived).
+
+Every step works in id-ordered batches of ``RETENTION_BATCH_SIZE``, each in
+its own short transaction, so kiosks are never locked out for long. A batch is
+written to the archive before it is deleted; if the job dies in between, the
+next run archives those rows again (archives are at-least-once).
+
+Queue analytics survive because ``QueueRollup`` rows are never archived.
+Their events are, so ``flask backfill-rollups`` refuses to rebuild from before
+``earliest_rebuild_day()``.
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, or_, select, update
+
+from config import Config
+from models import (
+    db, QueueEntry, QueueEvent, FlowProgress, FacilitatorCase, CaseSummary, QueueTicket,
+    AuditLog, UserSession, FlowCheckpoint
+)
+from utils.queue_events import FINAL_STATUSES
+from utils.storage_codec import CODEC_COLUMNS, decode_text
+
+logger = logging.getLogger(__name__)
+
+# Columns holding personal data, per table
+PII_COLUMNS = {
+    'queue_entry': ('user_name', 'user_email', 'phone_number', 'conversation_summary', 'facilitator_notes'),
+    'flow_progress': ('user_response',),
+    'case_summary': ('user_id', 'user_email', 'user_name', 'summary_json'),
+    'audit_log': ('ip_address', 'user_agent'),
+    'facilitator_case': ('priority_notes',),
+}
+
+# What a purged column is set to, where NULL is not allowed
+PURGED_VALUES = {
+    'case_summary': {'summary_json': '{}'},
+}
+
+
+def earliest_rebuild_day(now: Optional[datetime] = None) -> datetime:
+    """First day whose queue events are all still in the hot tables
+
+    Archived entries finished before the archive cutoff, so the day the cutoff
+    falls in can still have lost events; rollup rebuilds start the day after.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=Config.RETENTION_DAYS)
+    return cutoff.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class ArchiveWriter:
+    """Appends rows to one ``<table>-<run>.jsonl.gz`` file per table"""
+
+    def __init__(self, directory: str, include_pii: bool = False, run_id: Optional[str] = None):
+        self.directory = directory
+        self.include_pii = include_pii
+        self.run_id = run_id or datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        self._files = {}
+        self.paths: List[str] = []
+
+    def write(self, table_name: str, rows: Sequence[Dict]):
+        if not rows:
+            return
+        handle = self._files.get(table_name)
+        if handle is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{table_name}-{self.run_id}.jsonl.gz")
+            handle = self._files[table_name] = gzip.open(path, 'at', encoding='utf-8')
+            self.paths.append(path)
+        drop = () if self.include_pii else PII_COLUMNS.get(table_name, ())
+        encoded = CODEC_COLUMNS.get(table_name, ())
+        for row in rows:
+            # Blob columns are archived as plain JSON text, readable without the codec
+            record = {k: decode_text(v) if k in encoded else v for k, v in row.items() if k not in drop}
+            handle.write(json.dumps(record, default=_json_default, separators=(',', ':')) + '\n')
+        # Rows must be on disk before the batch that deletes them commits
+        handle.flush()
+
+    def close(self):
+        for handle in self._files.values():
+            handle.close()
+        self._files = {}
+
+
+class RetentionJob:
+    """One run of the retention policy; ``run()`` returns a per-table report"""
+
+    def __init__(self, now: Optional[datetime] = None, batch_size: Optional[int] = None,
+                 dry_run: bool = False, writer: Optional[ArchiveWriter] = None):
+        self.now = now or datetime.utcnow()
+        self.batch_size = batch_size or Config.RETENTION_BATCH_SIZE
+        self.dry_run = dry_run
+        self.writer = writer or ArchiveWriter(Config.RETENTION_ARCHIVE_DIR, Config.RETENTION_ARCHIVE_PII)
+        self.report: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, table_name: str, key: str, n: int):
+        self.report.setdefault(table_name, {}).setdefault(key, 0)
+        self.report[table_name][key] += n
+
+    # ------------------------------------------------------------------
+    # Batching helpers
+    # ------------------------------------------------------------------
+
+    def _id_batches(self, model, *criteria):
+        """Yield lists of matching ids in ascending batches (re-queried after each batch)"""
+        last_id = 0
+        while True:
+            ids = [row[0] for row in db.session.execute(
+                select(model.id).where(model.id > last_id, *criteria).order_by(model.id).limit(self.batch_size)
+            )]
+            if not ids:
+                return
+            yield ids
+            last_id = ids[-1]
+
+    def _rows(self, model, column, ids) -> List[Dict]:
+        return [dict(row._mapping) for row in db.session.execute(select(model.__table__).where(column.in_(ids)))]
+
+    def _archive(self, parent, criteria, children=()):
+        """Archive and delete ``parent`` rows matching ``criteria`` with their ``children``
+
+        ``children`` is a sequence of (model, foreign key column) pairs.
+        """
+        parent_name = parent.__table__.name
+        for ids in self._id_batches(parent, *criteria):
+            if self.dry_run:
+                self._count(parent_name, 'would_archive', len(ids))
+                continue
+            try:
+                for child, fk in children:
+                    rows = self._rows(child, fk, ids)
+                    self.writer.write(child.__table__.name, rows)
+                    self._count(child.__table__.name, 'archived', len(rows))
+                rows = self._rows(parent, parent.id, ids)
+                self.writer.write(parent_name, rows)
+
+                for child, fk in children:
+                    db.session.execute(delete(child).where(fk.in_(ids)).execution_options(synchronize_session=False))
+                db.session.execute(delete(parent).where(parent.id.in_(ids)).execution_options(synchronize_session=False))
+                db.session.commit()
+                self._count(parent_name, 'archived', len(rows))
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _purge(self, model, criteria):
+        """Clear the PII columns of matching rows that still hold any of them"""
+        table_name = model.__table__.name
+        cleared = {c: PURGED_VALUES.get(table_name, {}).get(c) for c in PII_COLUMNS[table_name]}
+        has_pii = or_(*(
+            getattr(model, c).isnot(None) if value is None else getattr(model, c) != value
+            for c, value in cleared.items()
+        ))
+        for ids in self._id_batches(model, *criteria, has_pii):
+            if self.dry_run:
+                self._count(table_name, 'would_purge_pii', len(ids))
+                continue
+            try:
+                values = dict(cleared)
+                if 'updated_at' in model.__table__.c:
+                    values['updated_at'] = model.updated_at  # don't let onupdate restart the clock
+                db.session.execute(
+                    update(model).where(model.id.in_(ids)).values(values)
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            self._count(table_name, 'pii_purged', len(ids))
+
+    # ------------------------------------------------------------------
+    # Policy
+    # ------------------------------------------------------------------
+
+    def _finished_before(self, cutoff):
+        # The newest entry per priority level seeds the next queue number; keep it
+        newest = select(func.max(QueueEntry.id)).group_by(QueueEntry.priority_level)
+        return (QueueEntry.status.in_(FINAL_STATUSES), QueueEntry.updated_at < cutoff, QueueEntry.id.notin_(newest))
+
+    def purge_pii(self):
+        cutoff = self.now - timedelta(days=Config.RETENTION_PII_DAYS)
+        finished = (QueueEntry.status.in_(FINAL_STATUSES), QueueEntry.updated_at < cutoff)
+        self._purge(QueueEntry, finished)
+        finished_ids = select(QueueEntry.id).where(*finished)
+        self._purge(FlowProgress, (FlowProgress.queue_entry_id.in_(finished_ids),))
+        self._purge(FacilitatorCase, (FacilitatorCase.queue_entry_id.in_(finished_ids),))
+        self._purge(CaseSummary, (CaseSummary.created_at < cutoff,))
+        self._purge(AuditLog, (AuditLog.timestamp < cutoff,))
+
+    def archive(self):
+        cutoff = self.now - timedelta(days=Config.RETENTION_DAYS)
+        self._archive(QueueEntry, self._finished_before(cutoff), children=(
+            (FlowProgress, FlowProgress.queue_entry_id),
+            (QueueEvent, QueueEvent.queue_entry_id),
+            (FacilitatorCase, FacilitatorCase.queue_entry_id),
+        ))
+        self._archive(CaseSummary, (CaseSummary.created_at < cutoff,), children=(
+            (QueueTicket, QueueTicket.summary_id),
+        ))
+        audit_cutoff = self.now - timedelta(days=Config.AUDIT_LOG_RETENTION_DAYS)
+        self._archive(AuditLog, (AuditLog.timestamp < audit_cutoff,))
+
+    def _delete_expired(self, model):
+        table_name = model.__table__.name
+        for ids in self._id_batches(model, model.expires_at < self.now):
+            if self.dry_run:
+                self._count(table_name, 'would_delete', len(ids))
+                continue
+            try:
+                db.session.execute(
+                    delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            self._count(table_name, 'deleted', len(ids))
+
+    def delete_expired_sessions(self):
+        self._delete_expired(UserSession)
+        self._delete_expired(FlowCheckpoint)
+
+    def run(self) -> Dict:
+        started = time.perf_counter()
+        try:
+            self.purge_pii()
+            self.archive()
+            self.delete_expired_sessions()
+        finally:
+            self.writer.close()
+        result = {
+            'dry_run': self.dry_run,
+            'tables': self.report,
+            'archive_files': list(self.writer.paths),
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Retention run finished in {result['seconds']}s: {self.report}")
+        return result
+
+
+def run_retention(dry_run: bool = False, now: Optional[datetime] = None) -> Dict:
+    """Apply the configured retention policy; must run in an app context"""
+    return RetentionJob(now=now, dry_run=dry_run).run()
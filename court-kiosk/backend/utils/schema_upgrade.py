@@ -0,0 +1,40 @@
+"""
+Additive schema upgrades
+
+``db.create_all`` creates missing tables but never alters existing ones, and
+the project has no migration framework. Columns added to a model after its
+table shipped are listed here and added with ``ALTER TABLE ... ADD COLUMN``;
+indexes declared on the models are created if missing. Both steps are
+idempotent and run from ``init_database``.
+"""
+
+import logging
+
+from sqlalchemy import inspect, text
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# table -> [(column, DDL type)]; only nullable columns can be added this way
+ADDED_COLUMNS = {
+    'flow_progress': [('sequence', 'INTEGER')],
+}
+
+
+def upgrade_schema():
+    """Add missing columns and indexes to existing tables; must run in an app context"""
+    inspector = inspect(db.engine)
+    for table_name, columns in ADDED_COLUMNS.items():
+        if not inspector.has_table(table_name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table_name)}
+        for name, ddl in columns:
+            if name not in existing:
+                logger.info(f"Adding column {table_name}.{name}")
+                db.session.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {name} {ddl}'))
+    db.session.commit()
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
@@ -0,0 +1,57 @@
+"""
+Lazily constructed service singletons
+
+Building the OpenAI client, the ReportLab stylesheet and the local court form
+index is slow, and on serverless deployments that cost used to be paid on every
+cold start whether or not the request needed it. Each getter below builds its
+service on first use and returns the same instance afterwards.
+"""
+
+import threading
+
+from config import Config
+
+_lock = threading.RLock()
+_instances = {}
+
+
+def _get_or_create(name, factory):
+    """Return the cached instance for ``name``, building it once if needed"""
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+
+def get_llm_service():
+    """Shared LLMService (OpenAI client is created on first call)"""
+    def factory():
+        from utils.llm_service import LLMService
+        return LLMService(Config.OPENAI_API_KEY)
+    return _get_or_create('llm_service', factory)
+
+
+def get_email_service():
+    """Shared EmailService (imports ReportLab on first call)"""
+    def factory():
+        from utils.email_service import EmailService
+        return EmailService()
+    return _get_or_create('email_service', factory)
+
+
+def get_case_summary_service():
+    """Shared CaseSummaryService"""
+    def factory():
+        from utils.case_summary_service import CaseSummaryService
+        return CaseSummaryService()
+    return _get_or_create('case_summary_service', factory)
+
+
+def reset_services():
+    """Drop all cached instances (used after configuration changes)"""
+    with _lock:
+        _instances.clear()
@@ -0,0 +1,136 @@
+"""
+Socket.IO pub/sub backplane
+
+With more than one gunicorn/eventlet worker each worker only knows its own
+WebSocket clients, so a ``queue_update`` emitted by the worker that handled
+call-next never reached displays connected to the others. Setting
+``SOCKETIO_MESSAGE_QUEUE`` makes every emit go through a shared channel; each
+worker then fans the message out to its own clients.
+
+Supported URLs:
+
+- ``redis://`` / ``rediss://`` (and anything else python-socketio accepts,
+  e.g. ``amqp://`` through kombu): handed to Flask-SocketIO unchanged. Needs
+  the matching client package (``redis``, ``kombu``) installed.
+- ``sqlite:///path/to/file.db``: ``SQLitePubSubManager``, a stand-in for a
+  single host (dev, CI, load tests) with no extra service or package.
+- ``local://``: ``LocalPubSubManager``, an in-process bus for tests that run
+  several Socket.IO servers in one process.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from socketio import PubSubManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = 'court-kiosk'
+SQLITE_POLL_SECONDS = 0.02
+SQLITE_RETENTION_SECONDS = 60
+
+
+class SQLitePubSubManager(PubSubManager):
+    """Pub/sub over an append-only SQLite table, polled by each worker
+
+    Messages are JSON (never pickle); payloads emitted to clients are JSON
+    anyway. Rows older than ``SQLITE_RETENTION_SECONDS`` are pruned by the
+    publishers.
+    """
+    name = 'sqlite'
+
+    def __init__(self, path, channel=DEFAULT_CHANNEL, write_only=False, logger=None,
+                 poll_seconds=SQLITE_POLL_SECONDS):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self._local = threading.local()
+        self._last_prune = 0.0
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS socketio_message ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, '
+            'payload TEXT NOT NULL, created_at REAL NOT NULL)'
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _publish(self, data):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('INSERT INTO socketio_message (channel, payload, created_at) VALUES (?, ?, ?)',
+                     (self.channel, json.dumps(data, separators=(',', ':')), now))
+        if now - self._last_prune > SQLITE_RETENTION_SECONDS:
+            self._last_prune = now
+            conn.execute('DELETE FROM socketio_message WHERE created_at < ?', (now - SQLITE_RETENTION_SECONDS,))
+
+    def _listen(self):
+        conn = self._connect()
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM socketio_message').fetchone()[0]
+        while True:
+            try:
+                rows = conn.execute(
+                    'SELECT id, payload FROM socketio_message WHERE id > ? AND channel = ? ORDER BY id',
+                    (last_id, self.channel)
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Socket.IO backplane poll failed: {e}")
+                rows = []
+            for message_id, payload in rows:
+                last_id = message_id
+                yield json.loads(payload)
+            self.server.sleep(self.poll_seconds)
+
+
+class LocalPubSubManager(PubSubManager):
+    """In-process bus shared by every manager on the same channel"""
+    name = 'local'
+    _subscribers: Dict[str, list] = {}
+    _subscribers_lock = threading.Lock()
+
+    def initialize(self):
+        self._queue = self.server.eio.create_queue()
+        with self._subscribers_lock:
+            self._subscribers.setdefault(self.channel, []).append(self._queue)
+        super().initialize()
+
+    def _publish(self, data):
+        for queue in list(self._subscribers.get(self.channel, ())):
+            queue.put(data)
+
+    def _listen(self):
+        while True:
+            yield self._queue.get()
+
+
+def client_manager_options(url: Optional[str], channel: str = DEFAULT_CHANNEL) -> Dict:
+    """Keyword arguments for ``SocketIO(...)`` that attach the backplane for ``url``"""
+    if not url:
+        return {}
+    if url.startswith('sqlite:///'):
+        return {'client_manager': SQLitePubSubManager(url[len('sqlite:///'):], channel=channel)}
+    if url.startswith('local://'):
+        return {'client_manager': LocalPubSubManager(channel=channel)}
+    return {'message_queue': url, 'channel': channel}
+
+
+def describe(url: Optional[str]) -> str:
+    """Backplane URL with any password removed, for logs"""
+    if not url:
+        return 'none (single worker)'
+    scheme, sep, rest = url.partition('://')
+    if '@' in rest:
+        rest = rest.split('@', 1)[1]
+    return f"{scheme}{sep}{rest}"
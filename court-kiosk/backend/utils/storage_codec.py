@@ -0,0 +1,75 @@
+"""
+Storage codec for JSON blob columns
+
+``CaseSummary.summary_json``/``required_forms``/``next_steps`` and
+``QueueEntry.documents_needed``/``facilitator_notes`` are Text columns holding
+JSON. ``encode_json`` writes them compactly and ``decode_json`` reads both the
+encoded form and the plain JSON written before it, so existing rows never
+need rewriting.
+
+Format, chosen by a version prefix that valid JSON can never start with:
+
+- no prefix: plain JSON text (legacy rows, and values too small to be worth
+  compressing)
+- ``~z1:``: zlib-compressed UTF-8 JSON, base85 so it stays valid Text on
+  every database
+
+Only values of at least ``COMPRESS_MIN_CHARS`` are compressed, and only when
+that actually saves space. The codec sticks to the standard library so every
+process (web, CLI, serverless) can read every row.
+
+Decoding is lazy at the model level: these columns are deferred, so list
+queries never fetch, decompress or parse blobs they don't return.
+"""
+
+import base64
+import json
+import zlib
+from typing import Any, Optional
+
+PREFIX_ZLIB_V1 = '~z1:'
+COMPRESS_MIN_CHARS = 512
+COMPRESSION_LEVEL = 6
+
+# Columns written through this codec, per table (e.g. for archive readers)
+CODEC_COLUMNS = {
+    'case_summary': ('summary_json', 'required_forms', 'next_steps'),
+    'queue_entry': ('documents_needed', 'facilitator_notes'),
+}
+
+
+def encode_json(value: Any, compress_min_chars: int = COMPRESS_MIN_CHARS) -> Optional[str]:
+    """Stored form of ``value``; strings are taken to be JSON text already"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        text = value
+    else:
+        text = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+    if len(text) < compress_min_chars:
+        return text
+    packed = PREFIX_ZLIB_V1 + base64.b85encode(
+        zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+    ).decode('ascii')
+    return packed if len(packed) < len(text) else text
+
+
+def decode_text(raw: Optional[str]) -> Optional[str]:
+    """JSON text of a stored value (decompressed if needed), without parsing it"""
+    if not raw or not isinstance(raw, str):
+        return raw
+    if raw.startswith(PREFIX_ZLIB_V1):
+        return zlib.decompress(base64.b85decode(raw[len(PREFIX_ZLIB_V1):])).decode('utf-8')
+    return raw
+
+
+def decode_json(raw: Any, default: Any = None) -> Any:
+    """Parsed value of a stored column; ``default`` for empty or unreadable values"""
+    if raw is None or raw == '':
+        return default
+    if not isinstance(raw, str):
+        return raw  # already decoded
+    try:
+        return json.loads(decode_text(raw))
+    except (ValueError, zlib.error):
+        return default
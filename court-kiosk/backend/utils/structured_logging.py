@@ -0,0 +1,308 @@
+"""
+Structured, non-blocking logging
+
+``configure_logging()`` replaces ``logging.basicConfig``. Loggers hand
+records to a ``QueueHandler``, and a ``QueueListener`` thread formats and
+writes them. A slow stdout or log shipper therefore never adds to request
+latency. The queue is bounded: when the writer falls behind, new records are
+dropped and counted in ``log_records_dropped_total`` instead of blocking.
+Under eventlet the queue and the writer thread come from the unpatched
+standard library (``concurrency.native``), so the writer is a real OS
+thread and its blocking writes never hold the hub.
+
+On the calling side a record costs a level check, a sampling check and
+capturing the request context (path, trace id). Formatting, PII redaction
+and I/O happen on the listener thread.
+
+Settings (see ``config.py``):
+
+- ``LOG_FORMAT``: ``json`` (one object per line) or ``text``
+- ``LOG_LEVELS``: per-logger levels, ``queue_manager=WARNING,werkzeug=WARNING``
+- ``LOG_SAMPLE_RATES``: keep only a fraction of a logger's INFO/DEBUG
+  records, ``utils.email_service=0.1``; warnings and errors are always kept
+- ``LOG_REDACT_PII``: mask email addresses and phone numbers in messages,
+  and values of fields such as ``user_email`` passed through ``extra=``
+
+Structured fields go through ``extra``:
+
+    logger.info("Queue entry created", extra={'queue_number': 'A001', 'case_type': 'DVRO'})
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import time
+import traceback
+from typing import Callable, Dict, Optional
+
+from flask import has_request_context, request
+
+from utils import tracing
+from utils.concurrency import native
+from utils.metrics import registry
+
+LOG_RECORDS_DROPPED = registry.counter(
+    'log_records_dropped_total', 'Log records dropped because the log writer fell behind')
+
+DEFAULT_QUEUE_SIZE = 10_000
+
+_EMAIL = re.compile(r'([A-Za-z0-9._%+-]+)@([A-Za-z0-9.-]+\.[A-Za-z]{2,})')
+_PHONE = re.compile(r'(?<![\w.])(?:\+?1[\s.-]?)?(?:\(\d{3}\)\s?|\d{3}[\s.-])\d{3}[\s.-]\d{4}(?![\w.])|\+1\d{10}\b')
+
+# ``extra=`` fields whose values are always masked
+PII_FIELDS = frozenset({
+    'email', 'user_email', 'to_email', 'phone', 'phone_number', 'user_phone', 'name', 'user_name',
+    'client_name', 'address', 'date_of_birth', 'case_data', 'answers',
+})
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RESERVED = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def redact(text: str) -> str:
+    """``text`` with email addresses (local part) and phone numbers masked"""
+    if not text:
+        return text
+    text = _EMAIL.sub(lambda m: f"***@{m.group(2)}", text)
+    return _PHONE.sub('[phone]', text)
+
+
+def parse_mapping(spec: Optional[str], convert=str) -> Dict:
+    """``'a=1, b.c=2'`` -> ``{'a': '1', 'b.c': '2'}`` (malformed items are skipped)"""
+    out = {}
+    for item in (spec or '').split(','):
+        name, sep, value = item.partition('=')
+        if not (sep and name.strip() and value.strip()):
+            continue
+        try:
+            out[name.strip()] = convert(value.strip())
+        except ValueError:
+            continue
+    return out
+
+
+def _longest_prefix(name: str, table: Dict[str, float]) -> Optional[float]:
+    while name:
+        if name in table:
+            return table[name]
+        name = name.rpartition('.')[0]
+    return None
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of INFO/DEBUG records from noisy loggers"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {name: max(0.0, min(1.0, rate)) for name, rate in rates.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = _longest_prefix(record.name, self.rates)
+        return rate is None or random.random() < rate
+
+
+class ContextFilter(logging.Filter):
+    """Captures request path and trace id on the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context():
+            record.http_method = request.method
+            record.http_path = request.path
+        span = tracing.current_span()
+        if span.recording:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues without waiting; the message is merged but not formatted here"""
+
+    def __init__(self, record_queue, full=queue.Full, on_drop: Callable[[], None] = LOG_RECORDS_DROPPED.inc):
+        super().__init__(record_queue)
+        self._full = full
+        self._on_drop = on_drop
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may be mutable objects) and render the traceback
+        # while the frames still exist; everything else waits for the listener.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except self._full:
+            self._on_drop()
+
+
+class _Listener(logging.handlers.QueueListener):
+    def start(self):
+        # A real OS thread even under eventlet, so sink writes never run on the hub
+        self._thread = native('threading').Thread(target=self._monitor, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def enqueue_sentinel(self):
+        # Wait for room: the queue may be full when we are asked to stop
+        self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, context and extra fields"""
+
+    def __init__(self, redact_pii: bool = True):
+        super().__init__()
+        self.redact_pii = redact_pii
+
+    def _field(self, key: str, value):
+        if not self.redact_pii:
+            return value
+        if key in PII_FIELDS:
+            return '[redacted]'
+        return redact(value) if isinstance(value, str) else value
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        data = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'message': redact(message) if self.redact_pii else message,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith('_'):
+                data[key] = self._field(key, value)
+        if record.exc_text:
+            data['exception'] = redact(record.exc_text) if self.redact_pii else record.exc_text
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """``LEVEL:logger:message`` like ``basicConfig``, with redaction"""
+
+    def __init__(self, redact_pii: bool = True):
+        super().__init__('%(levelname)s:%(name)s:%(message)s')
+        self.redact_pii = redact_pii
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        return redact(text) if self.redact_pii else text
+
+
+_listener: Optional[_Listener] = None
+_handler: Optional[NonBlockingQueueHandler] = None
+_writers: Dict[str, _Listener] = {}
+
+
+def _native_queue_handler(queue_size: int, **kwargs) -> NonBlockingQueueHandler:
+    # Unpatched queue: a green one would park the writer thread on the hub
+    native_queue = native('queue')
+    return NonBlockingQueueHandler(native_queue.Queue(maxsize=queue_size), native_queue.Full, **kwargs)
+
+
+def configure_logging(level: str = 'INFO', fmt: str = 'json', module_levels: Optional[Dict[str, str]] = None,
+                      sample_rates: Optional[Dict[str, float]] = None, redact_pii: bool = True,
+                      stream=None, queue_size: int = DEFAULT_QUEUE_SIZE) -> logging.handlers.QueueListener:
+    """Route the root logger through a background writer; safe to call again (reconfigures)"""
+    global _listener, _handler
+    shutdown()
+
+    formatter = JsonFormatter(redact_pii) if fmt == 'json' else TextFormatter(redact_pii)
+    sink = logging.StreamHandler(stream or sys.stdout)
+    sink.setFormatter(formatter)
+
+    handler = _native_queue_handler(queue_size)
+    handler.addFilter(SamplingFilter(sample_rates or {}))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(getattr(logging, str(module_level).upper(), logging.INFO))
+
+    _handler = handler
+    _listener = _Listener(handler.queue, sink, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown():
+    """Flush queued records, stop the writer thread and detach our handler"""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler.close()
+        _handler = None
+
+
+def dedicated_writer(name: str, sink: logging.Handler, queue_size: int = DEFAULT_QUEUE_SIZE,
+                     on_drop: Callable[[], None] = LOG_RECORDS_DROPPED.inc) -> logging.Logger:
+    """Logger ``name`` with its own bounded queue and writer thread, writing only to ``sink``
+
+    The same non-blocking path as the root logger, for other line-oriented
+    output that must stay off the request path (trace export). Records do
+    not propagate to the log sink. Calling it again for ``name`` replaces
+    the writer.
+    """
+    stop_writer(name)
+    handler = _native_queue_handler(queue_size, on_drop=on_drop)
+    target = logging.getLogger(name)
+    target.addHandler(handler)
+    target.setLevel(logging.INFO)
+    target.propagate = False
+    _writers[name] = _Listener(handler.queue, sink)
+    _writers[name].start()
+    return target
+
+
+def flush_writer(name: str):
+    """Wait until everything handed to ``dedicated_writer(name)`` has been written"""
+    writer = _writers.get(name)
+    if writer is not None:
+        writer.queue.join()
+
+
+def stop_writer(name: str):
+    writer = _writers.pop(name, None)
+    if writer is None:
+        return
+    writer.stop()
+    target = logging.getLogger(name)
+    for handler in list(target.handlers) + list(writer.handlers):
+        target.removeHandler(handler)
+        handler.close()
+
+
+def _shutdown_at_exit():
+    shutdown()
+    for name in list(_writers):
+        stop_writer(name)
+    # Handlers still referenced at exit (ours held by a caller, Flask's
+    # default one) are collected during interpreter teardown, and logging
+    # then takes its module lock to forget them. Under eventlet that lock is
+    # green and fails with "greenlet is being finalized" once the main
+    # greenlet is gone; nothing logs concurrently any more, so a native lock
+    # is safe from here on.
+    if sys.modules.get('eventlet.patcher') is not None:
+        logging._lock = native('threading').RLock()
+
+
+atexit.register(_shutdown_at_exit)
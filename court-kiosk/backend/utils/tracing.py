@@ -0,0 +1,432 @@
+"""
+Lightweight request tracing
+
+Spans are kept in a ``contextvars`` context, so nesting follows the call
+stack (and each eventlet greenthread has its own). A trace starts at the
+HTTP request (continuing an incoming W3C ``traceparent`` if there is one);
+``span()``/``traced()`` add child spans, and SQL statements become spans
+through SQLAlchemy engine events.
+
+Finished traces are appended to ``TRACE_EXPORT_PATH`` as one OTLP/JSON
+``ExportTraceServiceRequest`` per line, which the OpenTelemetry collector's
+file receiver (and most trace viewers) can read. Serialising and writing
+happen on a background writer thread (``structured_logging.dedicated_writer``),
+not in request teardown.
+
+Sampling:
+
+- ``TRACE_SAMPLE_RATE``: fraction of requests exported (0 disables)
+- ``TRACE_SLOW_MS``: additionally export any trace whose root span took at
+  least this long, whatever the rate, so tail latency is always captured
+- ``TRACE_TRUSTED_PARENTS``: addresses or networks (``10.0.0.0/8,127.0.0.1``)
+  whose ``traceparent`` sampled flag is honoured. Anyone else's trace id is
+  continued but sampling follows the rate, so a client cannot force every
+  request of its own to be traced.
+
+With both at 0 nothing is recorded and ``span()`` costs one attribute check.
+"""
+
+import contextvars
+import functools
+import ipaddress
+import json
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'court-kiosk-backend'
+MAX_STATEMENT_CHARS = 500
+MAX_SPANS_PER_TRACE = 2000
+EXPORT_QUEUE_SIZE = 1000
+EXPORT_LOGGER = 'court_kiosk.trace_export'
+
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'end_ns', 'attributes',
+                 'status', 'status_message')
+
+    def __init__(self, trace: '_Trace', name: str, parent_id: Optional[str], kind: int, attributes: Dict):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = None
+        self.status_message = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"[:300]
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.finish(self)
+
+
+class _NoopSpan:
+    """Stand-in when tracing is off or the trace was not sampled"""
+    trace_id = None
+    span_id = None
+    recording = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, error):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    """Spans of one trace; exported when its root span ends"""
+
+    def __init__(self, tracer: 'Tracer', trace_id: str, sampled: bool):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.root: Optional[Span] = None
+        self.dropped = 0
+
+    def finish(self, span: Span):
+        if len(self.spans) < MAX_SPANS_PER_TRACE:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        if span is self.root:
+            self.tracer._on_trace_end(self)
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_span(span: Span) -> Dict:
+    data = {
+        'traceId': span.trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': span.kind,
+        'startTimeUnixNano': str(span.start_ns),
+        'endTimeUnixNano': str(span.end_ns),
+        'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span.attributes.items() if v is not None],
+    }
+    if span.parent_id:
+        data['parentSpanId'] = span.parent_id
+    if span.status is not None:
+        data['status'] = {'code': span.status}
+        if span.status_message:
+            data['status']['message'] = span.status_message
+    return data
+
+
+def _otlp_request(spans: List[Span]) -> Dict:
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+            'scopeSpans': [{'scope': {'name': 'court-kiosk.tracing'}, 'spans': [_otlp_span(s) for s in spans]}],
+        }]
+    }
+
+
+class _OtlpLineFormatter(logging.Formatter):
+    """Renders the ``spans`` a record carries; runs on the writer thread"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(_otlp_request(record.spans), separators=(',', ':'))
+
+
+class FileExporter:
+    """Appends one OTLP/JSON export request per trace to a file, from a background writer
+
+    ``export()`` only enqueues; when the writer falls behind, traces are
+    dropped and counted in ``dropped``.
+    """
+
+    def __init__(self, path: str, queue_size: int = EXPORT_QUEUE_SIZE):
+        self.path = path
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._writer = None
+
+    def start(self):
+        from utils.structured_logging import dedicated_writer
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        sink = logging.FileHandler(self.path, encoding='utf-8', delay=True)
+        sink.setFormatter(_OtlpLineFormatter())
+        self._writer = dedicated_writer(EXPORT_LOGGER, sink, self.queue_size, on_drop=self._count_drop)
+        return self
+
+    def _count_drop(self):
+        self.dropped += 1
+
+    def export(self, spans: List[Span]):
+        if self._writer is None:
+            self.start()
+        self._writer.info('trace', extra={'spans': spans})
+
+    def flush(self):
+        """Wait for queued traces to reach the file"""
+        from utils.structured_logging import flush_writer
+        flush_writer(EXPORT_LOGGER)
+
+
+def parse_networks(spec: Optional[str]) -> List:
+    """``'10.0.0.0/8, 127.0.0.1'`` -> networks (malformed items are logged and skipped)"""
+    networks = []
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            logger.warning(f"Ignoring invalid TRACE_TRUSTED_PARENTS entry {item!r}")
+    return networks
+
+
+def _in_networks(address: Optional[str], networks: Sequence) -> bool:
+    if not address or not networks:
+        return False
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.0, slow_ms: float = 0.0, exporter: Optional[FileExporter] = None):
+        self.configure(sample_rate, slow_ms, exporter)
+        self.exported = 0
+
+    def configure(self, sample_rate: float = 0.0, slow_ms: float = 0.0, exporter: Optional[FileExporter] = None):
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.slow_ms = max(0.0, slow_ms)
+        self.exporter = exporter
+        self.enabled = exporter is not None and (self.sample_rate > 0 or self.slow_ms > 0)
+
+    def start_trace(self, name: str, kind: int = KIND_SERVER, traceparent: Optional[str] = None,
+                    trust_parent: bool = False, **attributes):
+        """Root span for a new (or continued) trace; NOOP_SPAN when not recording
+
+        The ``traceparent`` sampled flag decides sampling only with
+        ``trust_parent``; otherwise its ids are kept and ``sample_rate`` applies.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        trace_id, parent_id, sampled = None, None, None
+        match = _TRACEPARENT.match(traceparent or '')
+        if match:
+            trace_id, parent_id = match.group(1), match.group(2)
+            if trust_parent:
+                sampled = bool(int(match.group(3), 16) & 1)
+        if sampled is None:
+            sampled = random.random() < self.sample_rate
+        if not sampled and not self.slow_ms:
+            return NOOP_SPAN
+        trace = _Trace(self, trace_id or os.urandom(16).hex(), sampled)
+        trace.root = Span(trace, name, parent_id, kind, attributes)
+        return trace.root
+
+    def _on_trace_end(self, trace: _Trace):
+        duration_ms = (trace.root.end_ns - trace.root.start_ns) / 1e6
+        if not trace.sampled and duration_ms < self.slow_ms:
+            return
+        if trace.dropped:
+            trace.root.set_attribute('tracing.dropped_spans', trace.dropped)
+        try:
+            self.exporter.export(trace.spans)
+            self.exported += 1
+        except OSError as e:
+            logger.error(f"Trace export failed: {e}")
+
+
+tracer = Tracer()
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def start_span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """Child of the current span (not made current; call ``end()``)"""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """``with span('email.render_pdf', form_count=3) as s: ...``"""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = Span(parent.trace, name, parent.span_id, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def traced(name: Optional[str] = None, kind: int = KIND_INTERNAL):
+    """Decorator form of ``span()``; defaults to the function's qualified name"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def activate(root):
+    """Make ``root`` (from ``tracer.start_trace``) current for the block and end it after"""
+    if not getattr(root, 'recording', False):
+        yield root
+        return
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        root.end()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    db_span = start_span('db.query', KIND_CLIENT, **{
+        'db.system': conn.dialect.name,
+        'db.statement': statement[:MAX_STATEMENT_CHARS],
+    })
+    conn.info.setdefault('tracing_spans', []).append(db_span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get('tracing_spans')
+    if spans:
+        db_span = spans.pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            db_span.set_attribute('db.rowcount', cursor.rowcount)
+        db_span.end()
+
+
+def _handle_error(exception_context):
+    spans = exception_context.connection.info.get('tracing_spans') if exception_context.connection else None
+    if spans:
+        db_span = spans.pop()
+        db_span.set_error(exception_context.original_exception)
+        db_span.end()
+
+
+def install(app, sample_rate: float, slow_ms: float, export_path: str, trusted_parents: Optional[str] = None):
+    """Trace ``app``'s requests and all SQL; a no-op when both sampling knobs are 0"""
+    from flask import g, request
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    tracer.configure(sample_rate, slow_ms, FileExporter(export_path))
+    if not tracer.enabled:
+        return tracer
+    tracer.exporter.start()
+    trusted_networks = parse_networks(trusted_parents)
+
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def _start_request_trace():
+        root = tracer.start_trace(f"{request.method} {request.path}", KIND_SERVER,
+                                  traceparent=request.headers.get('traceparent'),
+                                  trust_parent=_in_networks(request.remote_addr, trusted_networks),
+                                  **{'http.method': request.method, 'http.target': request.path})
+        if root.recording:
+            g.trace_token = _current_span.set(root)
+            g.trace_root = root
+
+    @app.after_request
+    def _tag_response(response):
+        root = g.get('trace_root')
+        if root is not None:
+            rule = request.url_rule
+            root.set_attribute('http.route', rule.rule if rule is not None else None)
+            root.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                root.status = STATUS_ERROR
+            response.headers['X-Trace-Id'] = root.trace_id
+        return response
+
+    @app.teardown_request
+    def _end_request_trace(error=None):
+        root = g.pop('trace_root', None)
+        token = g.pop('trace_token', None)
+        if root is None:
+            return
+        if error is not None:
+            root.set_error(error)
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            _current_span.set(None)  # torn down from a different context
+        root.end()
+
+    logger.info(f"Tracing enabled: sample_rate={tracer.sample_rate} slow_ms={tracer.slow_ms} -> {export_path}")
+    return tracer
@@ -0,0 +1,283 @@
+"""
+Wait-time prediction from observed service durations
+
+The old estimate was ``base_times[priority] + 5 * people_ahead`` with a COUNT
+query per enqueue. The predictor instead learns how long facilitators actually
+spend on each case type (and each facilitator on each case type) from claim ->
+completion times, and turns the work queued ahead of an entry into minutes by
+dividing it across the facilitators currently working.
+
+- Running statistics are kept in memory (Welford) and updated as cases
+  complete; on first use they are warmed from the QueueEvent log.
+- Until a case type has enough samples its mean is blended with a prior:
+  ``CaseType.estimated_duration`` or ``DEFAULT_SERVICE_MINUTES``.
+- ``refresh_estimates`` recomputes every waiting entry's
+  ``estimated_wait_time`` with one SELECT and a single batched UPDATE of the
+  rows whose estimate changed, and caches per-priority totals so estimating a
+  new arrival is O(1). Time in service is measured from the claim event, so
+  progress updates on a case no longer shift everyone's estimate.
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, func, select, update
+
+from models import db, QueueEntry, QueueEvent, FacilitatorCase, CaseType
+from utils.facilitator_scheduler import facilitator_directory
+from utils.queue_claim import ROW_LOCKING_DIALECTS
+from utils.queue_events import CLAIMED_STATUSES, claim_times
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_ORDER = ('A', 'B', 'C', 'D')
+DEFAULT_SERVICE_MINUTES = 15.0
+
+# Pseudo-observations given to the prior when blending with observed means
+PRIOR_WEIGHT = 5
+
+# Durations outside this range are misclicks/no-shows or bookkeeping mistakes
+MIN_SERVICE_MINUTES = 1.0
+MAX_SERVICE_MINUTES = 240.0
+
+# Facilitators who claimed a case within this window count as working
+ACTIVE_WINDOW = timedelta(minutes=60)
+
+WARM_LIMIT = 1000
+CASE_TYPE_TTL_SECONDS = 600
+
+
+@dataclass
+class RunningStats:
+    """Welford running mean/variance"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class WaitTimePredictor:
+    """Per-process service-time model and batched wait estimate refresher"""
+
+    def __init__(self, default_servers: int = 1):
+        self.default_servers = default_servers
+        self._by_case_type: Dict[str, RunningStats] = {}
+        self._by_facilitator: Dict[Tuple[int, str], RunningStats] = {}
+        self._overall = RunningStats()
+        self._priors: Dict[str, float] = {}
+        self._priors_loaded_at = 0.0
+        self._active: Dict[object, datetime] = {}  # facilitator/user id -> last claim
+        self._warmed = False
+        # Cached by refresh_estimates: minutes of work at or above each priority
+        self._backlog: Optional[Dict[str, float]] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Learning
+    # ------------------------------------------------------------------
+
+    def observe_claim(self, staff_id, when: Optional[datetime] = None):
+        """A facilitator (or staff user) started a case - they count as working"""
+        if staff_id is not None:
+            self._active[staff_id] = when or datetime.utcnow()
+
+    def observe_completion(self, case_type: Optional[str], started_at: Optional[datetime],
+                           completed_at: Optional[datetime] = None, facilitator_id: Optional[int] = None):
+        """Record one claim -> completion duration"""
+        if not started_at:
+            return
+        minutes = ((completed_at or datetime.utcnow()) - started_at).total_seconds() / 60
+        if not MIN_SERVICE_MINUTES <= minutes <= MAX_SERVICE_MINUTES:
+            return
+        key = (case_type or '').upper()
+        with self._lock:
+            self._by_case_type.setdefault(key, RunningStats()).add(minutes)
+            self._overall.add(minutes)
+            if facilitator_id is not None:
+                self._by_facilitator.setdefault((facilitator_id, key), RunningStats()).add(minutes)
+
+    def record_completion(self, entry, started_at: Optional[datetime]):
+        """observe_completion for a QueueEntry, attributed to its assigned facilitator"""
+        if not started_at:
+            return
+        facilitator_id = db.session.query(FacilitatorCase.facilitator_id).filter(
+            FacilitatorCase.queue_entry_id == entry.id
+        ).order_by(FacilitatorCase.id.desc()).scalar()
+        self.observe_completion(entry.case_type, started_at, datetime.utcnow(), facilitator_id)
+
+    def warm(self):
+        """Seed statistics from recent claim -> completion pairs in the event log
+
+        Falls back to FacilitatorCase assignment times for history recorded
+        before the event log existed.
+        """
+        if self._warmed:
+            return
+        self._warmed = True
+        try:
+            completed = db.session.query(
+                QueueEvent.queue_entry_id, QueueEvent.created_at
+            ).filter(QueueEvent.to_status == 'completed').order_by(
+                QueueEvent.created_at.desc()
+            ).limit(WARM_LIMIT).all()
+            rows = []
+            if completed:
+                completed_at = dict(completed)
+                claimed_at = dict(db.session.query(QueueEvent.queue_entry_id, func.max(QueueEvent.created_at)).filter(
+                    QueueEvent.queue_entry_id.in_(list(completed_at)),
+                    QueueEvent.to_status.in_(CLAIMED_STATUSES)
+                ).group_by(QueueEvent.queue_entry_id).all())
+                details = db.session.query(
+                    QueueEntry.id, QueueEntry.case_type, FacilitatorCase.facilitator_id
+                ).outerjoin(FacilitatorCase, FacilitatorCase.queue_entry_id == QueueEntry.id).filter(
+                    QueueEntry.id.in_(list(claimed_at))
+                ).all()
+                rows = [
+                    (case_type, claimed_at[entry_id], completed_at[entry_id], facilitator_id)
+                    for entry_id, case_type, facilitator_id in details
+                ]
+            else:
+                rows = db.session.query(
+                    QueueEntry.case_type, FacilitatorCase.created_at, QueueEntry.updated_at, FacilitatorCase.facilitator_id
+                ).join(FacilitatorCase, FacilitatorCase.queue_entry_id == QueueEntry.id).filter(
+                    QueueEntry.status == 'completed'
+                ).order_by(QueueEntry.updated_at.desc()).limit(WARM_LIMIT).all()
+        except Exception as e:
+            logger.warning(f"Could not warm wait-time statistics: {e}")
+            return
+        for case_type, started_at, completed_at, facilitator_id in rows:
+            self.observe_completion(case_type, started_at, completed_at, facilitator_id)
+        logger.info(f"Wait-time predictor warmed from {len(rows)} completed cases")
+
+    # ------------------------------------------------------------------
+    # Prediction
+    # ------------------------------------------------------------------
+
+    def _prior(self, case_type: str) -> float:
+        if time.monotonic() - self._priors_loaded_at > CASE_TYPE_TTL_SECONDS:
+            try:
+                self._priors = {
+                    (code or '').upper(): float(duration)
+                    for code, duration in db.session.query(CaseType.code, CaseType.estimated_duration).all()
+                    if duration
+                }
+            except Exception as e:
+                logger.warning(f"Could not load case type durations: {e}")
+            self._priors_loaded_at = time.monotonic()
+        if case_type in self._priors:
+            return self._priors[case_type]
+        # Unknown case type: the default, pulled toward what we have seen overall
+        overall = self._overall
+        return (DEFAULT_SERVICE_MINUTES * PRIOR_WEIGHT + overall.mean * overall.count) / (PRIOR_WEIGHT + overall.count)
+
+    def expected_service_minutes(self, case_type: Optional[str], facilitator_id: Optional[int] = None) -> float:
+        """Blended mean service time for a case type (optionally for one facilitator)"""
+        key = (case_type or '').upper()
+        prior = self._prior(key)
+        stats = self._by_facilitator.get((facilitator_id, key)) if facilitator_id is not None else None
+        if stats is None or stats.count < PRIOR_WEIGHT:
+            stats = self._by_case_type.get(key)
+        if stats is None or not stats.count:
+            return prior
+        return (prior * PRIOR_WEIGHT + stats.mean * stats.count) / (PRIOR_WEIGHT + stats.count)
+
+    def active_servers(self, now: Optional[datetime] = None) -> int:
+        """Facilitators who claimed a case recently, or the registered active count"""
+        now = now or datetime.utcnow()
+        cutoff = now - ACTIVE_WINDOW
+        for staff_id, last in list(self._active.items()):
+            if last < cutoff:
+                self._active.pop(staff_id, None)
+        if self._active:
+            return len(self._active)
+        try:
+            return max(self.default_servers, len(facilitator_directory.active()))
+        except Exception as e:
+            logger.warning(f"Could not count active facilitators: {e}")
+            return self.default_servers
+
+    def estimate_new(self, priority_level: str, case_type: Optional[str] = None) -> int:
+        """Minutes a new arrival at ``priority_level`` should expect to wait (O(1))"""
+        if self._backlog is None:
+            self.refresh_estimates(commit=False)
+        backlog = self._backlog or {}
+        return int(round(backlog.get((priority_level or 'C').upper(), backlog.get('D', 0.0))))
+
+    def refresh_estimates(self, commit: bool = True) -> int:
+        """Recompute every waiting entry's estimated_wait_time; returns rows updated
+
+        Entries are ordered by priority then age (the order facilitators see),
+        prefix sums of expected service time give the work ahead of each one,
+        and the remaining time of cases in progress is added in front.
+        """
+        self.warm()
+        now = datetime.utcnow()
+        servers = self.active_servers(now)
+
+        in_progress = db.session.query(QueueEntry.id, QueueEntry.case_type).filter(
+            QueueEntry.status.in_(CLAIMED_STATUSES)
+        ).all()
+        started = claim_times(entry_id for entry_id, _ in in_progress)
+        ahead = 0.0
+        for entry_id, case_type in in_progress:
+            started_at = started.get(entry_id)
+            elapsed = (now - started_at).total_seconds() / 60 if started_at else 0.0
+            ahead += max(0.0, self.expected_service_minutes(case_type) - elapsed)
+        running = ahead / servers
+
+        waiting = db.session.query(
+            QueueEntry.id, QueueEntry.priority_level, QueueEntry.case_type, QueueEntry.estimated_wait_time
+        ).filter(QueueEntry.status == 'waiting').order_by(
+            QueueEntry.priority_level, QueueEntry.created_at, QueueEntry.id
+        ).all()
+
+        changed = {}
+        backlog = {}
+        for entry_id, priority_level, case_type, current in waiting:
+            estimate = int(round(ahead / servers))
+            if estimate != current:
+                changed[entry_id] = estimate
+            ahead += self.expected_service_minutes(case_type)
+            backlog[(priority_level or 'C').upper()] = ahead / servers
+        # Priorities with nobody waiting inherit the work queued above them
+        for level in PRIORITY_ORDER:
+            running = backlog.get(level, running)
+            backlog[level] = running
+        self._backlog = backlog
+
+        ids = list(changed)
+        if ids and db.session.get_bind().dialect.name in ROW_LOCKING_DIALECTS:
+            # An entry being claimed right now is locked and about to leave the
+            # queue: skip it instead of waiting for the claiming transaction
+            ids = db.session.execute(
+                select(QueueEntry.id).where(QueueEntry.id.in_(ids), QueueEntry.status == 'waiting')
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+        if ids:
+            # updated_at moves with the estimate on purpose: the admin list's
+            # serialized fragments are keyed on it
+            db.session.execute(
+                update(QueueEntry)
+                .where(QueueEntry.id.in_(ids), QueueEntry.status == 'waiting')
+                .values(estimated_wait_time=case({i: changed[i] for i in ids}, value=QueueEntry.id))
+                .execution_options(synchronize_session=False)
+            )
+        if commit:
+            db.session.commit()
+        return len(ids)
+
+wait_time_predictor = WaitTimePredictor()
@@ -101,6 +101,16 @@ OPTIONAL_VARS = {
         'example': 'INFO',
         'default': 'INFO'
     },
+    'DB_PROFILE': {
+        'description': 'Database engine tuning profile (sqlite, postgres, serverless or none)',
+        'example': 'postgres',
+        'default': 'Chosen from DATABASE_URL'
+    },
+    'LOG_FORMAT': {
+        'description': 'Log output format (json or text)',
+        'example': 'text',
+        'default': 'json'
+    },
     'PORT': {
         'description': 'Port number for the Flask server',
         'example': '5000',
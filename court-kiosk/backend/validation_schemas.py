@@ -64,6 +64,24 @@ class GenerateCaseSummarySchema(Schema):
     language = fields.Str(validate=validate.OneOf(['en', 'es', 'zh', 'vi']))
     join_queue = fields.Bool(allow_none=True)
 
+class FlowStepSchema(Schema):
+    sequence = fields.Int(required=True, validate=validate.Range(min=0, max=100000))
+    node_id = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    node_text = fields.Str(allow_none=True, validate=validate.Length(max=2000))
+    user_response = fields.Str(allow_none=True, validate=validate.Length(max=5000))
+    timestamp = fields.DateTime(allow_none=True)
+
+class FlowProgressBatchSchema(Schema):
+    steps = fields.List(fields.Nested(FlowStepSchema), required=True,
+                        validate=validate.Length(min=1, max=500, error="Between 1 and 500 steps per batch"))
+
+class FlowCheckpointSchema(Schema):
+    flow_id = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    path = fields.List(fields.Int(validate=validate.Range(min=0)), required=True,
+                       validate=validate.Length(max=2000))
+    answers = fields.Dict(allow_none=True)
+    version = fields.Int(required=True, validate=validate.Range(min=0))
+
 def validate_request_data(schema_class, data):
     """Validate request data using the specified schema"""
     try:
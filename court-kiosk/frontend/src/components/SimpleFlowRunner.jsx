@@ -4,10 +4,19 @@ import AdminQuestionsPage from './AdminQuestionsPage';
 import ErrorBoundary from './ErrorBoundary';
 import { getLocalFormUrl, getOfficialFormUrl } from '../utils/formUtils';
 import { FileText, ExternalLink, Eye } from 'lucide-react';
+import { useFlowCheckpoint } from '../hooks/useFlowCheckpoint';
 
-const SimpleFlowRunner = ({ flow, onFinish, onBack, onHome, onRoute }) => {
+// Answers given on the path up to (not including) its last node; a node visited twice keeps its latest answer
+const answersAlong = (path, answers) => Object.fromEntries(
+  path.slice(0, -1).filter(nodeId => nodeId in answers).map(nodeId => [nodeId, answers[nodeId]])
+);
+
+const SimpleFlowRunner = ({ flow, onFinish, onBack, onHome, onRoute, checkpointToken }) => {
   const [currentNodeId, setCurrentNodeId] = useState(flow?.start || 'DVROStart');
   const [history, setHistory] = useState([flow?.start || 'DVROStart']);
+  // Choice label (edge "when") picked at each node of the path
+  const [answers, setAnswers] = useState({});
+  const { restored, record, clear: clearCheckpoint } = useFlowCheckpoint(flow, { token: checkpointToken });
   const [showSummary, setShowSummary] = useState(false);
   const [showAdminQuestions, setShowAdminQuestions] = useState(false);
   const [adminData, setAdminData] = useState(null);
@@ -27,6 +36,29 @@ const SimpleFlowRunner = ({ flow, onFinish, onBack, onHome, onRoute }) => {
     }
   }, [currentNodeId, currentNode, onRoute]);
 
+  // Resume a checkpointed session, unless the user has already moved on
+  useEffect(() => {
+    if (!restored || history.length > 1) return;
+    const resumable = restored.history.filter(nodeId => flow?.nodes?.[nodeId]);
+    if (resumable.length > 1) {
+      setHistory(resumable);
+      setAnswers(answersAlong(resumable, restored.answers || {}));
+      setCurrentNodeId(resumable[resumable.length - 1]);
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [restored]);
+
+  // Buffer every step; the hook syncs the latest path and answers every few seconds
+  useEffect(() => {
+    record(history, answers);
+  }, [history, answers, record]);
+
+  // Leaving for home ends the visit: the next visitor must not resume this session
+  const handleHome = () => {
+    clearCheckpoint();
+    onHome?.();
+  };
+
   // Debug logging removed for production
 
   const handleNext = (nextNodeId) => {
@@ -71,6 +103,7 @@ const SimpleFlowRunner = ({ flow, onFinish, onBack, onHome, onRoute }) => {
       const newHistory = history.slice(0, -1);
       const previousNode = newHistory[newHistory.length - 1];
       setHistory(newHistory);
+      setAnswers(prev => answersAlong(newHistory, prev));
       setCurrentNodeId(previousNode);
     } else {
       onBack?.();
@@ -82,6 +115,9 @@ const SimpleFlowRunner = ({ flow, onFinish, onBack, onHome, onRoute }) => {
   const handleChoice = (edgeIndex) => {
     const edge = outgoingEdges[edgeIndex];
     if (edge) {
+      if (edge.when) {
+        setAnswers(prev => ({ ...prev, [currentNodeId]: edge.when }));
+      }
       handleNext(edge.to);
     }
   };
@@ -91,6 +127,7 @@ const SimpleFlowRunner = ({ flow, onFinish, onBack, onHome, onRoute }) => {
     if (nodeIndex !== -1) {
       const newHistory = history.slice(0, nodeIndex + 1);
       setHistory(newHistory);
+      setAnswers(prev => answersAlong(newHistory, prev));
       setCurrentNodeId(nodeId);
     }
   };
@@ -153,7 +190,7 @@ const SimpleFlowRunner = ({ flow, onFinish, onBack, onHome, onRoute }) => {
         flow={flow}
         onBack={handleAdminQuestionsBack}
         onComplete={handleAdminQuestionsComplete}
-        onHome={onHome}
+        onHome={handleHome}
       />
     );
   }
@@ -166,7 +203,7 @@ const SimpleFlowRunner = ({ flow, onFinish, onBack, onHome, onRoute }) => {
         flow={flow}
         adminData={adminData}
         onBack={handleSummaryBack}
-        onHome={onHome}
+        onHome={handleHome}
       />
     );
   }
@@ -208,7 +245,7 @@ const SimpleFlowRunner = ({ flow, onFinish, onBack, onHome, onRoute }) => {
             </div>
             <div className="flex items-center space-x-4">
               <button
-                onClick={onHome}
+                onClick={handleHome}
                 className="px-4 py-2 bg-gray-100 text-gray-700 rounded hover:bg-gray-200 transition-colors"
               >
                 Home
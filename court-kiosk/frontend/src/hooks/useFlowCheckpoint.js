@@ -0,0 +1,194 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+import { buildApiUrl, getApiHeaders } from '../utils/apiConfig';
+
+const SYNC_INTERVAL_MS = 5000;
+const STORAGE_PREFIX = 'flowCheckpoint:';
+// A reload this soon after the last step is a crash or refresh, not a new visitor
+const RESUME_WINDOW_MS = 2 * 60 * 1000;
+
+const newToken = () => {
+  const bytes = new Uint8Array(18);
+  window.crypto.getRandomValues(bytes);
+  return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+};
+
+// The kiosk tab is shared by every visitor: a stored token is only reused by a
+// reload within RESUME_WINDOW_MS of the last step, and is removed by clear()
+const recentToken = (flowId) => {
+  try {
+    const stored = JSON.parse(sessionStorage.getItem(`${STORAGE_PREFIX}${flowId}`));
+    if (stored?.token && Date.now() - stored.steppedAt < RESUME_WINDOW_MS) {
+      return stored.token;
+    }
+  } catch (e) {
+    // Unreadable or unavailable storage: start a new session
+  }
+  return null;
+};
+
+const storeToken = (flowId, token) => {
+  try {
+    sessionStorage.setItem(`${STORAGE_PREFIX}${flowId}`, JSON.stringify({ token, steppedAt: Date.now() }));
+  } catch (e) {
+    // Private mode / storage full: only crash recovery is lost
+  }
+};
+
+const forgetToken = (flowId) => {
+  try {
+    sessionStorage.removeItem(`${STORAGE_PREFIX}${flowId}`);
+  } catch (e) {
+    // Nothing stored
+  }
+};
+
+/**
+ * Buffers flow steps locally and syncs a compact checkpoint to the backend
+ * (PUT /api/flow-checkpoints/<token>) every few seconds, so a session can be
+ * resumed after a crash or on another kiosk with the same token.
+ *
+ * Each visitor gets a new token. A checkpoint is only loaded for a token passed
+ * in explicitly or after a reload within RESUME_WINDOW_MS of the last step.
+ * Call clear() when the visitor is done: it stops syncing and deletes the
+ * checkpoint so the next visitor cannot resume it.
+ *
+ * The path is sent as indexes into the flow's node list
+ * (GET /api/flows/<id>/index). Sync stops if the backend's flow version
+ * differs from the one loaded here, or if another kiosk has taken over the
+ * session (409).
+ */
+export const useFlowCheckpoint = (flow, { token: providedToken, enabled = true, intervalMs = SYNC_INTERVAL_MS } = {}) => {
+  const flowId = flow?.id;
+  const active = Boolean(enabled && flowId);
+  const [session] = useState(() => {
+    if (providedToken) return { token: providedToken, resume: true };
+    const recent = active ? recentToken(flowId) : null;
+    return recent ? { token: recent, resume: true } : { token: active ? newToken() : null, resume: false };
+  });
+  const { token } = session;
+  const [restored, setRestored] = useState(null);
+
+  const indexRef = useRef(null);
+  const versionRef = useRef(0);
+  const pendingRef = useRef(null);
+  const stoppedRef = useRef(false);
+  const clearedRef = useRef(false);
+  const inFlightRef = useRef(false);
+
+  const deleteCheckpoint = useCallback(() => {
+    fetch(buildApiUrl(`/api/flow-checkpoints/${token}`), {
+      method: 'DELETE',
+      headers: getApiHeaders(),
+      keepalive: true
+    }).catch(() => {
+      // Offline: the checkpoint expires on its own, and nothing here knows the token any more
+    });
+  }, [token]);
+
+  useEffect(() => {
+    if (!active || !token) return undefined;
+    let cancelled = false;
+
+    const load = async () => {
+      try {
+        const indexResponse = await fetch(buildApiUrl(`/api/flows/${encodeURIComponent(flowId)}/index`));
+        if (!indexResponse.ok) {
+          stoppedRef.current = true;
+          return;
+        }
+        const index = await indexResponse.json();
+        if (index.version !== flow.version) {
+          stoppedRef.current = true;
+          return;
+        }
+        indexRef.current = new Map(index.node_ids.map((nodeId, i) => [nodeId, i]));
+        if (!session.resume) return;
+
+        const response = await fetch(buildApiUrl(`/api/flow-checkpoints/${token}`), { headers: getApiHeaders() });
+        if (response.ok) {
+          const checkpoint = await response.json();
+          if (cancelled) return;
+          versionRef.current = checkpoint.version;
+          if (!checkpoint.flow_changed && checkpoint.node_ids.length) {
+            setRestored({ history: checkpoint.node_ids, answers: checkpoint.answers || {} });
+          }
+        }
+      } catch (error) {
+        if (process.env.NODE_ENV === 'development') {
+          console.warn('Flow checkpoint unavailable:', error.message);
+        }
+      }
+    };
+    load();
+    return () => {
+      cancelled = true;
+    };
+  }, [active, flowId, flow?.version, token, session.resume]);
+
+  const flush = useCallback(async (keepalive = false) => {
+    const pending = pendingRef.current;
+    const index = indexRef.current;
+    if (!pending || !index || stoppedRef.current || inFlightRef.current) return;
+
+    const path = pending.history.map(nodeId => index.get(nodeId));
+    if (path.some(i => i === undefined)) return;
+
+    pendingRef.current = null;
+    inFlightRef.current = true;
+    try {
+      const response = await fetch(buildApiUrl(`/api/flow-checkpoints/${token}`), {
+        method: 'PUT',
+        headers: getApiHeaders(),
+        keepalive,
+        body: JSON.stringify({ flow_id: flowId, path, answers: pending.answers, version: versionRef.current })
+      });
+      if (response.ok) {
+        versionRef.current = (await response.json()).version;
+        if (clearedRef.current) {
+          // Finished while this sync was in flight: delete what it just wrote
+          deleteCheckpoint();
+        }
+      } else if (response.status === 409) {
+        stoppedRef.current = true;
+      } else {
+        pendingRef.current = pendingRef.current || pending;
+      }
+    } catch (error) {
+      // Offline: keep the latest state buffered for the next tick
+      pendingRef.current = pendingRef.current || pending;
+    } finally {
+      inFlightRef.current = false;
+    }
+  }, [flowId, token, deleteCheckpoint]);
+
+  useEffect(() => {
+    if (!active) return undefined;
+    const timer = setInterval(() => flush(), intervalMs);
+    const onPageHide = () => flush(true);
+    window.addEventListener('pagehide', onPageHide);
+    return () => {
+      clearInterval(timer);
+      window.removeEventListener('pagehide', onPageHide);
+    };
+  }, [active, flush, intervalMs]);
+
+  const record = useCallback((history, answers = {}) => {
+    if (active && !clearedRef.current) {
+      pendingRef.current = { history, answers };
+      storeToken(flowId, token);
+    }
+  }, [active, flowId, token]);
+
+  const clear = useCallback(() => {
+    if (!active || clearedRef.current) return;
+    clearedRef.current = true;
+    stoppedRef.current = true;
+    pendingRef.current = null;
+    forgetToken(flowId);
+    deleteCheckpoint();
+  }, [active, flowId, deleteCheckpoint]);
+
+  return { token, restored, record, clear };
+};
+
+export default useFlowCheckpoint;
@@ -51,11 +51,13 @@ export const API_CONFIG = {
   RETRY_DELAY: 1000, // 1 second
 };
 
-// Shared secret for kiosk-facing write/LLM endpoints (must match backend KIOSK_API_KEY)
+// Shared secret for kiosk-facing write/LLM endpoints (must match backend KIOSK_API_KEY or one of KIOSK_API_KEYS)
 export const getKioskApiKey = () => process.env.REACT_APP_KIOSK_API_KEY || '';
+// Identifies this kiosk when kiosks share one key, so each gets its own rate-limit budget
+export const getKioskId = () => process.env.REACT_APP_KIOSK_ID || '';
 
 /**
- * Default headers for API calls. Includes X-Kiosk-Key when configured.
+ * Default headers for API calls. Includes X-Kiosk-Key (and X-Kiosk-Id) when configured.
  * Pass additional headers via `extra`; Authorization should be supplied by callers when needed.
  */
 export const getApiHeaders = (extra = {}) => {
@@ -66,6 +68,10 @@ export const getApiHeaders = (extra = {}) => {
   const kioskKey = getKioskApiKey();
   if (kioskKey) {
     headers['X-Kiosk-Key'] = kioskKey;
+    const kioskId = getKioskId();
+    if (kioskId) {
+      headers['X-Kiosk-Id'] = kioskId;
+    }
   }
   return headers;
 };